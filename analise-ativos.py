@@ -2,13 +2,25 @@
 # Projeto DIO - Análise de Ativos Financeiros Brasileiros
 # Vinícius Tavares Rocha
 # ==============================
+#
+# Sem argumentos: modo interativo (pede as datas, mostra os gráficos e o
+# simulador de CDB).
+#
+# Com argumentos: modo em lote, sem input() nem janelas — para o cron.
+#   python analise-ativos.py --arquivo lista_b3.txt --janela 30d --janela 1a \
+#       --janela 01012025:30062025 --saida ranking/ --formatos csv,json
+# Cada janela gera ranking_<inicio>_<fim>.csv/.json e, sem --sem-graficos,
+# precos_/base100_<inicio>_<fim>.png. Os fechamentos são baixados uma vez
+# (união das janelas) e as janelas rodam em paralelo num pool de processos.
+# ==============================
+
+import json
+import os
+import re
+import sys
+from datetime import datetime, timedelta
 
-import yfinance as yf
 import pandas as pd
-import numpy as np
-from datetime import datetime
-import matplotlib.pyplot as plt
-from matplotlib.ticker import FuncFormatter
 
 # ------------------------------
 # Função para ler e validar data
@@ -54,21 +66,6 @@ ativos = [
     "MGLU3.SA"
 ]
 
-# ------------------------------
-# Entrada de datas
-# ------------------------------
-start = ler_data("Digite a data de início (DDMMAAAA): ")
-end = ler_data("Digite a data de término (DDMMAAAA): ")
-
-# ------------------------------
-# Download dos dados históricos
-# ------------------------------
-dados = yf.download(ativos, start=start, end=end)
-
-if dados.empty:
-    print("⚠ Nenhum dado retornado.")
-    exit()
-
 # ------------------------------
 # Paleta de cores vibrantes e distintas
 # ------------------------------
@@ -86,17 +83,71 @@ cores = [
     "#F50057"   # pink forte
 ]
 
+COLUNAS_RANKING = ["Ativo", "Preço Médio", "Retorno %", "Volatilidade %", "Máximo", "Mínimo"]
+
 # ------------------------------
-# Visualização gráfica dos ativos (TEMA ESCURO PRO)
+# Download dos dados históricos
 # ------------------------------
-plt.style.use("dark_background")
+def baixar_fechamentos(tickers, start, end):
+    """yf.download dos tickers → DataFrame datas × tickers só com os fechamentos."""
+    import yfinance as yf
+
+    dados = yf.download(tickers, start=start, end=end, progress=False)
+    if dados.empty:
+        return pd.DataFrame()
+    close = dados["Close"]
+    if isinstance(close, pd.Series):   # um ticker só → Series
+        close = close.to_frame(name=tickers[0])
+    # na ordem pedida (o yfinance devolve em ordem alfabética) — as cores seguem a lista
+    return close[[t for t in tickers if t in close.columns and close[t].notna().any()]]
 
-fig, ax = plt.subplots(figsize=(10, 5))
+# ------------------------------
+# Tabela comparativa (vetorizada sobre o frame inteiro)
+# ------------------------------
+def tabela_ranking(close):
+    """
+    Preço médio, retorno, volatilidade, máximo e mínimo de todas as colunas
+    de uma vez. Cada ativo usa só os próprios pregões válidos — o mesmo que
+    fechamento.dropna() por ativo, sem loop em Python.
+    """
+    close   = close.dropna(axis=1, how="all")
+    inicial = close.bfill().iloc[0]
+    final   = close.ffill().iloc[-1]
+    # variação sobre o último fechamento válido anterior (pula buracos como o dropna)
+    variacao = (close / close.ffill().shift(1) - 1).where(close.notna())
+
+    tabela = pd.DataFrame({
+        "Ativo":          [t.replace(".SA", "") for t in close.columns],
+        "Preço Médio":    close.mean().values,
+        "Retorno %":      ((final - inicial) / inicial * 100).values,
+        "Volatilidade %": (variacao.std() * 100).values,
+        "Máximo":         close.max().values,
+        "Mínimo":         close.min().values,
+    }, columns=COLUNAS_RANKING)
+
+    tabela = tabela.sort_values(by="Retorno %", ascending=False)
+    return tabela.round({c: 2 for c in COLUNAS_RANKING[1:]})
 
-for i, ativo in enumerate(ativos):
-    try:
-        serie = dados["Close"][ativo].dropna()
+# ------------------------------
+# Gráficos (mesmo desenho no modo interativo e no lote)
+# ------------------------------
+def _estilizar(ax, titulo, ylabel):
+    ax.set_title(titulo, fontsize=15, fontweight="bold", pad=12)
+    ax.set_xlabel("Data")
+    ax.set_ylabel(ylabel)
+
+    ax.grid(True, linestyle="--", alpha=0.2)
+    ax.legend(frameon=False, ncol=2, fontsize=9)
 
+    ax.spines["top"].set_visible(False)
+    ax.spines["right"].set_visible(False)
+
+def desenhar_precos(ax, close):
+    """Evolução do preço de fechamento."""
+    from matplotlib.ticker import FuncFormatter
+
+    for i, ativo in enumerate(close.columns):
+        serie = close[ativo].dropna()
         ax.plot(
             serie.index,
             serie.values,
@@ -106,38 +157,16 @@ for i, ativo in enumerate(ativos):
             label=ativo.replace(".SA", "")
         )
 
-    except:
-        print(f"⚠ Não foi possível plotar {ativo}")
-
-ax.set_title("Evolução do preço de fechamento", fontsize=15, fontweight="bold", pad=12)
-ax.set_xlabel("Data")
-ax.set_ylabel("Preço (R$)")
-
-ax.yaxis.set_major_formatter(
-    FuncFormatter(lambda x, _: f"R$ {x:,.0f}")
-)
-
-ax.grid(True, linestyle="--", alpha=0.2)
-ax.legend(frameon=False, ncol=2, fontsize=9)
-
-ax.spines["top"].set_visible(False)
-ax.spines["right"].set_visible(False)
-
-plt.tight_layout()
-plt.show()
-
-# ------------------------------
-# Gráfico comparativo normalizado
-# ------------------------------
-print("\n📊 Gerando gráfico comparativo de desempenho...")
-
-fig, ax = plt.subplots(figsize=(10, 5))
+    ax.yaxis.set_major_formatter(
+        FuncFormatter(lambda x, _: f"R$ {x:,.0f}")
+    )
+    _estilizar(ax, "Evolução do preço de fechamento", "Preço (R$)")
 
-for i, ativo in enumerate(ativos):
-    try:
-        serie = dados["Close"][ativo].dropna()
+def desenhar_base100(ax, close):
+    """Comparação de crescimento dos ativos (Base 100)."""
+    for i, ativo in enumerate(close.columns):
+        serie = close[ativo].dropna()
         normalizado = (serie / serie.iloc[0]) * 100
-
         ax.plot(
             normalizado.index,
             normalizado.values,
@@ -146,90 +175,255 @@ for i, ativo in enumerate(ativos):
             alpha=0.95,
             label=ativo.replace(".SA", "")
         )
-    except:
-        pass
 
-ax.set_title("Comparação de crescimento dos ativos (Base 100)", fontsize=15, fontweight="bold", pad=12)
-ax.set_xlabel("Data")
-ax.set_ylabel("Base 100")
+    _estilizar(ax, "Comparação de crescimento dos ativos (Base 100)", "Base 100")
 
-ax.grid(True, linestyle="--", alpha=0.2)
-ax.legend(frameon=False, ncol=2, fontsize=9)
+def _salvar_grafico(desenhar, close, caminho):
+    """Desenha numa Figure avulsa (sem pyplot/backend de janela) e grava o PNG."""
+    from matplotlib import style
+    from matplotlib.figure import Figure
 
-ax.spines["top"].set_visible(False)
-ax.spines["right"].set_visible(False)
+    with style.context("dark_background"):
+        fig = Figure(figsize=(10, 5))
+        desenhar(fig.add_subplot(), close)
+        fig.tight_layout()
+        fig.savefig(caminho, format="png", dpi=110)
 
-plt.tight_layout()
-plt.show()
-
-# ------------------------------
-# Função de análise por ativo
-# ------------------------------
-def analisar_ativo(df, ticker):
-    fechamento = df["Close"][ticker].dropna()
-
-    preco_medio = fechamento.mean()
-    preco_inicial = fechamento.iloc[0]
-    preco_final = fechamento.iloc[-1]
-    retorno = ((preco_final - preco_inicial) / preco_inicial) * 100
-    volatilidade = fechamento.pct_change().std() * 100
-    maximo = fechamento.max()
-    minimo = fechamento.min()
-
-    return {
-        "Ativo": ticker.replace(".SA", ""),
-        "Preço Médio": preco_medio,
-        "Retorno %": retorno,
-        "Volatilidade %": volatilidade,
-        "Máximo": maximo,
-        "Mínimo": minimo
-    }
+# ==============================
+# MODO EM LOTE
+# ==============================
+def _data_iso(texto):
+    """Aceita DDMMAAAA, DD/MM/AAAA ou AAAA-MM-DD e devolve AAAA-MM-DD."""
+    for fmt in ("%d%m%Y", "%d/%m/%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(texto.strip(), fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            pass
+    raise ValueError(f"Data inválida: {texto!r}. Use DDMMAAAA.")
+
+def _janela(texto, hoje=None):
+    """
+    "INICIO:FIM" (FIM vazio = hoje) ou relativa a hoje: 30d, 6m, 1a.
+    As relativas servem para o cron — a janela anda junto com a data.
+    """
+    hoje = hoje or datetime.now()
+    m = re.fullmatch(r"(\d+)([dma])", texto.strip().lower())
+    if m:
+        n, unidade = int(m.group(1)), m.group(2)
+        dias = n * {"d": 1, "m": 30, "a": 365}[unidade]
+        return (hoje - timedelta(days=dias)).strftime("%Y-%m-%d"), hoje.strftime("%Y-%m-%d")
+    inicio, sep, fim = texto.partition(":")
+    if not sep:
+        raise ValueError(f"Janela inválida: {texto!r}. Use INICIO:FIM ou 30d/6m/1a.")
+    inicio = _data_iso(inicio)
+    fim    = _data_iso(fim) if fim.strip() else hoje.strftime("%Y-%m-%d")
+    if inicio >= fim:
+        raise ValueError(f"Janela {texto!r}: início precisa ser antes do fim.")
+    return inicio, fim
+
+def _ler_tickers(brutos, arquivo=None):
+    """Tickers da linha de comando + arquivo (um por linha ou separados por vírgula, # comenta)."""
+    if arquivo:
+        with open(arquivo, encoding="utf-8") as f:
+            for linha in f:
+                brutos += linha.split("#", 1)[0].replace(",", " ").split()
+    tickers = []
+    for raw in brutos:
+        raw = raw.strip().upper()
+        t   = raw if raw.endswith(".SA") else raw + ".SA"
+        if raw and t not in tickers:
+            tickers.append(t)
+    return tickers
+
+def processar_janela(close, inicio, fim, pasta, formatos, max_graficos):
+    """
+    Roda num processo do pool: ranking da janela + arquivos.
+    O gráfico leva só os max_graficos melhores do ranking — centenas de
+    linhas numa figura não se leem (e custam a maior parte do tempo).
+    """
+    close = close.loc[inicio:fim].dropna(axis=1, how="all")
+    base  = f"{inicio}_{fim}"
+    if close.empty:
+        return {"janela": base, "arquivos": [], "erro": "Nenhum dado no período."}
+
+    tabela   = tabela_ranking(close)
+    arquivos = []
+    if "csv" in formatos:
+        caminho = os.path.join(pasta, f"ranking_{base}.csv")
+        tabela.to_csv(caminho, index=False, encoding="utf-8")
+        arquivos.append(caminho)
+    if "json" in formatos:
+        caminho = os.path.join(pasta, f"ranking_{base}.json")
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump({"inicio": inicio, "fim": fim,
+                       "ativos": tabela.to_dict(orient="records")},
+                      f, ensure_ascii=False, indent=2)
+        arquivos.append(caminho)
+
+    if max_graficos > 0:
+        recorte = close[close.columns[tabela.index[:max_graficos]]]
+        for nome, desenhar in (("precos", desenhar_precos), ("base100", desenhar_base100)):
+            caminho = os.path.join(pasta, f"{nome}_{base}.png")
+            _salvar_grafico(desenhar, recorte, caminho)
+            arquivos.append(caminho)
+
+    return {"janela": base, "arquivos": arquivos, "ativos": len(tabela)}
+
+def rodar_lote(tickers, janelas, pasta, formatos=("csv", "json"),
+               max_graficos=len(cores), processos=None):
+    """
+    1) um download com a união das janelas;
+    2) cada janela (ranking + CSV/JSON + PNGs) num processo do pool.
+    Retorna uma lista de dicts {"janela", "arquivos", "erro"?}.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    os.makedirs(pasta, exist_ok=True)
+    close = baixar_fechamentos(tickers,
+                               min(i for i, _ in janelas),
+                               max(f for _, f in janelas))
+    if close.empty:
+        return [{"janela": f"{i}_{f}", "arquivos": [], "erro": "Nenhum dado retornado."}
+                for i, f in janelas]
+    faltando = [t for t in tickers if t not in close.columns]
+    if faltando:
+        print(f"⚠ Sem dados: {', '.join(t.replace('.SA', '') for t in faltando)}")
+
+    tarefas = [(close, i, f, pasta, formatos, max_graficos) for i, f in janelas]
+    if len(tarefas) == 1 or processos == 1:
+        return [processar_janela(*t) for t in tarefas]
+
+    resultados = []
+    # spawn: mesmo comportamento no Windows e no Linux (sem herdar estado do pai)
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=processos, mp_context=ctx) as pool:
+        futuros = {pool.submit(processar_janela, *t): f"{t[1]}_{t[2]}" for t in tarefas}
+        for futuro in as_completed(futuros):
+            try:
+                resultados.append(futuro.result())
+            except Exception as e:
+                resultados.append({"janela": futuros[futuro], "arquivos": [], "erro": str(e)})
+    return sorted(resultados, key=lambda r: r["janela"])
 
-# ------------------------------
-# Construção da tabela comparativa
-# ------------------------------
-analises = []
+# ==============================
+# MODO INTERATIVO
+# ==============================
+def modo_interativo():
+    import matplotlib.pyplot as plt
+
+    # ------------------------------
+    # Entrada de datas
+    # ------------------------------
+    start = ler_data("Digite a data de início (DDMMAAAA): ")
+    end = ler_data("Digite a data de término (DDMMAAAA): ")
+
+    close = baixar_fechamentos(ativos, start, end)
+
+    if close.empty:
+        print("⚠ Nenhum dado retornado.")
+        return
+
+    for ativo in ativos:
+        if ativo not in close.columns:
+            print(f"⚠ Não foi possível plotar {ativo}")
+
+    # ------------------------------
+    # Visualização gráfica dos ativos (TEMA ESCURO PRO)
+    # ------------------------------
+    plt.style.use("dark_background")
+
+    fig, ax = plt.subplots(figsize=(10, 5))
+    desenhar_precos(ax, close)
+    plt.tight_layout()
+    plt.show()
+
+    # ------------------------------
+    # Gráfico comparativo normalizado
+    # ------------------------------
+    print("\n📊 Gerando gráfico comparativo de desempenho...")
+
+    fig, ax = plt.subplots(figsize=(10, 5))
+    desenhar_base100(ax, close)
+    plt.tight_layout()
+    plt.show()
+
+    # ------------------------------
+    # Construção da tabela comparativa
+    # ------------------------------
+    tabela = tabela_ranking(close)
+
+    print("\n📊 Ranking de desempenho no período:\n")
+    print(tabela.to_string(index=False))
+
+    # ------------------------------
+    # Simulação de investimento em CDB
+    # ------------------------------
+    print("\n💰 Simulador de CDB")
 
-for ativo in ativos:
     try:
-        resultado = analisar_ativo(dados, ativo)
-        analises.append(resultado)
-    except:
-        print(f"⚠ Falha ao analisar {ativo}")
-
-tabela = pd.DataFrame(analises)
-
-tabela = tabela.sort_values(by="Retorno %", ascending=False)
-
-tabela["Preço Médio"] = tabela["Preço Médio"].round(2)
-tabela["Retorno %"] = tabela["Retorno %"].round(2)
-tabela["Volatilidade %"] = tabela["Volatilidade %"].round(2)
-tabela["Máximo"] = tabela["Máximo"].round(2)
-tabela["Mínimo"] = tabela["Mínimo"].round(2)
+        valor_cdb = float(input("Digite o valor investido (R$): "))
+        percentual_cdi = float(input("Percentual do CDI (ex: 110 para 110%): "))
+        dias = int(input("Período do investimento em dias: "))
+
+        taxa_cdi_anual = 0.105
+        taxa_anual_cdb = taxa_cdi_anual * (percentual_cdi / 100)
+
+        valor_final = valor_cdb * (1 + taxa_anual_cdb) ** (dias / 365)
+        rendimento = valor_final - valor_cdb
+
+        print("\n📈 Resultado da simulação:")
+        print(f"Valor inicial: R$ {valor_cdb:.2f}")
+        print(f"Valor final estimado: R$ {valor_final:.2f}")
+        print(f"Rendimento bruto: R$ {rendimento:.2f}")
+
+    except ValueError:
+        print("⚠ Entrada inválida na simulação do CDB.")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        modo_interativo()
+        return
+
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Ranking de ativos em lote, sem input() nem janelas (para agendar).")
+    parser.add_argument("tickers", nargs="*", help="tickers (PETR4 ou PETR4.SA)")
+    parser.add_argument("--arquivo", help="arquivo com tickers (um por linha, # comenta)")
+    parser.add_argument("--janela", action="append", required=True,
+                        help="INICIO:FIM (DDMMAAAA, FIM vazio = hoje) ou 30d/6m/1a; repetível")
+    parser.add_argument("--saida", default="ranking", help="pasta de saída")
+    parser.add_argument("--formatos", default="csv,json", help="csv,json")
+    parser.add_argument("--max-graficos", type=int, default=len(cores),
+                        help="ativos nos PNGs (melhores do ranking)")
+    parser.add_argument("--sem-graficos", action="store_true", help="não gera PNGs")
+    parser.add_argument("--processos", type=int, default=None,
+                        help="workers do pool (padrão: nº de CPUs)")
+    args = parser.parse_args(argv)
 
-print("\n📊 Ranking de desempenho no período:\n")
-print(tabela.to_string(index=False))
-
-# ------------------------------
-# Simulação de investimento em CDB
-# ------------------------------
-print("\n💰 Simulador de CDB")
-
-try:
-    valor_cdb = float(input("Digite o valor investido (R$): "))
-    percentual_cdi = float(input("Percentual do CDI (ex: 110 para 110%): "))
-    dias = int(input("Período do investimento em dias: "))
-
-    taxa_cdi_anual = 0.105
-    taxa_anual_cdb = taxa_cdi_anual * (percentual_cdi / 100)
-
-    valor_final = valor_cdb * (1 + taxa_anual_cdb) ** (dias / 365)
-    rendimento = valor_final - valor_cdb
-
-    print("\n📈 Resultado da simulação:")
-    print(f"Valor inicial: R$ {valor_cdb:.2f}")
-    print(f"Valor final estimado: R$ {valor_final:.2f}")
-    print(f"Rendimento bruto: R$ {rendimento:.2f}")
-
-except:
-    print("⚠ Entrada inválida na simulação do CDB.")
\ No newline at end of file
+    try:
+        janelas = list(dict.fromkeys(_janela(j) for j in args.janela))
+        tickers = _ler_tickers(list(args.tickers), args.arquivo) or list(ativos)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    formatos = {f.strip().lower() for f in args.formatos.split(",") if f.strip()}
+
+    inicio = datetime.now()
+    resultados = rodar_lote(tickers, janelas, args.saida, formatos,
+                            0 if args.sem_graficos else args.max_graficos,
+                            args.processos)
+    falhas = 0
+    for r in resultados:
+        if r.get("erro"):
+            falhas += 1
+            print(f"⚠ {r['janela']}: {r['erro']}")
+        else:
+            print(f"✔ {r['janela']} ({r['ativos']} ativos): {', '.join(r['arquivos'])}")
+    print(f"Concluído em {(datetime.now() - inicio).total_seconds():.1f}s")
+    sys.exit(1 if falhas else 0)   # o cron só avisa quando algo deu errado
+
+
+if __name__ == "__main__":
+    main()
@@ -8,17 +8,31 @@
 # GitHub: github.com/seuusuario/dashboard-investimentos
 # =============================================================================
 
+import time
+_T0 = time.perf_counter()   # zero da linha do tempo da inicialização
+
 import tkinter as tk
 from tkinter import ttk
-import yfinance as yf
-from datetime import datetime
-import threading
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.ticker import FuncFormatter
+from datetime import datetime, timedelta
+import atexit
 import os
-import json as _json_mod
-import sqlite3
+import sys
+
+from investimentos.analise import (
+    CORES_ATIVOS, CDI_ANUAL, nome_exibicao,
+    _calcular_analise, _classificar_risco,
+    _calcular_score, _gerar_insights_completo,
+)
+from investimentos.graficos import BG, TXT, ACCENT
+from investimentos.carteira import (
+    _calcular_pl, _cdi_desde_compra, _calcular_rendimento_cdb, _periodo_carteira,
+    _gerar_alertas_carteira, _calcular_score_diversificacao, _gerar_resumo_executivo,
+)
+from investimentos.servico import ServicoInvestimentos
+from investimentos.despacho import DespachoUI
+from investimentos.tarefas import Executor, PRIORIDADE_ALTA, PRIORIDADE_BAIXA
+from investimentos.importador import importar_extratos, validar_no_yahoo
+from investimentos.inicio import LinhaDoTempo, META_INICIO_MS
 
 # ── Etapa 6: carrega .env e APIs ──
 try:
@@ -31,23 +45,28 @@ ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY", "")
 OPENAI_API_KEY    = os.getenv("OPENAI_API_KEY", "")
 GOOGLE_API_KEY    = os.getenv("GOOGLE_API_KEY", "")
 
+# ── Linha do tempo da abertura (META_INICIO_MS no .env ajusta a meta) ──
+# python app_investimentos.py --medir-inicio  abre, mede, fecha e sai com 1 se passou da meta
+MEDIR_INICIO = "--medir-inicio" in sys.argv
+_inicio      = LinhaDoTempo(_T0, float(os.getenv("META_INICIO_MS", META_INICIO_MS)))
+_inicio.marcar("imports")
+CHAVES_IA = {"openai": OPENAI_API_KEY, "anthropic": ANTHROPIC_API_KEY, "google": GOOGLE_API_KEY}
+
+# ── Núcleo headless: preços, banco, carteira e análises (investimentos.servico) ──
+# A UI só monta telas e chama o serviço — o mesmo serviço roda sem Tk.
+BASE_DIR         = os.path.dirname(os.path.abspath(__file__))
+CACHE_MEMORIA_MB = float(os.getenv("CACHE_MEMORIA_MB", "256"))   # DataFrames montados
+_servico         = ServicoInvestimentos(BASE_DIR, cache_memoria_mb=CACHE_MEMORIA_MB)
+_inicio.marcar("serviço")
+
 # ==============================
 # CONFIGURAÇÃO DE CORES
 # ==============================
-BG      = "#111111"
+# BG, TXT e ACCENT vêm de investimentos.graficos (compartilhados com as figuras)
 CARD    = "#1c1c1c"
-TXT     = "#e0e0e0"
 BTN     = "#2e2e2e"
-ACCENT  = "#cc0000"
 CDB_BG  = "#1c1c1c"
 
-CORES_ATIVOS = [
-    "#00E5FF", "#FF9100", "#FF1744", "#76FF03", "#D500F9",
-    "#FFD600", "#00BFA5", "#FF6D00", "#64DD17", "#2979FF",
-    "#FF4081", "#F50057", "#69F0AE", "#EEFF41", "#FF6E40",
-    "#40C4FF", "#B2FF59", "#EA80FC", "#FF80AB", "#CCFF90",
-]
-
 ATIVOS_PADRAO = [
     "PETR4.SA", "VALE3.SA", "ITUB4.SA", "BBDC4.SA",
     "BBAS3.SA", "WEGE3.SA", "SUZB3.SA", "CPFE3.SA",
@@ -116,11 +135,250 @@ class MascaraData:
             return None
 
 
+# ==============================
+# TABELA VIRTUAL — pool de linhas reaproveitado
+# ==============================
+class TabelaVirtual:
+    """
+    Tabela em grid que só cria widgets para as linhas visíveis.
+    O pool de linhas fica vivo entre atualizações: cada refresh compara
+    (texto, cor, fundo) de cada célula com o último estado aplicado e só
+    chama config() onde algo mudou. Ordenação (clique no cabeçalho),
+    filtro e rolagem apenas deslocam a janela de dados sobre o mesmo pool.
+
+    Cada linha é um dict:
+        {"chave": ..., "celulas": [(texto, cor), ...], "valores": [...]}
+    "valores" é opcional e traz as chaves de ordenação de cada coluna;
+    sem ele a ordenação usa o texto da célula.
+    """
+    BG_PAR   = "#161616"
+    BG_IMPAR = "#202020"
+    BG_CAB   = "#1c1c1c"
+
+    def __init__(self, pai, colunas, larguras, cor_cab=ACCENT, acao=None,
+                 linhas_visiveis=15, nota=None, padx=6):
+        self.colunas  = colunas
+        self.larguras = larguras
+        self.visiveis = linhas_visiveis
+        self.acao     = acao   # callback(chave) do botão ✕ na última coluna
+        self._n_dados = len(colunas) - (1 if acao else 0)
+
+        self._linhas  = []     # tudo o que foi recebido em atualizar()
+        self._vista   = []     # linhas após filtro + ordenação
+        self._offset  = 0
+        self._ordem   = None   # (coluna, reverso)
+        self._filtro  = None
+        self._pool    = []     # [(labels, botao)] — uma entrada por linha visível
+        self._ocultas = set()  # índices do pool sem dado no momento
+        self._estado  = {}     # widget -> (texto, cor, fundo) aplicado
+        self._rodape  = None
+        self._grade_visivel = False
+
+        self.frame = tk.Frame(pai, bg=self.BG_CAB)
+        self.frame.pack(fill="x", padx=padx)
+
+        self.lbl_msg = tk.Label(self.frame, text="", bg="#161616", fg="#cc0000",
+                                font=("Arial", 9, "italic"), pady=12)
+        self.grade  = tk.Frame(self.frame, bg=self.BG_CAB)
+        self.scroll = tk.Scrollbar(self.frame, orient="vertical", command=self._rolar)
+
+        self._cab = []
+        for c, (col, w) in enumerate(zip(colunas, larguras)):
+            lbl = tk.Label(self.grade, text=col, bg=self.BG_CAB, fg=cor_cab,
+                           font=("Arial", 8, "bold"), width=w, anchor="center")
+            lbl.grid(row=0, column=c, padx=1, pady=3, sticky="ew")
+            if c < self._n_dados:
+                lbl.config(cursor="hand2")
+                lbl.bind("<Button-1>", lambda e, c=c: self.ordenar(c))
+            self._cab.append(lbl)
+        tk.Frame(self.grade, bg="#2e2e2e", height=1).grid(
+            row=1, column=0, columnspan=len(colunas), sticky="ew")
+
+        self.lbl_nota = None
+        if nota:
+            self.lbl_nota = tk.Label(self.frame, text=nota, bg="#161616", fg="#cc0000",
+                                     font=("Arial", 7), anchor="w")
+
+    # ── dados ──
+    def atualizar(self, linhas, rodape=None):
+        """Substitui os dados da tabela; reaplica filtro/ordem e só toca células alteradas."""
+        self._linhas = list(linhas)
+        self._aplicar_vista()
+        self._mostrar_grade()
+        self._desenhar()
+        if rodape is not None:
+            self._desenhar_rodape(rodape)
+
+    def atualizar_linhas(self, linhas):
+        """Troca só as linhas cujas chaves vieram em linhas (novas chaves entram no fim)."""
+        novas = {l["chave"]: l for l in linhas}
+        self._linhas = [novas.pop(l["chave"], l) for l in self._linhas] + list(novas.values())
+        self._aplicar_vista()
+        if self._grade_visivel:
+            self._desenhar()
+
+    def mensagem(self, texto="", cor="#cc0000"):
+        """Esconde a grade (sem destruí-la) e mostra um aviso no lugar."""
+        if self._grade_visivel:
+            self.grade.pack_forget()
+            self.scroll.pack_forget()
+            if self.lbl_nota: self.lbl_nota.pack_forget()
+            self._grade_visivel = False
+        if texto:
+            self.lbl_msg.config(text=texto, fg=cor)
+            self.lbl_msg.pack()
+        else:
+            self.lbl_msg.pack_forget()
+
+    def ordenar(self, coluna, reverso=None):
+        if reverso is None:
+            reverso = bool(self._ordem and self._ordem[0] == coluna and not self._ordem[1])
+        self._ordem = (coluna, reverso)
+        for c, lbl in enumerate(self._cab):
+            seta = (" ▼" if reverso else " ▲") if c == coluna else ""
+            lbl.config(text=self.colunas[c] + seta)
+        self._aplicar_vista()
+        self._offset = 0
+        self._desenhar()
+
+    def filtrar(self, predicado=None):
+        """predicado(linha) -> bool; None remove o filtro."""
+        self._filtro = predicado
+        self._aplicar_vista()
+        self._offset = 0
+        self._desenhar()
+
+    def _aplicar_vista(self):
+        vista = [l for l in self._linhas if self._filtro is None or self._filtro(l)]
+        if self._ordem:
+            c, reverso = self._ordem
+            def chave(l):
+                return l["valores"][c] if "valores" in l else l["celulas"][c][0]
+            com_valor = [l for l in vista if chave(l) is not None]
+            sem_valor = [l for l in vista if chave(l) is None]
+            com_valor.sort(key=chave, reverse=reverso)
+            vista = com_valor + sem_valor
+        self._vista  = vista
+        self._offset = max(0, min(self._offset, len(vista) - self.visiveis))
+
+    # ── widgets ──
+    def _mostrar_grade(self):
+        self.lbl_msg.pack_forget()
+        if not self._grade_visivel:
+            if self.lbl_nota: self.lbl_nota.pack(side="bottom", fill="x", padx=2, pady=4)
+            self.grade.pack(side="left", fill="x", expand=True)
+            self._grade_visivel = True
+
+    def _criar_linha(self, r):
+        labels = []
+        for c in range(self._n_dados):
+            lbl = tk.Label(self.grade, text="", bg=self.BG_PAR, fg=TXT,
+                           font=("Arial", 8), width=self.larguras[c], anchor="center")
+            lbl.grid(row=r + 2, column=c, padx=1, pady=2, sticky="ew")
+            lbl.bind("<MouseWheel>", self._on_roda)
+            labels.append(lbl)
+        botao = None
+        if self.acao:
+            botao = tk.Button(self.grade, text="✕", bg="#2a0000", fg="#FF5252",
+                              font=("Arial", 8, "bold"), relief="flat", cursor="hand2",
+                              width=2, command=lambda r=r: self._acionar(r))
+            botao.grid(row=r + 2, column=self._n_dados, padx=1, pady=2)
+        return labels, botao
+
+    def _config(self, widget, texto, cor, fundo):
+        novo = (texto, cor, fundo)
+        if self._estado.get(widget) != novo:
+            widget.config(text=texto, fg=cor, bg=fundo)
+            self._estado[widget] = novo
+
+    def _desenhar(self):
+        n = len(self._vista)
+        while len(self._pool) < min(n, self.visiveis):
+            self._pool.append(self._criar_linha(len(self._pool)))
+
+        for r, (labels, botao) in enumerate(self._pool):
+            i = self._offset + r
+            if i >= n:
+                if r not in self._ocultas:
+                    for w in labels: w.grid_remove()
+                    if botao: botao.grid_remove()
+                    self._ocultas.add(r)
+                continue
+            if r in self._ocultas:
+                for w in labels: w.grid()
+                if botao: botao.grid()
+                self._ocultas.discard(r)
+            fundo = self.BG_PAR if i % 2 == 0 else self.BG_IMPAR
+            for lbl, (texto, cor) in zip(labels, self._vista[i]["celulas"]):
+                self._config(lbl, texto, cor, fundo)
+
+        if n > self.visiveis:
+            self.scroll.set(self._offset / n, (self._offset + self.visiveis) / n)
+            if self._grade_visivel and not self.scroll.winfo_manager():
+                self.scroll.pack(side="right", fill="y", before=self.grade)
+        else:
+            self.scroll.pack_forget()
+
+    def _desenhar_rodape(self, rodape):
+        if self._rodape is None:
+            base = self.visiveis + 2
+            tk.Frame(self.grade, bg="#2e2e2e", height=1).grid(
+                row=base, column=0, columnspan=len(self.colunas), sticky="ew", pady=2)
+            self._rodape = []
+            for c in range(len(self.colunas)):
+                lbl = tk.Label(self.grade, text="", bg=self.BG_CAB,
+                               font=("Arial", 8, "bold"), width=self.larguras[c],
+                               anchor="center")
+                lbl.grid(row=base + 1, column=c, padx=1, pady=3, sticky="ew")
+                self._rodape.append(lbl)
+        for lbl, (texto, cor) in zip(self._rodape, rodape):
+            self._config(lbl, texto, cor or self.BG_CAB, self.BG_CAB)
+
+    # ── eventos ──
+    def _rolar(self, *args):
+        n = len(self._vista)
+        if args[0] == "moveto":
+            novo = int(float(args[1]) * n)
+        else:
+            passo = self.visiveis if args[2] == "pages" else 1
+            novo  = self._offset + int(args[1]) * passo
+        novo = max(0, min(novo, n - self.visiveis))
+        if novo != self._offset:
+            self._offset = novo
+            self._desenhar()
+
+    def _on_roda(self, e):
+        if len(self._vista) <= self.visiveis:
+            return None   # deixa o scroll da página principal agir
+        self._rolar("scroll", int(-1*(e.delta/120)), "units")
+        return "break"
+
+    def _acionar(self, r):
+        i = self._offset + r
+        if self.acao and i < len(self._vista):
+            self.acao(self._vista[i]["chave"])
+
+
+_tabelas_virtuais = {}   # str(frame_pai) -> TabelaVirtual
+
+def _tabela_virtual(frame_pai, colunas, larguras, **kw):
+    """Devolve a TabelaVirtual de frame_pai, criando-a só na primeira vez."""
+    tabela = _tabelas_virtuais.get(str(frame_pai))
+    if tabela is None or not tabela.frame.winfo_exists():
+        tabela = TabelaVirtual(frame_pai, colunas, larguras, **kw)
+        _tabelas_virtuais[str(frame_pai)] = tabela
+    return tabela
+
+
 # ==============================
 # HELPERS
 # ==============================
-def nome_exibicao(ticker):
-    return ticker.replace(".SA", "").upper()
+def _data_ordenavel(data_str):
+    """'DD/MM/AAAA' -> 'AAAA-MM-DD' (ordena como texto); None se inválida."""
+    try:
+        return datetime.strptime(data_str, "%d/%m/%Y").strftime("%Y-%m-%d")
+    except Exception:
+        return None
 
 def limpar_entry_placeholder(entry, placeholder):
     if entry.get() == placeholder:
@@ -149,16 +407,12 @@ def adicionar_ativo():
     btn_add.config(state="disabled", text="...")
     label_status.config(text=f"Verificando {nome_exibicao(ticker)}...", fg="#aaaaaa")
 
-    def verificar():
-        valido = False
-        try:
-            hist = yf.download(ticker, period="5d", auto_adjust=True, progress=False)
-            valido = not hist.empty
-        except Exception:
-            valido = False
-        root.after(0, lambda: _pos_verificacao(ticker, valido))
+    async def verificar():
+        return ticker in await _servico.cotacoes_async([ticker])
 
-    threading.Thread(target=verificar, daemon=True).start()
+    _executor.submeter("ativo", verificar, nome=nome_exibicao(ticker), chave=ticker,
+                       substituir=False, prioridade=PRIORIDADE_ALTA,
+                       ao_concluir=lambda valido: _pos_verificacao(ticker, valido))
 
 def _pos_verificacao(ticker, valido):
     btn_add.config(state="normal", text="+")
@@ -201,88 +455,38 @@ def desmarcar_todos():
 # ==============================
 # GERAR GRÁFICO
 # ==============================
-import matplotlib.dates as mdates
-import numpy as np
+# matplotlib (backend TkAgg) e numpy custam mais que o resto da abertura
+# inteira — entram só quando o primeiro gráfico é desenhado.
+plt = mdates = np = FigureCanvasTkAgg = FuncFormatter = _montar_grafico = None
+
+def _carregar_graficos():
+    """Importa matplotlib/numpy na primeira figura (chamar antes de desenhar)."""
+    global plt, mdates, np, FigureCanvasTkAgg, FuncFormatter, _montar_grafico
+    if plt is not None:
+        return
+    t = time.perf_counter()
+    import numpy
+    import matplotlib.pyplot
+    import matplotlib.dates
+    import matplotlib.ticker
+    from matplotlib.backends import backend_tkagg
+    from investimentos import graficos
+    np, mdates, FuncFormatter = numpy, matplotlib.dates, matplotlib.ticker.FuncFormatter
+    FigureCanvasTkAgg = backend_tkagg.FigureCanvasTkAgg
+    _montar_grafico   = graficos._montar_grafico
+    plt = matplotlib.pyplot
+    print(f"[Início] matplotlib carregado no primeiro gráfico ({(time.perf_counter() - t) * 1000:.0f} ms)")
 
 # estado global do gráfico para tooltip
 _estado_grafico = {
     "ax": None, "canvas": None,
     "series": {},   # ticker -> (xs_num, ys, cor)
-    "modo": "preco" # "preco" ou "base100"
+    "modo": "preco", # "preco" ou "base100"
+    "zoom": None,   # estado do zoom/pan do gráfico atual
 }
 
-def _montar_grafico(dados, selecionados, modo):
-    """Monta a figura matplotlib e retorna (fig, series_dict)."""
-    fig = plt.figure(figsize=(11, 4.2))
-    fig.patch.set_facecolor(BG)
-
-    ax = fig.add_axes([0.07, 0.16, 0.68, 0.74])
-    ax.set_facecolor(BG)
-
-    ax_leg = fig.add_axes([0.77, 0.05, 0.22, 0.90])
-    ax_leg.set_facecolor("#1c1c1c")
-    ax_leg.set_xticks([]); ax_leg.set_yticks([])
-    for spine in ax_leg.spines.values():
-        spine.set_edgecolor(ACCENT); spine.set_linewidth(1.2)
-
-    linhas, nomes, series = [], [], {}
-
-    for ativo in selecionados:
-        cor = CORES_ATIVOS[ativos_ordem.index(ativo) % len(CORES_ATIVOS)]
-        try:
-            raw = (dados["Close"] if len(selecionados) == 1
-                   else dados["Close"][ativo]).dropna()
-
-            if modo == "base100":
-                serie = (raw / raw.iloc[0]) * 100
-            else:
-                serie = raw
-
-            xs_num = mdates.date2num(serie.index.to_pydatetime())
-            ys     = serie.values.astype(float)
-
-            linha, = ax.plot(serie.index, ys, linewidth=2.5,
-                             color=cor, label=nome_exibicao(ativo))
-            linhas.append(linha)
-            nomes.append(nome_exibicao(ativo))
-            series[ativo] = (xs_num, ys, cor)
-
-            # Média móvel (se ativada)
-            mm = _mm_estado.get("periodo", 0)
-            if mm > 0 and len(serie) >= mm:
-                mm_serie = serie.rolling(window=mm).mean().dropna()
-                ax.plot(mm_serie.index, mm_serie.values,
-                        linewidth=1.2, color=cor, linestyle="--", alpha=0.5)
-        except Exception:
-            pass
-
-    titulo = "Desempenho Relativo (Base 100)" if modo == "base100" else "Evolução dos Ativos"
-    ylabel = "Retorno (Base 100)" if modo == "base100" else "Preço (R$)"
-
-    ax.set_title(titulo, color=TXT, fontsize=13, fontweight="bold")
-    ax.set_ylabel(ylabel, color=TXT)
-
-    if modo == "preco":
-        ax.yaxis.set_major_formatter(FuncFormatter(lambda x, _: f"R$ {x:,.0f}"))
-    else:
-        ax.yaxis.set_major_formatter(FuncFormatter(lambda x, _: f"{x:.1f}"))
-        ax.axhline(100, color="#444", linewidth=0.8, linestyle="--")
-
-    ax.xaxis.set_major_locator(mdates.MonthLocator(interval=1))
-    ax.xaxis.set_major_formatter(mdates.DateFormatter("%b/%Y"))
-    ax.tick_params(axis="x", colors="#FFF", rotation=35, labelsize=8)
-    ax.tick_params(axis="y", colors="#FFF")
-    for spine in ax.spines.values(): spine.set_color("#444")
-
-    ax_leg.text(0.5, 0.97, "Ativos", transform=ax_leg.transAxes,
-                color=ACCENT, fontsize=10, fontweight="bold", ha="center", va="top")
-    leg = ax_leg.legend(handles=linhas, labels=nomes, loc="upper center",
-                        bbox_to_anchor=(0.5, 0.90), frameon=False, ncol=1,
-                        fontsize=9, handlelength=1.5, labelspacing=0.5)
-    for t in leg.get_texts(): t.set_color("#FFF")
-
-    return fig, ax, series
-
+# Estado do modo mira (crosshair)
+_mira_estado = {"ativa": False, "esconder": None}
 
 def _conectar_tooltip(fig, ax, canvas, series, modo):
     """
@@ -303,7 +507,8 @@ def _conectar_tooltip(fig, ax, canvas, series, modo):
     LIMIAR_PX = 25
 
     def on_move(event):
-        if event.inaxes != ax or not series or event.xdata is None:
+        if (event.inaxes != ax or not series or event.xdata is None
+                or _mira_estado["ativa"]):
             annot.set_visible(False)
             dot.set_visible(False)
             canvas.draw_idle()
@@ -359,69 +564,349 @@ def _conectar_tooltip(fig, ax, canvas, series, modo):
     canvas.mpl_connect("motion_notify_event", on_move)
 
 
-def _montar_tabela(dados, selecionados, frame_pai):
-    """Cria tabela de análise dentro de frame_pai — usa grid no frame mestre."""
-    for w in frame_pai.winfo_children(): w.destroy()
+# ==============================
+# MIRA — VALORES DE TODAS AS SÉRIES NA DATA DO CURSOR
+# ==============================
+MIRA_LINHA_PT = 11   # altura de cada linha do painel, em pontos
+
+def _conectar_mira(ax, canvas, series, modo, dados, selecionados):
+    """
+    Modo mira: linha vertical na data do cursor e um painel com preço,
+    nível Base 100 e variação do dia de todos os ativos plotados.
+    Cada série é resolvida por busca binária no próprio eixo de datas,
+    então cada movimento custa O(ativos × log barras).
+    """
+    from matplotlib.transforms import offset_copy
 
-    colunas  = ["Ativo", "Início", "Fim", "Retorno %", "Var. Dia", "Volatil. %", "Risco", "Máximo", "Mínimo"]
-    larguras = [80, 85, 85, 85, 75, 85, 70, 85, 85]
+    # Primeiro fechamento de cada ativo: converte preço <-> Base 100
+    bases = {}
+    for t in series:
+        try:
+            raw = (dados["Close"] if len(selecionados) == 1
+                   else dados["Close"][t]).dropna()
+            bases[t] = float(raw.iloc[0])
+        except Exception:
+            pass
 
-    # Frame mestre com grid
-    tbl = tk.Frame(frame_pai, bg="#1c1c1c")
-    tbl.pack(fill="x", padx=8)
+    linha_v = ax.axvline(ax.get_xlim()[0], color="#888888", linewidth=0.8,
+                         linestyle="--", zorder=9, visible=False)
+    fundo   = dict(boxstyle="square,pad=0.2", facecolor=BG,
+                   alpha=0.85, edgecolor="none")
+    textos  = [
+        ax.text(0, 0.98, "", fontsize=7.5, family="monospace", va="top",
+                zorder=12, visible=False, bbox=fundo,
+                transform=offset_copy(ax.transAxes, fig=ax.figure,
+                                      y=-i * MIRA_LINHA_PT, units="points"))
+        for i in range(len(series) + 1)   # cabeçalho + um por ativo
+    ]
+    artistas = [linha_v] + textos
 
-    # Cabeçalho
-    for c, (col, w) in enumerate(zip(colunas, larguras)):
-        tk.Label(tbl, text=col, bg="#1c1c1c", fg=ACCENT,
-                 font=("Arial", 8, "bold"), width=w//8,
-                 anchor="center").grid(row=0, column=c, padx=1, pady=3, sticky="ew")
+    def _esconder():
+        if linha_v.get_visible():
+            for a in artistas:
+                a.set_visible(False)
+            canvas.draw_idle()
+
+    def on_move(event):
+        if not _mira_estado["ativa"] or event.inaxes != ax or event.xdata is None:
+            _esconder()
+            return
+
+        x = event.xdata
+        # fechamentos diários (sem as barras finas do zoom) para a variação do dia
+        diarios = (_estado_grafico.get("zoom") or {}).get("diarios", {})
+        linhas  = []
+        x_barra = None
+        for t, (xs, ys, cor) in series.items():
+            i = int(np.searchsorted(xs, x, side="right")) - 1
+            if i < 0 or t not in bases or np.isnan(ys[i]):
+                continue
+            y     = float(ys[i])
+            preco = y if modo == "preco" else y * bases[t] / 100
+            xs_d, ys_d = diarios.get(t, (xs, ys))
+            j   = int(np.searchsorted(xs_d, np.floor(xs[i]), side="left")) - 1
+            var = (y / float(ys_d[j]) - 1) * 100 if j >= 0 else None
+            linhas.append((preco / bases[t] * 100, t, preco, var, cor))
+            x_barra = xs[i] if x_barra is None else max(x_barra, xs[i])
+
+        if not linhas:
+            _esconder()
+            return
+        linhas.sort(key=lambda r: r[0], reverse=True)
+
+        x0, x1 = ax.get_xlim()
+        fmt    = "%d/%m/%Y %H:%M" if x1 - x0 <= 5 else "%d/%m/%Y"
+        # painel do lado oposto ao cursor
+        pos_x, ha = (0.99, "right") if (x - x0) < (x1 - x0) / 2 else (0.01, "left")
+
+        textos[0].set_text(f"{mdates.num2date(x_barra).strftime(fmt):<16}"
+                           f"{'Preço':>10}{'B100':>8}{'Dia':>9}")
+        textos[0].set_color(TXT)
+        for txt, (b100, t, preco, var, cor) in zip(textos[1:], linhas):
+            var_txt = f"{var:+.2f}%" if var is not None else "—"
+            txt.set_text(f"{nome_exibicao(t):<16}{preco:>10,.2f}{b100:>8.1f}{var_txt:>9}")
+            txt.set_color(cor)
+        for k, txt in enumerate(textos):
+            txt.set_x(pos_x)
+            txt.set_ha(ha)
+            txt.set_visible(k <= len(linhas))
+
+        linha_v.set_xdata([x_barra, x_barra])
+        linha_v.set_visible(True)
+        canvas.draw_idle()
+
+    _mira_estado["esconder"] = _esconder
+    canvas.mpl_connect("motion_notify_event", on_move)
+    canvas.mpl_connect("axes_leave_event",    lambda e: _esconder())
+
+
+# ==============================
+# ZOOM / PAN + BARRAS INTRADIÁRIAS SOB DEMANDA
+# ==============================
+# (span máximo visível em dias, intervalo yfinance, histórico do provedor em dias)
+# O Yahoo só guarda 5m dos últimos ~60 dias e 60m dos últimos ~730.
+ZOOM_INTERVALOS = [
+    (5,  "5m",  59),
+    (60, "60m", 729),
+]
 
-    # Separador
-    sep = tk.Frame(tbl, bg="#2e2e2e", height=1)
-    sep.grid(row=1, column=0, columnspan=len(colunas), sticky="ew", pady=0)
+def _intervalo_para_janela(x0, x1):
+    """Escolhe o intervalo mais fino disponível para a janela [x0, x1] (date2num)."""
+    span  = x1 - x0   # em date2num, 1.0 == 1 dia
+    idade = (datetime.now() - mdates.num2date(x0).replace(tzinfo=None)).days
+    for span_max, intervalo, hist_max in ZOOM_INTERVALOS:
+        if span <= span_max and idade <= hist_max:
+            return intervalo
+    return None
+
+def _formatar_eixo_x(ax):
+    x0, x1 = ax.get_xlim()
+    span = x1 - x0
+    if span > 120:
+        ax.xaxis.set_major_locator(mdates.MonthLocator(interval=1))
+        ax.xaxis.set_major_formatter(mdates.DateFormatter("%b/%Y"))
+    else:
+        ax.xaxis.set_major_locator(mdates.AutoDateLocator())
+        ax.xaxis.set_major_formatter(
+            mdates.DateFormatter("%d/%m %Hh" if span <= 5 else "%d/%m"))
 
-    # Linhas de dados
-    for idx_a, ativo in enumerate(selecionados):
+def _conectar_zoom(ax, canvas, series, modo, dados, selecionados):
+    """
+    Roda do mouse = zoom no eixo X centrado no cursor; arrastar = pan;
+    duplo clique = volta à janela completa.
+    Quando o span visível cai abaixo de ZOOM_INTERVALOS, baixa barras mais
+    finas só da janela visível em background. Até elas chegarem o gráfico
+    continua mostrando os fechamentos diários já em cache; resultados de
+    janelas que o usuário já deixou para trás são descartados.
+    """
+    linhas   = {l.get_gid(): l for l in ax.get_lines() if l.get_gid()}
+    diarios  = {t: (xs, ys) for t, (xs, ys, _) in series.items()}
+    estado   = {"arraste": None, "geracao": 0, "pendente": None, "fino": None,
+                "xlim_ini": ax.get_xlim(), "diarios": diarios}
+    _estado_grafico["zoom"] = estado   # o refresh incremental estende diarios/xlim_ini
+
+    # Em Base 100 as barras finas precisam da mesma base do diário
+    bases = {}
+    if modo == "base100":
+        for t in series:
+            try:
+                raw = (dados["Close"] if len(selecionados) == 1
+                       else dados["Close"][t]).dropna()
+                bases[t] = float(raw.iloc[0])
+            except Exception:
+                pass
+
+    def _ajustar_y():
+        x0, x1 = ax.get_xlim()
+        visiveis = [ys[(xs >= x0) & (xs <= x1)] for xs, ys, _ in series.values()]
+        visiveis = [v for v in visiveis if len(v)]
+        if not visiveis:
+            return
+        lo = min(float(np.nanmin(v)) for v in visiveis)
+        hi = max(float(np.nanmax(v)) for v in visiveis)
+        margem = (hi - lo) * 0.05 or abs(hi) * 0.01 or 1.0
+        ax.set_ylim(lo - margem, hi + margem)
+
+    def _restaurar_diario():
+        for t, (xs, ys) in diarios.items():
+            linhas[t].set_data(xs, ys)
+            series[t] = (xs, ys, series[t][2])
+        estado["fino"] = None
+
+    def _aplicar_fino(geracao, fino, janela):
+        if geracao != estado["geracao"] or fino is None or fino.empty:
+            return
+        if not canvas.get_tk_widget().winfo_exists():
+            return
+        tickers = list(series)
+        for t in tickers:
+            try:
+                raw = (fino["Close"] if len(tickers) == 1
+                       else fino["Close"][t]).dropna()
+            except Exception:
+                continue
+            if raw.empty or (modo == "base100" and t not in bases):
+                continue
+            idx  = raw.index.tz_localize(None) if raw.index.tz is not None else raw.index
+            xs_f = mdates.date2num(idx.to_pydatetime())
+            ys_f = raw.values.astype(float)
+            if modo == "base100":
+                ys_f = ys_f / bases[t] * 100
+            # diário fora da janela + intradiário dentro dela
+            xs_d, ys_d = diarios[t]
+            antes  = xs_d < np.floor(xs_f[0])
+            depois = xs_d > xs_f[-1]
+            xs = np.concatenate([xs_d[antes], xs_f, xs_d[depois]])
+            ys = np.concatenate([ys_d[antes], ys_f, ys_d[depois]])
+            linhas[t].set_data(xs, ys)
+            series[t] = (xs, ys, series[t][2])
+        estado["fino"] = janela
+        _ajustar_y()
+        canvas.draw_idle()
+
+    def _avaliar_janela():
+        estado["pendente"] = None
+        estado["geracao"] += 1
+        geracao = estado["geracao"]
+        x0, x1 = ax.get_xlim()
+        intervalo = _intervalo_para_janela(x0, x1)
+        if intervalo is None:
+            if estado["fino"]:
+                _restaurar_diario(); _ajustar_y(); canvas.draw_idle()
+            return
+        start  = mdates.num2date(x0).strftime("%Y-%m-%d")
+        end    = (mdates.num2date(x1) + timedelta(days=1)).strftime("%Y-%m-%d")
+        janela = (intervalo, start, end)
+        if estado["fino"] == janela:
+            return
+        tickers = list(series)
+
+        def _baixar():
+            try:
+                return _servico.baixar_intradiario(tickers, intervalo, start, end)
+            except Exception:
+                return None
+
+        _executor.submeter("zoom", _baixar, nome=f"barras {intervalo}", chave=janela,
+                           ao_concluir=lambda fino: _aplicar_fino(geracao, fino, janela))
+
+    def _apos_mudanca():
+        _formatar_eixo_x(ax)
+        _ajustar_y()
+        canvas.draw_idle()
+        # debounce: só decide/baixa 300ms depois do último zoom/pan
+        if estado["pendente"]:
+            root.after_cancel(estado["pendente"])
+        estado["pendente"] = root.after(300, _avaliar_janela)
+
+    def _limitar(x0, x1):
+        lo, hi = estado["xlim_ini"]
+        if x1 - x0 >= hi - lo:
+            return lo, hi
+        if x0 < lo: x0, x1 = lo, lo + (x1 - x0)
+        if x1 > hi: x0, x1 = hi - (x1 - x0), hi
+        return x0, x1
+
+    def on_scroll(event):
+        if event.inaxes != ax or event.xdata is None:
+            return
+        fator  = 0.8 if event.button == "up" else 1.25
+        x0, x1 = ax.get_xlim()
+        cx     = event.xdata
+        novo0, novo1 = cx - (cx - x0) * fator, cx + (x1 - cx) * fator
+        if novo1 - novo0 < 1 / 24:   # não aproxima além de 1 hora
+            return
+        ax.set_xlim(*_limitar(novo0, novo1))
+        _apos_mudanca()
+
+    def on_press(event):
+        if event.inaxes != ax or event.button != 1:
+            return
+        if event.dblclick:
+            ax.set_xlim(*estado["xlim_ini"])
+            _apos_mudanca()
+            return
+        estado["arraste"] = (event.x, ax.get_xlim())
+
+    def on_motion(event):
+        if estado["arraste"] is None or event.x is None:
+            return
+        px0, (x0, x1) = estado["arraste"]
+        dx = (event.x - px0) / ax.bbox.width * (x1 - x0)
+        ax.set_xlim(*_limitar(x0 - dx, x1 - dx))
+        canvas.draw_idle()
+
+    def on_release(event):
+        if estado["arraste"] is not None:
+            estado["arraste"] = None
+            _apos_mudanca()
+
+    estado["reavaliar"] = _apos_mudanca
+
+    canvas.mpl_connect("scroll_event",         on_scroll)
+    canvas.mpl_connect("button_press_event",   on_press)
+    canvas.mpl_connect("motion_notify_event",  on_motion)
+    canvas.mpl_connect("button_release_event", on_release)
+
+
+COLUNAS_ANALISE  = ["Ativo", "Início", "Fim", "Retorno %", "Var. Dia", "Volatil. %", "Risco", "Máximo", "Mínimo"]
+LARGURAS_ANALISE = [80, 85, 85, 85, 75, 85, 70, 85, 85]
+
+def _tabela_analise(frame_pai):
+    return _tabela_virtual(frame_pai, COLUNAS_ANALISE,
+                           [w // 8 for w in LARGURAS_ANALISE], padx=8)
+
+def _linha_analise(dados, selecionados, ativo, indice):
+    """Monta a linha da tabela de análise de um ativo (dict da TabelaVirtual)."""
+    serie = (dados["Close"] if len(selecionados) == 1
+             else dados["Close"][ativo]).dropna()
+
+    inicio    = float(serie.iloc[0])
+    fim       = float(serie.iloc[-1])
+    retorno   = ((fim - inicio) / inicio) * 100
+    vol       = serie.pct_change().std() * 100
+    maximo    = float(serie.max())
+    minimo    = float(serie.min())
+    cor_ativo = CORES_ATIVOS[indice[ativo] % len(CORES_ATIVOS)]
+    cor_ret   = "#00C896" if retorno >= 0 else "#FF5252"
+
+    risco_txt, cor_risco = _classificar_risco(vol)
+    # Variação do último dia disponível
+    var_dia = None
+    if len(serie) >= 2:
+        var_dia     = float((serie.iloc[-1] / serie.iloc[-2] - 1) * 100)
+        var_dia_txt = f"{var_dia:+.2f}%"
+        cor_var_dia = "#00C896" if var_dia >= 0 else "#FF5252"
+    else:
+        var_dia_txt = "—"; cor_var_dia = "#888888"
+    valores = [
+        (nome_exibicao(ativo), cor_ativo),
+        (f"R$ {inicio:.2f}",   "#e0e0e0"),
+        (f"R$ {fim:.2f}",      "#e0e0e0"),
+        (f"{retorno:+.2f}%",   cor_ret),
+        (var_dia_txt,          cor_var_dia),
+        (f"{vol:.2f}%",        "#e0e0e0"),
+        (risco_txt,            cor_risco),
+        (f"R$ {maximo:.2f}",   "#e0e0e0"),
+        (f"R$ {minimo:.2f}",   "#e0e0e0"),
+    ]
+    return {
+        "chave":   ativo,
+        "celulas": valores,
+        "valores": [nome_exibicao(ativo), inicio, fim, retorno, var_dia,
+                    float(vol), float(vol), maximo, minimo],
+    }
+
+def _montar_tabela(dados, selecionados, frame_pai):
+    """Atualiza a tabela de análise de frame_pai — reaproveita os widgets entre refreshes."""
+    indice = {t: i for i, t in enumerate(ativos_ordem)}
+    linhas = []
+    for ativo in selecionados:
         try:
-            serie = (dados["Close"] if len(selecionados) == 1
-                     else dados["Close"][ativo]).dropna()
-
-            inicio    = float(serie.iloc[0])
-            fim       = float(serie.iloc[-1])
-            retorno   = ((fim - inicio) / inicio) * 100
-            vol       = serie.pct_change().std() * 100
-            maximo    = float(serie.max())
-            minimo    = float(serie.min())
-            cor_ativo = CORES_ATIVOS[ativos_ordem.index(ativo) % len(CORES_ATIVOS)]
-            cor_ret   = "#00C896" if retorno >= 0 else "#FF5252"
-            row_bg    = "#161616" if idx_a % 2 == 0 else "#202020"
-
-            risco_txt, cor_risco = _classificar_risco(vol)
-            # Variação do último dia disponível
-            if len(serie) >= 2:
-                var_dia     = (serie.iloc[-1] / serie.iloc[-2] - 1) * 100
-                var_dia_txt = f"{var_dia:+.2f}%"
-                cor_var_dia = "#00C896" if var_dia >= 0 else "#FF5252"
-            else:
-                var_dia_txt = "—"; cor_var_dia = "#888888"
-            valores = [
-                (nome_exibicao(ativo), cor_ativo),
-                (f"R$ {inicio:.2f}",   "#e0e0e0"),
-                (f"R$ {fim:.2f}",      "#e0e0e0"),
-                (f"{retorno:+.2f}%",   cor_ret),
-                (var_dia_txt,          cor_var_dia),
-                (f"{vol:.2f}%",        "#e0e0e0"),
-                (risco_txt,            cor_risco),
-                (f"R$ {maximo:.2f}",   "#e0e0e0"),
-                (f"R$ {minimo:.2f}",   "#e0e0e0"),
-            ]
-            r = idx_a + 2   # +2 por causa do header e separador
-            for c, (val, fg) in enumerate(valores):
-                tk.Label(tbl, text=val, bg=row_bg, fg=fg,
-                         font=("Arial", 8), width=larguras[c]//8,
-                         anchor="center").grid(row=r, column=c, padx=1, pady=2, sticky="ew")
+            linhas.append(_linha_analise(dados, selecionados, ativo, indice))
         except Exception:
             pass
+    _tabela_analise(frame_pai).atualizar(linhas)
 
 
 # Estado da média móvel
@@ -437,6 +922,14 @@ def _toggle_mm(periodo):
     if _cache["dados"] is not None:
         _renderizar(_estado_grafico["modo"])
 
+def _toggle_mira():
+    """Liga/desliga o modo mira (linha vertical + painel com todos os ativos)."""
+    _mira_estado["ativa"] = not _mira_estado["ativa"]
+    ativa = _mira_estado["ativa"]
+    btn_mira.config(bg=ACCENT if ativa else BTN, fg="#000000" if ativa else TXT)
+    if not ativa and _mira_estado["esconder"]:
+        _mira_estado["esconder"]()
+
 def _atualizar_btn_mm():
     p = _mm_estado["periodo"]
     btn_mm20.config(bg=ACCENT if p == 20 else BTN,
@@ -444,166 +937,14 @@ def _atualizar_btn_mm():
     btn_mm50.config(bg=ACCENT if p == 50 else BTN,
                     fg="#000000" if p == 50 else TXT)
 
-# ── Análise inteligente ──
-def _calcular_analise(dados, selecionados):
-    """Calcula métricas de todos os ativos e retorna lista de dicts."""
-    analises = []
-    for ativo in selecionados:
-        try:
-            serie = (dados["Close"] if len(selecionados) == 1
-                     else dados["Close"][ativo]).dropna()
-            inicio  = float(serie.iloc[0])
-            fim     = float(serie.iloc[-1])
-            retorno = ((fim - inicio) / inicio) * 100
-            vol     = serie.pct_change().std() * 100
-            analises.append({
-                "ticker":  ativo,
-                "nome":    nome_exibicao(ativo),
-                "retorno": retorno,
-                "vol":     vol,
-                "cor":     CORES_ATIVOS[ativos_ordem.index(ativo) % len(CORES_ATIVOS)]
-            })
-        except Exception:
-            pass
-    return analises
-
-def _classificar_risco(vol):
-    if vol < 1.5:
-        return ("Baixo",  "#00C896")   # verde
-    elif vol < 2.5:
-        return ("Médio",  "#FFD600")   # amarelo
-    else:
-        return ("Alto",   "#FF5252")   # vermelho
-
-
-# ==============================
-# SETORES DOS ATIVOS (para detecção de concentração)
-# ==============================
-SETORES = {
-    "PETR4.SA": "Energia",    "PETR3.SA": "Energia",
-    "PRIO3.SA": "Energia",    "CSAN3.SA": "Energia",
-    "VALE3.SA": "Mineração",  "CSNA3.SA": "Siderurgia",
-    "GGBR4.SA": "Siderurgia",
-    "ITUB4.SA": "Banco",      "BBDC4.SA": "Banco",
-    "BBAS3.SA": "Banco",      "SANB11.SA":"Banco",
-    "BBSE3.SA": "Seguros",
-    "WEGE3.SA": "Indústria",  "EMBR3.SA": "Indústria",
-    "SUZB3.SA": "Papel/Celulose","KLBN11.SA":"Papel/Celulose",
-    "CPFE3.SA": "Elétrico",   "TAEE11.SA":"Elétrico",
-    "EGIE3.SA": "Elétrico",   "ENGI11.SA":"Elétrico",
-    "MGLU3.SA": "Varejo",     "VIIA3.SA": "Varejo",
-    "LREN3.SA": "Varejo",
-    "RENT3.SA": "Aluguel de Veículos",
-    "RADL3.SA": "Farmácia",
-    "HAPV3.SA": "Saúde",      "RDOR3.SA": "Saúde",
-}
-
-# CDI anual base (atualizar conforme necessário)
-CDI_ANUAL = 0.1065
-
-# ==============================
-# 5. ALERTA DE TENDÊNCIA
-# ==============================
-def _tendencia_ativo(serie):
-    """
-    Compara preço atual com MM20.
-    Retorna ('Alta', cor) / ('Queda', cor) / ('Lateral', cor)
-    """
-    if len(serie) < 20:
-        return ("N/D", "#888888")
-    mm20_atual = serie.rolling(20).mean().iloc[-1]
-    preco_atual = serie.iloc[-1]
-    diff = (preco_atual - mm20_atual) / mm20_atual * 100
-    if diff > 1.5:
-        return ("↑ Alta",   "#cc0000")
-    elif diff < -1.5:
-        return ("↓ Queda",  "#FF5252")
-    else:
-        return ("→ Lateral","#e60000")
-
-# ==============================
-# 6. SCORE GERAL DA CARTEIRA (0–10)
-# ==============================
-def _calcular_score(analises):
-    """
-    Nota de 0 a 10 baseada em:
-    - 60% retorno médio normalizado
-    - 40% risco (vol) médio invertido
-    """
-    if not analises:
-        return 0.0
-    ret_medio = sum(a["retorno"] for a in analises) / len(analises)
-    vol_medio = sum(a["vol"]     for a in analises) / len(analises)
-
-    # Normaliza retorno: -20% → 0, +20% → 10
-    score_ret = max(0, min(10, (ret_medio + 20) / 4))
-    # Normaliza risco: vol 0% → 10, vol 4%+ → 0
-    score_vol = max(0, min(10, 10 - vol_medio * 2.5))
-
-    return round(score_ret * 0.6 + score_vol * 0.4, 1)
-
-def _cor_score(score):
-    if score >= 7:   return "#00C896"   # verde
-    elif score >= 4: return "#FFD600"   # amarelo
-    else:            return "#FF5252"   # vermelho
-
-# ==============================
-# 7. COMPARAÇÃO COM CDI
-# ==============================
-def _retorno_cdi_periodo(start_str, end_str):
-    """Calcula quanto o CDI rendeu no período selecionado."""
-    try:
-        d1 = datetime.strptime(start_str, "%Y-%m-%d")
-        d2 = datetime.strptime(end_str,   "%Y-%m-%d")
-        dias = (d2 - d1).days
-        return ((1 + CDI_ANUAL) ** (dias / 365) - 1) * 100
-    except Exception:
-        return None
-
-# ==============================
-# 8. DETECÇÃO DE CONCENTRAÇÃO SETORIAL
-# ==============================
-def _detectar_concentracao(selecionados):
-    """Retorna lista de alertas de concentração (setor com 2+ ativos)."""
-    contagem = {}
-    for t in selecionados:
-        setor = SETORES.get(t, "Outros")
-        contagem[setor] = contagem.get(setor, []) + [nome_exibicao(t)]
-    alertas = []
-    for setor, nomes in contagem.items():
-        if len(nomes) >= 2:
-            alertas.append(f"{setor}: {', '.join(nomes)}")
-    return alertas
-
-# ==============================
-# 9. MELHOR MÊS DA CARTEIRA
-# ==============================
-def _melhor_mes(dados, selecionados):
-    """Retorna o mês com maior retorno médio da carteira."""
-    try:
-        import pandas as pd
-        frames = []
-        for ativo in selecionados:
-            s = (dados["Close"] if len(selecionados)==1
-                 else dados["Close"][ativo]).dropna()
-            frames.append(s.pct_change().dropna())
-
-        carteira = pd.concat(frames, axis=1).mean(axis=1)
-        mensais  = carteira.resample("ME").sum() * 100
-        if mensais.empty:
-            return None, None
-        idx_max  = mensais.idxmax()
-        return idx_max.strftime("%B/%Y"), round(float(mensais.max()), 2)
-    except Exception:
-        return None, None
-
 # ==============================
 # 10. EXPORTAR RELATÓRIO PDF
 # ==============================
 def exportar_pdf():
     """Gera PDF com gráfico + tabela de análise + insights."""
     from tkinter import filedialog
-    import io, textwrap
+    import io
+    from investimentos.relatorios import _linhas_tabela, _montar_pdf   # reportlab só aqui dentro
 
     fig = _fig_atual.get("fig")
     dados        = _cache.get("dados")
@@ -624,241 +965,71 @@ def exportar_pdf():
         return
 
     try:
-        from reportlab.lib.pagesizes import A4
-        from reportlab.lib import colors
-        from reportlab.lib.units import cm
-        from reportlab.platypus import (SimpleDocTemplate, Paragraph, Spacer,
-                                         Image, Table, TableStyle)
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib.enums import TA_CENTER, TA_LEFT
-
         # Salva gráfico em buffer
         buf = io.BytesIO()
         fig.savefig(buf, format="png", dpi=120, bbox_inches="tight",
                     facecolor=BG)
-        buf.seek(0)
-
-        doc   = SimpleDocTemplate(caminho, pagesize=A4,
-                                   leftMargin=1.5*cm, rightMargin=1.5*cm,
-                                   topMargin=1.5*cm, bottomMargin=1.5*cm)
-        story = []
-        styles = getSampleStyleSheet()
-
-        titulo_style = ParagraphStyle("titulo", fontSize=16, fontName="Helvetica-Bold",
-                                       alignment=TA_CENTER, spaceAfter=4)
-        sub_style    = ParagraphStyle("sub",    fontSize=9,  fontName="Helvetica",
-                                       alignment=TA_CENTER, textColor=colors.grey, spaceAfter=12)
-        sec_style    = ParagraphStyle("sec",    fontSize=11, fontName="Helvetica-Bold",
-                                       spaceBefore=12, spaceAfter=4)
-        body_style   = ParagraphStyle("body",   fontSize=8,  fontName="Helvetica",
-                                       spaceAfter=3, leading=12)
-
-        # Cabeçalho
-        story.append(Paragraph("Dashboard de Investimentos", titulo_style))
-        story.append(Paragraph(f"Relatório gerado em {datetime.now().strftime('%d/%m/%Y %H:%M')}", sub_style))
-
-        # Gráfico
-        story.append(Paragraph("Evolução dos Ativos", sec_style))
-        img = Image(buf, width=16*cm, height=7*cm)
-        story.append(img)
-        story.append(Spacer(1, 0.3*cm))
-
-        # Tabela de análise
-        story.append(Paragraph("Análise do Período", sec_style))
-        analises = _calcular_analise(dados, selecionados)
-
-        header = ["Ativo", "Retorno %", "Volatil. %", "Risco", "Máximo", "Mínimo"]
-        rows   = [header]
-        for a in analises:
-            try:
-                serie  = (dados["Close"] if len(selecionados)==1
-                          else dados["Close"][a["ticker"]]).dropna()
-                rows.append([
-                    a["nome"],
-                    f"{a['retorno']:+.2f}%",
-                    f"{a['vol']:.2f}%",
-                    _classificar_risco(a["vol"])[0],
-                    f"R$ {float(serie.max()):.2f}",
-                    f"R$ {float(serie.min()):.2f}",
-                ])
-            except Exception:
-                pass
 
-        tbl = Table(rows, colWidths=[3*cm,2.5*cm,2.5*cm,2*cm,3*cm,3*cm])
-        tbl.setStyle(TableStyle([
-            ("BACKGROUND", (0,0), (-1,0), colors.HexColor("#1c1c1c")),
-            ("TEXTCOLOR",  (0,0), (-1,0), colors.HexColor("#cc0000")),
-            ("FONTNAME",   (0,0), (-1,0), "Helvetica-Bold"),
-            ("FONTSIZE",   (0,0), (-1,-1), 8),
-            ("ALIGN",      (0,0), (-1,-1), "CENTER"),
-            ("ROWBACKGROUNDS", (0,1), (-1,-1),
-             [colors.HexColor("#161616"), colors.HexColor("#202020")]),
-            ("TEXTCOLOR",  (0,1), (-1,-1), colors.white),
-            ("GRID",       (0,0), (-1,-1), 0.3, colors.HexColor("#2e2e2e")),
-            ("TOPPADDING", (0,0), (-1,-1), 4),
-            ("BOTTOMPADDING",(0,0),(-1,-1),4),
-        ]))
-        story.append(tbl)
-        story.append(Spacer(1, 0.4*cm))
-
-        # Score + CDI
-        score = _calcular_score(analises)
-        start_yf = _cache.get("start"); end_yf = _cache.get("end")
-        story.append(Paragraph("Inteligência do Período", sec_style))
-        story.append(Paragraph(f"Score da carteira: {score}/10", body_style))
-
-        # Insights
-        frases = _gerar_insights_completo(analises, dados, selecionados,
-                                           _cache.get("start"), _cache.get("end"))
-        for f in frases:
-            story.append(Paragraph(f"• {f['titulo']}: {f['texto']}", body_style))
-
-        doc.build(story)
+        analises = _calcular_analise(dados, selecionados, ativos_ordem)
+        frases   = _gerar_insights_completo(analises, dados, selecionados,
+                                             _cache.get("start"), _cache.get("end"))
+        # Mesmo layout do gerador em lote (sem reportlab, cai para o PDF do matplotlib)
+        _montar_pdf(caminho, buf, _linhas_tabela(dados, selecionados, analises),
+                    _calcular_score(analises), frases)
         btn_pdf.config(text="✔ PDF Salvo!", fg="#cc0000")
         root.after(3000, lambda: btn_pdf.config(text="📄 Exportar PDF", fg=TXT))
 
-    except ImportError:
-        # reportlab não instalado
-        import subprocess, sys
-        subprocess.run([sys.executable, "-m", "pip", "install", "reportlab", "--quiet"])
-        btn_pdf.config(text="Instalando... tente novamente", fg="#e60000")
-        root.after(4000, lambda: btn_pdf.config(text="📄 Exportar PDF", fg=TXT))
     except Exception as e:
         btn_pdf.config(text=f"⚠ Erro", fg="#FF5252")
         root.after(3000, lambda: btn_pdf.config(text="📄 Exportar PDF", fg=TXT))
 
-def _gerar_insights_completo(analises, dados, selecionados, start_str, end_str):
-    """Gera frases automáticas completas incluindo tendência, CDI, concentração e melhor mês."""
-    if not analises: return []
-
-    por_retorno = sorted(analises, key=lambda x: x["retorno"], reverse=True)
-    por_vol     = sorted(analises, key=lambda x: x["vol"],     reverse=True)
-    por_estab   = sorted(analises, key=lambda x: x["vol"])
-
-    melhor   = por_retorno[0]
-    pior     = por_retorno[-1]
-    mais_vol = por_vol[0]
-    mais_est = por_estab[0]
-
-    frases = []
-
-    # 🏆 Top performer
-    sinal = "+" if melhor["retorno"] >= 0 else ""
-    frases.append({"icone":"🏆","titulo":"Top performer",
-        "texto": f"{melhor['nome']} apresentou o maior retorno no período ({sinal}{melhor['retorno']:.2f}%).",
-        "cor":"#FFD600"})
-
-    # 📉 Pior desempenho
-    sinal2 = "+" if pior["retorno"] >= 0 else ""
-    frases.append({"icone":"📉","titulo":"Menor retorno",
-        "texto": f"{pior['nome']} teve o menor desempenho ({sinal2}{pior['retorno']:.2f}%).",
-        "cor":"#FF5252"})
-
-    # ⚠ Mais arriscado
-    risco_txt, _ = _classificar_risco(mais_vol["vol"])
-    frases.append({"icone":"⚠","titulo":"Maior risco",
-        "texto": f"{mais_vol['nome']} possui alta volatilidade ({mais_vol['vol']:.2f}%) — risco {risco_txt}.",
-        "cor":"#FF9100"})
-
-    # 🛡 Mais estável
-    frases.append({"icone":"🛡","titulo":"Mais estável",
-        "texto": f"{mais_est['nome']} foi o ativo mais estável (vol. {mais_est['vol']:.2f}%).",
-        "cor":"#00E5FF"})
-
-    # 📊 Visão geral de retornos
-    positivos = sum(1 for a in analises if a["retorno"] > 0)
-    total = len(analises)
-    frases.append({"icone":"📊","titulo":"Visão geral",
-        "texto": f"{positivos} de {total} ativos ({positivos/total*100:.0f}%) tiveram retorno positivo.",
-        "cor":"#aaaaaa"})
-
-    # 5. Tendência por ativo
-    tendencias = {"↑ Alta": [], "↓ Queda": [], "→ Lateral": []}
-    for a in analises:
-        try:
-            serie = (dados["Close"] if len(selecionados)==1
-                     else dados["Close"][a["ticker"]]).dropna()
-            tend, _ = _tendencia_ativo(serie)
-            if tend in tendencias:
-                tendencias[tend].append(a["nome"])
-        except: pass
-    partes = []
-    if tendencias["↑ Alta"]:    partes.append(f"alta: {', '.join(tendencias['↑ Alta'])}")
-    if tendencias["↓ Queda"]:   partes.append(f"queda: {', '.join(tendencias['↓ Queda'])}")
-    if tendencias["→ Lateral"]: partes.append(f"lateral: {', '.join(tendencias['→ Lateral'])}")
-    if partes:
-        frases.append({"icone":"📡","titulo":"Tendências (MM20)",
-            "texto": "  |  ".join(partes).capitalize() + ".",
-            "cor":"#B2FF59"})
-
-    # 6. Score da carteira
-    score = _calcular_score(analises)
-    cor_s = _cor_score(score)
-    frases.append({"icone":"⭐","titulo":"Score da carteira",
-        "texto": f"{score}/10 — baseado em retorno médio e nível de risco dos ativos.",
-        "cor": cor_s})
-
-    # 7. Comparação com CDI
-    if start_str and end_str:
-        cdi_pct = _retorno_cdi_periodo(start_str, end_str)
-        if cdi_pct is not None:
-            ret_medio = sum(a["retorno"] for a in analises) / len(analises)
-            diff = ret_medio - cdi_pct
-            sinal_cdi = "acima" if diff >= 0 else "abaixo"
-            cor_cdi   = "#00C896" if diff >= 0 else "#FF5252"
-            frases.append({"icone":"🏦","titulo":"vs CDI",
-                "texto": f"Retorno médio da carteira ({ret_medio:+.2f}%) ficou {abs(diff):.2f}% {sinal_cdi} do CDI ({cdi_pct:.2f}%) no período.",
-                "cor": cor_cdi})
-
-    # 8. Concentração setorial
-    alertas = _detectar_concentracao(selecionados)
-    if alertas:
-        frases.append({"icone":"⚡","titulo":"Concentração setorial",
-            "texto": "Atenção: " + "; ".join(alertas) + ". Considere diversificar.",
-            "cor":"#FF9915"})
-
-    # 9. Melhor mês
-    mes, ret_mes = _melhor_mes(dados, selecionados)
-    if mes:
-        frases.append({"icone":"📅","titulo":"Melhor mês",
-            "texto": f"O melhor mês da carteira foi {mes} com retorno médio de {ret_mes:+.2f}%.",
-            "cor":"#FFD600"})
-
-    return frases
-
-
 def _gerar_insights(analises):
     """Wrapper simples (sem dados extras) para compatibilidade."""
     return _gerar_insights_completo(analises, _cache.get("dados"), _cache.get("selecionados"),
                                      _cache.get("start"), _cache.get("end"))
 
 
-def _desenhar_score_bar(parent, score, cor):
-    """Desenha barra visual de progresso do score (0-10) ao lado do título."""
-    BAR_W = 120
-    BAR_H = 10
+SCORE_BAR_W = 120
+SCORE_BAR_H = 10
 
-    c = tk.Canvas(parent, width=BAR_W, height=BAR_H,
+def _desenhar_score_bar(parent, score, cor):
+    """Desenha barra visual de progresso do score (0-10) ao lado do título.
+    Retorna (canvas, id_preenchimento, label) para atualizações in-place."""
+    c = tk.Canvas(parent, width=SCORE_BAR_W, height=SCORE_BAR_H,
                   bg="#202020", highlightthickness=0)
     c.pack(side="left", padx=(8, 0), pady=1)
 
     # Fundo
-    c.create_rectangle(0, 0, BAR_W, BAR_H,
+    c.create_rectangle(0, 0, SCORE_BAR_W, SCORE_BAR_H,
                         fill="#2e2e2e", outline="")
     # Preenchimento proporcional
-    fill_w = int((score / 10) * BAR_W)
-    if fill_w > 0:
-        c.create_rectangle(0, 0, fill_w, BAR_H,
-                            fill=cor, outline="")
+    fill_w = int((score / 10) * SCORE_BAR_W)
+    preench = c.create_rectangle(0, 0, fill_w, SCORE_BAR_H,
+                                 fill=cor, outline="",
+                                 state="normal" if fill_w > 0 else "hidden")
     # Texto da nota à direita
-    tk.Label(parent, text=f"{score}/10", bg="#202020", fg=cor,
-             font=("Arial", 8, "bold")).pack(side="left", padx=(4, 0))
+    lbl = tk.Label(parent, text=f"{score}/10", bg="#202020", fg=cor,
+                   font=("Arial", 8, "bold"))
+    lbl.pack(side="left", padx=(4, 0))
+    return c, preench, lbl
+
+def _atualizar_score_bar(barra, score, cor):
+    c, preench, lbl = barra
+    fill_w = int((score / 10) * SCORE_BAR_W)
+    c.coords(preench, 0, 0, fill_w, SCORE_BAR_H)
+    c.itemconfig(preench, fill=cor, state="normal" if fill_w > 0 else "hidden")
+    lbl.config(text=f"{score}/10", fg=cor)
 
 
+# Widgets do card de insights, para o refresh incremental só tocar no que mudou
+_insights_widgets = {"frases": None, "linhas": []}   # linhas: [(ícone, título, texto, barra)]
+
 def _montar_insights(analises, frame_pai):
     """Renderiza o card de insights."""
     for w in frame_pai.winfo_children(): w.destroy()
     frases = _gerar_insights(analises)
+    _insights_widgets["frases"] = frases
+    _insights_widgets["linhas"] = []
 
     if not frases:
         tk.Label(frame_pai, text="📈  Gere um gráfico para ver os insights da carteira.",
@@ -870,8 +1041,9 @@ def _montar_insights(analises, frame_pai):
         row = tk.Frame(frame_pai, bg="#202020")
         row.pack(fill="x", padx=8, pady=2)
 
-        tk.Label(row, text=f["icone"], bg="#202020", fg=f["cor"],
-                 font=("Arial", 11), width=2).pack(side="left", padx=(0,6))
+        lbl_icone = tk.Label(row, text=f["icone"], bg="#202020", fg=f["cor"],
+                             font=("Arial", 11), width=2)
+        lbl_icone.pack(side="left", padx=(0,6))
 
         col = tk.Frame(row, bg="#202020")
         col.pack(side="left", fill="x", expand=True)
@@ -880,19 +1052,48 @@ def _montar_insights(analises, frame_pai):
         titulo_row = tk.Frame(col, bg="#202020")
         titulo_row.pack(fill="x")
 
-        tk.Label(titulo_row, text=f["titulo"], bg="#202020", fg=f["cor"],
-                 font=("Arial", 8, "bold"), anchor="w").pack(side="left")
+        lbl_titulo = tk.Label(titulo_row, text=f["titulo"], bg="#202020", fg=f["cor"],
+                              font=("Arial", 8, "bold"), anchor="w")
+        lbl_titulo.pack(side="left")
 
         # Barra de progresso só para o score
+        barra = None
         if f["titulo"] == "Score da carteira":
             try:
                 score_val = float(f["texto"].split("/")[0])
-                _desenhar_score_bar(titulo_row, score_val, f["cor"])
+                barra = _desenhar_score_bar(titulo_row, score_val, f["cor"])
             except Exception:
                 pass
 
-        tk.Label(col, text=f["texto"], bg="#202020", fg="#e0e0e0",
-                 font=("Arial", 8), anchor="w", wraplength=780).pack(fill="x")
+        lbl_texto = tk.Label(col, text=f["texto"], bg="#202020", fg="#e0e0e0",
+                             font=("Arial", 8), anchor="w", wraplength=780)
+        lbl_texto.pack(fill="x")
+        _insights_widgets["linhas"].append((lbl_icone, lbl_titulo, lbl_texto, barra))
+
+
+def _atualizar_insights(analises, frame_pai):
+    """
+    Versão incremental de _montar_insights: se a lista de títulos é a mesma,
+    só reconfigura as linhas cujo texto/cor mudou; senão refaz o card.
+    """
+    frases   = _gerar_insights(analises)
+    antigas  = _insights_widgets["frases"] or []
+    if [f["titulo"] for f in frases] != [f["titulo"] for f in antigas] or not frases:
+        _montar_insights(analises, frame_pai)
+        return
+    for f, velha, (lbl_icone, lbl_titulo, lbl_texto, barra) in zip(
+            frases, antigas, _insights_widgets["linhas"]):
+        if f == velha:
+            continue
+        lbl_icone.config(fg=f["cor"])
+        lbl_titulo.config(fg=f["cor"])
+        lbl_texto.config(text=f["texto"])
+        if barra is not None:
+            try:
+                _atualizar_score_bar(barra, float(f["texto"].split("/")[0]), f["cor"])
+            except Exception:
+                pass
+    _insights_widgets["frases"] = frases
 
 
 # Cache dos dados para alternar entre modos sem rebaixar
@@ -909,12 +1110,17 @@ def _renderizar(modo):
     # Limpa área do gráfico
     for w in frame_grafico.winfo_children(): w.destroy()
 
-    fig, ax, series = _montar_grafico(dados, selecionados, modo)
+    _carregar_graficos()
+    fig, ax, series = _montar_grafico(dados, selecionados, modo,
+                                      ativos_ordem, _mm_estado.get("periodo", 0))
     _fig_atual["fig"] = fig   # guarda para exportar
     canvas = FigureCanvasTkAgg(fig, master=frame_grafico)
     canvas.draw()
     canvas.get_tk_widget().pack(fill="both", expand=True)
+    _estado_grafico.update(ax=ax, canvas=canvas, series=series)
     _conectar_tooltip(fig, ax, canvas, series, modo)
+    _conectar_zoom(ax, canvas, series, modo, dados, selecionados)
+    _conectar_mira(ax, canvas, series, modo, dados, selecionados)
 
     # Atualiza botões de modo
     if modo == "preco":
@@ -928,7 +1134,7 @@ def _renderizar(modo):
     _montar_tabela(dados, selecionados, frame_tabela)
 
     # Insights
-    analises = _calcular_analise(dados, selecionados)
+    analises = _calcular_analise(dados, selecionados, ativos_ordem)
     _montar_insights(analises, frame_insights)
 
 
@@ -957,7 +1163,7 @@ def exportar_png():
 def _mostrar_loading():
     """Exibe spinner animado no frame_grafico enquanto baixa os dados."""
     for w in frame_grafico.winfo_children(): w.destroy()
-    for w in frame_tabela.winfo_children(): w.destroy()
+    _tabela_analise(frame_tabela).mensagem()
 
     frame_load = tk.Frame(frame_grafico, bg=CARD)
     frame_load.pack(expand=True)
@@ -979,6 +1185,8 @@ def _mostrar_loading():
     return estado   # retorna para poder parar a animação
 
 
+_loading_grafico = {"estado": None, "chave": None}   # spinner e pedido do download atual
+
 def gerar_grafico():
     start = mascara_inicio.get_data_yf()
     end   = mascara_fim.get_data_yf()
@@ -998,18 +1206,28 @@ def gerar_grafico():
         tk.Label(frame_grafico, text="Selecione ao menos um ativo.",
                  fg="#e60000", bg=CARD).pack(pady=20); return
 
-    # Mostra loading e desabilita botão
+    # Mesmo pedido já em andamento: nada a fazer
+    chave = (tuple(selecionados), start, end)
+    if _executor.ocupado("grafico") and _loading_grafico["chave"] == chave:
+        return
+
+    # Mostra loading; um novo clique substitui o download anterior
+    if _loading_grafico["estado"]:
+        _loading_grafico["estado"]["ativo"] = False
     estado_load = _mostrar_loading()
-    btn_gerar.config(state="disabled", text="Carregando...")
+    _loading_grafico.update(estado=estado_load, chave=chave)
+    btn_gerar.config(text="Carregando...")
 
     def _baixar():
         try:
-            dados = yf.download(selecionados, start=start, end=end, auto_adjust=True)
+            return _servico.baixar(selecionados, start, end)
         except Exception:
-            dados = None
-        root.after(0, lambda: _pos_download(dados, selecionados, estado_load, start, end))
+            return None
 
-    threading.Thread(target=_baixar, daemon=True).start()
+    _executor.submeter("grafico", _baixar, nome=f"{len(selecionados)} ativo(s) {start} → {end}",
+                       chave=chave, prioridade=PRIORIDADE_ALTA,
+                       ao_concluir=lambda dados: _pos_download(dados, selecionados, estado_load,
+                                                               start, end))
 
 
 def _pos_download(dados, selecionados, estado_load, start, end):
@@ -1029,6 +1247,137 @@ def _pos_download(dados, selecionados, estado_load, start, end):
     _cache["end"]          = end
     _renderizar("preco")
 
+
+# ==============================
+# REFRESH INCREMENTAL (append-only) DURANTE O PREGÃO
+# ==============================
+PREGAO_HORAS         = (10, 18)   # B3, horário local
+INTERVALO_REFRESH_MS = 60_000
+
+def _em_pregao(agora=None):
+    agora = agora or datetime.now()
+    return agora.weekday() < 5 and PREGAO_HORAS[0] <= agora.hour < PREGAO_HORAS[1]
+
+def atualizar_grafico_incremental():
+    """Baixa só as barras a partir do último pregão em cache e anexa ao gráfico atual."""
+    dados        = _cache.get("dados")
+    selecionados = _cache.get("selecionados")
+    ax           = _estado_grafico.get("ax")
+    if dados is None or dados.empty or ax is None:
+        return
+    start = dados.index[-1].strftime("%Y-%m-%d")   # rebaixa o último: pode estar parcial
+    end   = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+
+    if _executor.ocupado("grafico"):   # um gráfico novo está vindo — ele já traz tudo
+        return
+
+    def _baixar():
+        try:
+            return _servico.baixar_bruto(selecionados, start=start, end=end)
+        except Exception:
+            return None
+
+    _executor.submeter("grafico", _baixar, nome="barras novas", prioridade=PRIORIDADE_BAIXA,
+                       ao_concluir=lambda novos: _anexar_barras(novos, selecionados, ax))
+
+def _anexar_barras(novos, selecionados, ax):
+    """
+    Anexa as barras novas às linhas já desenhadas (sem recriar a figura),
+    estende as MMs calculando só as janelas que terminam nas barras novas,
+    e atualiza apenas as linhas da tabela e os insights que mudaram.
+    """
+    import pandas as pd
+    if novos is None or novos.empty:
+        return
+    # o usuário gerou outro gráfico enquanto baixava — descarta
+    if ax is not _estado_grafico.get("ax") or selecionados is not _cache.get("selecionados"):
+        return
+    antigos = _cache["dados"]
+    corte   = novos.index[0]
+    if corte < antigos.index[0]:
+        return
+    dados = pd.concat([antigos[antigos.index < corte], novos])
+    _cache["dados"] = dados
+    _cache["end"]   = max(_cache.get("end") or "", datetime.now().strftime("%Y-%m-%d"))
+
+    modo    = _estado_grafico["modo"]
+    series  = _estado_grafico["series"]
+    zoom    = _estado_grafico.get("zoom") or {}
+    diarios = zoom.get("diarios", {})
+    linhas  = {l.get_gid(): l for l in ax.get_lines() if l.get_gid()}
+    mm      = _mm_estado.get("periodo", 0)
+    x_fim_antigo = max((xs[-1] for xs, _, _ in series.values() if len(xs)), default=None)
+    afetados = []
+
+    for t in list(series):
+        try:
+            raw_novo = (novos["Close"] if len(selecionados) == 1
+                        else novos["Close"][t]).dropna()
+        except Exception:
+            continue
+        if raw_novo.empty or t not in linhas:
+            continue
+        xs_novo = mdates.date2num(raw_novo.index.to_pydatetime())
+        ys_novo = raw_novo.values.astype(float)
+        if modo == "base100":
+            base = float((dados["Close"] if len(selecionados) == 1
+                          else dados["Close"][t]).dropna().iloc[0])
+            ys_novo = ys_novo / base * 100
+
+        xs_d, ys_d = diarios.get(t, series[t][:2])
+        manter = xs_d < xs_novo[0]
+        n_mantidos = int(manter.sum())
+        xs = np.concatenate([xs_d[manter], xs_novo])
+        ys = np.concatenate([ys_d[manter], ys_novo])
+        diarios[t] = (xs, ys)
+        series[t]  = (xs, ys, series[t][2])
+        linhas[t].set_data(xs, ys)
+
+        # MM: recalcula só as janelas que terminam em barras novas
+        mm_linha = linhas.get(f"mm:{t}")
+        if mm > 0 and mm_linha is not None and len(ys) >= mm:
+            inicio  = max(n_mantidos, mm - 1)
+            mm_novo = [ys[i - mm + 1:i + 1].mean() for i in range(inicio, len(ys))]
+            mx, my  = mm_linha.get_data(orig=False)
+            mx, my  = np.asarray(mx, dtype=float), np.asarray(my, dtype=float)
+            antes   = mx < xs[inicio]
+            mm_linha.set_data(np.concatenate([mx[antes], xs[inicio:]]),
+                              np.concatenate([my[antes], mm_novo]))
+        afetados.append(t)
+
+    if not afetados:
+        return
+
+    # Sem zoom: a janela acompanha as barras novas
+    if zoom:
+        x_fim_novo = max(xs[-1] for xs, _, _ in series.values() if len(xs))
+        lo, hi = zoom["xlim_ini"]
+        if tuple(ax.get_xlim()) == tuple(zoom["xlim_ini"]) and x_fim_antigo is not None:
+            zoom["xlim_ini"] = (lo, hi + (x_fim_novo - x_fim_antigo))
+            ax.set_xlim(*zoom["xlim_ini"])
+            ax.relim(); ax.autoscale_view(scalex=False)
+        if zoom.get("fino"):
+            zoom["fino"] = None
+            zoom["reavaliar"]()
+    _estado_grafico["canvas"].draw_idle()
+
+    indice = {t: i for i, t in enumerate(ativos_ordem)}
+    linhas_tabela = []
+    for t in afetados:
+        try:
+            linhas_tabela.append(_linha_analise(dados, selecionados, t, indice))
+        except Exception:
+            pass
+    _tabela_analise(frame_tabela).atualizar_linhas(linhas_tabela)
+    _atualizar_insights(_calcular_analise(dados, selecionados, ativos_ordem), frame_insights)
+
+def _auto_refresh_grafico():
+    """Durante o pregão, se o período do gráfico chega até hoje, anexa as barras novas."""
+    hoje = datetime.now().strftime("%Y-%m-%d")
+    if _em_pregao() and (_cache.get("end") or "") >= hoje:
+        atualizar_grafico_incremental()
+    root.after(INTERVALO_REFRESH_MS, _auto_refresh_grafico)
+
 # ==============================
 # COTAÇÕES — MOEDAS + BITCOIN
 # ==============================
@@ -1048,26 +1397,19 @@ MOEDAS = [
 # Guarda os Labels para atualizar
 _labels_cotacao = {}   # sigla -> (label_valor, label_var)
 
-def _buscar_cotacoes():
-    """Roda em thread — busca preços via history() e atualiza labels."""
+async def _buscar_cotacoes():
+    """Roda no núcleo de I/O — todas as moedas em paralelo; os labels são atualizados pelo despacho."""
+    precos = await _servico.cotacoes_async([t for _, t, _, _ in MOEDAS if t])
     for sigla, ticker_yf, simbolo, cor in MOEDAS:
         if ticker_yf is None:
-            root.after(0, lambda s=sigla, sm=simbolo, c=cor:
-                       _atualizar_label_moeda(s, 1.0, sm, c, 0.0))
+            preco, prev = 1.0, 1.0
+        elif ticker_yf in precos:
+            preco, prev = precos[ticker_yf]
+        else:
             continue
-        try:
-            hist = yf.Ticker(ticker_yf).history(period="2d")
-            if hist.empty or len(hist) < 1:
-                continue
-
-            preco = float(hist["Close"].iloc[-1])
-            prev  = float(hist["Close"].iloc[-2]) if len(hist) >= 2 else preco
-            var   = ((preco - prev) / prev * 100) if prev else 0.0
-
-            root.after(0, lambda s=sigla, p=preco, sm=simbolo, c=cor, v=var:
-                       _atualizar_label_moeda(s, p, sm, c, v))
-        except Exception:
-            pass
+        var = ((preco - prev) / prev * 100) if prev else 0.0
+        _despacho.postar(_atualizar_label_moeda, sigla, preco, simbolo, cor, var,
+                         chave=("moeda", sigla))
 
 def _atualizar_label_moeda(sigla, preco, simbolo, cor, variacao):
     if sigla not in _labels_cotacao:
@@ -1093,7 +1435,8 @@ def atualizar_cotacoes():
     """Dispara busca em background e agenda próxima atualização em 60s."""
     for _, lbl_val, lbl_var in [(k, v[0], v[1]) for k, v in _labels_cotacao.items()]:
         lbl_val.config(text="...")
-    threading.Thread(target=_buscar_cotacoes, daemon=True).start()
+    _executor.submeter("cotacoes", _buscar_cotacoes, nome="moedas", chave="moedas",
+                       prioridade=PRIORIDADE_BAIXA)
     root.after(300_000, atualizar_cotacoes)
 
 # ==============================
@@ -1202,6 +1545,28 @@ try:
 except Exception:
     pass
 root.configure(bg=BG)
+_inicio.marcar("janela raiz")
+
+# ── Tarefas em segundo plano: pool limitado, um "painel" por área da tela ──
+NOMES_PAINEIS = {"grafico": "Gráfico", "zoom": "Zoom", "ativo": "Verificação",
+                 "cotacoes": "Cotações", "carteira": "Carteira", "risco": "Risco",
+                 "benchmark": "Benchmark", "importacao": "Importação", "ia": "IA"}
+lbl_tarefas = None
+
+def _mostrar_tarefas():
+    if lbl_tarefas is None:
+        return
+    ativas = _executor.em_andamento()
+    lbl_tarefas.config(text="\n".join(
+        f"{'⏳' if estado == 'rodando' else '…'} {NOMES_PAINEIS.get(painel, painel)}: {nome}"
+        + (f" ({seg:.0f}s)" if estado == "rodando" and seg >= 1 else "")
+        for painel, nome, estado, seg in ativas) or "—")
+
+# Threads de trabalho nunca tocam o Tk: postam no despacho, drenado a cada quadro
+_despacho = DespachoUI(root)
+# Todo I/O de rede no event loop do serviço (criado na primeira tarefa async)
+_executor = Executor(trabalhadores=4, agendar=_despacho.agendar, ao_mudar=_mostrar_tarefas,
+                     nucleo=lambda: _servico.io)
 
 frame_main = tk.Frame(root, bg=BG)
 frame_main.pack(fill="both", expand=True)
@@ -1264,6 +1629,14 @@ label_status = tk.Label(frame_sidebar, text="", bg=CARD, fg="#cc0000",
                          font=("Arial", 8), wraplength=160)
 label_status.pack(padx=6, pady=4)
 
+def _avisar_gravacao_descartada(chave, erro):
+    label_status.config(text=f"⚠ Não foi possível salvar {chave[0]} {chave[1]}: {erro}",
+                        fg="#FF5252")
+
+# a fila de gravação roda em outra thread: o aviso passa pelo despacho
+_servico.fila.ao_descartar = lambda chave, erro: _despacho.postar(
+    _avisar_gravacao_descartada, chave, erro)
+
 # ── PAINEL DE COTAÇÕES ──
 tk.Frame(frame_sidebar, bg="#2e2e2e", height=1).pack(fill="x", padx=6, pady=(4, 0))
 
@@ -1300,8 +1673,17 @@ for sigla, ticker_yf, simbolo, cor in MOEDAS:
 
     _labels_cotacao[sigla] = (lbl_val, lbl_var)
 
+# ── TAREFAS EM ANDAMENTO ──
+tk.Frame(frame_sidebar, bg="#2e2e2e", height=1).pack(fill="x", padx=6, pady=(4, 0))
+tk.Label(frame_sidebar, text="⚙  Em andamento", bg=CARD, fg=ACCENT,
+         font=("Arial", 9, "bold")).pack(padx=6, pady=(4, 2), anchor="w")
+lbl_tarefas = tk.Label(frame_sidebar, text="—", bg=CARD, fg="#aaaaaa",
+                       font=("Arial", 7), justify="left", anchor="w", wraplength=190)
+lbl_tarefas.pack(fill="x", padx=6, pady=(0, 6))
+
 # Inicia cotações ao abrir
 root.after(500, atualizar_cotacoes)
+root.after(INTERVALO_REFRESH_MS, _auto_refresh_grafico)
 
 # ── CONTEÚDO DIREITO com scroll vertical ──
 frame_direito = tk.Frame(frame_main, bg=BG)
@@ -1314,7 +1696,7 @@ frame_topo.pack(fill="x", padx=10, pady=(10, 6))
 # Canvas de scroll para o resto
 _scroll_canvas = tk.Canvas(frame_direito, bg=BG, highlightthickness=0)
 _scroll_vbar   = ttk.Scrollbar(frame_direito, orient="vertical", command=_scroll_canvas.yview)
-_scroll_canvas.configure(yscrollcommand=_scroll_vbar.set)
+_scroll_canvas.configure(yscrollcommand=lambda *a: (_scroll_vbar.set(*a), _agendar_verificacao()))
 _scroll_vbar.pack(side="right", fill="y")
 _scroll_canvas.pack(side="left", fill="both", expand=True)
 
@@ -1330,6 +1712,51 @@ _scroll_canvas.bind("<Configure>", _on_canvas_configure)
 _scroll_canvas.bind_all("<MouseWheel>",
     lambda e: _scroll_canvas.yview_scroll(int(-1*(e.delta/120)), "units"))
 
+# ── Seções sob demanda ──
+# Simuladores, carteira e IA começam como placeholders do tamanho do card e
+# só são construídos (e buscam dados) quando entram na área visível do scroll
+# ou quando o placeholder é clicado. Quem só olha cotações não paga downloads
+# da carteira, indicadores de risco nem Ibovespa na abertura.
+_secoes      = []   # [{nome, frame, construir, pronta}] na ordem da tela
+_verificacao = {"pendente": None}
+
+def _secao_sob_demanda(nome, altura, construir):
+    frame = tk.Frame(frame_conteudo, bg=BG, height=altura)
+    frame.pack(fill="x")
+    frame.pack_propagate(False)
+    aviso = tk.Label(frame, text=f"▸ {nome}", bg=BG, fg="#555555",
+                     font=("Arial", 9), cursor="hand2")
+    aviso.pack(pady=(altura // 2 - 10, 0))
+    secao = {"nome": nome, "frame": frame, "construir": construir, "pronta": False}
+    aviso.bind("<Button-1>", lambda e: _construir_secao(secao))
+    _secoes.append(secao)
+    return secao
+
+def _construir_secao(secao):
+    if secao["pronta"]:
+        return
+    secao["pronta"] = True
+    frame = secao["frame"]
+    for w in frame.winfo_children(): w.destroy()
+    frame.pack_propagate(True)   # daqui em diante a altura é a do conteúdo
+    secao["construir"](frame)
+
+def _verificar_secoes():
+    """Constrói as seções cujo placeholder aparece entre o topo e o fundo da área visível."""
+    _verificacao["pendente"] = None
+    topo  = _scroll_canvas.canvasy(0)
+    fundo = topo + _scroll_canvas.winfo_height()
+    for secao in _secoes:
+        f = secao["frame"]
+        if not secao["pronta"] and f.winfo_ismapped() \
+                and f.winfo_y() < fundo and f.winfo_y() + f.winfo_height() > topo:
+            _construir_secao(secao)
+
+def _agendar_verificacao():
+    # yscrollcommand dispara várias vezes por rolagem — uma verificação por rajada
+    if _verificacao["pendente"] is None:
+        _verificacao["pendente"] = root.after(50, _verificar_secoes)
+
 # Data início
 tk.Label(frame_topo, text="Data início", bg=BG, fg=TXT,
          font=("Arial", 9)).pack(side="left", padx=(0, 4))
@@ -1393,6 +1820,12 @@ btn_mm50 = tk.Button(frame_topo, text="50", bg=BTN, fg=TXT,
                      command=lambda: _toggle_mm(50))
 btn_mm50.pack(side="left")
 
+tk.Label(frame_topo, text="|", bg=BG, fg="#444").pack(side="left", padx=6)
+btn_mira = tk.Button(frame_topo, text="✛ Mira", bg=BTN, fg=TXT,
+                     font=("Arial", 8, "bold"), relief="flat", cursor="hand2",
+                     command=_toggle_mira)
+btn_mira.pack(side="left")
+
 # -- GRÁFICO --
 frame_grafico = tk.Frame(frame_conteudo, bg=CARD)
 frame_grafico.pack(fill="both", expand=True)
@@ -1423,320 +1856,166 @@ tk.Label(cab_ins, text="🧠  Inteligência do Período", bg="#0d0d0d", fg="#cc0
 frame_insights = tk.Frame(frame_insights_inner, bg="#202020")
 frame_insights.pack(fill="x", pady=(4, 8))
 
-# -- ÁREA DOS DOIS CARDS (CDB + META) --
-frame_cards = tk.Frame(frame_conteudo, bg=BG)
-frame_cards.pack(fill="x", pady=(10, 0))
-
-# ── CARD ESQUERDO: Simulador CDB ──
-frame_cdb_outer = tk.Frame(frame_cards, bg=ACCENT)
-frame_cdb_outer.pack(side="left", fill="both", expand=True, padx=(0, 5))
-
-frame_cdb = tk.Frame(frame_cdb_outer, bg=CDB_BG)
-frame_cdb.pack(fill="both", expand=True, padx=2, pady=2)
-
-cab_cdb = tk.Frame(frame_cdb, bg="#0a2235")
-cab_cdb.pack(fill="x")
-tk.Label(cab_cdb, text="💵  Simulador de CDB", bg="#0a2235", fg=ACCENT,
-         font=("Arial", 10, "bold"), pady=6).pack(side="left", padx=10)
-
-linha_inputs = tk.Frame(frame_cdb, bg=CDB_BG)
-linha_inputs.pack(pady=6)
-
-def make_label(parent, text):
-    tk.Label(parent, text=text, bg=CDB_BG, fg="#aaaaaa", font=("Arial", 8)).pack()
-
-def limpar_cdb(entry, placeholder):
-    if entry.get() == placeholder:
-        entry.delete(0, tk.END)
-        entry.config(fg=TXT)
-
-col1 = tk.Frame(linha_inputs, bg=CDB_BG); col1.pack(side="left", padx=8)
-make_label(col1, "Valor (R$)")
-entry_valor = tk.Entry(col1, width=11, bg=BTN, fg=TXT, insertbackground=TXT, justify="center")
-entry_valor.insert(0, "2000")
-entry_valor.bind("<FocusIn>", lambda e: limpar_cdb(entry_valor, "2000"))
-entry_valor.pack()
-
-col2 = tk.Frame(linha_inputs, bg=CDB_BG); col2.pack(side="left", padx=8)
-make_label(col2, "% do CDI")
-entry_cdi = tk.Entry(col2, width=11, bg=BTN, fg=TXT, insertbackground=TXT, justify="center")
-entry_cdi.insert(0, "110")
-entry_cdi.bind("<FocusIn>", lambda e: limpar_cdb(entry_cdi, "110"))
-entry_cdi.pack()
-
-col3 = tk.Frame(linha_inputs, bg=CDB_BG); col3.pack(side="left", padx=8)
-make_label(col3, "Dias")
-entry_dias = tk.Entry(col3, width=11, bg=BTN, fg=TXT, insertbackground=TXT, justify="center")
-entry_dias.insert(0, "365")
-entry_dias.bind("<FocusIn>", lambda e: limpar_cdb(entry_dias, "365"))
-entry_dias.pack()
-
-col4 = tk.Frame(linha_inputs, bg=CDB_BG); col4.pack(side="left", padx=8)
-make_label(col4, " ")
-tk.Button(col4, text=" Simular ", bg=ACCENT, fg="#000000",
-          font=("Arial", 9, "bold"), relief="flat", cursor="hand2",
-          command=simular_cdb).pack()
-
-resultado_cdb = tk.Label(frame_cdb, text="", bg=CDB_BG, fg="#cc0000",
-                          font=("Arial", 10, "bold"), pady=5)
-resultado_cdb.pack()
-
-# ── CARD DIREITO: Calculadora de Meta ──
-frame_meta_outer = tk.Frame(frame_cards, bg="#e60000")
-frame_meta_outer.pack(side="left", fill="both", expand=True, padx=(5, 0))
-
-META_BG = "#1a1a0a"
-frame_meta = tk.Frame(frame_meta_outer, bg=META_BG)
-frame_meta.pack(fill="both", expand=True, padx=2, pady=2)
-
-cab_meta = tk.Frame(frame_meta, bg="#2a2a00")
-cab_meta.pack(fill="x")
-tk.Label(cab_meta, text="🎯  Calculadora de Meta", bg="#2a2a00", fg="#e60000",
-         font=("Arial", 10, "bold"), pady=6).pack(side="left", padx=10)
-
-# Modo: calcular prazo OU calcular aporte
-modo_var = tk.StringVar(value="aporte")
-modo_var.trace_add("write", _atualizar_label_modo)
-
-frame_modo = tk.Frame(frame_meta, bg=META_BG)
-frame_modo.pack(pady=(5, 2))
-
-tk.Label(frame_modo, text="Quero calcular:", bg=META_BG, fg="#aaaaaa",
-         font=("Arial", 8)).pack(side="left", padx=(8, 6))
-
-tk.Radiobutton(frame_modo, text="Tempo necessário", variable=modo_var, value="aporte",
-               bg=META_BG, fg=TXT, selectcolor="#2a2a10", activebackground=META_BG,
-               font=("Arial", 8), cursor="hand2").pack(side="left", padx=4)
-
-tk.Radiobutton(frame_modo, text="Aporte mensal", variable=modo_var, value="prazo",
-               bg=META_BG, fg=TXT, selectcolor="#2a2a10", activebackground=META_BG,
-               font=("Arial", 8), cursor="hand2").pack(side="left", padx=4)
-
-linha_meta = tk.Frame(frame_meta, bg=META_BG)
-linha_meta.pack(pady=6)
-
-def make_label_meta(parent, text):
-    tk.Label(parent, text=text, bg=META_BG, fg="#aaaaaa", font=("Arial", 8)).pack()
-
-# Meta (R$)
-m1 = tk.Frame(linha_meta, bg=META_BG); m1.pack(side="left", padx=8)
-make_label_meta(m1, "Meta (R$)")
-entry_meta = tk.Entry(m1, width=11, bg=BTN, fg=TXT, insertbackground=TXT, justify="center")
-entry_meta.insert(0, "30000")
-entry_meta.pack()
-
-# % CDI
-m2 = tk.Frame(linha_meta, bg=META_BG); m2.pack(side="left", padx=8)
-make_label_meta(m2, "% do CDI")
-entry_meta_cdi = tk.Entry(m2, width=11, bg=BTN, fg=TXT, insertbackground=TXT, justify="center")
-entry_meta_cdi.insert(0, "110")
-entry_meta_cdi.pack()
-
-# Aporte ou Prazo (dinâmico)
-m3 = tk.Frame(linha_meta, bg=META_BG); m3.pack(side="left", padx=8)
-label_aporte_ou_prazo = tk.Label(m3, text="Aporte mensal (R$)", bg=META_BG,
-                                  fg="#aaaaaa", font=("Arial", 8))
-label_aporte_ou_prazo.pack()
-entry_aporte_ou_prazo = tk.Entry(m3, width=11, bg=BTN, fg=TXT,
-                                  insertbackground=TXT, justify="center")
-entry_aporte_ou_prazo.insert(0, "500")
-entry_aporte_ou_prazo.pack()
-
-# Botão
-m4 = tk.Frame(linha_meta, bg=META_BG); m4.pack(side="left", padx=8)
-make_label_meta(m4, " ")
-tk.Button(m4, text=" Calcular ", bg="#e60000", fg="#161616",
-          font=("Arial", 9, "bold"), relief="flat", cursor="hand2",
-          command=calcular_meta).pack()
-
-resultado_meta = tk.Label(frame_meta, text="", bg=META_BG, fg="#cc0000",
-                           font=("Arial", 10, "bold"), pady=5)
-resultado_meta.pack()
+def _construir_simuladores(pai):
+    """Cards do simulador de CDB e da calculadora de meta."""
+    global entry_valor, entry_cdi, entry_dias, resultado_cdb, modo_var, entry_meta, \
+           entry_meta_cdi, label_aporte_ou_prazo, entry_aporte_ou_prazo, resultado_meta
+
+    # -- ÁREA DOS DOIS CARDS (CDB + META) --
+    frame_cards = tk.Frame(pai, bg=BG)
+    frame_cards.pack(fill="x", pady=(10, 0))
+
+    # ── CARD ESQUERDO: Simulador CDB ──
+    frame_cdb_outer = tk.Frame(frame_cards, bg=ACCENT)
+    frame_cdb_outer.pack(side="left", fill="both", expand=True, padx=(0, 5))
+
+    frame_cdb = tk.Frame(frame_cdb_outer, bg=CDB_BG)
+    frame_cdb.pack(fill="both", expand=True, padx=2, pady=2)
+
+    cab_cdb = tk.Frame(frame_cdb, bg="#0a2235")
+    cab_cdb.pack(fill="x")
+    tk.Label(cab_cdb, text="💵  Simulador de CDB", bg="#0a2235", fg=ACCENT,
+             font=("Arial", 10, "bold"), pady=6).pack(side="left", padx=10)
+
+    linha_inputs = tk.Frame(frame_cdb, bg=CDB_BG)
+    linha_inputs.pack(pady=6)
+
+    def make_label(parent, text):
+        tk.Label(parent, text=text, bg=CDB_BG, fg="#aaaaaa", font=("Arial", 8)).pack()
+
+    def limpar_cdb(entry, placeholder):
+        if entry.get() == placeholder:
+            entry.delete(0, tk.END)
+            entry.config(fg=TXT)
+
+    col1 = tk.Frame(linha_inputs, bg=CDB_BG); col1.pack(side="left", padx=8)
+    make_label(col1, "Valor (R$)")
+    entry_valor = tk.Entry(col1, width=11, bg=BTN, fg=TXT, insertbackground=TXT, justify="center")
+    entry_valor.insert(0, "2000")
+    entry_valor.bind("<FocusIn>", lambda e: limpar_cdb(entry_valor, "2000"))
+    entry_valor.pack()
+
+    col2 = tk.Frame(linha_inputs, bg=CDB_BG); col2.pack(side="left", padx=8)
+    make_label(col2, "% do CDI")
+    entry_cdi = tk.Entry(col2, width=11, bg=BTN, fg=TXT, insertbackground=TXT, justify="center")
+    entry_cdi.insert(0, "110")
+    entry_cdi.bind("<FocusIn>", lambda e: limpar_cdb(entry_cdi, "110"))
+    entry_cdi.pack()
+
+    col3 = tk.Frame(linha_inputs, bg=CDB_BG); col3.pack(side="left", padx=8)
+    make_label(col3, "Dias")
+    entry_dias = tk.Entry(col3, width=11, bg=BTN, fg=TXT, insertbackground=TXT, justify="center")
+    entry_dias.insert(0, "365")
+    entry_dias.bind("<FocusIn>", lambda e: limpar_cdb(entry_dias, "365"))
+    entry_dias.pack()
+
+    col4 = tk.Frame(linha_inputs, bg=CDB_BG); col4.pack(side="left", padx=8)
+    make_label(col4, " ")
+    tk.Button(col4, text=" Simular ", bg=ACCENT, fg="#000000",
+              font=("Arial", 9, "bold"), relief="flat", cursor="hand2",
+              command=simular_cdb).pack()
+
+    resultado_cdb = tk.Label(frame_cdb, text="", bg=CDB_BG, fg="#cc0000",
+                              font=("Arial", 10, "bold"), pady=5)
+    resultado_cdb.pack()
+
+    # ── CARD DIREITO: Calculadora de Meta ──
+    frame_meta_outer = tk.Frame(frame_cards, bg="#e60000")
+    frame_meta_outer.pack(side="left", fill="both", expand=True, padx=(5, 0))
+
+    META_BG = "#1a1a0a"
+    frame_meta = tk.Frame(frame_meta_outer, bg=META_BG)
+    frame_meta.pack(fill="both", expand=True, padx=2, pady=2)
+
+    cab_meta = tk.Frame(frame_meta, bg="#2a2a00")
+    cab_meta.pack(fill="x")
+    tk.Label(cab_meta, text="🎯  Calculadora de Meta", bg="#2a2a00", fg="#e60000",
+             font=("Arial", 10, "bold"), pady=6).pack(side="left", padx=10)
+
+    # Modo: calcular prazo OU calcular aporte
+    modo_var = tk.StringVar(value="aporte")
+    modo_var.trace_add("write", _atualizar_label_modo)
+
+    frame_modo = tk.Frame(frame_meta, bg=META_BG)
+    frame_modo.pack(pady=(5, 2))
+
+    tk.Label(frame_modo, text="Quero calcular:", bg=META_BG, fg="#aaaaaa",
+             font=("Arial", 8)).pack(side="left", padx=(8, 6))
+
+    tk.Radiobutton(frame_modo, text="Tempo necessário", variable=modo_var, value="aporte",
+                   bg=META_BG, fg=TXT, selectcolor="#2a2a10", activebackground=META_BG,
+                   font=("Arial", 8), cursor="hand2").pack(side="left", padx=4)
+
+    tk.Radiobutton(frame_modo, text="Aporte mensal", variable=modo_var, value="prazo",
+                   bg=META_BG, fg=TXT, selectcolor="#2a2a10", activebackground=META_BG,
+                   font=("Arial", 8), cursor="hand2").pack(side="left", padx=4)
+
+    linha_meta = tk.Frame(frame_meta, bg=META_BG)
+    linha_meta.pack(pady=6)
+
+    def make_label_meta(parent, text):
+        tk.Label(parent, text=text, bg=META_BG, fg="#aaaaaa", font=("Arial", 8)).pack()
+
+    # Meta (R$)
+    m1 = tk.Frame(linha_meta, bg=META_BG); m1.pack(side="left", padx=8)
+    make_label_meta(m1, "Meta (R$)")
+    entry_meta = tk.Entry(m1, width=11, bg=BTN, fg=TXT, insertbackground=TXT, justify="center")
+    entry_meta.insert(0, "30000")
+    entry_meta.pack()
+
+    # % CDI
+    m2 = tk.Frame(linha_meta, bg=META_BG); m2.pack(side="left", padx=8)
+    make_label_meta(m2, "% do CDI")
+    entry_meta_cdi = tk.Entry(m2, width=11, bg=BTN, fg=TXT, insertbackground=TXT, justify="center")
+    entry_meta_cdi.insert(0, "110")
+    entry_meta_cdi.pack()
+
+    # Aporte ou Prazo (dinâmico)
+    m3 = tk.Frame(linha_meta, bg=META_BG); m3.pack(side="left", padx=8)
+    label_aporte_ou_prazo = tk.Label(m3, text="Aporte mensal (R$)", bg=META_BG,
+                                      fg="#aaaaaa", font=("Arial", 8))
+    label_aporte_ou_prazo.pack()
+    entry_aporte_ou_prazo = tk.Entry(m3, width=11, bg=BTN, fg=TXT,
+                                      insertbackground=TXT, justify="center")
+    entry_aporte_ou_prazo.insert(0, "500")
+    entry_aporte_ou_prazo.pack()
+
+    # Botão
+    m4 = tk.Frame(linha_meta, bg=META_BG); m4.pack(side="left", padx=8)
+    make_label_meta(m4, " ")
+    tk.Button(m4, text=" Calcular ", bg="#e60000", fg="#161616",
+              font=("Arial", 9, "bold"), relief="flat", cursor="hand2",
+              command=calcular_meta).pack()
+
+    resultado_meta = tk.Label(frame_meta, text="", bg=META_BG, fg="#cc0000",
+                               font=("Arial", 10, "bold"), pady=5)
+    resultado_meta.pack()
+
+_secao_sob_demanda("Simuladores", 180, _construir_simuladores)
 
 
 # ======================================================
 # ETAPA 5 — CARTEIRA PESSOAL (Tópicos 1-5)
 # ======================================================
-import json, os, math
-
-CARTEIRA_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)), "carteira.json")
-
-# ── 1b. Histórico de patrimônio (SQLite3) ──
-DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "historico.db")
-
-def _init_db():
-    """Cria o banco SQLite e a tabela de histórico se não existirem."""
-    conn = sqlite3.connect(DB_PATH)
-    cur  = conn.cursor()
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS historico_patrimonio (
-            id          INTEGER PRIMARY KEY AUTOINCREMENT,
-            data        TEXT    NOT NULL,
-            custo_total REAL    NOT NULL,
-            patrimonio  REAL    NOT NULL,
-            lucro_rs    REAL    NOT NULL,
-            lucro_pct   REAL    NOT NULL,
-            n_ativos    INTEGER NOT NULL
-        )
-    """)
-    conn.commit()
-    conn.close()
+import os, math
 
-def _registrar_patrimonio(custo_total, patrimonio, lucro_rs, lucro_pct, n_ativos):
-    """
-    Salva um snapshot do patrimônio atual no banco.
-    Chamado automaticamente após cada atualização da carteira.
-    Evita duplicatas — só registra uma vez por dia.
-    """
-    try:
-        conn = conn = sqlite3.connect(DB_PATH)
-        cur  = conn.cursor()
-        hoje = datetime.now().strftime("%Y-%m-%d")
-        # Verifica se já registrou hoje
-        cur.execute("SELECT id FROM historico_patrimonio WHERE data = ?", (hoje,))
-        if cur.fetchone():
-            # Atualiza o registro de hoje em vez de duplicar
-            cur.execute("""
-                UPDATE historico_patrimonio
-                SET custo_total=?, patrimonio=?, lucro_rs=?, lucro_pct=?, n_ativos=?
-                WHERE data=?
-            """, (custo_total, patrimonio, lucro_rs, lucro_pct, n_ativos, hoje))
-        else:
-            cur.execute("""
-                INSERT INTO historico_patrimonio
-                    (data, custo_total, patrimonio, lucro_rs, lucro_pct, n_ativos)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (hoje, custo_total, patrimonio, lucro_rs, lucro_pct, n_ativos))
-        conn.commit()
-        conn.close()
-    except Exception as e:
-        print(f"[SQLite] Erro ao registrar patrimônio: {e}")
+# Banco (SQLite, WAL), fila de gravação e migração dos JSONs antigos ficam no
+# serviço; a UI trabalha sobre os mesmos dicts em memória.
+_carteira = _servico.carteira
+_cdbs     = _servico.cdbs
 
-def _buscar_historico(dias=90):
-    """
-    Retorna os últimos N dias do histórico como lista de dicts.
-    Usado para plotar a evolução do patrimônio ao longo do tempo.
-    """
+def _atualizar_titulo():
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cur  = conn.cursor()
-        cur.execute("""
-            SELECT data, custo_total, patrimonio, lucro_rs, lucro_pct, n_ativos
-            FROM historico_patrimonio
-            ORDER BY data DESC
-            LIMIT ?
-        """, (dias,))
-        rows = cur.fetchall()
-        conn.close()
-        return [
-            {
-                "data":        r[0],
-                "custo_total": r[1],
-                "patrimonio":  r[2],
-                "lucro_rs":    r[3],
-                "lucro_pct":   r[4],
-                "n_ativos":    r[5],
-            }
-            for r in reversed(rows)  # ordem cronológica
-        ]
-    except Exception as e:
-        print(f"[SQLite] Erro ao buscar histórico: {e}")
-        return []
-
-# Inicializa o banco na inicialização do app
-_init_db()
-
-# ── 1. Persistência JSON ──
-def _carregar_carteira():
-    """Carrega carteira do JSON com validação de campos."""
-    if os.path.exists(CARTEIRA_JSON):
-        try:
-            with open(CARTEIRA_JSON, encoding="utf-8") as f:
-                dados = json.load(f)
-            if not isinstance(dados, dict):
-                return {}
-            validos = {}
-            for ticker, pos in dados.items():
-                ticker = ticker.strip()
-                if not ticker:
-                    continue
-                if all(k in pos for k in ("qtd","preco_medio","data_compra")):
-                    pos["qtd"]         = float(pos["qtd"])
-                    pos["preco_medio"] = float(pos["preco_medio"])
-                    validos[ticker]    = pos
-            return validos
-        except Exception:
-            try:
-                import shutil
-                shutil.copy(CARTEIRA_JSON, CARTEIRA_JSON + ".bak")
-            except Exception:
-                pass
-            return {}
-    return {}
-
-def _salvar_carteira(carteira):
-    with open(CARTEIRA_JSON, "w", encoding="utf-8") as f:
-        json.dump(carteira, f, ensure_ascii=False, indent=2)
-    try:
-        n = len(carteira)
+        n = len(_carteira)
         root.title(f"Dashboard de Investimentos — {n} ativo{'s' if n!=1 else ''} na carteira")
     except Exception:
         pass
 
-_carteira = _carregar_carteira()
-
 # ── 2 & 3. Busca preço atual + cálculo de P&L ──
 
 # ======================================================
 # CARTEIRA — CDBs
 # ======================================================
-CDB_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)), "carteira_cdbs.json")
-
-def _carregar_cdbs():
-    """Carrega CDBs do JSON com validação de campos."""
-    if os.path.exists(CDB_JSON):
-        try:
-            with open(CDB_JSON, encoding="utf-8") as f:
-                dados = json.load(f)
-            # Valida que é lista e cada item tem os campos necessários
-            if not isinstance(dados, list):
-                return []
-            validos = []
-            for item in dados:
-                if all(k in item for k in ("nome","valor","pct_cdi","data")):
-                    # Garante tipos corretos
-                    item["valor"]   = float(item["valor"])
-                    item["pct_cdi"] = float(item["pct_cdi"])
-                    validos.append(item)
-            return validos
-        except Exception:
-            # JSON corrompido — faz backup e começa do zero
-            try:
-                import shutil
-                shutil.copy(CDB_JSON, CDB_JSON + ".bak")
-            except Exception:
-                pass
-            return []
-    return []   # lista de dicts: {nome, valor, pct_cdi, data}
-
-def _salvar_cdbs(cdbs):
-    with open(CDB_JSON, "w", encoding="utf-8") as f:
-        json.dump(cdbs, f, ensure_ascii=False, indent=2)
-
-_cdbs = _carregar_cdbs()
-
-def _calcular_rendimento_cdb(valor, pct_cdi, data_str):
-    """Calcula rendimento bruto acumulado do CDB até hoje."""
-    try:
-        d1   = datetime.strptime(data_str, "%d/%m/%Y")
-        dias = max((datetime.now() - d1).days, 0)
-        taxa_periodo = ((1 + CDI_ANUAL * (pct_cdi/100)) ** (dias/365)) - 1
-        rendimento   = valor * taxa_periodo
-        total        = valor + rendimento
-        return rendimento, total, dias
-    except Exception:
-        return 0.0, float(valor), 0
-
 def _adicionar_cdb():
     nome_s  = entry_cdb_nome.get().strip()
     valor_s = entry_cdb_valor.get().strip()
@@ -1758,56 +2037,41 @@ def _adicionar_cdb():
 
     venc_s = entry_cdb_venc.get().strip()
     venc_val = venc_s if (venc_s and venc_s != "DD/MM/AAAA") else "—"
-    _cdbs.append({"nome": nome_s, "valor": valor, "pct_cdi": pct, "data": data_s, "vencimento": venc_val})
-    _salvar_cdbs(_cdbs)
+    _servico.adicionar_cdb(nome_s, valor, pct, data_s, venc_val)
     lbl_cdb_status.config(text=f"✔ CDB '{nome_s}' adicionado!", fg="#cc0000")
     _renderizar_cdbs()
 
 def _remover_cdb(idx):
     if 0 <= idx < len(_cdbs):
-        del _cdbs[idx]
-        _salvar_cdbs(_cdbs)
+        _servico.remover_cdb(idx)
         _renderizar_cdbs()
 
+COLUNAS_CDB  = ["Nome/Banco", "Aplicado (R$)", "% CDI", "Data", "Vencimento", "Dias", "Rendimento R$", "Total R$", "Rent. %", "Alerta", "Ação"]
+LARGURAS_CDB = [12, 10, 5, 10, 10, 5, 12, 10, 7, 7, 5]
+
 def _renderizar_cdbs():
     """Renderiza tabela de CDBs da carteira."""
-    for w in frame_cdb_cart_tabela.winfo_children(): w.destroy()
+    tabela = _tabela_virtual(frame_cdb_cart_tabela, COLUNAS_CDB, LARGURAS_CDB,
+                             cor_cab="#e60000", acao=_remover_cdb)
 
     if not _cdbs:
-        tk.Label(frame_cdb_cart_tabela,
-                 text="Nenhum CDB registrado. Adicione acima.",
-                 bg="#161616", fg="#cc0000", font=("Arial", 9, "italic"), pady=10).pack()
+        tabela.mensagem("Nenhum CDB registrado. Adicione acima.")
         return
 
-    CAB_BG = "#1c1c1c"
-    cols   = ["Nome/Banco", "Aplicado (R$)", "% CDI", "Data", "Vencimento", "Dias", "Rendimento R$", "Total R$", "Rent. %", "Alerta", "Ação"]
-    widths = [12, 10, 5, 10, 10, 5, 12, 10, 7, 7, 5]
-
-    tbl = tk.Frame(frame_cdb_cart_tabela, bg=CAB_BG)
-    tbl.pack(fill="x", padx=6)
-
-    for c, (col, w) in enumerate(zip(cols, widths)):
-        tk.Label(tbl, text=col, bg=CAB_BG, fg="#e60000",
-                 font=("Arial", 8, "bold"), width=w,
-                 anchor="center").grid(row=0, column=c, padx=1, pady=3, sticky="ew")
-
-    tk.Frame(tbl, bg="#2e2e2e", height=1).grid(
-        row=1, column=0, columnspan=len(cols), sticky="ew")
-
     total_aplicado = total_rendimento = total_atual = 0
+    linhas = []
 
     for idx, cdb in enumerate(_cdbs):
         rend, total, dias = _calcular_rendimento_cdb(
             cdb["valor"], cdb["pct_cdi"], cdb["data"])
         rent_pct = (rend / cdb["valor"] * 100) if cdb["valor"] > 0 else 0
-        row_bg   = "#161616" if idx % 2 == 0 else "#202020"
         cor_rend = "#00C896"
-        ri       = idx + 2
 
         # Alerta de vencimento
         venc = cdb.get("vencimento", "—")
         alerta_venc = ""
         cor_alerta  = "#888888"
+        dias_venc   = None
         if venc and venc != "—":
             try:
                 dv = datetime.strptime(venc, "%d/%m/%Y")
@@ -1833,15 +2097,13 @@ def _renderizar_cdbs():
             (f"{rent_pct:.2f}%",         cor_rend),
             (alerta_venc,                cor_alerta),
         ]
-        for c, (val, fg) in enumerate(dados_row):
-            tk.Label(tbl, text=val, bg=row_bg, fg=fg,
-                     font=("Arial", 8), width=widths[c],
-                     anchor="center").grid(row=ri, column=c, padx=1, pady=2, sticky="ew")
-
-        tk.Button(tbl, text="✕", bg="#2a0000", fg="#FF5252",
-                  font=("Arial", 8, "bold"), relief="flat", cursor="hand2", width=2,
-                  command=lambda i=idx: _remover_cdb(i)
-                  ).grid(row=ri, column=10, padx=1, pady=2)
+        linhas.append({
+            "chave":   idx,   # _remover_cdb recebe o índice em _cdbs
+            "celulas": dados_row,
+            "valores": [cdb["nome"], cdb["valor"], cdb["pct_cdi"],
+                        _data_ordenavel(cdb["data"]), _data_ordenavel(venc),
+                        dias, rend, total, rent_pct, dias_venc],
+        })
 
         total_aplicado  += cdb["valor"]
         total_rendimento += rend
@@ -1849,10 +2111,6 @@ def _renderizar_cdbs():
 
     # Linha de totais
     rent_total_pct = (total_rendimento / total_aplicado * 100) if total_aplicado > 0 else 0
-    sep_r = len(_cdbs) + 2
-    tk.Frame(tbl, bg="#2e2e2e", height=1).grid(
-        row=sep_r, column=0, columnspan=len(cols), sticky="ew", pady=2)
-    tot_row = sep_r + 1
     resumo = [
         ("TOTAL",                     "#e60000"),
         (f"{total_aplicado:,.2f}",    "#e60000"),
@@ -1862,82 +2120,14 @@ def _renderizar_cdbs():
         (f"{rent_total_pct:.2f}%",    "#cc0000"),
         ("", "#aaaaaa"), ("", ""),
     ]
-    for c, (val, fg) in enumerate(resumo):
-        tk.Label(tbl, text=val, bg="#1c1c1c", fg=fg,
-                 font=("Arial", 8, "bold"), width=widths[c],
-                 anchor="center").grid(row=tot_row, column=c, padx=1, pady=3, sticky="ew")
+    tabela.atualizar(linhas, rodape=resumo)
 
 
 # ======================================================
 # ETAPA 5 — Tópicos 6 a 10
 # ======================================================
 
-# ── 6. Indicadores de Risco Avançados ──
-def _calcular_beta(serie_ativo, serie_ibov):
-    try:
-        import pandas as pd
-        ret_a = serie_ativo.pct_change().dropna()
-        ret_b = serie_ibov.pct_change().dropna()
-        df = pd.concat([ret_a, ret_b], axis=1).dropna()
-        if len(df) < 10: return None
-        cov = df.iloc[:,0].cov(df.iloc[:,1])
-        var = df.iloc[:,1].var()
-        return round(cov/var, 2) if var != 0 else None
-    except: return None
-
-def _calcular_sharpe(serie):
-    try:
-        ret_d = serie.pct_change().dropna()
-        ret_a = float(ret_d.mean() * 252)
-        vol_a = float(ret_d.std() * (252**0.5))
-        if vol_a == 0: return None
-        return round((ret_a - CDI_ANUAL) / vol_a, 2)
-    except: return None
-
-def _calcular_drawdown_max(serie):
-    try:
-        pico = serie.cummax()
-        dd   = (serie - pico) / pico * 100
-        return round(float(dd.min()), 2)
-    except: return None
-
-def _buscar_ibov_para_carteira(start, end):
-    try:
-        d = yf.download("^BVSP", start=start, end=end,
-                        auto_adjust=True, progress=False)
-        return d["Close"].dropna() if not d.empty else None
-    except: return None
-
-def _calcular_indicadores_avancados_carteira(carteira, precos):
-    """Calcula Beta, Sharpe e Drawdown para cada ativo da carteira."""
-    if not carteira: return {}
-    datas = []
-    for pos in carteira.values():
-        try: datas.append(datetime.strptime(pos["data_compra"], "%d/%m/%Y"))
-        except: pass
-    if not datas: return {}
-    start = min(datas).strftime("%Y-%m-%d")
-    end   = datetime.now().strftime("%Y-%m-%d")
-    tickers = list(carteira.keys())
-    try:
-        dados = yf.download(tickers, start=start, end=end,
-                            auto_adjust=True, progress=False)
-        if dados.empty: return {}
-    except: return {}
-    serie_ibov = _buscar_ibov_para_carteira(start, end)
-    result = {}
-    for ticker in tickers:
-        try:
-            serie = (dados["Close"] if len(tickers)==1
-                     else dados["Close"][ticker]).dropna()
-            result[ticker] = {
-                "beta":     _calcular_beta(serie, serie_ibov) if serie_ibov is not None else None,
-                "sharpe":   _calcular_sharpe(serie),
-                "drawdown": _calcular_drawdown_max(serie),
-            }
-        except: pass
-    return result
-
+# ── 6. Indicadores de Risco Avançados (cálculo em investimentos.carteira) ──
 def _grafico_evolucao_com_dados(dados, carteira, frame_pai):
     """Plota evolução do patrimônio com dados já baixados."""
     for w in frame_pai.winfo_children(): w.destroy()
@@ -1953,6 +2143,7 @@ def _grafico_evolucao_com_dados(dados, carteira, frame_pai):
             except: pass
         if patrimonio_total.empty:
             return
+        _carregar_graficos()
         fig = plt.figure(figsize=(11, 3.0)); fig.patch.set_facecolor("#111111")
         ax  = fig.add_axes([0.07, 0.20, 0.88, 0.70]); ax.set_facecolor("#161616")
         ax.fill_between(patrimonio_total.index, patrimonio_total.values, alpha=0.2, color=ACCENT)
@@ -1976,59 +2167,45 @@ def _grafico_evolucao_com_dados(dados, carteira, frame_pai):
         tk.Label(frame_pai, text=f"Erro no gráfico: {e}", bg="#161616",
                  fg="#FF5252", font=("Arial",8)).pack()
 
+COLUNAS_RISCO  = ["Ativo", "Beta", "Sharpe", "Drawdown Máx."]
+LARGURAS_RISCO = [10, 8, 8, 14]
+
+def _tabela_risco(frame_pai):
+    return _tabela_virtual(
+        frame_pai, COLUNAS_RISCO, LARGURAS_RISCO, cor_cab="#cc0000",
+        nota="Beta<1 = menos volátil que o mercado  |  Sharpe>0 = retorno acima do risco  |  Drawdown = maior queda do pico")
+
 def _montar_tabela_risco(carteira, frame_pai):
     """Renderiza tabela de indicadores de risco avançados (em thread)."""
-    for w in frame_pai.winfo_children(): w.destroy()
+    tabela = _tabela_risco(frame_pai)
     if not carteira:
-        tk.Label(frame_pai, text="Adicione ativos para ver indicadores de risco.",
-                 bg="#161616", fg="#cc0000", font=("Arial", 8, "italic"), pady=8).pack()
+        tabela.mensagem("Adicione ativos para ver indicadores de risco.")
         return
-    tk.Label(frame_pai, text="⏳ Calculando Beta, Sharpe e Drawdown...",
-             bg="#161616", fg=ACCENT, font=("Arial", 8), pady=6).pack()
-    def _calc():
-        try:
-            ind = _calcular_indicadores_avancados_carteira(carteira, {})
-            root.after(0, lambda: _renderizar_tabela_risco(ind, frame_pai))
-        except Exception as e:
-            root.after(0, lambda: [w.destroy() for w in frame_pai.winfo_children()] or
-                       tk.Label(frame_pai, text=f"Erro ao calcular indicadores.",
-                                bg="#161616", fg="#FF5252", font=("Arial",8)).pack())
-    threading.Thread(target=_calc, daemon=True).start()
+    tabela.mensagem("⏳ Calculando Beta, Sharpe e Drawdown...", ACCENT)
+    _executor.submeter("risco", _servico.indicadores_risco, carteira,
+                       nome="Beta/Sharpe/Drawdown",
+                       ao_concluir=lambda ind: _renderizar_tabela_risco(ind, frame_pai),
+                       ao_erro=lambda e: tabela.mensagem("Erro ao calcular indicadores.", "#FF5252"))
 
 def _renderizar_tabela_risco(indicadores, frame_pai):
-    for w in frame_pai.winfo_children(): w.destroy()
+    tabela = _tabela_risco(frame_pai)
     if not indicadores:
-        tk.Label(frame_pai, text="Não foi possível calcular indicadores.",
-                 bg="#161616", fg="#cc0000", font=("Arial", 8, "italic"), pady=8).pack()
+        tabela.mensagem("Não foi possível calcular indicadores.")
         return
-    CAB_BG = "#1c1c1c"
-    cols   = ["Ativo", "Beta", "Sharpe", "Drawdown Máx."]
-    widths = [10, 8, 8, 14]
-    tbl = tk.Frame(frame_pai, bg=CAB_BG); tbl.pack(fill="x", padx=6)
-    for c,(col,w) in enumerate(zip(cols,widths)):
-        tk.Label(tbl, text=col, bg=CAB_BG, fg="#cc0000",
-                 font=("Arial",8,"bold"), width=w,
-                 anchor="center").grid(row=0,column=c,padx=1,pady=3,sticky="ew")
-    tk.Frame(tbl, bg="#2a1a2a", height=1).grid(row=1,column=0,columnspan=4,sticky="ew")
-    for idx,(ticker,ind) in enumerate(indicadores.items()):
-        row_bg = "#161616" if idx%2==0 else "#202020"
-        ri     = idx+2
+    linhas = []
+    for ticker, ind in indicadores.items():
         beta_s = f"{ind['beta']:.2f}"  if ind['beta']    is not None else "N/D"
         shar_s = f"{ind['sharpe']:.2f}" if ind['sharpe'] is not None else "N/D"
         dd_s   = f"{ind['drawdown']:.1f}%" if ind['drawdown'] is not None else "N/D"
         cor_beta  = "#cc0000" if ind['beta'] is not None and ind['beta']<1 else "#FF5252" if ind['beta'] is not None else "#888"
         cor_sharp = "#cc0000" if ind['sharpe'] is not None and ind['sharpe']>0 else "#FF5252" if ind['sharpe'] is not None else "#888"
         cor_dd    = "#e60000" if ind['drawdown'] is not None and ind['drawdown']>-15 else "#FF5252" if ind['drawdown'] is not None else "#888"
-        dados_row = [(nome_exibicao(ticker),"#e0e0e0"),(beta_s,cor_beta),(shar_s,cor_sharp),(dd_s,cor_dd)]
-        for c,(val,fg) in enumerate(dados_row):
-            tk.Label(tbl,text=val,bg=row_bg,fg=fg,
-                     font=("Arial",8),width=widths[c],
-                     anchor="center").grid(row=ri,column=c,padx=1,pady=2,sticky="ew")
-
-    # Legenda
-    leg = tk.Frame(frame_pai, bg="#161616"); leg.pack(fill="x", padx=8, pady=4)
-    tk.Label(leg, text="Beta<1 = menos volátil que o mercado  |  Sharpe>0 = retorno acima do risco  |  Drawdown = maior queda do pico",
-             bg="#161616", fg="#cc0000", font=("Arial", 7), anchor="w").pack(fill="x")
+        linhas.append({
+            "chave":   ticker,
+            "celulas": [(nome_exibicao(ticker),"#e0e0e0"),(beta_s,cor_beta),(shar_s,cor_sharp),(dd_s,cor_dd)],
+            "valores": [nome_exibicao(ticker), ind['beta'], ind['sharpe'], ind['drawdown']],
+        })
+    tabela.atualizar(linhas)
 
 # ── 7. Comparativo com Benchmarks ──
 def _montar_grafico_benchmark(carteira, frame_pai):
@@ -2040,29 +2217,18 @@ def _montar_grafico_benchmark(carteira, frame_pai):
         return
     tk.Label(frame_pai, text="⏳ Buscando dados do Ibovespa e CDI...",
              bg="#161616", fg=ACCENT, font=("Arial",8), pady=6).pack()
-    def _buscar():
-        try:
-            datas = []
-            for pos in carteira.values():
-                try: datas.append(datetime.strptime(pos["data_compra"],"%d/%m/%Y"))
-                except: pass
-            if not datas: return
-            start   = min(datas).strftime("%Y-%m-%d")
-            end     = datetime.now().strftime("%Y-%m-%d")
-            tickers = list(carteira.keys())
-            dados   = yf.download(tickers, start=start, end=end,
-                                  auto_adjust=True, progress=False)
-            ibov    = yf.download("^BVSP", start=start, end=end,
-                                  auto_adjust=True, progress=False)
-            root.after(0, lambda: _renderizar_benchmark(dados, ibov, carteira, frame_pai, start, end))
-        except Exception as e:
-            root.after(0, lambda: [w.destroy() for w in frame_pai.winfo_children()] or
-                       tk.Label(frame_pai, text="Erro ao buscar benchmarks.",
-                                bg="#161616", fg="#FF5252", font=("Arial",8)).pack())
-    threading.Thread(target=_buscar, daemon=True).start()
+    def _erro(e=None):
+        for w in frame_pai.winfo_children(): w.destroy()
+        tk.Label(frame_pai, text="Erro ao buscar benchmarks.",
+                 bg="#161616", fg="#FF5252", font=("Arial",8)).pack()
+    _executor.submeter("benchmark", _servico.dados_benchmark, carteira,
+                       nome="Ibovespa e CDI", ao_erro=_erro,
+                       ao_concluir=lambda r: _renderizar_benchmark(r[0], r[1], carteira, frame_pai,
+                                                                   r[2], r[3]) if r else _erro())
 
 def _renderizar_benchmark(dados, ibov, carteira, frame_pai, start, end):
     import pandas as pd, numpy as np
+    _carregar_graficos()
     for w in frame_pai.winfo_children(): w.destroy()
     fig = plt.figure(figsize=(11, 3.0)); fig.patch.set_facecolor("#111111")
     ax  = fig.add_axes([0.07, 0.20, 0.88, 0.70]); ax.set_facecolor("#161616")
@@ -2105,37 +2271,6 @@ def _renderizar_benchmark(dados, ibov, carteira, frame_pai, start, end):
     canvas.draw(); canvas.get_tk_widget().pack(fill="both", expand=True)
 
 # ── 8. Alertas Automáticos ──
-def _gerar_alertas_carteira(rows):
-    """Gera lista de alertas baseados na posição atual da carteira."""
-    alertas = []
-    for r in rows:
-        # Queda acentuada
-        if r["lucro_pct"] <= -15:
-            alertas.append(("🔴", f"{r['nome']} caiu {r['lucro_pct']:.1f}% desde sua compra — avalie sua posição.", "#FF5252"))
-        elif r["lucro_pct"] <= -8:
-            alertas.append(("🟡", f"{r['nome']} está {r['lucro_pct']:.1f}% abaixo do preço médio.", "#e60000"))
-        # Alta expressiva
-        if r["lucro_pct"] >= 30:
-            alertas.append(("🟢", f"{r['nome']} valorizou {r['lucro_pct']:.1f}% — considere realizar parte do lucro.", "#cc0000"))
-        # Comparação com CDI
-        try:
-            cdi = _cdi_desde_compra(r["data_compra"])
-            if cdi and r["lucro_pct"] < cdi:
-                diff = cdi - r["lucro_pct"]
-                alertas.append(("💛", f"{r['nome']} está {diff:.1f}% abaixo do CDI no mesmo período.", "#e60000"))
-        except: pass
-    # Concentração setorial
-    setores = {}
-    for r in rows:
-        s = SETORES.get(r["ticker"], "Outros")
-        setores[s] = setores.get(s,[]) + [r["nome"]]
-    for setor, nomes in setores.items():
-        if len(nomes) >= 2:
-            alertas.append(("⚡", f"Concentração em {setor}: {', '.join(nomes)}. Considere diversificar.", "#FF9915"))
-    if not alertas:
-        alertas.append(("✅", "Nenhum alerta no momento. Carteira dentro dos parâmetros normais.", "#cc0000"))
-    return alertas
-
 def _montar_alertas(rows, frame_pai):
     for w in frame_pai.winfo_children(): w.destroy()
     if not rows:
@@ -2150,27 +2285,6 @@ def _montar_alertas(rows, frame_pai):
                  font=("Arial",8), anchor="w", wraplength=900).pack(side="left", fill="x", expand=True)
 
 # ── 9. Score de Diversificação ──
-def _calcular_score_diversificacao(carteira):
-    """Nota 0–10 baseada em qtd de ativos, setores e concentração."""
-    if not carteira: return 0.0, "Carteira vazia."
-    n_ativos  = len(carteira)
-    setores   = set(SETORES.get(t,"Outros") for t in carteira)
-    n_setores = len(setores)
-    # Concentração: % do maior ativo pelo custo
-    custos = {t: float(p["qtd"])*float(p["preco_medio"]) for t,p in carteira.items()}
-    total  = sum(custos.values())
-    maior_pct = max(custos.values())/total*100 if total>0 else 100
-    # Score
-    score_ativos  = min(10, n_ativos * 1.2)
-    score_setores = min(10, n_setores * 2.0)
-    score_conc    = max(0, 10 - (maior_pct - 20) * 0.2) if maior_pct > 20 else 10
-    score = round((score_ativos*0.3 + score_setores*0.4 + score_conc*0.3), 1)
-    if score >= 8:   msg = "✅ Carteira bem diversificada!"
-    elif score >= 6: msg = "⚠ Diversificação razoável — considere adicionar mais setores."
-    elif score >= 4: msg = "🔶 Diversificação baixa — carteira concentrada."
-    else:            msg = "🔴 Carteira muito concentrada — alto risco não sistemático."
-    return score, msg
-
 def _montar_score_div(carteira, frame_pai):
     for w in frame_pai.winfo_children(): w.destroy()
     score, msg = _calcular_score_diversificacao(carteira)
@@ -2190,28 +2304,6 @@ def _montar_score_div(carteira, frame_pai):
              font=("Arial",8), anchor="w", padx=10).pack(fill="x")
 
 # ── 10. Resumo Executivo ──
-def _gerar_resumo_executivo(rows, carteira):
-    """Gera parágrafo descritivo do estado atual da carteira."""
-    if not rows: return "Adicione ativos à carteira para ver o resumo executivo."
-    total_custo  = sum(r["custo"]      for r in rows)
-    total_patrim = sum(r["patrimonio"] for r in rows)
-    total_lucro  = sum(r["lucro_rs"]   for r in rows)
-    total_pct    = (total_lucro/total_custo*100) if total_custo>0 else 0
-    melhor = max(rows, key=lambda r: r["lucro_pct"])
-    pior   = min(rows, key=lambda r: r["lucro_pct"])
-    score_div, _ = _calcular_score_diversificacao(carteira)
-    nivel_div = "bem diversificada" if score_div>=8 else "moderadamente diversificada" if score_div>=5 else "concentrada"
-    sinal = "positivo" if total_lucro>=0 else "negativo"
-    resumo = (
-        f"Sua carteira é composta por {len(rows)} ativo(s), com custo total de "
-        f"R$ {total_custo:,.2f} e patrimônio atual de R$ {total_patrim:,.2f}. "
-        f"O resultado acumulado é {sinal}: R$ {total_lucro:+,.2f} ({total_pct:+.2f}%). "
-        f"O ativo com melhor desempenho é {melhor['nome']} ({melhor['lucro_pct']:+.2f}%) "
-        f"e o que mais preocupa é {pior['nome']} ({pior['lucro_pct']:+.2f}%). "
-        f"A carteira está {nivel_div} (score {score_div}/10)."
-    )
-    return resumo
-
 def _montar_resumo_executivo(rows, carteira, frame_pai):
     for w in frame_pai.winfo_children(): w.destroy()
     if not rows:
@@ -2223,70 +2315,6 @@ def _montar_resumo_executivo(rows, carteira, frame_pai):
              font=("Arial", 9), anchor="w", justify="left",
              wraplength=1100, padx=12, pady=10).pack(fill="x")
 
-def _buscar_precos_carteira(tickers):
-    """Retorna dict {ticker: preco_atual} — ignora ativos inválidos/delistados."""
-    precos = {}
-    for t in tickers:
-        t = t.strip()  # remove espaços extras que corrompem o yfinance
-        if not t:
-            continue
-        try:
-            hist = yf.Ticker(t).history(period="2d")
-            if hist is not None and not hist.empty and "Close" in hist.columns:
-                preco = float(hist["Close"].dropna().iloc[-1])
-                if preco > 0:
-                    precos[t] = preco
-        except Exception:
-            pass  # ignora 404, delistados, sem dados
-    return precos
-
-def _calcular_pl(carteira, precos):
-    """Retorna lista de dicts com P&L por ativo. Ignora ativos sem preço."""
-    rows = []
-    for ticker, pos in carteira.items():
-        preco_atual = precos.get(ticker)
-        if preco_atual is None or preco_atual <= 0:
-            continue  # ativo delistado ou sem dados — ignora silenciosamente
-        qtd         = float(pos["qtd"])
-        pm          = float(pos["preco_edio"] if "preco_medio" not in pos else pos["preco_medio"])
-        pm          = float(pos["preco_medio"])
-        custo       = qtd * pm
-        patrimonio  = qtd * preco_atual
-        lucro_rs    = patrimonio - custo
-        lucro_pct   = (lucro_rs / custo * 100) if custo > 0 else 0
-        # Tendência vs preço médio
-        diff_pm = ((preco_atual - pm) / pm * 100) if pm > 0 else 0
-        if diff_pm > 2:
-            tendencia = ("↑ Alta",    "#00C896")
-        elif diff_pm < -2:
-            tendencia = ("↓ Queda",   "#FF5252")
-        else:
-            tendencia = ("→ Lateral", "#e60000")
-        rows.append({
-            "ticker":     ticker,
-            "nome":       nome_exibicao(ticker),
-            "qtd":        qtd,
-            "pm":         pm,
-            "preco_atual":preco_atual,
-            "custo":      custo,
-            "patrimonio": patrimonio,
-            "lucro_rs":   lucro_rs,
-            "lucro_pct":  lucro_pct,
-            "data_compra":pos.get("data_compra", "—"),
-            "tendencia":  tendencia,
-        })
-    return rows
-
-# ── 4. Comparativo com CDI ──
-def _cdi_desde_compra(data_compra_str):
-    """Retorna quanto o CDI rendeu desde a data de compra até hoje."""
-    try:
-        d1   = datetime.strptime(data_compra_str, "%d/%m/%Y")
-        dias = (datetime.now() - d1).days
-        return ((1 + CDI_ANUAL) ** (dias / 365) - 1) * 100
-    except Exception:
-        return None
-
 # ── 5. Gráfico evolução da carteira ──
 def _grafico_evolucao_carteira(carteira, frame_pai):
     """Plota evolução do patrimônio total da carteira desde a data de compra mais antiga."""
@@ -2297,26 +2325,20 @@ def _grafico_evolucao_carteira(carteira, frame_pai):
                  bg="#161616", fg="#cc0000", font=("Arial", 9, "italic"), pady=20).pack()
         return
 
-    # Descobre data mais antiga
-    datas = []
-    for pos in carteira.values():
-        try:
-            datas.append(datetime.strptime(pos["data_compra"], "%d/%m/%Y"))
-        except Exception:
-            pass
-    if not datas:
+    # Desde a data mais antiga
+    periodo = _periodo_carteira(carteira)
+    if not periodo:
         return
-    start = min(datas).strftime("%Y-%m-%d")
-    end   = datetime.now().strftime("%Y-%m-%d")
 
     tickers = list(carteira.keys())
     try:
-        dados = yf.download(tickers, start=start, end=end, auto_adjust=True, progress=False)
+        dados = _servico.baixar(tickers, *periodo)
         if dados.empty:
             return
     except Exception:
         return
 
+    _carregar_graficos()
     fig = plt.figure(figsize=(11, 3.2))
     fig.patch.set_facecolor("#111111")
     ax  = fig.add_axes([0.07, 0.18, 0.90, 0.72])
@@ -2384,87 +2406,86 @@ def _adicionar_posicao():
         lbl_cart_status.config(text="⚠ Data inválida. Use DD/MM/AAAA.", fg="#FF5252"); return
 
     # Se já existe, soma a posição (preço médio ponderado)
-    if ticker in _carteira:
-        old = _carteira[ticker]
-        qtd_total = float(old["qtd"]) + qtd
-        pm_novo   = (float(old["qtd"])*float(old["preco_medio"]) + qtd*pm) / qtd_total
-        _carteira[ticker] = {"qtd": qtd_total, "preco_medio": round(pm_novo,4),
-                              "data_compra": old["data_compra"]}
-        msg = f"✔ Posição de {nome_exibicao(ticker)} atualizada!"
-    else:
-        _carteira[ticker] = {"qtd": qtd, "preco_medio": pm, "data_compra": data_s}
+    if _servico.adicionar_posicao(ticker, qtd, pm, data_s):
         msg = f"✔ {nome_exibicao(ticker)} adicionado à carteira!"
+    else:
+        msg = f"✔ Posição de {nome_exibicao(ticker)} atualizada!"
 
-    _salvar_carteira(_carteira)
+    _atualizar_titulo()
     lbl_cart_status.config(text=msg, fg="#cc0000")
-    _atualizar_carteira_ui()
+    _agendar_atualizacao_carteira()
 
 def _remover_posicao(ticker):
     if ticker in _carteira:
-        del _carteira[ticker]
-        _salvar_carteira(_carteira)
-        _atualizar_carteira_ui()
+        _servico.remover_posicao(ticker)
+        _atualizar_titulo()
+        _agendar_atualizacao_carteira()
 
-def _atualizar_carteira_ui():
-    """Busca TODOS os dados em uma thread e renderiza tudo de uma vez."""
-    lbl_cart_status.config(text="⏳ Buscando dados...", fg="#aaaaaa")
-    btn_atualizar_cart.config(state="disabled", text="Carregando...")
+def _importar_extratos():
+    """Importa CSVs de corretora / negociações da B3 (CEI) e mescla na carteira."""
+    from tkinter import filedialog
+    caminhos = filedialog.askopenfilenames(
+        title="Importar extratos de negociação",
+        filetypes=[("CSV", "*.csv *.txt"), ("Todos", "*.*")])
+    if not caminhos:
+        return
+    lbl_cart_status.config(text=f"⏳ Importando {len(caminhos)} arquivo(s)...", fg="#aaaaaa")
 
-    def _buscar_tudo():
-        resultado = {"precos": {}, "ibov": None, "dados_hist": None,
-                     "indicadores": {}, "erro": None}
+    def _ler():
         try:
-            tickers = list(_carteira.keys())
-            if not tickers:
-                root.after(0, lambda: _aplicar_resultados(resultado))
-                return
-
-            # 1. Preços atuais
-            resultado["precos"] = _buscar_precos_carteira(tickers)
-
-            # 2. Dados históricos para gráficos e indicadores
-            datas = []
-            for pos in _carteira.values():
-                try: datas.append(datetime.strptime(pos["data_compra"], "%d/%m/%Y"))
-                except: pass
-
-            if datas:
-                start = min(datas).strftime("%Y-%m-%d")
-                end   = datetime.now().strftime("%Y-%m-%d")
-                try:
-                    resultado["dados_hist"] = yf.download(
-                        tickers, start=start, end=end,
-                        auto_adjust=True, progress=False)
-                except: pass
-                try:
-                    resultado["ibov"] = yf.download(
-                        "^BVSP", start=start, end=end,
-                        auto_adjust=True, progress=False)
-                except: pass
-                # 3. Indicadores de risco
-                try:
-                    ind = {}
-                    serie_ibov = resultado["ibov"]["Close"].dropna() if resultado["ibov"] is not None and not resultado["ibov"].empty else None
-                    dados_h = resultado["dados_hist"]
-                    for ticker in tickers:
-                        try:
-                            s = (dados_h["Close"] if len(tickers)==1
-                                 else dados_h["Close"][ticker]).dropna()
-                            ind[ticker] = {
-                                "beta":     _calcular_beta(s, serie_ibov) if serie_ibov is not None else None,
-                                "sharpe":   _calcular_sharpe(s),
-                                "drawdown": _calcular_drawdown_max(s),
-                            }
-                        except: pass
-                    resultado["indicadores"] = ind
-                except: pass
-
+            return importar_extratos(
+                caminhos, validar=lambda tickers: validar_no_yahoo(tickers, baixar=_servico.baixar_bruto))
         except Exception as e:
-            resultado["erro"] = str(e)
-
-        root.after(0, lambda: _aplicar_resultados(resultado))
+            return {"erro": str(e)}
+
+    def _aplicar(rel):
+        if rel.get("erro"):
+            lbl_cart_status.config(text=f"⚠ Importação falhou: {rel['erro']}", fg="#FF5252"); return
+        for erro in rel["erros"]:
+            print(f"[Importação] {erro}")
+        # uma transação para a importação inteira
+        upserts, remover = _servico.aplicar_importacao(rel)
+        if not upserts and not remover:
+            lbl_cart_status.config(text=f"⚠ Nenhuma operação válida em {rel['linhas']} linha(s).",
+                                   fg="#FF5252"); return
+        _atualizar_titulo()
+        msg = f"✔ {rel['operacoes']} operações → {len(upserts)} posição(ões)"
+        if remover:
+            msg += f", {len(remover)} zerada(s)"
+        if rel["ignoradas"] or rel["invalidos"]:
+            msg += f" · {rel['ignoradas']} linha(s) ignorada(s), {len(rel['invalidos'])} ticker(s) sem cotação"
+        lbl_cart_status.config(text=msg, fg="#cc0000")
+        _agendar_atualizacao_carteira()
+
+    _executor.submeter("importacao", _ler, nome=f"{len(caminhos)} arquivo(s)",
+                       chave=tuple(caminhos), substituir=False, ao_concluir=_aplicar)
+
+ATRASO_CARTEIRA_MS = 400   # edições dentro dessa janela viram um refresh só
+
+_refresh_carteira = {"pendente": None}
+
+def _agendar_atualizacao_carteira():
+    """Depois de adicionar/remover/importar: junta edições seguidas num refresh incremental."""
+    if _refresh_carteira["pendente"] is not None:
+        root.after_cancel(_refresh_carteira["pendente"])
+    _refresh_carteira["pendente"] = root.after(
+        ATRASO_CARTEIRA_MS, lambda: _atualizar_carteira_ui(incremental=True))
+
+def _atualizar_carteira_ui(incremental=False):
+    """
+    Busca os dados em uma thread e renderiza tudo de uma vez. O botão pede
+    tudo de novo; incremental=True (edições) só busca o que mudou.
+    """
+    if _refresh_carteira["pendente"] is not None:
+        root.after_cancel(_refresh_carteira["pendente"])
+        _refresh_carteira["pendente"] = None
+    lbl_cart_status.config(text="⏳ Buscando dados...", fg="#aaaaaa")
+    btn_atualizar_cart.config(state="disabled", text="Carregando...")
 
-    threading.Thread(target=_buscar_tudo, daemon=True).start()
+    # preços, histórico, Ibovespa e indicadores numa tarefa só (ver ServicoInvestimentos);
+    # a tarefa nova substitui a anterior do painel, se ainda estiver rodando
+    _executor.submeter("carteira", _servico.atualizar_carteira, incremental,
+                       nome=f"{len(_carteira)} posição(ões)", ao_concluir=_aplicar_resultados)
 
 def _aplicar_resultados(resultado):
     """Chamada na thread principal com todos os dados prontos."""
@@ -2494,49 +2515,33 @@ def _aplicar_resultados(resultado):
 
     lbl_cart_status.config(text=f"✔ Carteira atualizada — {len(rows)} ativo(s)", fg="#cc0000")
 
+COLUNAS_CARTEIRA  = ["Ativo","Tend.","Qtd","P.M. (R$)","Atual (R$)","Custo (R$)","Patrim. (R$)","Lucro R$","Lucro %","CDI%","Ação"]
+LARGURAS_CARTEIRA = [7,8,4,8,8,10,10,10,8,7,4]
+
 def _renderizar_carteira(precos):
     """Renderiza tabela P&L + totais + gráfico."""
-    # Limpa tabela
-    for w in frame_cart_tabela.winfo_children(): w.destroy()
+    tabela = _tabela_virtual(frame_cart_tabela, COLUNAS_CARTEIRA, LARGURAS_CARTEIRA,
+                             acao=_remover_posicao)
 
     rows = _calcular_pl(_carteira, precos)
 
     if not rows:
-        for w in frame_cart_tabela.winfo_children(): w.destroy()
-        tk.Label(frame_cart_tabela,
-                 text="Nenhum ativo adicionado. Use o formulário acima para adicionar ações.",
-                 bg="#161616", fg="#cc0000", font=("Arial", 9, "italic"), pady=16).pack()
+        tabela.mensagem("Nenhum ativo adicionado. Use o formulário acima para adicionar ações.")
         lbl_cart_status.config(text="", fg="#aaaaaa")
         return
 
-    # Cabeçalho da tabela
-    CAB_BG = "#1c1c1c"
-    cols   = ["Ativo","Tend.","Qtd","P.M. (R$)","Atual (R$)","Custo (R$)","Patrim. (R$)","Lucro R$","Lucro %","CDI%","Ação"]
-    widths = [7,8,4,8,8,10,10,10,8,7,4]
-
-    tbl = tk.Frame(frame_cart_tabela, bg=CAB_BG)
-    tbl.pack(fill="x", padx=6)
-
-    for c,(col,w) in enumerate(zip(cols,widths)):
-        tk.Label(tbl, text=col, bg=CAB_BG, fg=ACCENT,
-                 font=("Arial",8,"bold"), width=w,
-                 anchor="center").grid(row=0,column=c,padx=1,pady=3,sticky="ew")
-
-    tk.Frame(tbl, bg="#2e2e2e", height=1).grid(
-        row=1, column=0, columnspan=len(cols), sticky="ew")
-
+    indice = {t: i for i, t in enumerate(_carteira)}
     total_custo = total_patrim = total_lucro = 0
+    linhas = []
 
-    for idx, r in enumerate(rows):
-        row_bg  = "#161616" if idx%2==0 else "#202020"
+    for r in rows:
         cor_ret = "#00C896" if r["lucro_rs"] >= 0 else "#FF5252"
         cdi_ret = _cdi_desde_compra(r["data_compra"])
         cdi_txt = f"{cdi_ret:.2f}%" if cdi_ret else "—"
-        ri      = idx + 2
 
         tend_txt, tend_cor = r.get("tendencia", ("—", "#888888"))
         dados_row = [
-            (nome_exibicao(r["ticker"]), CORES_ATIVOS[list(_carteira.keys()).index(r["ticker"]) % len(CORES_ATIVOS)]),
+            (nome_exibicao(r["ticker"]), CORES_ATIVOS[indice[r["ticker"]] % len(CORES_ATIVOS)]),
             (tend_txt,                   tend_cor),
             (f"{r['qtd']:.0f}",          "#e0e0e0"),
             (f"{r['pm']:.2f}",           "#e0e0e0"),
@@ -2547,16 +2552,12 @@ def _renderizar_carteira(precos):
             (f"{r['lucro_pct']:+.2f}%",  cor_ret),
             (cdi_txt,                    "#aaaaaa"),
         ]
-        for c,(val,fg) in enumerate(dados_row):
-            tk.Label(tbl, text=val, bg=row_bg, fg=fg,
-                     font=("Arial",8), width=widths[c],
-                     anchor="center").grid(row=ri,column=c,padx=1,pady=2,sticky="ew")
-
-        # Botão remover (coluna 10 = última)
-        tk.Button(tbl, text="✕", bg="#2a0000", fg="#FF5252",
-                  font=("Arial",8,"bold"), relief="flat", cursor="hand2", width=2,
-                  command=lambda t=r["ticker"]: _remover_posicao(t)
-                  ).grid(row=ri, column=10, padx=1, pady=2)
+        linhas.append({
+            "chave":   r["ticker"],
+            "celulas": dados_row,
+            "valores": [r["nome"], tend_txt, r["qtd"], r["pm"], r["preco_atual"],
+                        r["custo"], r["patrimonio"], r["lucro_rs"], r["lucro_pct"], cdi_ret],
+        })
 
         total_custo   += r["custo"]
         total_patrim  += r["patrimonio"]
@@ -2565,10 +2566,6 @@ def _renderizar_carteira(precos):
     # Totais
     total_pct = (total_lucro/total_custo*100) if total_custo>0 else 0
     cor_tot   = "#00C896" if total_lucro>=0 else "#FF5252"
-    sep_r     = len(rows)+2
-    tk.Frame(tbl, bg="#2e2e2e", height=1).grid(
-        row=sep_r, column=0, columnspan=len(cols), sticky="ew", pady=2)
-    tot_row = sep_r+1
     COR_VAZIO = "#1c1c1c"  # mesma cor do fundo = invisível
     resumo = [
         ("TOTAL","#e60000"),("",COR_VAZIO),("",COR_VAZIO),("",COR_VAZIO),("",COR_VAZIO),
@@ -2578,19 +2575,18 @@ def _renderizar_carteira(precos):
         (f"{total_pct:+.2f}%",cor_tot),
         ("",COR_VAZIO),("",COR_VAZIO),
     ]
-    for c,(val,fg) in enumerate(resumo):
-        tk.Label(tbl, text=val, bg="#1c1c1c", fg=fg,
-                 font=("Arial",8,"bold"), width=widths[c],
-                 anchor="center").grid(row=tot_row,column=c,padx=1,pady=3,sticky="ew")
+    tabela.atualizar(linhas, rodape=resumo)
 
     # Registra snapshot no histórico SQLite
     try:
-        _registrar_patrimonio(
+        _servico.registrar_patrimonio(
             custo_total = total_custo,
             patrimonio  = total_patrim,
             lucro_rs    = total_lucro,
             lucro_pct   = (total_lucro / total_custo * 100) if total_custo > 0 else 0,
             n_ativos    = len(rows),
+            posicoes    = [(r["ticker"], r["qtd"], r["preco_atual"], r["custo"], r["patrimonio"])
+                           for r in rows],
         )
     except Exception as e:
         print(f"[SQLite] Erro no registro automático: {e}")
@@ -2603,150 +2599,175 @@ CART_BG  = "#161616"
 CART_ACC = "#cc0000"
 CART_BORDER = "#e60000"
 
-frame_cart_outer = tk.Frame(frame_conteudo, bg="#e60000")
-frame_cart_outer.pack(fill="x", pady=(10, 0))
-
-frame_cart = tk.Frame(frame_cart_outer, bg=CART_BG)
-frame_cart.pack(fill="both", expand=True, padx=2, pady=2)
-
-# Cabeçalho
-cab_cart = tk.Frame(frame_cart, bg="#0d0d0d")
-cab_cart.pack(fill="x")
-tk.Label(cab_cart, text="💼  Carteira Pessoal", bg="#0d0d0d", fg=CART_ACC,
-         font=("Arial", 11, "bold"), pady=6).pack(side="left", padx=12)
-btn_atualizar_cart = tk.Button(cab_cart, text="↻ Atualizar", bg=BTN, fg=CART_ACC,
-          font=("Arial", 8, "bold"), relief="flat", cursor="hand2",
-          command=_atualizar_carteira_ui)
-btn_atualizar_cart.pack(side="right", padx=10)
-
-# Formulário de adição
-frame_cart_form = tk.Frame(frame_cart, bg=CART_BG)
-frame_cart_form.pack(fill="x", padx=10, pady=(8,4))
-
-def _mk(parent, texto):
-    tk.Label(parent, text=texto, bg=CART_BG, fg="#aaaaaa",
-             font=("Arial", 7)).pack(anchor="w")
-
-col_t = tk.Frame(frame_cart_form, bg=CART_BG); col_t.pack(side="left", padx=(0,6))
-_mk(col_t, "Ticker")
-entry_cart_ticker = tk.Entry(col_t, width=9, bg=BTN, fg="#888888",
-                              insertbackground=TXT, font=("Arial", 9), justify="center")
-entry_cart_ticker.insert(0, "ex: PETR4")
-entry_cart_ticker.bind("<FocusIn>",  lambda e: limpar_entry_placeholder(entry_cart_ticker, "ex: PETR4"))
-entry_cart_ticker.bind("<FocusOut>", lambda e: restaurar_placeholder(entry_cart_ticker, "ex: PETR4"))
-entry_cart_ticker.pack()
-
-col_q = tk.Frame(frame_cart_form, bg=CART_BG); col_q.pack(side="left", padx=(0,6))
-_mk(col_q, "Quantidade")
-entry_cart_qtd = tk.Entry(col_q, width=9, bg=BTN, fg=TXT,
-                           insertbackground=TXT, font=("Arial", 9), justify="center")
-entry_cart_qtd.insert(0, "100")
-entry_cart_qtd.pack()
-
-col_p = tk.Frame(frame_cart_form, bg=CART_BG); col_p.pack(side="left", padx=(0,6))
-_mk(col_p, "Preço médio (R$)")
-entry_cart_pm = tk.Entry(col_p, width=9, bg=BTN, fg=TXT,
-                          insertbackground=TXT, font=("Arial", 9), justify="center")
-entry_cart_pm.insert(0, "30.00")
-entry_cart_pm.pack()
-
-col_d = tk.Frame(frame_cart_form, bg=CART_BG); col_d.pack(side="left", padx=(0,6))
-_mk(col_d, "Data compra")
-entry_cart_data = tk.Entry(col_d, width=11, bg=BTN, fg=TXT,
-                            insertbackground=TXT, font=("Arial", 9), justify="center")
-entry_cart_data.insert(0, "01/01/2025")
-entry_cart_data.pack()
-
-col_b = tk.Frame(frame_cart_form, bg=CART_BG); col_b.pack(side="left", padx=(0,6))
-_mk(col_b, " ")
-tk.Button(col_b, text="＋ Adicionar", bg=CART_ACC, fg="#000000",
-          font=("Arial", 9, "bold"), relief="flat", cursor="hand2",
-          command=_adicionar_posicao).pack()
-
-lbl_cart_status = tk.Label(frame_cart, text="", bg=CART_BG, fg="#cc0000",
-                             font=("Arial", 8), pady=2)
-lbl_cart_status.pack()
-
-# Tabela P&L
-frame_cart_tabela = tk.Frame(frame_cart, bg=CART_BG)
-frame_cart_tabela.pack(fill="x", padx=4, pady=(0,4))
-
-
-# -- Separador visual entre ações e CDBs --
-tk.Frame(frame_cart, bg="#2e2e2e", height=2).pack(fill="x", padx=10, pady=(8,0))
-
-# Cabeçalho CDB
-cab_cdb_cart = tk.Frame(frame_cart, bg="#0d0d0d")
-cab_cdb_cart.pack(fill="x")
-tk.Label(cab_cdb_cart, text="🏦  CDBs na Carteira", bg="#0d0d0d", fg="#e60000",
-         font=("Arial", 10, "bold"), pady=5).pack(side="left", padx=12)
-
-# Formulário CDB
-frame_cdb_cart_form = tk.Frame(frame_cart, bg=CART_BG)
-frame_cdb_cart_form.pack(fill="x", padx=10, pady=(6, 4))
-
-def _mk_cdb(parent, texto):
-    tk.Label(parent, text=texto, bg=CART_BG, fg="#aaaaaa",
-             font=("Arial", 7)).pack(anchor="w")
-
-cdb_c1 = tk.Frame(frame_cdb_cart_form, bg=CART_BG); cdb_c1.pack(side="left", padx=(0,6))
-_mk_cdb(cdb_c1, "Nome / Banco")
-entry_cdb_nome = tk.Entry(cdb_c1, width=14, bg=BTN, fg="#888888",
-                           insertbackground=TXT, font=("Arial", 9), justify="center")
-entry_cdb_nome.insert(0, "ex: Nubank CDB")
-entry_cdb_nome.bind("<FocusIn>",  lambda e: limpar_entry_placeholder(entry_cdb_nome, "ex: Nubank CDB"))
-entry_cdb_nome.bind("<FocusOut>", lambda e: restaurar_placeholder(entry_cdb_nome, "ex: Nubank CDB"))
-entry_cdb_nome.pack()
-
-cdb_c2 = tk.Frame(frame_cdb_cart_form, bg=CART_BG); cdb_c2.pack(side="left", padx=(0,6))
-_mk_cdb(cdb_c2, "Valor aplicado (R$)")
-entry_cdb_valor = tk.Entry(cdb_c2, width=11, bg=BTN, fg=TXT,
-                            insertbackground=TXT, font=("Arial", 9), justify="center")
-entry_cdb_valor.insert(0, "5000")
-entry_cdb_valor.pack()
-
-cdb_c3 = tk.Frame(frame_cdb_cart_form, bg=CART_BG); cdb_c3.pack(side="left", padx=(0,6))
-_mk_cdb(cdb_c3, "% do CDI")
-entry_cdb_pct = tk.Entry(cdb_c3, width=8, bg=BTN, fg=TXT,
-                          insertbackground=TXT, font=("Arial", 9), justify="center")
-entry_cdb_pct.insert(0, "110")
-entry_cdb_pct.pack()
-
-cdb_c4 = tk.Frame(frame_cdb_cart_form, bg=CART_BG); cdb_c4.pack(side="left", padx=(0,6))
-_mk_cdb(cdb_c4, "Data aplicação")
-entry_cdb_data = tk.Entry(cdb_c4, width=11, bg=BTN, fg=TXT,
-                           insertbackground=TXT, font=("Arial", 9), justify="center")
-entry_cdb_data.insert(0, "01/01/2025")
-entry_cdb_data.pack()
-
-cdb_c5 = tk.Frame(frame_cdb_cart_form, bg=CART_BG); cdb_c5.pack(side="left", padx=(0,6))
-_mk_cdb(cdb_c5, "Vencimento (opc.)")
-entry_cdb_venc = tk.Entry(cdb_c5, width=11, bg=BTN, fg="#888888",
-                           insertbackground=TXT, font=("Arial", 9), justify="center")
-entry_cdb_venc.insert(0, "DD/MM/AAAA")
-entry_cdb_venc.bind("<FocusIn>",  lambda e: limpar_entry_placeholder(entry_cdb_venc, "DD/MM/AAAA"))
-entry_cdb_venc.bind("<FocusOut>", lambda e: restaurar_placeholder(entry_cdb_venc, "DD/MM/AAAA"))
-entry_cdb_venc.pack()
-
-cdb_c6 = tk.Frame(frame_cdb_cart_form, bg=CART_BG); cdb_c6.pack(side="left", padx=(0,6))
-_mk_cdb(cdb_c6, " ")
-tk.Button(cdb_c6, text="＋ Adicionar CDB", bg="#e60000", fg="#161616",
-          font=("Arial", 9, "bold"), relief="flat", cursor="hand2",
-          command=_adicionar_cdb).pack()
+def _construir_carteira(pai):
+    """Card da carteira (ações + CDBs); a primeira carga de dados sai daqui."""
+    global btn_atualizar_cart, entry_cart_ticker, entry_cart_qtd, entry_cart_pm, \
+           entry_cart_data, lbl_cart_status, frame_cart_tabela, entry_cdb_nome, \
+           entry_cdb_valor, entry_cdb_pct, entry_cdb_data, entry_cdb_venc, lbl_cdb_status, \
+           frame_cdb_cart_tabela, frame_cart_grafico
 
-lbl_cdb_status = tk.Label(frame_cart, text="", bg=CART_BG, fg="#cc0000",
-                            font=("Arial", 8), pady=2)
-lbl_cdb_status.pack()
+    frame_cart_outer = tk.Frame(pai, bg="#e60000")
+    frame_cart_outer.pack(fill="x", pady=(10, 0))
 
-# Tabela CDBs
-frame_cdb_cart_tabela = tk.Frame(frame_cart, bg=CART_BG)
-frame_cdb_cart_tabela.pack(fill="x", padx=4, pady=(0, 10))
+    frame_cart = tk.Frame(frame_cart_outer, bg=CART_BG)
+    frame_cart.pack(fill="both", expand=True, padx=2, pady=2)
 
-# Gráfico evolução
-frame_cart_grafico = tk.Frame(frame_cart, bg=CART_BG)
-frame_cart_grafico.pack(fill="x", padx=4, pady=(0,4))
+    # Cabeçalho
+    cab_cart = tk.Frame(frame_cart, bg="#0d0d0d")
+    cab_cart.pack(fill="x")
+    tk.Label(cab_cart, text="💼  Carteira Pessoal", bg="#0d0d0d", fg=CART_ACC,
+             font=("Arial", 11, "bold"), pady=6).pack(side="left", padx=12)
+    btn_atualizar_cart = tk.Button(cab_cart, text="↻ Atualizar", bg=BTN, fg=CART_ACC,
+              font=("Arial", 8, "bold"), relief="flat", cursor="hand2",
+              command=_atualizar_carteira_ui)
+    btn_atualizar_cart.pack(side="right", padx=10)
+
+    # Formulário de adição
+    frame_cart_form = tk.Frame(frame_cart, bg=CART_BG)
+    frame_cart_form.pack(fill="x", padx=10, pady=(8,4))
+
+    def _mk(parent, texto):
+        tk.Label(parent, text=texto, bg=CART_BG, fg="#aaaaaa",
+                 font=("Arial", 7)).pack(anchor="w")
+
+    col_t = tk.Frame(frame_cart_form, bg=CART_BG); col_t.pack(side="left", padx=(0,6))
+    _mk(col_t, "Ticker")
+    entry_cart_ticker = tk.Entry(col_t, width=9, bg=BTN, fg="#888888",
+                                  insertbackground=TXT, font=("Arial", 9), justify="center")
+    entry_cart_ticker.insert(0, "ex: PETR4")
+    entry_cart_ticker.bind("<FocusIn>",  lambda e: limpar_entry_placeholder(entry_cart_ticker, "ex: PETR4"))
+    entry_cart_ticker.bind("<FocusOut>", lambda e: restaurar_placeholder(entry_cart_ticker, "ex: PETR4"))
+    entry_cart_ticker.pack()
+
+    col_q = tk.Frame(frame_cart_form, bg=CART_BG); col_q.pack(side="left", padx=(0,6))
+    _mk(col_q, "Quantidade")
+    entry_cart_qtd = tk.Entry(col_q, width=9, bg=BTN, fg=TXT,
+                               insertbackground=TXT, font=("Arial", 9), justify="center")
+    entry_cart_qtd.insert(0, "100")
+    entry_cart_qtd.pack()
+
+    col_p = tk.Frame(frame_cart_form, bg=CART_BG); col_p.pack(side="left", padx=(0,6))
+    _mk(col_p, "Preço médio (R$)")
+    entry_cart_pm = tk.Entry(col_p, width=9, bg=BTN, fg=TXT,
+                              insertbackground=TXT, font=("Arial", 9), justify="center")
+    entry_cart_pm.insert(0, "30.00")
+    entry_cart_pm.pack()
+
+    col_d = tk.Frame(frame_cart_form, bg=CART_BG); col_d.pack(side="left", padx=(0,6))
+    _mk(col_d, "Data compra")
+    entry_cart_data = tk.Entry(col_d, width=11, bg=BTN, fg=TXT,
+                                insertbackground=TXT, font=("Arial", 9), justify="center")
+    entry_cart_data.insert(0, "01/01/2025")
+    entry_cart_data.pack()
+
+    col_b = tk.Frame(frame_cart_form, bg=CART_BG); col_b.pack(side="left", padx=(0,6))
+    _mk(col_b, " ")
+    tk.Button(col_b, text="＋ Adicionar", bg=CART_ACC, fg="#000000",
+              font=("Arial", 9, "bold"), relief="flat", cursor="hand2",
+              command=_adicionar_posicao).pack(side="left")
+    tk.Button(col_b, text="📂 Importar", bg=BTN, fg=TXT,
+              font=("Arial", 9), relief="flat", cursor="hand2",
+              command=_importar_extratos).pack(side="left", padx=(4,0))
+
+    lbl_cart_status = tk.Label(frame_cart, text="", bg=CART_BG, fg="#cc0000",
+                                 font=("Arial", 8), pady=2)
+    lbl_cart_status.pack()
+
+    # Tabela P&L
+    frame_cart_tabela = tk.Frame(frame_cart, bg=CART_BG)
+    frame_cart_tabela.pack(fill="x", padx=4, pady=(0,4))
+
+
+    # -- Separador visual entre ações e CDBs --
+    tk.Frame(frame_cart, bg="#2e2e2e", height=2).pack(fill="x", padx=10, pady=(8,0))
+
+    # Cabeçalho CDB
+    cab_cdb_cart = tk.Frame(frame_cart, bg="#0d0d0d")
+    cab_cdb_cart.pack(fill="x")
+    tk.Label(cab_cdb_cart, text="🏦  CDBs na Carteira", bg="#0d0d0d", fg="#e60000",
+             font=("Arial", 10, "bold"), pady=5).pack(side="left", padx=12)
+
+    # Formulário CDB
+    frame_cdb_cart_form = tk.Frame(frame_cart, bg=CART_BG)
+    frame_cdb_cart_form.pack(fill="x", padx=10, pady=(6, 4))
+
+    def _mk_cdb(parent, texto):
+        tk.Label(parent, text=texto, bg=CART_BG, fg="#aaaaaa",
+                 font=("Arial", 7)).pack(anchor="w")
+
+    cdb_c1 = tk.Frame(frame_cdb_cart_form, bg=CART_BG); cdb_c1.pack(side="left", padx=(0,6))
+    _mk_cdb(cdb_c1, "Nome / Banco")
+    entry_cdb_nome = tk.Entry(cdb_c1, width=14, bg=BTN, fg="#888888",
+                               insertbackground=TXT, font=("Arial", 9), justify="center")
+    entry_cdb_nome.insert(0, "ex: Nubank CDB")
+    entry_cdb_nome.bind("<FocusIn>",  lambda e: limpar_entry_placeholder(entry_cdb_nome, "ex: Nubank CDB"))
+    entry_cdb_nome.bind("<FocusOut>", lambda e: restaurar_placeholder(entry_cdb_nome, "ex: Nubank CDB"))
+    entry_cdb_nome.pack()
+
+    cdb_c2 = tk.Frame(frame_cdb_cart_form, bg=CART_BG); cdb_c2.pack(side="left", padx=(0,6))
+    _mk_cdb(cdb_c2, "Valor aplicado (R$)")
+    entry_cdb_valor = tk.Entry(cdb_c2, width=11, bg=BTN, fg=TXT,
+                                insertbackground=TXT, font=("Arial", 9), justify="center")
+    entry_cdb_valor.insert(0, "5000")
+    entry_cdb_valor.pack()
+
+    cdb_c3 = tk.Frame(frame_cdb_cart_form, bg=CART_BG); cdb_c3.pack(side="left", padx=(0,6))
+    _mk_cdb(cdb_c3, "% do CDI")
+    entry_cdb_pct = tk.Entry(cdb_c3, width=8, bg=BTN, fg=TXT,
+                              insertbackground=TXT, font=("Arial", 9), justify="center")
+    entry_cdb_pct.insert(0, "110")
+    entry_cdb_pct.pack()
+
+    cdb_c4 = tk.Frame(frame_cdb_cart_form, bg=CART_BG); cdb_c4.pack(side="left", padx=(0,6))
+    _mk_cdb(cdb_c4, "Data aplicação")
+    entry_cdb_data = tk.Entry(cdb_c4, width=11, bg=BTN, fg=TXT,
+                               insertbackground=TXT, font=("Arial", 9), justify="center")
+    entry_cdb_data.insert(0, "01/01/2025")
+    entry_cdb_data.pack()
+
+    cdb_c5 = tk.Frame(frame_cdb_cart_form, bg=CART_BG); cdb_c5.pack(side="left", padx=(0,6))
+    _mk_cdb(cdb_c5, "Vencimento (opc.)")
+    entry_cdb_venc = tk.Entry(cdb_c5, width=11, bg=BTN, fg="#888888",
+                               insertbackground=TXT, font=("Arial", 9), justify="center")
+    entry_cdb_venc.insert(0, "DD/MM/AAAA")
+    entry_cdb_venc.bind("<FocusIn>",  lambda e: limpar_entry_placeholder(entry_cdb_venc, "DD/MM/AAAA"))
+    entry_cdb_venc.bind("<FocusOut>", lambda e: restaurar_placeholder(entry_cdb_venc, "DD/MM/AAAA"))
+    entry_cdb_venc.pack()
+
+    cdb_c6 = tk.Frame(frame_cdb_cart_form, bg=CART_BG); cdb_c6.pack(side="left", padx=(0,6))
+    _mk_cdb(cdb_c6, " ")
+    tk.Button(cdb_c6, text="＋ Adicionar CDB", bg="#e60000", fg="#161616",
+              font=("Arial", 9, "bold"), relief="flat", cursor="hand2",
+              command=_adicionar_cdb).pack()
+
+    lbl_cdb_status = tk.Label(frame_cart, text="", bg=CART_BG, fg="#cc0000",
+                                font=("Arial", 8), pady=2)
+    lbl_cdb_status.pack()
+
+    # Tabela CDBs
+    frame_cdb_cart_tabela = tk.Frame(frame_cart, bg=CART_BG)
+    frame_cdb_cart_tabela.pack(fill="x", padx=4, pady=(0, 10))
 
+    # Gráfico evolução
+    frame_cart_grafico = tk.Frame(frame_cart, bg=CART_BG)
+    frame_cart_grafico.pack(fill="x", padx=4, pady=(0,4))
 
+    # Se já tem ações salvas, carrega tudo
+    try:
+        if _carteira:
+            _atualizar_carteira_ui()
+        else:
+            _renderizar_carteira({})
+    except Exception:
+        pass
+
+    # Inicializa CDBs
+    try:
+        _renderizar_cdbs()
+    except Exception:
+        pass
+
+_secao_sob_demanda("Carteira Pessoal", 440, _construir_carteira)
 
 # ==============================
 # INICIALIZAR CHECKBOXES PADRÃO
@@ -2760,20 +2781,6 @@ for ticker in ATIVOS_PADRAO:
 # Mostra mensagem inicial no card de insights
 _montar_insights([], frame_insights)
 
-# Se já tem ações salvas, carrega tudo
-try:
-    if _carteira:
-        _atualizar_carteira_ui()
-    else:
-        _renderizar_carteira({})
-except Exception:
-    pass
-
-# Inicializa CDBs
-try:
-    _renderizar_cdbs()
-except Exception:
-    pass
 
 
 
@@ -2783,86 +2790,92 @@ except Exception:
 IA_BG    = "#111111"
 IA_BORDA = "#cc0000"
 
-frame_ia_outer = tk.Frame(frame_conteudo, bg=IA_BORDA)
-frame_ia_outer.pack(fill="x", pady=(10, 0))
-
-frame_ia = tk.Frame(frame_ia_outer, bg=IA_BG)
-frame_ia.pack(fill="both", expand=True, padx=2, pady=2)
-
-# Cabeçalho
-cab_ia = tk.Frame(frame_ia, bg="#0d0d0d")
-cab_ia.pack(fill="x")
-tk.Label(cab_ia, text="🤖  IA Consultora", bg="#0d0d0d", fg=IA_BORDA,
-         font=("Arial", 11, "bold"), pady=6).pack(side="left", padx=12)
-tk.Label(cab_ia, text="Claude → GPT-4o-mini → Gemini  |  fallback automático", bg="#0d0d0d", fg="#555555",
-         font=("Arial", 8)).pack(side="left", padx=4)
-
-# Status das chaves
-def _status_chave(nome, chave):
-    ok  = "✔" if chave else "✘"
-    cor = "#00C896" if chave else "#FF5252"
-    return nome, ok, cor
-
-frame_ia_keys = tk.Frame(cab_ia, bg="#0d0d0d")
-frame_ia_keys.pack(side="right", padx=12)
-for nome, chave in [("Anthropic", ANTHROPIC_API_KEY), ("OpenAI", OPENAI_API_KEY), ("Gemini", GOOGLE_API_KEY)]:
-    n, ok, cor = _status_chave(nome, chave)
-    tk.Label(frame_ia_keys, text=f"{ok} {n}", bg="#0d0d0d", fg=cor,
-             font=("Arial", 8)).pack(side="left", padx=6)
-
-# Campo de pergunta
-frame_ia_input = tk.Frame(frame_ia, bg=IA_BG)
-frame_ia_input.pack(fill="x", padx=10, pady=(8, 4))
-
-tk.Label(frame_ia_input, text="Sua pergunta:", bg=IA_BG, fg="#aaaaaa",
-         font=("Arial", 8)).pack(anchor="w")
-
-frame_ia_row = tk.Frame(frame_ia_input, bg=IA_BG)
-frame_ia_row.pack(fill="x")
-
-entry_ia = tk.Entry(frame_ia_row, bg="#1c1c1c", fg="#e0e0e0",
-                    insertbackground="#e0e0e0", font=("Arial", 10),
-                    relief="flat")
-entry_ia.pack(side="left", fill="x", expand=True, ipady=6, padx=(0, 8))
-entry_ia.insert(0, "Ex: O que você acha da minha carteira atual?")
-entry_ia.bind("<FocusIn>",  lambda e: limpar_entry_placeholder(entry_ia, "Ex: O que você acha da minha carteira atual?"))
-entry_ia.bind("<FocusOut>", lambda e: restaurar_placeholder(entry_ia, "Ex: O que você acha da minha carteira atual?"))
-entry_ia.bind("<Return>", lambda e: _enviar_pergunta_ia())
-
-btn_ia = tk.Button(frame_ia_row, text="✦ Consultar", bg=IA_BORDA, fg="#e0e0e0",
-                   font=("Arial", 9, "bold"), relief="flat", cursor="hand2",
-                   command=lambda: _enviar_pergunta_ia())
-btn_ia.pack(side="left")
-
-# Sugestões rápidas
-frame_ia_sugestoes = tk.Frame(frame_ia, bg=IA_BG)
-frame_ia_sugestoes.pack(fill="x", padx=10, pady=(0, 6))
-tk.Label(frame_ia_sugestoes, text="Sugestões:", bg=IA_BG, fg="#555555",
-         font=("Arial", 7)).pack(side="left", padx=(0, 6))
-
-sugestoes = [
-    "Analise minha carteira",
-    "Qual meu maior risco?",
-    "Estou batendo o CDI?",
-    "Devo diversificar?",
-    "Qual ativo vender?",
-]
-for s in sugestoes:
-    tk.Button(frame_ia_sugestoes, text=s, bg="#2e2e2e", fg="#aaaaaa",
-              font=("Arial", 7), relief="flat", cursor="hand2",
-              command=lambda txt=s: _sugestao_ia(txt)).pack(side="left", padx=2)
+def _construir_ia(pai):
+    """Painel da IA consultora."""
+    global entry_ia, btn_ia, txt_ia
+
+    frame_ia_outer = tk.Frame(pai, bg=IA_BORDA)
+    frame_ia_outer.pack(fill="x", pady=(10, 0))
+
+    frame_ia = tk.Frame(frame_ia_outer, bg=IA_BG)
+    frame_ia.pack(fill="both", expand=True, padx=2, pady=2)
+
+    # Cabeçalho
+    cab_ia = tk.Frame(frame_ia, bg="#0d0d0d")
+    cab_ia.pack(fill="x")
+    tk.Label(cab_ia, text="🤖  IA Consultora", bg="#0d0d0d", fg=IA_BORDA,
+             font=("Arial", 11, "bold"), pady=6).pack(side="left", padx=12)
+    tk.Label(cab_ia, text="Claude → GPT-4o-mini → Gemini  |  fallback automático", bg="#0d0d0d", fg="#555555",
+             font=("Arial", 8)).pack(side="left", padx=4)
+
+    # Status das chaves
+    def _status_chave(nome, chave):
+        ok  = "✔" if chave else "✘"
+        cor = "#00C896" if chave else "#FF5252"
+        return nome, ok, cor
+
+    frame_ia_keys = tk.Frame(cab_ia, bg="#0d0d0d")
+    frame_ia_keys.pack(side="right", padx=12)
+    for nome, chave in [("Anthropic", ANTHROPIC_API_KEY), ("OpenAI", OPENAI_API_KEY), ("Gemini", GOOGLE_API_KEY)]:
+        n, ok, cor = _status_chave(nome, chave)
+        tk.Label(frame_ia_keys, text=f"{ok} {n}", bg="#0d0d0d", fg=cor,
+                 font=("Arial", 8)).pack(side="left", padx=6)
+
+    # Campo de pergunta
+    frame_ia_input = tk.Frame(frame_ia, bg=IA_BG)
+    frame_ia_input.pack(fill="x", padx=10, pady=(8, 4))
+
+    tk.Label(frame_ia_input, text="Sua pergunta:", bg=IA_BG, fg="#aaaaaa",
+             font=("Arial", 8)).pack(anchor="w")
+
+    frame_ia_row = tk.Frame(frame_ia_input, bg=IA_BG)
+    frame_ia_row.pack(fill="x")
+
+    entry_ia = tk.Entry(frame_ia_row, bg="#1c1c1c", fg="#e0e0e0",
+                        insertbackground="#e0e0e0", font=("Arial", 10),
+                        relief="flat")
+    entry_ia.pack(side="left", fill="x", expand=True, ipady=6, padx=(0, 8))
+    entry_ia.insert(0, "Ex: O que você acha da minha carteira atual?")
+    entry_ia.bind("<FocusIn>",  lambda e: limpar_entry_placeholder(entry_ia, "Ex: O que você acha da minha carteira atual?"))
+    entry_ia.bind("<FocusOut>", lambda e: restaurar_placeholder(entry_ia, "Ex: O que você acha da minha carteira atual?"))
+    entry_ia.bind("<Return>", lambda e: _enviar_pergunta_ia())
+
+    btn_ia = tk.Button(frame_ia_row, text="✦ Consultar", bg=IA_BORDA, fg="#e0e0e0",
+                       font=("Arial", 9, "bold"), relief="flat", cursor="hand2",
+                       command=lambda: _enviar_pergunta_ia())
+    btn_ia.pack(side="left")
+
+    # Sugestões rápidas
+    frame_ia_sugestoes = tk.Frame(frame_ia, bg=IA_BG)
+    frame_ia_sugestoes.pack(fill="x", padx=10, pady=(0, 6))
+    tk.Label(frame_ia_sugestoes, text="Sugestões:", bg=IA_BG, fg="#555555",
+             font=("Arial", 7)).pack(side="left", padx=(0, 6))
+
+    sugestoes = [
+        "Analise minha carteira",
+        "Qual meu maior risco?",
+        "Estou batendo o CDI?",
+        "Devo diversificar?",
+        "Qual ativo vender?",
+    ]
+    for s in sugestoes:
+        tk.Button(frame_ia_sugestoes, text=s, bg="#2e2e2e", fg="#aaaaaa",
+                  font=("Arial", 7), relief="flat", cursor="hand2",
+                  command=lambda txt=s: _sugestao_ia(txt)).pack(side="left", padx=2)
+
+    # Área de resposta
+    frame_ia_resp = tk.Frame(frame_ia, bg=IA_BG)
+    frame_ia_resp.pack(fill="x", padx=10, pady=(0, 10))
 
-# Área de resposta
-frame_ia_resp = tk.Frame(frame_ia, bg=IA_BG)
-frame_ia_resp.pack(fill="x", padx=10, pady=(0, 10))
+    txt_ia = tk.Text(frame_ia_resp, bg="#1c1c1c", fg="#e0e0e0",
+                     font=("Arial", 9), relief="flat", wrap="word",
+                     height=8, state="disabled", padx=10, pady=8)
+    txt_ia.pack(fill="x")
 
-txt_ia = tk.Text(frame_ia_resp, bg="#1c1c1c", fg="#e0e0e0",
-                 font=("Arial", 9), relief="flat", wrap="word",
-                 height=8, state="disabled", padx=10, pady=8)
-txt_ia.pack(fill="x")
+    scroll_ia = tk.Scrollbar(frame_ia_resp, command=txt_ia.yview, bg="#2e2e2e")
+    txt_ia.config(yscrollcommand=scroll_ia.set)
 
-scroll_ia = tk.Scrollbar(frame_ia_resp, command=txt_ia.yview, bg="#2e2e2e")
-txt_ia.config(yscrollcommand=scroll_ia.set)
+_secao_sob_demanda("IA Consultora", 330, _construir_ia)
 
 # ── Funções da IA ──
 def _exibir_resposta_ia(texto):
@@ -2884,296 +2897,38 @@ def _enviar_pergunta_ia():
         return
     btn_ia.config(state="disabled", text="⏳ Consultando...")
     _exibir_resposta_ia("⏳ Processando com GPT-4o-mini e Claude Sonnet...")
-    def _rodar():
-        resposta = executar_tarefa_financeira(pergunta)
-        root.after(0, lambda: _exibir_resposta_ia(resposta))
-    threading.Thread(target=_rodar, daemon=True).start()
-
-# ======================================================
-# ETAPA 6 — IA CONSULTORA MULTI-LLM
-# GPT-4o-mini: processa dados brutos → JSON estruturado
-# Claude Sonnet: analisa JSON → resposta qualitativa
-# ======================================================
-
-def _montar_contexto_carteira():
-    """Monta dict com todos os dados atuais da carteira para enviar às IAs."""
-    ctx = {}
-    # Carteira de ações
-    if _carteira:
-        precos = _buscar_precos_carteira(list(_carteira.keys()))
-        rows   = _calcular_pl(_carteira, precos)
-        ctx["acoes"] = [
-            {
-                "ticker":     r["ticker"],
-                "nome":       r["nome"],
-                "qtd":        r["qtd"],
-                "preco_medio":r["pm"],
-                "preco_atual":r["preco_atual"],
-                "custo":      round(r["custo"], 2),
-                "patrimonio": round(r["patrimonio"], 2),
-                "lucro_rs":   round(r["lucro_rs"], 2),
-                "lucro_pct":  round(r["lucro_pct"], 2),
-                "data_compra":r["data_compra"],
-                "cdi_periodo":round(_cdi_desde_compra(r["data_compra"]) or 0, 2),
-            }
-            for r in rows
-        ]
-        ctx["total_custo"]  = round(sum(r["custo"]      for r in rows), 2)
-        ctx["total_patrim"] = round(sum(r["patrimonio"] for r in rows), 2)
-        ctx["total_lucro"]  = round(sum(r["lucro_rs"]   for r in rows), 2)
-    else:
-        ctx["acoes"] = []
-
-    # CDBs
-    ctx["cdbs"] = [
-        {
-            "nome":    c["nome"],
-            "valor":   c["valor"],
-            "pct_cdi": c["pct_cdi"],
-            "data":    c["data"],
-            "rendimento": round(_calcular_rendimento_cdb(c["valor"], c["pct_cdi"], c["data"])[0], 2),
-            "total":      round(_calcular_rendimento_cdb(c["valor"], c["pct_cdi"], c["data"])[1], 2),
-        }
-        for c in _cdbs
-    ]
-
-    # Score e CDI atual
-    ctx["cdi_anual_pct"] = CDI_ANUAL * 100
-    ctx["data_consulta"] = datetime.now().strftime("%d/%m/%Y %H:%M")
-
-    return ctx
-
-
-def _chamar_gpt(prompt_sistema, prompt_usuario):
-    """Chama GPT-4o-mini via requests (sem dependência de SDK)."""
-    import urllib.request, urllib.error
-
-    if len(prompt_usuario) > 8000:
-        prompt_usuario = prompt_usuario[:8000] + "\n...[dados truncados]"
-
-    payload = _json_mod.dumps({
-        "model": "gpt-4o-mini",
-        "messages": [
-            {"role": "system", "content": prompt_sistema},
-            {"role": "user",   "content": prompt_usuario},
-        ],
-        "max_tokens": 800,
-        "temperature": 0.3,
-    }, ensure_ascii=False).encode("utf-8")
-
-    req = urllib.request.Request(
-        "https://api.openai.com/v1/chat/completions",
-        data=payload,
-        headers={
-            "Content-Type":  "application/json",
-            "Authorization": f"Bearer {OPENAI_API_KEY.strip()}",
-        },
-        method="POST",
-    )
-    try:
-        with urllib.request.urlopen(req, timeout=30) as resp:
-            data = _json_mod.loads(resp.read().decode("utf-8"))
-        return data["choices"][0]["message"]["content"]
-    except urllib.error.HTTPError as e:
-        detalhe = e.read().decode("utf-8", errors="replace")
-        raise Exception(f"HTTP {e.code}: {detalhe}")
-
-
-
-
-
-def _chamar_claude(prompt_sistema, prompt_usuario):
-    """Chama Claude Sonnet via requests (sem dependência de SDK)."""
-    import urllib.request, urllib.error
-
-    # Limita tamanho para evitar payload gigante
-    if len(prompt_usuario) > 8000:
-        prompt_usuario = prompt_usuario[:8000] + "\n...[dados truncados]"
-
-    body = {
-        "model": "claude-3-5-sonnet-20241022",
-        "max_tokens": 1024,
-        "system": prompt_sistema,
-        "messages": [
-            {"role": "user", "content": prompt_usuario},
-        ],
-    }
-    payload = _json_mod.dumps(body, ensure_ascii=False).encode("utf-8")
-
-    req = urllib.request.Request(
-        "https://api.anthropic.com/v1/messages",
-        data=payload,
-        headers={
-            "Content-Type":      "application/json",
-            "x-api-key":         ANTHROPIC_API_KEY.strip(),
-            "anthropic-version": "2023-06-01",
-        },
-        method="POST",
-    )
-    try:
-        with urllib.request.urlopen(req, timeout=30) as resp:
-            data = _json_mod.loads(resp.read().decode("utf-8"))
-        return data["content"][0]["text"]
-    except urllib.error.HTTPError as e:
-        detalhe = e.read().decode("utf-8", errors="replace")
-        raise Exception(f"HTTP {e.code}: {detalhe}")
-
-
-def _chamar_gemini(prompt_sistema, prompt_usuario):
-    """Chama Gemini 1.5 Flash via REST puro — sem SDK, só urllib."""
-    import urllib.request, urllib.error
-
-    if len(prompt_usuario) > 8000:
-        prompt_usuario = prompt_usuario[:8000] + "\n...[dados truncados]"
-
-    # Gemini não tem campo system separado — une tudo em um prompt
-    prompt_completo = f"{prompt_sistema}\n\n{prompt_usuario}"
-
-    body = _json_mod.dumps({
-        "contents": [{"parts": [{"text": prompt_completo}]}],
-        "generationConfig": {"maxOutputTokens": 1024, "temperature": 0.4}
-    }, ensure_ascii=False).encode("utf-8")
-
-    chave = os.getenv("GOOGLE_API_KEY", "").strip()
-    # Testa v1 e v1beta com vários modelos — um deles vai funcionar
-    tentativas = [
-        ("v1beta","gemini-2.0-flash-lite"),   # confirmado funcionando
-        ("v1beta","gemini-2.0-flash"),
-        ("v1beta","gemini-1.5-flash-latest"),
-        ("v1",    "gemini-2.0-flash"),
-        ("v1",    "gemini-1.5-flash"),
-    ]
-    ultimo_erro = None
-    for versao, modelo in tentativas:
-        url = (
-            f"https://generativelanguage.googleapis.com/{versao}/models/"
-            f"{modelo}:generateContent?key={chave}"
-        )
-        try:
-            req = urllib.request.Request(
-                url, data=body,
-                headers={"Content-Type": "application/json"},
-                method="POST"
-            )
-            with urllib.request.urlopen(req, timeout=30) as resp:
-                data = _json_mod.loads(resp.read().decode("utf-8"))
-            return data["candidates"][0]["content"]["parts"][0]["text"]
-        except urllib.error.HTTPError as e:
-            corpo = e.read().decode("utf-8", errors="replace")[:200]
-            ultimo_erro = f"HTTP_{e.code} ({versao}/{modelo}): {corpo}"
-            if e.code == 429:
-                raise Exception(f"429: {corpo}")  # propaga imediatamente — sem tentar outros
-            continue
-        except Exception as e:
-            ultimo_erro = str(e)
-            if "429" in str(e):
-                raise  # propaga o 429
-            continue
-    raise Exception(ultimo_erro or "Todos os modelos Gemini falharam")
-
+    _executor.submeter("ia", _servico.consultar_ia, pergunta, CHAVES_IA, nome=pergunta[:30],
+                       chave=pergunta, prioridade=PRIORIDADE_ALTA,
+                       ao_concluir=_exibir_resposta_ia,
+                       ao_erro=lambda e: _exibir_resposta_ia(f"⚠ Erro: {e}"))
 
-def executar_tarefa_financeira(pergunta_usuario):
-    """
-    Pipeline Multi-LLM com fallback automático:
-    - Modo completo: GPT-4o-mini processa → Claude Sonnet analisa
-    - Fallback:      GPT-4o-mini faz tudo sozinho (quando Claude indisponível)
-    - Reativa automaticamente quando Claude voltar a ter créditos
-    """
-    if not OPENAI_API_KEY and not ANTHROPIC_API_KEY:
-        return "⚠ Nenhuma chave de API encontrada. Configure ANTHROPIC_API_KEY e OPENAI_API_KEY no arquivo .env"
+# ==============================
+# ENCERRAMENTO — grava o que estiver na fila antes de sair
+# ==============================
+def _ao_fechar():
+    _executor.fechar()
+    _despacho.fechar()
+    _servico.fechar(timeout=10)
+    root.destroy()
 
-    ctx = _montar_contexto_carteira()
+root.protocol("WM_DELETE_WINDOW", _ao_fechar)
+atexit.register(_servico.fila.fechar)   # saída sem fechar a janela (Ctrl+C etc.)
 
-    PROMPT_CONSULTOR = (
-        "Você é um consultor financeiro especializado no mercado brasileiro. "
-        "Analise os dados da carteira do usuário e responda de forma clara, "
-        "objetiva e personalizada em português. "
-        "Seja direto, use dados concretos da carteira e dê recomendações práticas. "
-        "Não invente dados — use apenas o que foi fornecido."
-    )
+# ==============================
+# TEMPO ATÉ A PRIMEIRA JANELA
+# ==============================
+_inicio.marcar("interface")
 
-    # ── Etapa 1: GPT-4o-mini processa os dados brutos ──
-    dados_processados = None
-    erro_gpt = None
-    if OPENAI_API_KEY:
-        try:
-            sys_gpt = (
-                "Você é um processador de dados financeiros. "
-                "Recebe dados de carteira em JSON e uma pergunta do usuário. "
-                "Retorne APENAS um JSON válido com os campos: "
-                "resumo_numerico (dict com métricas calculadas), "
-                "alertas (list de strings), "
-                "contexto_pergunta (string com dados relevantes para a pergunta)."
-            )
-            usr_gpt = (
-                f"Dados da carteira:\n{_json_mod.dumps(ctx, ensure_ascii=False, indent=2)}\n\n"
-                f"Pergunta do usuário: {pergunta_usuario}"
-            )
-            resposta_gpt = _chamar_gpt(sys_gpt, usr_gpt)
-            resposta_gpt_clean = resposta_gpt.strip()
-            if resposta_gpt_clean.startswith("```"):
-                resposta_gpt_clean = resposta_gpt_clean.split("\n", 1)[1].rsplit("```", 1)[0]
-            dados_processados = _json_mod.loads(resposta_gpt_clean)
-        except Exception as e:
-            erro_gpt = str(e)
-            dados_processados = {"dados_brutos": ctx}
-    else:
-        dados_processados = {"dados_brutos": ctx}
-
-    # ── Etapa 2: tenta Claude Sonnet ──
-    if ANTHROPIC_API_KEY:
-        sys_claude = PROMPT_CONSULTOR
-        usr_claude = (
-            f"Dados processados da carteira:\n{_json_mod.dumps(dados_processados, ensure_ascii=False, indent=2)}\n\n"
-            f"Pergunta do investidor: {pergunta_usuario}"
-        )
-        try:
-            resposta = _chamar_claude(sys_claude, usr_claude)
-            return resposta  # pipeline completo funcionou
-        except Exception as e:
-            erro_str = str(e)
-            # Verifica se é erro de saldo — faz fallback silencioso para GPT
-            eh_saldo = any(k in erro_str for k in ["credit", "billing", "balance", "quota", "429", "low"])
-            if not eh_saldo:
-                return f"⚠ Erro ao chamar Claude: {erro_str}"
-            # Saldo insuficiente — continua para GPT
-
-    # ── Fallback 1: GPT-4o-mini sozinho ──
-    if OPENAI_API_KEY:
-        try:
-            usr_gpt_final = (
-                f"Dados da carteira:\n{_json_mod.dumps(ctx, ensure_ascii=False, indent=2)}\n\n"
-                f"Pergunta do investidor: {pergunta_usuario}"
-            )
-            resposta = _chamar_gpt(PROMPT_CONSULTOR, usr_gpt_final)
-            return f"[GPT-4o-mini] {resposta}"
-        except Exception as e:
-            erro_gpt2 = str(e)
-            eh_saldo_gpt = any(k in erro_gpt2 for k in ["credit", "billing", "quota", "429", "insufficient"])
-            if not eh_saldo_gpt:
-                return f"⚠ Erro no GPT: {erro_gpt2}"
-            # Saldo insuficiente no GPT — tenta Gemini
-
-    # ── Fallback 2: Gemini 1.5 Flash (gratuito) ──
-    if GOOGLE_API_KEY:
-        # Garante que há dados válidos antes de enviar
-        ctx_limpo = {k: v for k, v in ctx.items() if v not in [None, [], {}]}
-        if not ctx_limpo:
-            ctx_limpo = {"aviso": "Carteira vazia — responda de forma genérica sobre investimentos."}
-        try:
-            usr_gemini = (
-                f"Dados da carteira:\n{_json_mod.dumps(ctx_limpo, ensure_ascii=False, indent=2)}\n\n"
-                f"Pergunta do investidor: {pergunta_usuario}"
-            )
-            resposta = _chamar_gemini(PROMPT_CONSULTOR, usr_gemini)
-            return f"[Gemini 1.5 Flash] {resposta}"
-        except Exception as e:
-            erro_str = str(e)
-            print(f"[Gemini] Erro detalhado: {erro_str}")
-            if "429" in erro_str or "quota" in erro_str.lower():
-                return "⏳ Limite do Gemini atingido (15 req/min gratuitas). Aguarde 1 minuto e tente novamente."
-            return f"⚠ Gemini indisponível: {erro_str[:150]}"
+def _primeira_janela(event):
+    if event.widget is not root or _inicio.fases[-1][0] == "primeira janela":
+        return
+    _inicio.marcar("primeira janela")
+    print("[Início] Linha do tempo da abertura:\n" + _inicio.relatorio())
+    if MEDIR_INICIO:
+        root.after(0, _ao_fechar)
 
-    return "⚠ Nenhuma IA disponivel. Claude: console.anthropic.com | GPT: platform.openai.com | Gemini: verifique GOOGLE_API_KEY no .env"
+root.bind("<Map>", _primeira_janela, add="+")
+root.mainloop()
 
-root.mainloop()
\ No newline at end of file
+if MEDIR_INICIO:
+    sys.exit(0 if _inicio.dentro_da_meta() else 1)
@@ -0,0 +1,8 @@
+"""
+Núcleo headless do dashboard de investimentos.
+
+Dados, persistência, análises, IA, gráficos e relatórios que não dependem
+do Tk. investimentos.servico.ServicoInvestimentos reúne tudo para uma pasta
+de dados; o app_investimentos.py é só a interface sobre ele, e o gerador de
+relatórios em lote (python -m investimentos.relatorios) usa as mesmas peças.
+"""
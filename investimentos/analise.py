@@ -0,0 +1,290 @@
+# =============================================================================
+# investimentos.analise — métricas e insights dos ativos
+# Funções puras sobre os DataFrames do yfinance: não importam Tk nem
+# matplotlib, então rodam no dashboard, em relatórios em lote e em workers.
+# =============================================================================
+
+from datetime import datetime
+
+# ==============================
+# CORES DOS ATIVOS
+# ==============================
+CORES_ATIVOS = [
+    "#00E5FF", "#FF9100", "#FF1744", "#76FF03", "#D500F9",
+    "#FFD600", "#00BFA5", "#FF6D00", "#64DD17", "#2979FF",
+    "#FF4081", "#F50057", "#69F0AE", "#EEFF41", "#FF6E40",
+    "#40C4FF", "#B2FF59", "#EA80FC", "#FF80AB", "#CCFF90",
+]
+
+
+# ==============================
+# HELPERS
+# ==============================
+def nome_exibicao(ticker):
+    return ticker.replace(".SA", "").upper()
+
+
+# ==============================
+# ANÁLISE INTELIGENTE
+# ==============================
+def _calcular_analise(dados, selecionados, ordem=None):
+    """
+    Calcula métricas de todos os ativos e retorna lista de dicts.
+    ordem define a cor de cada ativo (posição em CORES_ATIVOS); por padrão
+    é a própria lista de selecionados.
+    """
+    indice   = {t: i for i, t in enumerate(ordem or selecionados)}
+    analises = []
+    for ativo in selecionados:
+        try:
+            serie = (dados["Close"] if len(selecionados) == 1
+                     else dados["Close"][ativo]).dropna()
+            inicio  = float(serie.iloc[0])
+            fim     = float(serie.iloc[-1])
+            retorno = ((fim - inicio) / inicio) * 100
+            vol     = serie.pct_change().std() * 100
+            analises.append({
+                "ticker":  ativo,
+                "nome":    nome_exibicao(ativo),
+                "retorno": retorno,
+                "vol":     vol,
+                "cor":     CORES_ATIVOS[indice.get(ativo, 0) % len(CORES_ATIVOS)]
+            })
+        except Exception:
+            pass
+    return analises
+
+def _classificar_risco(vol):
+    if vol < 1.5:
+        return ("Baixo",  "#00C896")   # verde
+    elif vol < 2.5:
+        return ("Médio",  "#FFD600")   # amarelo
+    else:
+        return ("Alto",   "#FF5252")   # vermelho
+
+
+# ==============================
+# SETORES DOS ATIVOS (para detecção de concentração)
+# ==============================
+SETORES = {
+    "PETR4.SA": "Energia",    "PETR3.SA": "Energia",
+    "PRIO3.SA": "Energia",    "CSAN3.SA": "Energia",
+    "VALE3.SA": "Mineração",  "CSNA3.SA": "Siderurgia",
+    "GGBR4.SA": "Siderurgia",
+    "ITUB4.SA": "Banco",      "BBDC4.SA": "Banco",
+    "BBAS3.SA": "Banco",      "SANB11.SA":"Banco",
+    "BBSE3.SA": "Seguros",
+    "WEGE3.SA": "Indústria",  "EMBR3.SA": "Indústria",
+    "SUZB3.SA": "Papel/Celulose","KLBN11.SA":"Papel/Celulose",
+    "CPFE3.SA": "Elétrico",   "TAEE11.SA":"Elétrico",
+    "EGIE3.SA": "Elétrico",   "ENGI11.SA":"Elétrico",
+    "MGLU3.SA": "Varejo",     "VIIA3.SA": "Varejo",
+    "LREN3.SA": "Varejo",
+    "RENT3.SA": "Aluguel de Veículos",
+    "RADL3.SA": "Farmácia",
+    "HAPV3.SA": "Saúde",      "RDOR3.SA": "Saúde",
+}
+
+# CDI anual base (atualizar conforme necessário)
+CDI_ANUAL = 0.1065
+
+# ==============================
+# 5. ALERTA DE TENDÊNCIA
+# ==============================
+def _tendencia_ativo(serie):
+    """
+    Compara preço atual com MM20.
+    Retorna ('Alta', cor) / ('Queda', cor) / ('Lateral', cor)
+    """
+    if len(serie) < 20:
+        return ("N/D", "#888888")
+    mm20_atual = serie.rolling(20).mean().iloc[-1]
+    preco_atual = serie.iloc[-1]
+    return _tendencia_por_diff((preco_atual - mm20_atual) / mm20_atual * 100)
+
+def _tendencia_por_diff(diff):
+    """Classifica a distância (%) do preço atual para a MM20."""
+    if diff > 1.5:
+        return ("↑ Alta",   "#cc0000")
+    elif diff < -1.5:
+        return ("↓ Queda",  "#FF5252")
+    else:
+        return ("→ Lateral","#e60000")
+
+# ==============================
+# 6. SCORE GERAL DA CARTEIRA (0–10)
+# ==============================
+def _calcular_score(analises):
+    """
+    Nota de 0 a 10 baseada em:
+    - 60% retorno médio normalizado
+    - 40% risco (vol) médio invertido
+    """
+    if not analises:
+        return 0.0
+    ret_medio = sum(a["retorno"] for a in analises) / len(analises)
+    vol_medio = sum(a["vol"]     for a in analises) / len(analises)
+
+    # Normaliza retorno: -20% → 0, +20% → 10
+    score_ret = max(0, min(10, (ret_medio + 20) / 4))
+    # Normaliza risco: vol 0% → 10, vol 4%+ → 0
+    score_vol = max(0, min(10, 10 - vol_medio * 2.5))
+
+    return round(score_ret * 0.6 + score_vol * 0.4, 1)
+
+def _cor_score(score):
+    if score >= 7:   return "#00C896"   # verde
+    elif score >= 4: return "#FFD600"   # amarelo
+    else:            return "#FF5252"   # vermelho
+
+# ==============================
+# 7. COMPARAÇÃO COM CDI
+# ==============================
+def _retorno_cdi_periodo(start_str, end_str):
+    """Calcula quanto o CDI rendeu no período selecionado."""
+    try:
+        d1 = datetime.strptime(start_str, "%Y-%m-%d")
+        d2 = datetime.strptime(end_str,   "%Y-%m-%d")
+        dias = (d2 - d1).days
+        return ((1 + CDI_ANUAL) ** (dias / 365) - 1) * 100
+    except Exception:
+        return None
+
+# ==============================
+# 8. DETECÇÃO DE CONCENTRAÇÃO SETORIAL
+# ==============================
+def _detectar_concentracao(selecionados):
+    """Retorna lista de alertas de concentração (setor com 2+ ativos)."""
+    contagem = {}
+    for t in selecionados:
+        setor = SETORES.get(t, "Outros")
+        contagem[setor] = contagem.get(setor, []) + [nome_exibicao(t)]
+    alertas = []
+    for setor, nomes in contagem.items():
+        if len(nomes) >= 2:
+            alertas.append(f"{setor}: {', '.join(nomes)}")
+    return alertas
+
+# ==============================
+# 9. MELHOR MÊS DA CARTEIRA
+# ==============================
+def _melhor_mes(dados, selecionados):
+    """Retorna o mês com maior retorno médio da carteira."""
+    try:
+        import pandas as pd
+        frames = []
+        for ativo in selecionados:
+            s = (dados["Close"] if len(selecionados)==1
+                 else dados["Close"][ativo]).dropna()
+            frames.append(s.pct_change().dropna())
+
+        carteira = pd.concat(frames, axis=1).mean(axis=1)
+        mensais  = carteira.resample("ME").sum() * 100
+        if mensais.empty:
+            return None, None
+        idx_max  = mensais.idxmax()
+        return idx_max.strftime("%B/%Y"), round(float(mensais.max()), 2)
+    except Exception:
+        return None, None
+
+# ==============================
+# INSIGHTS DO PERÍODO
+# ==============================
+def _gerar_insights_completo(analises, dados, selecionados, start_str, end_str):
+    """Gera frases automáticas completas incluindo tendência, CDI, concentração e melhor mês."""
+    if not analises: return []
+
+    por_retorno = sorted(analises, key=lambda x: x["retorno"], reverse=True)
+    por_vol     = sorted(analises, key=lambda x: x["vol"],     reverse=True)
+    por_estab   = sorted(analises, key=lambda x: x["vol"])
+
+    melhor   = por_retorno[0]
+    pior     = por_retorno[-1]
+    mais_vol = por_vol[0]
+    mais_est = por_estab[0]
+
+    frases = []
+
+    # 🏆 Top performer
+    sinal = "+" if melhor["retorno"] >= 0 else ""
+    frases.append({"icone":"🏆","titulo":"Top performer",
+        "texto": f"{melhor['nome']} apresentou o maior retorno no período ({sinal}{melhor['retorno']:.2f}%).",
+        "cor":"#FFD600"})
+
+    # 📉 Pior desempenho
+    sinal2 = "+" if pior["retorno"] >= 0 else ""
+    frases.append({"icone":"📉","titulo":"Menor retorno",
+        "texto": f"{pior['nome']} teve o menor desempenho ({sinal2}{pior['retorno']:.2f}%).",
+        "cor":"#FF5252"})
+
+    # ⚠ Mais arriscado
+    risco_txt, _ = _classificar_risco(mais_vol["vol"])
+    frases.append({"icone":"⚠","titulo":"Maior risco",
+        "texto": f"{mais_vol['nome']} possui alta volatilidade ({mais_vol['vol']:.2f}%) — risco {risco_txt}.",
+        "cor":"#FF9100"})
+
+    # 🛡 Mais estável
+    frases.append({"icone":"🛡","titulo":"Mais estável",
+        "texto": f"{mais_est['nome']} foi o ativo mais estável (vol. {mais_est['vol']:.2f}%).",
+        "cor":"#00E5FF"})
+
+    # 📊 Visão geral de retornos
+    positivos = sum(1 for a in analises if a["retorno"] > 0)
+    total = len(analises)
+    frases.append({"icone":"📊","titulo":"Visão geral",
+        "texto": f"{positivos} de {total} ativos ({positivos/total*100:.0f}%) tiveram retorno positivo.",
+        "cor":"#aaaaaa"})
+
+    # 5. Tendência por ativo
+    tendencias = {"↑ Alta": [], "↓ Queda": [], "→ Lateral": []}
+    for a in analises:
+        try:
+            serie = (dados["Close"] if len(selecionados)==1
+                     else dados["Close"][a["ticker"]]).dropna()
+            tend, _ = _tendencia_ativo(serie)
+            if tend in tendencias:
+                tendencias[tend].append(a["nome"])
+        except: pass
+    partes = []
+    if tendencias["↑ Alta"]:    partes.append(f"alta: {', '.join(tendencias['↑ Alta'])}")
+    if tendencias["↓ Queda"]:   partes.append(f"queda: {', '.join(tendencias['↓ Queda'])}")
+    if tendencias["→ Lateral"]: partes.append(f"lateral: {', '.join(tendencias['→ Lateral'])}")
+    if partes:
+        frases.append({"icone":"📡","titulo":"Tendências (MM20)",
+            "texto": "  |  ".join(partes).capitalize() + ".",
+            "cor":"#B2FF59"})
+
+    # 6. Score da carteira
+    score = _calcular_score(analises)
+    cor_s = _cor_score(score)
+    frases.append({"icone":"⭐","titulo":"Score da carteira",
+        "texto": f"{score}/10 — baseado em retorno médio e nível de risco dos ativos.",
+        "cor": cor_s})
+
+    # 7. Comparação com CDI
+    if start_str and end_str:
+        cdi_pct = _retorno_cdi_periodo(start_str, end_str)
+        if cdi_pct is not None:
+            ret_medio = sum(a["retorno"] for a in analises) / len(analises)
+            diff = ret_medio - cdi_pct
+            sinal_cdi = "acima" if diff >= 0 else "abaixo"
+            cor_cdi   = "#00C896" if diff >= 0 else "#FF5252"
+            frases.append({"icone":"🏦","titulo":"vs CDI",
+                "texto": f"Retorno médio da carteira ({ret_medio:+.2f}%) ficou {abs(diff):.2f}% {sinal_cdi} do CDI ({cdi_pct:.2f}%) no período.",
+                "cor": cor_cdi})
+
+    # 8. Concentração setorial
+    alertas = _detectar_concentracao(selecionados)
+    if alertas:
+        frases.append({"icone":"⚡","titulo":"Concentração setorial",
+            "texto": "Atenção: " + "; ".join(alertas) + ". Considere diversificar.",
+            "cor":"#FF9915"})
+
+    # 9. Melhor mês
+    mes, ret_mes = _melhor_mes(dados, selecionados)
+    if mes:
+        frases.append({"icone":"📅","titulo":"Melhor mês",
+            "texto": f"O melhor mês da carteira foi {mes} com retorno médio de {ret_mes:+.2f}%.",
+            "cor":"#FFD600"})
+
+    return frases
@@ -0,0 +1,323 @@
+# =============================================================================
+# investimentos.api — servidor HTTP/JSON local sobre o ServicoInvestimentos
+# Os números do dashboard para scripts e outros painéis, sem Tk:
+#
+#   python -m investimentos.api --pasta . --porta 8765
+#   curl localhost:8765/carteira
+#
+# Rotas (GET):
+#   /saude                       versões, idade dos preços, estatísticas do cache
+#   /carteira                    P&L por ativo (_calcular_pl) + CDI desde a compra + totais
+#   /risco                       beta, Sharpe e drawdown por ativo
+#   /resumo                      alertas, score de diversificação e resumo executivo
+#   /cdbs                        CDBs com rendimento acumulado
+#   /historico?inicio=&fim=&pontos=   patrimônio (resolução conforme o período)
+#   /insights?tickers=A,B&inicio=&fim=  análise e insights de um período
+#
+# Respostas ficam em cache por (rota, parâmetros, versões). A versão da
+# carteira muda quando posições/CDBs mudam — aqui ou no app aberto sobre o
+# mesmo historico.db; a dos preços, quando uma nova busca (no máximo uma a
+# cada --ttl segundos) traz valores diferentes. Pedidos simultâneos da mesma
+# chave esperam uma única execução: N clientes, uma ida ao Yahoo.
+# =============================================================================
+
+import json
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from investimentos.analise import _calcular_analise, _calcular_score, _gerar_insights_completo
+from investimentos.carteira import (
+    _calcular_pl, _cdi_desde_compra, _calcular_rendimento_cdb,
+    _gerar_alertas_carteira, _calcular_score_diversificacao, _gerar_resumo_executivo,
+)
+from investimentos.memoria import CacheLRU
+
+TTL_PRECOS = 60          # segundos entre buscas de preço atual
+_FALTA     = object()
+
+
+class ErroPedido(Exception):
+    """Parâmetro inválido — vira HTTP 400."""
+
+
+def _json_padrao(obj):
+    """numpy/pandas → tipos do json (float64, int64, Timestamp...)."""
+    if hasattr(obj, "item"):
+        return obj.item()
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    return str(obj)
+
+
+def _data_param(params, nome, padrao=None):
+    valor = params.get(nome, [padrao])[0]
+    if valor:
+        try:
+            datetime.strptime(valor, "%Y-%m-%d")
+        except ValueError:
+            raise ErroPedido(f"{nome}: use AAAA-MM-DD")
+    return valor
+
+
+class ApiInvestimentos:
+    """Rotas, cache de respostas e busca única por chave. Thread-safe."""
+
+    def __init__(self, servico, ttl_precos=TTL_PRECOS, cache_mb=32):
+        self.servico     = servico
+        self.ttl         = ttl_precos
+        self.respostas   = CacheLRU(cache_mb * 2**20)
+        self.buscas      = 0        # execuções de fato (o resto veio do cache ou de carona)
+        self._lock       = threading.Lock()
+        self._lock_banco = threading.Lock()
+        self._em_voo     = {}       # chave -> Future da execução em andamento
+        self._precos     = {"versao": 0, "em": 0.0, "valores": None, "carteira": None}
+        self.rotas = {
+            "/saude":     self.saude,
+            "/carteira":  self.carteira,
+            "/risco":     self.risco,
+            "/resumo":    self.resumo,
+            "/cdbs":      self.cdbs,
+            "/historico": self.historico,
+            "/insights":  self.insights,
+        }
+
+    # ── Cache e busca única ──
+    def _unico(self, chave, funcao):
+        """Valor em cache ou funcao() — chamadas concorrentes da mesma chave compartilham uma execução."""
+        valor = self.respostas.obter(chave, _FALTA)
+        if valor is not _FALTA:
+            return valor
+        with self._lock:
+            futuro = self._em_voo.get(chave)
+            dono   = futuro is None
+            if dono:
+                futuro = self._em_voo[chave] = Future()
+        if not dono:
+            return futuro.result()
+        try:
+            valor = funcao()
+            with self._lock:
+                self.buscas += 1
+            self.respostas.guardar(chave, valor)
+            futuro.set_result(valor)
+            return valor
+        except BaseException as e:
+            futuro.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._em_voo.pop(chave, None)
+
+    def _versao_carteira(self):
+        with self._lock_banco:
+            self.servico.recarregar_se_mudou()
+            return self.servico.versao
+
+    def _precos_atuais(self):
+        """
+        {ticker: preço} da carteira, rebuscado no máximo a cada ttl segundos.
+        A versão dos preços só sobe quando algum valor muda de fato.
+        """
+        versao_cart = self._versao_carteira()
+        janela      = int(time.time() // self.ttl)
+
+        def _buscar():
+            tickers = list(self.servico.carteira)
+            precos  = self.servico.precos_atuais(tickers) if tickers else {}
+            with self._lock:
+                p = self._precos
+                if precos != p["valores"]:
+                    p["versao"] += 1
+                p.update(valores=precos, em=time.time(), carteira=versao_cart)
+                return precos, p["versao"]
+
+        return self._unico(("precos", versao_cart, janela), _buscar)
+
+    # ── Rotas ──
+    def saude(self, params):
+        return {
+            "versao_carteira": self.servico.versao,
+            "versao_precos":   self._precos["versao"],
+            "idade_precos_s":  round(time.time() - self._precos["em"], 1) if self._precos["em"] else None,
+            "buscas":          self.buscas,
+            "cache":           self.respostas.estatisticas(),
+        }
+
+    def _linhas_pl(self):
+        precos, vp = self._precos_atuais()
+        vc = self.servico.versao
+
+        def _calcular():
+            rows = _calcular_pl(dict(self.servico.carteira), precos)
+            for r in rows:
+                r["tendencia"] = r["tendencia"][0]
+                r["cdi_pct"]   = _cdi_desde_compra(r["data_compra"])
+            return rows
+
+        return self._unico(("pl", vc, vp), _calcular), vc, vp
+
+    def carteira(self, params):
+        rows, vc, vp = self._linhas_pl()
+
+        def _montar():
+            custo  = sum(r["custo"] for r in rows)
+            patrim = sum(r["patrimonio"] for r in rows)
+            return {
+                "posicoes": rows,
+                "totais": {"custo": custo, "patrimonio": patrim, "lucro_rs": patrim - custo,
+                           "lucro_pct": (patrim - custo) / custo * 100 if custo > 0 else 0.0},
+                "sem_preco": [t for t in self.servico.carteira if t not in {r["ticker"] for r in rows}],
+                "precos_em": datetime.fromtimestamp(self._precos["em"]).isoformat(timespec="seconds"),
+            }
+
+        return self._unico(("carteira", vc, vp), _montar)
+
+    def risco(self, params):
+        # fechamentos diários: o resultado só muda com a carteira ou com o dia
+        vc  = self._versao_carteira()
+        dia = datetime.now().strftime("%Y-%m-%d")
+        return self._unico(("risco", vc, dia),
+                           lambda: self.servico.indicadores_risco(dict(self.servico.carteira)))
+
+    def resumo(self, params):
+        rows, vc, vp = self._linhas_pl()
+
+        def _montar():
+            carteira = dict(self.servico.carteira)
+            score, msg = _calcular_score_diversificacao(carteira)
+            return {
+                "alertas": [{"icone": i, "texto": t} for i, t, _ in _gerar_alertas_carteira(rows)],
+                "score_diversificacao": score,
+                "diversificacao": msg,
+                "resumo": _gerar_resumo_executivo(rows, carteira) if rows else "",
+            }
+
+        return self._unico(("resumo", vc, vp), _montar)
+
+    def cdbs(self, params):
+        vc  = self._versao_carteira()
+        dia = datetime.now().strftime("%Y-%m-%d")   # o rendimento corre a cada dia
+
+        def _montar():
+            saida = []
+            for c in list(self.servico.cdbs):
+                rend, total, dias = _calcular_rendimento_cdb(c["valor"], c["pct_cdi"], c["data"])
+                saida.append({**c, "dias": dias, "rendimento": rend, "total": total,
+                              "rent_pct": rend / c["valor"] * 100 if c["valor"] else 0.0})
+            return saida
+
+        return self._unico(("cdbs", vc, dia), _montar)
+
+    def historico(self, params):
+        inicio = _data_param(params, "inicio")
+        fim    = _data_param(params, "fim")
+        try:
+            pontos = int(params.get("pontos", ["400"])[0])
+        except ValueError:
+            raise ErroPedido("pontos: número inteiro")
+        vc = self._versao_carteira()   # sobe também quando o app grava snapshots
+
+        def _montar():
+            resolucao, linhas = self.servico.buscar_historico_periodo(inicio, fim, pontos)
+            return {"resolucao": resolucao, "linhas": linhas}
+
+        return self._unico(("historico", vc, inicio, fim, pontos), _montar)
+
+    def insights(self, params):
+        tickers = [t.strip().upper() for t in ",".join(params.get("tickers", [])).split(",") if t.strip()]
+        tickers = [t if t.endswith(".SA") or t.startswith("^") else t + ".SA" for t in tickers]
+        if not tickers:
+            raise ErroPedido("tickers: informe ao menos um (ex.: tickers=PETR4,VALE3)")
+        hoje   = datetime.now().strftime("%Y-%m-%d")
+        inicio = _data_param(params, "inicio", "2024-01-01")
+        fim    = _data_param(params, "fim", hoje)
+        # períodos que chegam até hoje mudam a cada pregão — os demais são fixos
+        janela = int(time.time() // self.ttl) if fim >= hoje else None
+
+        def _montar():
+            dados = self.servico.baixar(tickers, inicio, fim)
+            if dados is None or dados.empty:
+                return {"analises": [], "insights": [], "score": None}
+            analises = _calcular_analise(dados, tickers)
+            return {
+                "analises": analises,
+                "insights": _gerar_insights_completo(analises, dados, tickers, inicio, fim),
+                "score":    _calcular_score(analises) if analises else None,
+            }
+
+        return self._unico(("insights", tuple(tickers), inicio, fim, janela), _montar)
+
+    # ── Despacho ──
+    def responder(self, caminho):
+        """(status, corpo bytes) para um GET."""
+        url  = urlsplit(caminho)
+        rota = self.rotas.get(url.path.rstrip("/") or "/saude")
+        if rota is None:
+            return 404, {"erro": f"rota desconhecida: {url.path}", "rotas": sorted(self.rotas)}
+        try:
+            return 200, rota(parse_qs(url.query))
+        except ErroPedido as e:
+            return 400, {"erro": str(e)}
+        except Exception as e:
+            return 502, {"erro": f"{type(e).__name__}: {e}"}
+
+
+def _manipulador(api):
+    class Manipulador(BaseHTTPRequestHandler):
+        server_version = "investimentos-api"
+
+        def do_GET(self):
+            status, dados = api.responder(self.path)
+            corpo = json.dumps(dados, ensure_ascii=False, default=_json_padrao).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, formato, *args):
+            pass   # sem uma linha por requisição no console
+
+    return Manipulador
+
+
+def servir(servico, host="127.0.0.1", porta=8765, ttl_precos=TTL_PRECOS):
+    """Sobe o servidor (bloqueia até Ctrl+C) e fecha o serviço na saída."""
+    api = ApiInvestimentos(servico, ttl_precos)
+    servidor = ThreadingHTTPServer((host, porta), _manipulador(api))
+    servidor.daemon_threads = True
+    print(f"API em http://{host}:{porta}/ — rotas: {', '.join(sorted(api.rotas))}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        servico.fechar()
+
+
+def main(argv=None):
+    import argparse
+    import os
+    from investimentos.servico import ServicoInvestimentos
+    parser = argparse.ArgumentParser(
+        description="Servidor HTTP/JSON local com a carteira e as análises do dashboard.")
+    parser.add_argument("--pasta", default=".", help="pasta com historico.db e .cache_precos/")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="interface (padrão: só esta máquina)")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--ttl", type=float, default=TTL_PRECOS,
+                        help="segundos entre buscas de preço atual")
+    args = parser.parse_args(argv)
+
+    servico = ServicoInvestimentos(os.path.abspath(args.pasta),
+                                   cache_memoria_mb=float(os.getenv("CACHE_MEMORIA_MB", "256")))
+    servir(servico, args.host, args.porta, args.ttl)
+
+
+if __name__ == "__main__":
+    main()
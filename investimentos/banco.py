@@ -0,0 +1,679 @@
+# =============================================================================
+# investimentos.banco — camada SQLite do dashboard
+# Uma conexão de escrita persistente (WAL) protegida por lock e um pool
+# pequeno de conexões de leitura emprestadas a cada consulta: o gráfico lê
+# enquanto a carteira grava sem um esperar o outro, e threads de vida curta
+# (servidor HTTP) não deixam conexões abertas para trás. Os snapshots são UPSERTs de um único comando
+# (INSERT ... ON CONFLICT) e podem ser agrupados numa transação com lote().
+# Além do total diário (historico_patrimonio) guarda uma linha por ativo
+# (historico_posicoes) para séries por ticker: valor, peso, lucro...
+# A carteira e os CDBs também moram aqui — cada inclusão/remoção é uma
+# linha numa transação, em vez de reescrever o JSON inteiro.
+# FilaGravacao tira essas escritas da thread do Tk (write-behind com
+# coalescência de rajadas).
+# =============================================================================
+
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# ── Rollups do patrimônio ──
+# resolução -> (início do período, fim do período) em função de uma data.
+# Semana = segunda a domingo.
+PERIODOS_ROLLUP = {
+    "S": ("date({d}, 'weekday 0', '-6 days')", "date({d}, 'weekday 0')"),
+    "M": ("date({d}, 'start of month')",       "date({d}, 'start of month', '+1 month', '-1 day')"),
+    "A": ("date({d}, 'start of year')",        "date({d}, 'start of year', '+1 year', '-1 day')"),
+}
+# dias corridos aproximados de cada ponto (para escolher a resolução)
+DIAS_POR_PONTO = [("D", 365 / 252), ("S", 7), ("M", 365 / 12), ("A", 365)]
+
+def _sql_rollup(res, periodos):
+    """
+    Recalcula os períodos `res` listados em `periodos` (subquery com ini/fim)
+    a partir dos snapshots diários — abertura/fechamento são o primeiro e o
+    último dia do período; custo e lucro são os do fechamento.
+    """
+    def ultimo(col, ordem="DESC"):
+        return (f"(SELECT {col} FROM historico_patrimonio "
+                f"WHERE data BETWEEN b.ini AND b.fim ORDER BY data {ordem} LIMIT 1)")
+    return f"""
+        INSERT OR REPLACE INTO historico_rollup
+            (resolucao, inicio, primeiro, ultimo, abertura, fechamento,
+             minimo, maximo, custo_total, lucro_rs, lucro_pct, n_dias)
+        SELECT '{res}', b.ini, MIN(h.data), MAX(h.data),
+               {ultimo("patrimonio", "ASC")}, {ultimo("patrimonio")},
+               MIN(h.patrimonio), MAX(h.patrimonio),
+               {ultimo("custo_total")}, {ultimo("lucro_rs")}, {ultimo("lucro_pct")},
+               COUNT(*)
+        FROM ({periodos}) b
+        JOIN historico_patrimonio h ON h.data BETWEEN b.ini AND b.fim
+        GROUP BY b.ini
+    """
+
+def _sql_gatilho_rollup(evento):
+    """Trigger que mantém os três rollups a cada INSERT/UPDATE de um snapshot diário."""
+    corpo = ";\n".join(
+        _sql_rollup(res, f"SELECT {ini.format(d='NEW.data')} AS ini, "
+                         f"{fim.format(d='NEW.data')} AS fim")
+        for res, (ini, fim) in PERIODOS_ROLLUP.items())
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS tg_rollup_{evento.lower()}
+        AFTER {evento} ON historico_patrimonio
+        BEGIN
+            {corpo};
+        END
+    """
+
+# Versão do esquema em PRAGMA user_version — cada migração sobe um número
+MIGRACOES = [
+    # 1 — índice único por data (bancos antigos não tinham restrição:
+    #     fica o registro mais recente de cada dia)
+    [
+        """CREATE TABLE IF NOT EXISTS historico_patrimonio (
+               id          INTEGER PRIMARY KEY AUTOINCREMENT,
+               data        TEXT    NOT NULL,
+               custo_total REAL    NOT NULL,
+               patrimonio  REAL    NOT NULL,
+               lucro_rs    REAL    NOT NULL,
+               lucro_pct   REAL    NOT NULL,
+               n_ativos    INTEGER NOT NULL
+           )""",
+        """DELETE FROM historico_patrimonio
+           WHERE id NOT IN (SELECT MAX(id) FROM historico_patrimonio GROUP BY data)""",
+        """CREATE UNIQUE INDEX IF NOT EXISTS ux_historico_data
+           ON historico_patrimonio(data)""",
+    ],
+    # 2 — snapshot diário por ativo
+    [
+        """CREATE TABLE IF NOT EXISTS historico_posicoes (
+               ticker TEXT NOT NULL,
+               data   TEXT NOT NULL,
+               qtd    REAL NOT NULL,
+               preco  REAL NOT NULL,
+               custo  REAL NOT NULL,
+               valor  REAL NOT NULL,
+               PRIMARY KEY (ticker, data)
+           ) WITHOUT ROWID""",
+        """CREATE INDEX IF NOT EXISTS ix_posicoes_data_ticker
+           ON historico_posicoes(data, ticker)""",
+    ],
+    # 3 — carteira e CDBs saem dos JSONs (id preserva a ordem de inclusão)
+    [
+        """CREATE TABLE IF NOT EXISTS carteira (
+               id          INTEGER PRIMARY KEY,
+               ticker      TEXT NOT NULL UNIQUE,
+               qtd         REAL NOT NULL,
+               preco_medio REAL NOT NULL,
+               data_compra TEXT NOT NULL
+           )""",
+        """CREATE TABLE IF NOT EXISTS cdbs (
+               id         INTEGER PRIMARY KEY AUTOINCREMENT,
+               nome       TEXT NOT NULL,
+               valor      REAL NOT NULL,
+               pct_cdi    REAL NOT NULL,
+               data       TEXT NOT NULL,
+               vencimento TEXT NOT NULL DEFAULT '—'
+           )""",
+    ],
+    # 4 — rollups semanal/mensal/anual mantidos por trigger + carga inicial
+    [
+        """CREATE TABLE IF NOT EXISTS historico_rollup (
+               resolucao   TEXT    NOT NULL,   -- S, M ou A
+               inicio      TEXT    NOT NULL,   -- 1º dia do período
+               primeiro    TEXT    NOT NULL,   -- 1º snapshot do período
+               ultimo      TEXT    NOT NULL,   -- último snapshot do período
+               abertura    REAL    NOT NULL,
+               fechamento  REAL    NOT NULL,
+               minimo      REAL    NOT NULL,
+               maximo      REAL    NOT NULL,
+               custo_total REAL    NOT NULL,
+               lucro_rs    REAL    NOT NULL,
+               lucro_pct   REAL    NOT NULL,
+               n_dias      INTEGER NOT NULL,
+               PRIMARY KEY (resolucao, inicio)
+           ) WITHOUT ROWID""",
+        _sql_gatilho_rollup("INSERT"),
+        _sql_gatilho_rollup("UPDATE"),
+    ] + [
+        _sql_rollup(res, f"SELECT DISTINCT {ini.format(d='data')} AS ini, "
+                         f"{fim.format(d='data')} AS fim FROM historico_patrimonio")
+        for res, (ini, fim) in PERIODOS_ROLLUP.items()
+    ],
+    # 5 — marcas de tarefas únicas (ex.: migração dos JSONs), gravadas na
+    #     mesma transação da tarefa
+    [
+        """CREATE TABLE IF NOT EXISTS meta (
+               chave TEXT PRIMARY KEY,
+               valor TEXT NOT NULL
+           ) WITHOUT ROWID""",
+    ],
+]
+VERSAO_ESQUEMA = len(MIGRACOES)
+MAX_LEITORES   = 4   # conexões de leitura abertas ao mesmo tempo
+
+SQL_UPSERT_PATRIMONIO = """
+    INSERT INTO historico_patrimonio
+        (data, custo_total, patrimonio, lucro_rs, lucro_pct, n_ativos)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(data) DO UPDATE SET
+        custo_total = excluded.custo_total,
+        patrimonio  = excluded.patrimonio,
+        lucro_rs    = excluded.lucro_rs,
+        lucro_pct   = excluded.lucro_pct,
+        n_ativos    = excluded.n_ativos
+"""
+
+SQL_LIMPAR_POSICOES = "DELETE FROM historico_posicoes WHERE data = ?"
+
+SQL_INSERIR_POSICAO = """
+    INSERT INTO historico_posicoes (ticker, data, qtd, preco, custo, valor)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+# Expressões aceitas em serie_posicao() — "peso" é % do patrimônio do dia
+CAMPOS_POSICAO = {
+    "qtd":   "p.qtd",
+    "preco": "p.preco",
+    "custo": "p.custo",
+    "valor": "p.valor",
+    "lucro": "p.valor - p.custo",
+    "peso":  "p.valor * 100.0 / NULLIF(h.patrimonio, 0)",
+}
+
+SQL_UPSERT_POSICAO = """
+    INSERT INTO carteira (ticker, qtd, preco_medio, data_compra)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(ticker) DO UPDATE SET
+        qtd         = excluded.qtd,
+        preco_medio = excluded.preco_medio,
+        data_compra = excluded.data_compra
+"""
+
+SQL_INSERIR_CDB = """
+    INSERT INTO cdbs (id, nome, valor, pct_cdi, data, vencimento)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+# Backfill nunca sobrescreve um snapshot real (feito com o preço do momento)
+SQL_BACKFILL_PATRIMONIO = """
+    INSERT INTO historico_patrimonio
+        (data, custo_total, patrimonio, lucro_rs, lucro_pct, n_ativos)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(data) DO NOTHING
+"""
+
+SQL_BACKFILL_POSICAO = """
+    INSERT INTO historico_posicoes (ticker, data, qtd, preco, custo, valor)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(ticker, data) DO NOTHING
+"""
+
+SQL_HISTORICO = """
+    SELECT data, custo_total, patrimonio, lucro_rs, lucro_pct, n_ativos
+    FROM historico_patrimonio
+    ORDER BY data DESC
+    LIMIT ?
+"""
+
+
+class Banco:
+    """
+    Acesso ao historico.db compartilhado entre threads.
+    Escritas passam pela conexão única (serializadas pelo lock);
+    leituras pegam emprestada uma conexão do pool (no máximo MAX_LEITORES).
+    """
+
+    def __init__(self, caminho, duravel=False):
+        self.caminho    = caminho
+        self._lock      = threading.RLock()
+        self._nivel     = 0               # profundidade de lote() aninhado
+        self._livres    = queue.LifoQueue()   # conexões de leitura ociosas
+        self._vagas     = threading.BoundedSemaphore(MAX_LEITORES)
+        self._leitores  = []                  # todas as abertas (para fechar())
+        # isolation_level=None: as transações são abertas explicitamente em lote()
+        self._conn = sqlite3.connect(caminho, check_same_thread=False,
+                                     isolation_level=None, cached_statements=256)
+        self._configurar(self._conn)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        if duravel:
+            # fsync a cada COMMIT — barato quando quem grava é a FilaGravacao
+            self._conn.execute("PRAGMA synchronous=FULL")
+        self._migrar()
+
+    @staticmethod
+    def _configurar(conn):
+        conn.execute("PRAGMA synchronous=NORMAL")   # em WAL não perde dados em queda do app
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.execute("PRAGMA temp_store=MEMORY")
+
+    # ── Esquema ──
+    def _migrar(self):
+        versao = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        for n, comandos in enumerate(MIGRACOES[versao:], start=versao + 1):
+            with self.lote() as conn:
+                for sql in comandos:
+                    conn.execute(sql)
+                conn.execute(f"PRAGMA user_version={n}")
+
+    # ── Transações ──
+    @contextmanager
+    def lote(self):
+        """
+        Agrupa várias escritas numa transação só (um commit no fim).
+        Pode ser aninhado: só o lote mais externo faz o COMMIT.
+        """
+        with self._lock:
+            if self._nivel == 0:
+                self._conn.execute("BEGIN IMMEDIATE")
+            self._nivel += 1
+            try:
+                yield self._conn
+            except BaseException:
+                self._nivel -= 1
+                if self._nivel == 0:
+                    self._conn.execute("ROLLBACK")
+                raise
+            self._nivel -= 1
+            if self._nivel == 0:
+                self._conn.execute("COMMIT")
+
+    @contextmanager
+    def _leitura(self):
+        """
+        Empresta uma conexão de leitura do pool (WAL: não bloqueia nem é
+        bloqueada pela escrita). Com todas em uso, espera uma voltar.
+        """
+        self._vagas.acquire()
+        try:
+            try:
+                conn = self._livres.get_nowait()
+            except queue.Empty:
+                conn = sqlite3.connect(self.caminho, check_same_thread=False,
+                                       cached_statements=256)
+                self._configurar(conn)
+                with self._lock:
+                    self._leitores.append(conn)
+            try:
+                yield conn
+            finally:
+                self._livres.put(conn)
+        finally:
+            self._vagas.release()
+
+    # ── Patrimônio ──
+    def registrar_patrimonio(self, custo_total, patrimonio, lucro_rs, lucro_pct,
+                             n_ativos, data=None):
+        """UPSERT do snapshot do dia (um por data)."""
+        data = data or datetime.now().strftime("%Y-%m-%d")
+        self.registrar_patrimonios([(data, custo_total, patrimonio, lucro_rs, lucro_pct, n_ativos)])
+
+    def registrar_patrimonios(self, linhas):
+        """Vários snapshots (data, custo, patrimônio, lucro R$, lucro %, nº ativos) numa transação."""
+        with self.lote() as conn:
+            conn.executemany(SQL_UPSERT_PATRIMONIO, linhas)
+
+    def registrar_snapshot(self, custo_total, patrimonio, lucro_rs, lucro_pct,
+                           posicoes, data=None):
+        """
+        Snapshot do dia completo: linha agregada + uma linha por ativo,
+        na mesma transação. posicoes = [(ticker, qtd, preço, custo, valor)].
+        As posições do dia são substituídas (ativo removido some do snapshot).
+        """
+        data = data or datetime.now().strftime("%Y-%m-%d")
+        with self.lote() as conn:
+            conn.execute(SQL_UPSERT_PATRIMONIO,
+                         (data, custo_total, patrimonio, lucro_rs, lucro_pct, len(posicoes)))
+            conn.execute(SQL_LIMPAR_POSICOES, (data,))
+            conn.executemany(SQL_INSERIR_POSICAO,
+                             [(t, data, q, p, c, v) for t, q, p, c, v in posicoes])
+
+    def preencher_historico(self, totais, posicoes):
+        """Backfill em massa (uma transação); dias já registrados ficam como estão."""
+        with self.lote() as conn:
+            conn.executemany(SQL_BACKFILL_PATRIMONIO, totais)
+            conn.executemany(SQL_BACKFILL_POSICAO, posicoes)
+
+    def datas_registradas(self, inicio, fim):
+        """Datas (AAAA-MM-DD) com snapshot entre inicio e fim, inclusivos."""
+        with self._leitura() as conn:
+            rows = conn.execute("""
+                SELECT data FROM historico_patrimonio WHERE data BETWEEN ? AND ?
+            """, (inicio, fim)).fetchall()
+        return {r[0] for r in rows}
+
+    def buscar_historico_periodo(self, inicio=None, fim=None, max_pontos=400):
+        """
+        Histórico entre inicio e fim (AAAA-MM-DD) na resolução mais fina que
+        caiba em max_pontos: diário, semanal, mensal ou anual (rollups).
+        Retorna (resolução "D"/"S"/"M"/"A", lista de dicts em ordem cronológica);
+        patrimonio é o fechamento do período.
+        """
+        with self._leitura() as conn:
+            if inicio is None:
+                inicio = conn.execute("SELECT MIN(data) FROM historico_patrimonio").fetchone()[0]
+                if inicio is None:
+                    return "D", []
+            fim  = fim or datetime.now().strftime("%Y-%m-%d")
+            span = (datetime.strptime(fim, "%Y-%m-%d") - datetime.strptime(inicio, "%Y-%m-%d")).days + 1
+            res  = next((r for r, dias in DIAS_POR_PONTO if span / dias <= max_pontos), "A")
+
+            if res == "D":
+                rows = conn.execute("""
+                    SELECT data, patrimonio, patrimonio, patrimonio, patrimonio,
+                           custo_total, lucro_rs, lucro_pct
+                    FROM historico_patrimonio
+                    WHERE data BETWEEN ? AND ? ORDER BY data
+                """, (inicio, fim)).fetchall()
+            else:
+                # períodos que cruzam as bordas entram inteiros
+                ini_p = conn.execute(f"SELECT {PERIODOS_ROLLUP[res][0].format(d='?')}",
+                                     (inicio,)).fetchone()[0]
+                rows = conn.execute("""
+                    SELECT inicio, abertura, fechamento, minimo, maximo,
+                           custo_total, lucro_rs, lucro_pct
+                    FROM historico_rollup
+                    WHERE resolucao = ? AND inicio BETWEEN ? AND ? ORDER BY inicio
+                """, (res, ini_p, fim)).fetchall()
+        return res, [
+            {
+                "data":        r[0],
+                "abertura":    r[1],
+                "patrimonio":  r[2],
+                "minimo":      r[3],
+                "maximo":      r[4],
+                "custo_total": r[5],
+                "lucro_rs":    r[6],
+                "lucro_pct":   r[7],
+            }
+            for r in rows
+        ]
+
+    def buscar_historico(self, dias=90):
+        """Últimos N snapshots em ordem cronológica, como lista de dicts."""
+        with self._leitura() as conn:
+            rows = conn.execute(SQL_HISTORICO, (dias,)).fetchall()
+        return [
+            {
+                "data":        r[0],
+                "custo_total": r[1],
+                "patrimonio":  r[2],
+                "lucro_rs":    r[3],
+                "lucro_pct":   r[4],
+                "n_ativos":    r[5],
+            }
+            for r in reversed(rows)  # ordem cronológica
+        ]
+
+    def serie_posicao(self, ticker, inicio=None, fim=None, campo="valor"):
+        """
+        Série diária de um ativo entre inicio e fim (AAAA-MM-DD, inclusivos),
+        pronta para plotar: (datas datetime64[D], valores float64).
+        campo: qtd, preco, custo, valor, lucro ou peso (% do patrimônio).
+        """
+        import numpy as np
+
+        expr = CAMPOS_POSICAO[campo]
+        with self._leitura() as conn:
+            rows = conn.execute(f"""
+                SELECT p.data, {expr}
+                FROM historico_posicoes p
+                JOIN historico_patrimonio h ON h.data = p.data
+                WHERE p.ticker = ? AND p.data BETWEEN ? AND ?
+                ORDER BY p.data
+            """, (ticker, inicio or "0000-00-00", fim or "9999-12-31")).fetchall()
+        datas   = np.array([r[0] for r in rows], dtype="datetime64[D]")
+        valores = np.fromiter((np.nan if r[1] is None else r[1] for r in rows),
+                              dtype="float64", count=len(rows))
+        return datas, valores
+
+    def composicao(self, data):
+        """Posições registradas numa data: {ticker: (qtd, preço, custo, valor)}."""
+        with self._leitura() as conn:
+            rows = conn.execute("""
+                SELECT ticker, qtd, preco, custo, valor
+                FROM historico_posicoes WHERE data = ?
+            """, (data,)).fetchall()
+        return {r[0]: tuple(r[1:]) for r in rows}
+
+    # ── Carteira e CDBs ──
+    def carregar_carteira(self):
+        """{ticker: {qtd, preco_medio, data_compra}} na ordem de inclusão."""
+        with self._leitura() as conn:
+            rows = conn.execute("""
+                SELECT ticker, qtd, preco_medio, data_compra FROM carteira ORDER BY id
+            """).fetchall()
+        return {r[0]: {"qtd": r[1], "preco_medio": r[2], "data_compra": r[3]} for r in rows}
+
+    def salvar_posicao(self, ticker, pos):
+        """Insere ou atualiza uma posição (a ordem original é mantida)."""
+        with self.lote() as conn:
+            conn.execute(SQL_UPSERT_POSICAO,
+                         (ticker, pos["qtd"], pos["preco_medio"], pos["data_compra"]))
+
+    def remover_posicao(self, ticker):
+        with self.lote() as conn:
+            conn.execute("DELETE FROM carteira WHERE ticker = ?", (ticker,))
+
+    def importar_posicoes(self, upserts, remover=()):
+        """Resultado de uma importação de extratos: tudo numa transação (ou nada)."""
+        with self.lote() as conn:
+            conn.executemany(SQL_UPSERT_POSICAO, [
+                (t, p["qtd"], p["preco_medio"], p["data_compra"]) for t, p in upserts.items()
+            ])
+            conn.executemany("DELETE FROM carteira WHERE ticker = ?", [(t,) for t in remover])
+
+    def carregar_cdbs(self):
+        """Lista de dicts {id, nome, valor, pct_cdi, data, vencimento}."""
+        with self._leitura() as conn:
+            rows = conn.execute("""
+                SELECT id, nome, valor, pct_cdi, data, vencimento FROM cdbs ORDER BY id
+            """).fetchall()
+        return [
+            {"id": r[0], "nome": r[1], "valor": r[2], "pct_cdi": r[3],
+             "data": r[4], "vencimento": r[5]}
+            for r in rows
+        ]
+
+    def inserir_cdb(self, cdb):
+        """Grava um CDB (com o id do dict, se houver) e devolve o id."""
+        with self.lote() as conn:
+            cur = conn.execute(SQL_INSERIR_CDB, (cdb.get("id"), cdb["nome"], cdb["valor"],
+                                                 cdb["pct_cdi"], cdb["data"],
+                                                 cdb.get("vencimento", "—")))
+            return cur.lastrowid
+
+    def ultimo_id_cdb(self):
+        """Maior id de CDB já usado (inclusive removidos) — ids novos nunca se repetem."""
+        with self._leitura() as conn:
+            row = conn.execute(
+                "SELECT seq FROM sqlite_sequence WHERE name = 'cdbs'").fetchone()
+        return row[0] if row else 0
+
+    def remover_cdb(self, cdb_id):
+        with self.lote() as conn:
+            conn.execute("DELETE FROM cdbs WHERE id = ?", (cdb_id,))
+
+    def importar_legado(self, carteira, cdbs):
+        """
+        Migração dos JSONs antigos: tudo numa transação (ou nada), junto com a
+        marca em `meta` — os JSONs continuam no lugar e a próxima abertura
+        não importa os CDBs de novo. False se já tinha sido feita.
+        """
+        with self.lote() as conn:
+            if conn.execute("SELECT 1 FROM meta WHERE chave = 'legado_json'").fetchone():
+                return False
+            conn.execute("INSERT INTO meta (chave, valor) VALUES ('legado_json', ?)",
+                         (datetime.now().isoformat(timespec="seconds"),))
+            conn.executemany(SQL_UPSERT_POSICAO, [
+                (t, p["qtd"], p["preco_medio"], p["data_compra"]) for t, p in carteira.items()
+            ])
+            conn.executemany(SQL_INSERIR_CDB, [
+                (None, c["nome"], c["valor"], c["pct_cdi"], c["data"], c.get("vencimento", "—"))
+                for c in cdbs
+            ])
+        return True
+
+    def legado_importado(self):
+        """True se importar_legado() já rodou neste banco."""
+        with self._leitura() as conn:
+            return conn.execute("SELECT 1 FROM meta WHERE chave = 'legado_json'").fetchone() is not None
+
+    def versao_dados(self):
+        """
+        PRAGMA data_version da conexão de escrita: muda quando OUTRA conexão
+        (ex.: o app aberto em paralelo) faz commit no arquivo.
+        """
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def fechar(self):
+        with self._lock:
+            for conn in self._leitores:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._leitores.clear()
+            self._livres = queue.LifoQueue()
+            self._conn.close()
+
+
+class FilaGravacao:
+    """
+    Write-behind para o Banco: a UI enfileira a mudança e volta na hora;
+    uma thread grava em segundo plano. Eventos com a mesma chave se fundem
+    (vale o último), e tudo que chega dentro de `janela` segundos vai numa
+    transação só — dez remoções seguidas viram um COMMIT.
+    A ordem de gravação é a de chegada, também quando algo falha:
+      - erro transitório (sqlite3.OperationalError: banco travado por outro
+        processo, disco...) devolve a mudança e as seguintes ao começo da
+        fila, na mesma ordem, e tenta de novo a cada `pausa_erro` até fechar();
+      - erro permanente (IntegrityError, dado inválido) descarta só aquela
+        mudança e avisa ao_descartar(chave, erro) — as outras seguem.
+    """
+
+    def __init__(self, banco, janela=0.2, pausa_erro=1.0, ao_descartar=None):
+        self.banco     = banco
+        self.janela    = janela
+        self.pausa_erro   = pausa_erro
+        self.ao_descartar = ao_descartar   # chamado da thread de gravação
+        self.eventos   = 0     # mudanças recebidas
+        self.commits   = 0     # transações gravadas
+        self.descartes = 0     # mudanças abandonadas por erro permanente
+        self._cond     = threading.Condition()
+        self._pendentes = {}   # chave -> (funcao, args), na ordem da última mudança
+        self._gravando = False
+        self._urgente  = False
+        self._ativa    = True
+        self._thread   = threading.Thread(target=self._loop, name="gravacao-sqlite",
+                                          daemon=True)
+        self._thread.start()
+
+    def enfileirar(self, chave, funcao, *args):
+        """Agenda funcao(*args); substitui o que estiver pendente com a mesma chave."""
+        with self._cond:
+            self._pendentes.pop(chave, None)
+            self._pendentes[chave] = (funcao, args)
+            self.eventos += 1
+            self._cond.notify_all()
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._pendentes and self._ativa:
+                    self._cond.wait()
+                if not self._pendentes:
+                    return
+                # junta a rajada (a menos que alguém esteja esperando o flush)
+                fim = time.monotonic() + self.janela
+                while not self._urgente and self._ativa:
+                    resta = fim - time.monotonic()
+                    if resta <= 0:
+                        break
+                    self._cond.wait(resta)
+                lote, self._pendentes = self._pendentes, {}
+                self._gravando = True
+
+            resto, erro = self._gravar(lote)
+
+            with self._cond:
+                if resto:
+                    # volta na frente, na ordem original; o que já tem versão
+                    # mais nova pendente fica com a nova (que veio depois)
+                    self._pendentes = {**{k: v for k, v in resto.items()
+                                          if k not in self._pendentes},
+                                       **self._pendentes}
+                    if not self._ativa:
+                        print(f"[SQLite] Encerrando com {len(self._pendentes)} "
+                              f"mudança(s) não gravada(s): {erro}")
+                        self._gravando = False
+                        self._cond.notify_all()
+                        return
+                self._gravando = False
+                self._cond.notify_all()
+                if resto:
+                    self._cond.wait(self.pausa_erro)   # fechar() acorda antes
+
+    def _gravar(self, lote):
+        """
+        Grava o lote numa transação; se falhar, uma por uma, em ordem.
+        Retorna (mudanças a tentar de novo, erro transitório) — vazio se
+        tudo foi gravado ou descartado.
+        """
+        try:
+            with self.banco.lote():
+                for funcao, args in lote.values():
+                    funcao(*args)
+            self.commits += 1
+            return {}, None
+        except sqlite3.OperationalError as e:
+            print(f"[SQLite] Banco indisponível, tentando de novo ({len(lote)} mudança(s)): {e}")
+            return lote, e
+        except Exception as e:
+            print(f"[SQLite] Erro na gravação em segundo plano ({len(lote)} mudança(s)): {e}")
+        itens = list(lote.items())
+        for i, (chave, (funcao, args)) in enumerate(itens):
+            try:
+                with self.banco.lote():
+                    funcao(*args)
+                self.commits += 1
+            except sqlite3.OperationalError as e:
+                return dict(itens[i:]), e
+            except Exception as e:
+                print(f"[SQLite] Descartando gravação {chave!r}: {e}")
+                self.descartes += 1
+                if self.ao_descartar is not None:
+                    try:
+                        self.ao_descartar(chave, e)
+                    except Exception:
+                        pass
+        return {}, None
+
+    def esvaziar(self, timeout=None):
+        """Bloqueia até tudo que foi enfileirado estar no disco. False se estourar o timeout."""
+        limite = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._urgente = True
+            self._cond.notify_all()
+            try:
+                while self._pendentes or self._gravando:
+                    resta = None if limite is None else limite - time.monotonic()
+                    if resta is not None and resta <= 0:
+                        return False
+                    self._cond.wait(resta)
+                return True
+            finally:
+                self._urgente = False
+
+    def fechar(self, timeout=5.0):
+        """Flush final e encerra a thread (pode ser chamado mais de uma vez)."""
+        ok = self.esvaziar(timeout)
+        with self._cond:
+            self._ativa = False
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        return ok
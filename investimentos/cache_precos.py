@@ -0,0 +1,209 @@
+# =============================================================================
+# investimentos.cache_precos — fechamentos baixados sobrevivem entre execuções
+# Tudo que o app baixa do Yahoo vai para uma matriz datas × tickers (float64,
+# ordem de coluna: cada ticker é um bloco contíguo). Ao sair ela é gravada em
+# .npy e, na próxima abertura, volta por memory-map — sem rede, sem parse.
+# As Series/DataFrames só são montadas quando alguém pede um ticker.
+#
+# Arquivos em <pasta>/:
+#   datas.npy        datetime64[D], ordenadas
+#   fechamentos.npy  float64 (n_datas, n_tickers), Fortran order
+#   indice.json      versão, tickers, cobertura e tamanho dos .npy
+#                    (gravado por último — é o que valida o snapshot)
+# =============================================================================
+
+import json
+import os
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+FORMATO = 1
+
+
+def _formato_yf(fechamentos, tickers):
+    """Monta o DataFrame no formato do yf.download: dados["Close"] (Series se 1 ticker)."""
+    if len(tickers) == 1:
+        return pd.DataFrame({"Close": fechamentos[tickers[0]]})
+    return pd.concat({"Close": fechamentos[tickers]}, axis=1)
+
+
+class CachePrecos:
+    """Matriz de fechamentos em memória com snapshot binário em disco."""
+
+    def __init__(self, pasta):
+        self.pasta      = pasta
+        self.alterado   = False
+        self._lock      = threading.RLock()
+        self._datas     = np.empty(0, dtype="datetime64[D]")
+        self._matriz    = np.empty((0, 0), dtype="float64", order="F")
+        self._tickers   = []
+        self._coluna    = {}    # ticker -> índice da coluna
+        self._cobertura = {}    # ticker -> (start, end) já baixado, end exclusivo
+        self._indice_pd = None  # DatetimeIndex montado sob demanda
+        self._series    = {}    # ticker -> Series (view da coluna, sem cópia)
+
+    # ── Snapshot ──
+    def _caminho(self, nome):
+        return os.path.join(self.pasta, nome)
+
+    @classmethod
+    def carregar(cls, pasta):
+        """Abre o snapshot por memory-map; se faltar ou não bater com o índice, começa vazio."""
+        cache = cls(pasta)
+        try:
+            with open(cache._caminho("indice.json"), encoding="utf-8") as f:
+                indice = json.load(f)
+            if indice.get("formato") != FORMATO:
+                return cache
+            # checagem barata: os .npy têm o tamanho que o índice registrou
+            for nome, tamanho in indice["bytes"].items():
+                if os.path.getsize(cache._caminho(nome)) != tamanho:
+                    return cache
+            datas  = np.load(cache._caminho("datas.npy"),       mmap_mode="r")
+            matriz = np.load(cache._caminho("fechamentos.npy"), mmap_mode="r")
+            if matriz.shape != (len(datas), len(indice["tickers"])):
+                return cache
+        except (OSError, ValueError, KeyError):
+            return cache
+
+        cache._datas     = datas
+        cache._matriz    = matriz
+        cache._tickers   = list(indice["tickers"])
+        cache._coluna    = {t: j for j, t in enumerate(cache._tickers)}
+        cache._cobertura = {t: tuple(c) for t, c in indice["cobertura"].items()}
+        return cache
+
+    def salvar(self):
+        """Grava o snapshot (só se mudou). .npy primeiro, índice por último."""
+        with self._lock:
+            if not self.alterado:
+                return
+            os.makedirs(self.pasta, exist_ok=True)
+            tamanhos = {}
+            for nome, arr in (("datas.npy", self._datas), ("fechamentos.npy", self._matriz)):
+                tmp = self._caminho(nome + ".tmp")
+                with open(tmp, "wb") as f:
+                    np.save(f, arr)
+                os.replace(tmp, self._caminho(nome))
+                tamanhos[nome] = os.path.getsize(self._caminho(nome))
+            indice = {
+                "formato":   FORMATO,
+                "gravado":   datetime.now().isoformat(timespec="seconds"),
+                "tickers":   self._tickers,
+                "cobertura": self._cobertura,
+                "bytes":     tamanhos,
+            }
+            tmp = self._caminho("indice.json.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(indice, f)
+            os.replace(tmp, self._caminho("indice.json"))
+            self.alterado = False
+
+    # ── Consulta ──
+    def falta_desde(self, tickers, start, end):
+        """
+        Primeira data de [start, end) que ainda precisa vir da rede:
+        start se algum ticker não tem o começo do período, o fim da cobertura
+        mais curta se só falta a ponta, None se o cache cobre tudo.
+        """
+        with self._lock:
+            desde = None
+            for t in tickers:
+                c = self._cobertura.get(t)
+                if c is None or c[0] > start or c[1] < start:
+                    return start
+                if c[1] < end:
+                    desde = c[1] if desde is None else min(desde, c[1])
+            return desde
+
+    def _indice(self):
+        if self._indice_pd is None:
+            self._indice_pd = pd.DatetimeIndex(self._datas.astype("datetime64[ns]"))
+        return self._indice_pd
+
+    def serie(self, ticker):
+        """Série completa de um ticker — montada na primeira vez, view da coluna."""
+        with self._lock:
+            s = self._series.get(ticker)
+            if s is None:
+                j = self._coluna[ticker]
+                s = pd.Series(self._matriz[:, j], index=self._indice(), name=ticker, copy=False)
+                self._series[ticker] = s
+            return s
+
+    def dados(self, tickers, start, end):
+        """Fechamentos de [start, end) no formato do yf.download (só as colunas pedidas)."""
+        with self._lock:
+            i0 = int(np.searchsorted(self._datas, np.datetime64(start, "D"), side="left"))
+            i1 = int(np.searchsorted(self._datas, np.datetime64(end, "D"),   side="left"))
+            fech = pd.DataFrame({t: (self.serie(t).iloc[i0:i1] if t in self._coluna
+                                     else pd.Series(dtype="float64"))
+                                 for t in tickers})
+        fech = fech.dropna(how="all")
+        return _formato_yf(fech, list(tickers))
+
+    # ── Atualização ──
+    def incorporar(self, dados, tickers, start, end):
+        """Junta o retorno de um yf.download à matriz (o dado novo prevalece)."""
+        tickers = list(tickers)
+        close   = dados["Close"]
+        if isinstance(close, pd.Series):
+            close = close.to_frame(name=tickers[0])
+        if close.empty:
+            return
+        idx = close.index.tz_localize(None) if close.index.tz is not None else close.index
+        close = close.set_axis(idx.normalize(), axis=0)
+        close = close[~close.index.duplicated(keep="last")]
+
+        # o pregão de hoje ainda muda: a cobertura vai só até ontem
+        hoje = datetime.now().strftime("%Y-%m-%d")
+        fim  = min(end, hoje)
+
+        with self._lock:
+            novas = close.index.values.astype("datetime64[D]")
+            self._crescer(novas, [str(t) for t in close.columns])
+            linhas  = np.searchsorted(self._datas, novas)
+            valores = close.to_numpy(dtype="float64")
+            # só as linhas/colunas que vieram; NaN novo não apaga valor antigo
+            for k, t in enumerate(close.columns):
+                ok = ~np.isnan(valores[:, k])
+                self._matriz[linhas[ok], self._coluna[str(t)]] = valores[ok, k]
+            for t in tickers:
+                # ticker que falhou no download em lote volta como coluna toda NaN:
+                # não conta como baixado, senão nunca mais seria buscado
+                if t not in close.columns or start >= fim or not close[t].notna().any():
+                    continue
+                ini0, fim0 = self._cobertura.get(t, (start, fim))
+                if start <= fim0 and fim >= ini0:   # sobrepõe ou encosta: une
+                    self._cobertura[t] = (min(start, ini0), max(fim, fim0))
+                else:
+                    self._cobertura[t] = (start, fim)
+            self.alterado = True
+
+    def _crescer(self, novas, tickers):
+        """
+        Garante linhas para as datas e colunas para os tickers. Só realoca se
+        aparecer data ou ticker novo; senão a matriz é alterada no lugar (a
+        carregada do snapshot é memmap só leitura — copiada uma vez).
+        """
+        datas = np.union1d(self._datas, novas)
+        extra = [t for t in dict.fromkeys(tickers) if t not in self._coluna]
+        if len(datas) == len(self._datas) and not extra:
+            if not self._matriz.flags.writeable:
+                self._matriz = np.array(self._matriz, order="F")
+                self._series = {}
+            return
+        matriz = np.full((len(datas), len(self._tickers) + len(extra)), np.nan, order="F")
+        matriz[np.searchsorted(datas, self._datas), :len(self._tickers)] = self._matriz
+        self._datas     = datas
+        self._matriz    = matriz
+        self._tickers   = self._tickers + extra
+        self._coluna    = {t: j for j, t in enumerate(self._tickers)}
+        self._indice_pd = None
+        self._series    = {}
+
+    def __len__(self):
+        return len(self._tickers)
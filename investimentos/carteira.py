@@ -0,0 +1,276 @@
+# =============================================================================
+# investimentos.carteira — cálculos da carteira pessoal sem Tk
+# P&L, comparativo com o CDI, rendimento de CDBs, indicadores de risco
+# (beta, Sharpe, drawdown), alertas, score de diversificação e resumo.
+# reconstruir_patrimonio() refaz o valor diário da carteira a partir dos
+# fechamentos já baixados, numa passada vetorizada (dias × ativos), para
+# preencher o histórico dos dias em que o app não foi aberto.
+# =============================================================================
+
+from datetime import datetime
+
+from investimentos.analise import CDI_ANUAL, SETORES, nome_exibicao
+
+
+# ── P&L e CDI ──
+def _calcular_pl(carteira, precos):
+    """Retorna lista de dicts com P&L por ativo. Ignora ativos sem preço."""
+    rows = []
+    for ticker, pos in carteira.items():
+        preco_atual = precos.get(ticker)
+        if preco_atual is None or preco_atual <= 0:
+            continue  # ativo delistado ou sem dados — ignora silenciosamente
+        qtd         = float(pos["qtd"])
+        pm          = float(pos["preco_medio"])
+        custo       = qtd * pm
+        patrimonio  = qtd * preco_atual
+        lucro_rs    = patrimonio - custo
+        lucro_pct   = (lucro_rs / custo * 100) if custo > 0 else 0
+        # Tendência vs preço médio
+        diff_pm = ((preco_atual - pm) / pm * 100) if pm > 0 else 0
+        if diff_pm > 2:
+            tendencia = ("↑ Alta",    "#00C896")
+        elif diff_pm < -2:
+            tendencia = ("↓ Queda",   "#FF5252")
+        else:
+            tendencia = ("→ Lateral", "#e60000")
+        rows.append({
+            "ticker":     ticker,
+            "nome":       nome_exibicao(ticker),
+            "qtd":        qtd,
+            "pm":         pm,
+            "preco_atual":preco_atual,
+            "custo":      custo,
+            "patrimonio": patrimonio,
+            "lucro_rs":   lucro_rs,
+            "lucro_pct":  lucro_pct,
+            "data_compra":pos.get("data_compra", "—"),
+            "tendencia":  tendencia,
+        })
+    return rows
+
+def _cdi_desde_compra(data_compra_str):
+    """Retorna quanto o CDI rendeu desde a data de compra até hoje."""
+    try:
+        d1   = datetime.strptime(data_compra_str, "%d/%m/%Y")
+        dias = (datetime.now() - d1).days
+        return ((1 + CDI_ANUAL) ** (dias / 365) - 1) * 100
+    except Exception:
+        return None
+
+def _calcular_rendimento_cdb(valor, pct_cdi, data_str):
+    """Calcula rendimento bruto acumulado do CDB até hoje."""
+    try:
+        d1   = datetime.strptime(data_str, "%d/%m/%Y")
+        dias = max((datetime.now() - d1).days, 0)
+        taxa_periodo = ((1 + CDI_ANUAL * (pct_cdi/100)) ** (dias/365)) - 1
+        rendimento   = valor * taxa_periodo
+        total        = valor + rendimento
+        return rendimento, total, dias
+    except Exception:
+        return 0.0, float(valor), 0
+
+def _periodo_carteira(carteira):
+    """(start, end) AAAA-MM-DD da compra mais antiga até hoje — None se não houver datas."""
+    datas = []
+    for pos in carteira.values():
+        try: datas.append(datetime.strptime(pos["data_compra"], "%d/%m/%Y"))
+        except: pass
+    if not datas:
+        return None
+    return min(datas).strftime("%Y-%m-%d"), datetime.now().strftime("%Y-%m-%d")
+
+
+# ── Indicadores de risco ──
+def _calcular_beta(serie_ativo, serie_ibov):
+    try:
+        import pandas as pd
+        ret_a = serie_ativo.pct_change().dropna()
+        ret_b = serie_ibov.pct_change().dropna()
+        df = pd.concat([ret_a, ret_b], axis=1).dropna()
+        if len(df) < 10: return None
+        cov = df.iloc[:,0].cov(df.iloc[:,1])
+        var = df.iloc[:,1].var()
+        return round(cov/var, 2) if var != 0 else None
+    except: return None
+
+def _calcular_sharpe(serie):
+    try:
+        ret_d = serie.pct_change().dropna()
+        ret_a = float(ret_d.mean() * 252)
+        vol_a = float(ret_d.std() * (252**0.5))
+        if vol_a == 0: return None
+        return round((ret_a - CDI_ANUAL) / vol_a, 2)
+    except: return None
+
+def _calcular_drawdown_max(serie):
+    try:
+        pico = serie.cummax()
+        dd   = (serie - pico) / pico * 100
+        return round(float(dd.min()), 2)
+    except: return None
+
+def _indicadores_risco(dados, ibov, tickers, so=None):
+    """
+    {ticker: {beta, sharpe, drawdown}} a partir dos downloads da carteira e do Ibovespa.
+    so: calcula só esses tickers (dados continua no formato do download de `tickers`).
+    """
+    if dados is None or dados.empty:
+        return {}
+    serie_ibov = ibov["Close"].dropna() if ibov is not None and not ibov.empty else None
+    result = {}
+    for ticker in (tickers if so is None else so):
+        try:
+            serie = (dados["Close"] if len(tickers)==1
+                     else dados["Close"][ticker]).dropna()
+            result[ticker] = {
+                "beta":     _calcular_beta(serie, serie_ibov) if serie_ibov is not None else None,
+                "sharpe":   _calcular_sharpe(serie),
+                "drawdown": _calcular_drawdown_max(serie),
+            }
+        except: pass
+    return result
+
+
+# ── Alertas, diversificação e resumo ──
+def _gerar_alertas_carteira(rows):
+    """Gera lista de alertas baseados na posição atual da carteira."""
+    alertas = []
+    for r in rows:
+        # Queda acentuada
+        if r["lucro_pct"] <= -15:
+            alertas.append(("🔴", f"{r['nome']} caiu {r['lucro_pct']:.1f}% desde sua compra — avalie sua posição.", "#FF5252"))
+        elif r["lucro_pct"] <= -8:
+            alertas.append(("🟡", f"{r['nome']} está {r['lucro_pct']:.1f}% abaixo do preço médio.", "#e60000"))
+        # Alta expressiva
+        if r["lucro_pct"] >= 30:
+            alertas.append(("🟢", f"{r['nome']} valorizou {r['lucro_pct']:.1f}% — considere realizar parte do lucro.", "#cc0000"))
+        # Comparação com CDI
+        try:
+            cdi = _cdi_desde_compra(r["data_compra"])
+            if cdi and r["lucro_pct"] < cdi:
+                diff = cdi - r["lucro_pct"]
+                alertas.append(("💛", f"{r['nome']} está {diff:.1f}% abaixo do CDI no mesmo período.", "#e60000"))
+        except: pass
+    # Concentração setorial
+    setores = {}
+    for r in rows:
+        s = SETORES.get(r["ticker"], "Outros")
+        setores[s] = setores.get(s,[]) + [r["nome"]]
+    for setor, nomes in setores.items():
+        if len(nomes) >= 2:
+            alertas.append(("⚡", f"Concentração em {setor}: {', '.join(nomes)}. Considere diversificar.", "#FF9915"))
+    if not alertas:
+        alertas.append(("✅", "Nenhum alerta no momento. Carteira dentro dos parâmetros normais.", "#cc0000"))
+    return alertas
+
+def _calcular_score_diversificacao(carteira):
+    """Nota 0–10 baseada em qtd de ativos, setores e concentração."""
+    if not carteira: return 0.0, "Carteira vazia."
+    n_ativos  = len(carteira)
+    setores   = set(SETORES.get(t,"Outros") for t in carteira)
+    n_setores = len(setores)
+    # Concentração: % do maior ativo pelo custo
+    custos = {t: float(p["qtd"])*float(p["preco_medio"]) for t,p in carteira.items()}
+    total  = sum(custos.values())
+    maior_pct = max(custos.values())/total*100 if total>0 else 100
+    # Score
+    score_ativos  = min(10, n_ativos * 1.2)
+    score_setores = min(10, n_setores * 2.0)
+    score_conc    = max(0, 10 - (maior_pct - 20) * 0.2) if maior_pct > 20 else 10
+    score = round((score_ativos*0.3 + score_setores*0.4 + score_conc*0.3), 1)
+    if score >= 8:   msg = "✅ Carteira bem diversificada!"
+    elif score >= 6: msg = "⚠ Diversificação razoável — considere adicionar mais setores."
+    elif score >= 4: msg = "🔶 Diversificação baixa — carteira concentrada."
+    else:            msg = "🔴 Carteira muito concentrada — alto risco não sistemático."
+    return score, msg
+
+def _gerar_resumo_executivo(rows, carteira):
+    """Gera parágrafo descritivo do estado atual da carteira."""
+    if not rows: return "Adicione ativos à carteira para ver o resumo executivo."
+    total_custo  = sum(r["custo"]      for r in rows)
+    total_patrim = sum(r["patrimonio"] for r in rows)
+    total_lucro  = sum(r["lucro_rs"]   for r in rows)
+    total_pct    = (total_lucro/total_custo*100) if total_custo>0 else 0
+    melhor = max(rows, key=lambda r: r["lucro_pct"])
+    pior   = min(rows, key=lambda r: r["lucro_pct"])
+    score_div, _ = _calcular_score_diversificacao(carteira)
+    nivel_div = "bem diversificada" if score_div>=8 else "moderadamente diversificada" if score_div>=5 else "concentrada"
+    sinal = "positivo" if total_lucro>=0 else "negativo"
+    resumo = (
+        f"Sua carteira é composta por {len(rows)} ativo(s), com custo total de "
+        f"R$ {total_custo:,.2f} e patrimônio atual de R$ {total_patrim:,.2f}. "
+        f"O resultado acumulado é {sinal}: R$ {total_lucro:+,.2f} ({total_pct:+.2f}%). "
+        f"O ativo com melhor desempenho é {melhor['nome']} ({melhor['lucro_pct']:+.2f}%) "
+        f"e o que mais preocupa é {pior['nome']} ({pior['lucro_pct']:+.2f}%). "
+        f"A carteira está {nivel_div} (score {score_div}/10)."
+    )
+    return resumo
+
+
+# ── Histórico ──
+
+def _fechamentos(dados, tickers):
+    """DataFrame de fechamentos (dias × tickers) a partir do retorno do yf.download."""
+    close = dados["Close"]
+    if hasattr(close, "to_frame"):   # um ticker só → Series
+        close = close.to_frame(name=tickers[0])
+    if getattr(close.index, "tz", None) is not None:
+        close = close.tz_localize(None)
+    return close
+
+def reconstruir_patrimonio(carteira, dados, ate=None, pular=()):
+    """
+    Valor diário da carteira em cada pregão de `dados` (retorno do yf.download).
+    Considera cada posição com a quantidade e o preço médio atuais a partir
+    da data de compra. ate (AAAA-MM-DD) é exclusivo; datas em `pular` (já
+    registradas) ficam de fora.
+    Retorna (totais, posicoes) no formato das tabelas do banco:
+      totais   = [(data, custo_total, patrimonio, lucro_rs, lucro_pct, n_ativos)]
+      posicoes = [(ticker, data, qtd, preco, custo, valor)]
+    """
+    import numpy as np
+
+    tickers = list(carteira)
+    if not tickers or dados is None or dados.empty:
+        return [], []
+    close   = _fechamentos(dados, tickers)
+    tickers = [t for t in tickers if t in close.columns]
+    if not tickers:
+        return [], []
+
+    precos = close[tickers].sort_index().ffill()
+    datas  = np.asarray(precos.index.strftime("%Y-%m-%d"))
+    manter = ~np.isin(datas, list(pular))
+    if ate:
+        manter &= datas < ate
+    precos, datas = precos[manter], datas[manter]
+    if not len(datas):
+        return [], []
+
+    compra = np.array([np.datetime64(datetime.strptime(carteira[t]["data_compra"], "%d/%m/%Y"), "D")
+                       for t in tickers])
+    qtd = np.array([float(carteira[t]["qtd"]) for t in tickers])
+    pm  = np.array([float(carteira[t]["preco_medio"]) for t in tickers])
+    P   = precos.to_numpy(dtype="float64")
+
+    # dias × ativos: o ativo conta a partir da compra e se houver preço
+    dias        = precos.index.values.astype("datetime64[D]")
+    em_carteira = (dias[:, None] >= compra[None, :]) & ~np.isnan(P)
+    valor = np.where(em_carteira, P * qtd, 0.0)
+    custo = np.where(em_carteira, qtd * pm, 0.0)
+
+    patrim  = valor.sum(axis=1)
+    custo_t = custo.sum(axis=1)
+    n       = em_carteira.sum(axis=1)
+    lucro   = patrim - custo_t
+    pct     = np.divide(lucro * 100, custo_t, out=np.zeros_like(lucro), where=custo_t > 0)
+
+    linhas = np.flatnonzero(n > 0)
+    totais = list(zip(datas[linhas].tolist(), custo_t[linhas].tolist(), patrim[linhas].tolist(),
+                      lucro[linhas].tolist(), pct[linhas].tolist(), n[linhas].tolist()))
+
+    di, aj   = np.nonzero(em_carteira)
+    posicoes = list(zip(np.array(tickers)[aj].tolist(), datas[di].tolist(), qtd[aj].tolist(),
+                        P[di, aj].tolist(), custo[di, aj].tolist(), valor[di, aj].tolist()))
+    return totais, posicoes
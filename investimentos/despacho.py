@@ -0,0 +1,62 @@
+# =============================================================================
+# investimentos.despacho — atualizações de UI vindas de outras threads
+# O Tk só pode ser tocado pela thread principal. As threads de trabalho não
+# chamam root.after: elas postam (função, args) numa fila, e um único
+# callback periódico na thread principal esvazia a fila e aplica tudo num
+# lote. Mensagens com a mesma chave dentro do mesmo quadro se fundem — só a
+# última é aplicada (ex.: dez atualizações do mesmo label viram uma).
+# =============================================================================
+
+import itertools
+import threading
+from collections import OrderedDict
+
+
+class DespachoUI:
+    """Fila thread-safe drenada por root.after a cada `intervalo_ms`."""
+
+    def __init__(self, root, intervalo_ms=33):
+        self.root       = root
+        self.intervalo  = intervalo_ms
+        self.postadas   = 0
+        self.aplicadas  = 0
+        self._pendentes = OrderedDict()   # chave -> (funcao, args)
+        self._seq       = itertools.count()
+        self._lock      = threading.Lock()
+        self._ativo     = True
+        root.after(self.intervalo, self._drenar)
+
+    def postar(self, funcao, *args, chave=None):
+        """
+        Agenda funcao(*args) na thread da UI (seguro de qualquer thread).
+        Com chave, substitui uma mensagem ainda não aplicada da mesma chave.
+        """
+        if chave is None:
+            chave = ("_", next(self._seq))
+        with self._lock:
+            self._pendentes.pop(chave, None)   # a última vai para o fim da fila
+            self._pendentes[chave] = (funcao, args)
+            self.postadas += 1
+
+    def agendar(self, funcao):
+        """Callback sem argumentos; chamadas repetidas da mesma função no quadro se fundem."""
+        self.postar(funcao, chave=("funcao", funcao))
+
+    def _drenar(self):
+        if not self._ativo:
+            return
+        with self._lock:
+            lote, self._pendentes = self._pendentes, OrderedDict()
+        for funcao, args in lote.values():
+            try:
+                funcao(*args)
+            except Exception as e:
+                print(f"[UI] Erro ao aplicar {getattr(funcao, '__name__', funcao)}: {e}")
+        self.aplicadas += len(lote)
+        self.root.after(self.intervalo, self._drenar)
+
+    def fechar(self):
+        """Para de drenar — o que ainda chegar é descartado."""
+        self._ativo = False
+        with self._lock:
+            self._pendentes.clear()
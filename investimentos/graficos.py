@@ -0,0 +1,98 @@
+# =============================================================================
+# investimentos.graficos — figuras matplotlib sem backend de janela
+# Usa matplotlib.figure.Figure direto (sem pyplot), então a mesma figura
+# serve para o FigureCanvasTkAgg do dashboard e para savefig em workers.
+# matplotlib só é importado ao montar a primeira figura: importar as cores
+# daqui não custa nada na abertura do app.
+# =============================================================================
+
+from investimentos.analise import CORES_ATIVOS, nome_exibicao
+
+# ==============================
+# CONFIGURAÇÃO DE CORES
+# ==============================
+BG      = "#111111"
+TXT     = "#e0e0e0"
+ACCENT  = "#cc0000"
+
+
+def _montar_grafico(dados, selecionados, modo, ordem=None, mm=0):
+    """
+    Monta a figura matplotlib e retorna (fig, ax, series_dict).
+    ordem define a cor de cada ativo; mm > 0 desenha a média móvel.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.ticker import FuncFormatter
+    import matplotlib.dates as mdates
+
+    indice = {t: i for i, t in enumerate(ordem or selecionados)}
+    fig = Figure(figsize=(11, 4.2))
+    fig.patch.set_facecolor(BG)
+
+    ax = fig.add_axes([0.07, 0.16, 0.68, 0.74])
+    ax.set_facecolor(BG)
+
+    ax_leg = fig.add_axes([0.77, 0.05, 0.22, 0.90])
+    ax_leg.set_facecolor("#1c1c1c")
+    ax_leg.set_xticks([]); ax_leg.set_yticks([])
+    for spine in ax_leg.spines.values():
+        spine.set_edgecolor(ACCENT); spine.set_linewidth(1.2)
+
+    linhas, nomes, series = [], [], {}
+
+    for ativo in selecionados:
+        cor = CORES_ATIVOS[indice.get(ativo, 0) % len(CORES_ATIVOS)]
+        try:
+            raw = (dados["Close"] if len(selecionados) == 1
+                   else dados["Close"][ativo]).dropna()
+
+            if modo == "base100":
+                serie = (raw / raw.iloc[0]) * 100
+            else:
+                serie = raw
+
+            xs_num = mdates.date2num(serie.index.to_pydatetime())
+            ys     = serie.values.astype(float)
+
+            linha, = ax.plot(serie.index, ys, linewidth=2.5,
+                             color=cor, label=nome_exibicao(ativo))
+            linha.set_gid(ativo)   # usado pelo zoom para achar a linha do ativo
+            linhas.append(linha)
+            nomes.append(nome_exibicao(ativo))
+            series[ativo] = (xs_num, ys, cor)
+
+            # Média móvel (se ativada)
+            if mm > 0 and len(serie) >= mm:
+                mm_serie = serie.rolling(window=mm).mean().dropna()
+                mm_linha, = ax.plot(mm_serie.index, mm_serie.values,
+                                    linewidth=1.2, color=cor, linestyle="--", alpha=0.5)
+                mm_linha.set_gid(f"mm:{ativo}")
+        except Exception:
+            pass
+
+    titulo = "Desempenho Relativo (Base 100)" if modo == "base100" else "Evolução dos Ativos"
+    ylabel = "Retorno (Base 100)" if modo == "base100" else "Preço (R$)"
+
+    ax.set_title(titulo, color=TXT, fontsize=13, fontweight="bold")
+    ax.set_ylabel(ylabel, color=TXT)
+
+    if modo == "preco":
+        ax.yaxis.set_major_formatter(FuncFormatter(lambda x, _: f"R$ {x:,.0f}"))
+    else:
+        ax.yaxis.set_major_formatter(FuncFormatter(lambda x, _: f"{x:.1f}"))
+        ax.axhline(100, color="#444", linewidth=0.8, linestyle="--")
+
+    ax.xaxis.set_major_locator(mdates.MonthLocator(interval=1))
+    ax.xaxis.set_major_formatter(mdates.DateFormatter("%b/%Y"))
+    ax.tick_params(axis="x", colors="#FFF", rotation=35, labelsize=8)
+    ax.tick_params(axis="y", colors="#FFF")
+    for spine in ax.spines.values(): spine.set_color("#444")
+
+    ax_leg.text(0.5, 0.97, "Ativos", transform=ax_leg.transAxes,
+                color=ACCENT, fontsize=10, fontweight="bold", ha="center", va="top")
+    leg = ax_leg.legend(handles=linhas, labels=nomes, loc="upper center",
+                        bbox_to_anchor=(0.5, 0.90), frameon=False, ncol=1,
+                        fontsize=9, handlelength=1.5, labelspacing=0.5)
+    for t in leg.get_texts(): t.set_color("#FFF")
+
+    return fig, ax, series
@@ -0,0 +1,258 @@
+# =============================================================================
+# investimentos.ia — consultora multi-LLM sem Tk
+# GPT-4o-mini processa os dados brutos da carteira → JSON estruturado;
+# Claude Sonnet analisa o JSON → resposta qualitativa; Gemini é o último
+# recurso. As chamadas HTTP são corrotinas no NucleoIO (investimentos.rede).
+# =============================================================================
+
+import json
+from datetime import datetime
+
+from investimentos.analise import CDI_ANUAL
+from investimentos.carteira import _calcular_pl, _calcular_rendimento_cdb, _cdi_desde_compra
+from investimentos.rede import ErroHTTP
+
+
+def _montar_contexto_carteira(carteira, cdbs, precos):
+    """Monta dict com todos os dados atuais da carteira para enviar às IAs."""
+    ctx = {}
+    # Carteira de ações
+    if carteira:
+        rows   = _calcular_pl(carteira, precos)
+        ctx["acoes"] = [
+            {
+                "ticker":     r["ticker"],
+                "nome":       r["nome"],
+                "qtd":        r["qtd"],
+                "preco_medio":r["pm"],
+                "preco_atual":r["preco_atual"],
+                "custo":      round(r["custo"], 2),
+                "patrimonio": round(r["patrimonio"], 2),
+                "lucro_rs":   round(r["lucro_rs"], 2),
+                "lucro_pct":  round(r["lucro_pct"], 2),
+                "data_compra":r["data_compra"],
+                "cdi_periodo":round(_cdi_desde_compra(r["data_compra"]) or 0, 2),
+            }
+            for r in rows
+        ]
+        ctx["total_custo"]  = round(sum(r["custo"]      for r in rows), 2)
+        ctx["total_patrim"] = round(sum(r["patrimonio"] for r in rows), 2)
+        ctx["total_lucro"]  = round(sum(r["lucro_rs"]   for r in rows), 2)
+    else:
+        ctx["acoes"] = []
+
+    # CDBs
+    ctx["cdbs"] = [
+        {
+            "nome":    c["nome"],
+            "valor":   c["valor"],
+            "pct_cdi": c["pct_cdi"],
+            "data":    c["data"],
+            "rendimento": round(_calcular_rendimento_cdb(c["valor"], c["pct_cdi"], c["data"])[0], 2),
+            "total":      round(_calcular_rendimento_cdb(c["valor"], c["pct_cdi"], c["data"])[1], 2),
+        }
+        for c in cdbs
+    ]
+
+    # Score e CDI atual
+    ctx["cdi_anual_pct"] = CDI_ANUAL * 100
+    ctx["data_consulta"] = datetime.now().strftime("%d/%m/%Y %H:%M")
+
+    return ctx
+
+
+async def _chamar_gpt(io, chave, prompt_sistema, prompt_usuario):
+    """Chama GPT-4o-mini pela API REST (sem dependência de SDK), no núcleo de I/O."""
+    if len(prompt_usuario) > 8000:
+        prompt_usuario = prompt_usuario[:8000] + "\n...[dados truncados]"
+
+    data = await io.http_json(
+        "https://api.openai.com/v1/chat/completions",
+        {
+            "model": "gpt-4o-mini",
+            "messages": [
+                {"role": "system", "content": prompt_sistema},
+                {"role": "user",   "content": prompt_usuario},
+            ],
+            "max_tokens": 800,
+            "temperature": 0.3,
+        },
+        {"Authorization": f"Bearer {chave.strip()}"},
+        timeout=30)
+    return data["choices"][0]["message"]["content"]
+
+
+
+
+
+async def _chamar_claude(io, chave, prompt_sistema, prompt_usuario):
+    """Chama Claude Sonnet pela API REST (sem dependência de SDK), no núcleo de I/O."""
+    # Limita tamanho para evitar payload gigante
+    if len(prompt_usuario) > 8000:
+        prompt_usuario = prompt_usuario[:8000] + "\n...[dados truncados]"
+
+    body = {
+        "model": "claude-3-5-sonnet-20241022",
+        "max_tokens": 1024,
+        "system": prompt_sistema,
+        "messages": [
+            {"role": "user", "content": prompt_usuario},
+        ],
+    }
+    data = await io.http_json(
+        "https://api.anthropic.com/v1/messages", body,
+        {"x-api-key": chave.strip(), "anthropic-version": "2023-06-01"},
+        timeout=30)
+    return data["content"][0]["text"]
+
+
+async def _chamar_gemini(io, chave, prompt_sistema, prompt_usuario):
+    """Chama Gemini 1.5 Flash via REST puro — sem SDK, no núcleo de I/O."""
+    if len(prompt_usuario) > 8000:
+        prompt_usuario = prompt_usuario[:8000] + "\n...[dados truncados]"
+
+    # Gemini não tem campo system separado — une tudo em um prompt
+    prompt_completo = f"{prompt_sistema}\n\n{prompt_usuario}"
+
+    body = {
+        "contents": [{"parts": [{"text": prompt_completo}]}],
+        "generationConfig": {"maxOutputTokens": 1024, "temperature": 0.4}
+    }
+
+    chave = chave.strip()
+    # Testa v1 e v1beta com vários modelos — um deles vai funcionar
+    tentativas = [
+        ("v1beta","gemini-2.0-flash-lite"),   # confirmado funcionando
+        ("v1beta","gemini-2.0-flash"),
+        ("v1beta","gemini-1.5-flash-latest"),
+        ("v1",    "gemini-2.0-flash"),
+        ("v1",    "gemini-1.5-flash"),
+    ]
+    ultimo_erro = None
+    for versao, modelo in tentativas:
+        url = (
+            f"https://generativelanguage.googleapis.com/{versao}/models/"
+            f"{modelo}:generateContent?key={chave}"
+        )
+        try:
+            data = await io.http_json(url, body, timeout=30)
+            return data["candidates"][0]["content"]["parts"][0]["text"]
+        except ErroHTTP as e:
+            corpo = e.corpo[:200]
+            ultimo_erro = f"HTTP_{e.codigo} ({versao}/{modelo}): {corpo}"
+            if e.codigo == 429:
+                raise Exception(f"429: {corpo}")  # propaga imediatamente — sem tentar outros
+            continue
+        except Exception as e:
+            ultimo_erro = str(e)
+            if "429" in str(e):
+                raise  # propaga o 429
+            continue
+    raise Exception(ultimo_erro or "Todos os modelos Gemini falharam")
+
+
+async def executar_tarefa_financeira(io, pergunta_usuario, ctx, chaves):
+    """
+    Pipeline Multi-LLM com fallback automático:
+    - Modo completo: GPT-4o-mini processa → Claude Sonnet analisa
+    - Fallback:      GPT-4o-mini faz tudo sozinho (quando Claude indisponível)
+    - Reativa automaticamente quando Claude voltar a ter créditos
+    ctx vem de _montar_contexto_carteira(); chaves = {"openai", "anthropic", "google"}.
+    """
+    chave_openai    = chaves.get("openai", "")
+    chave_anthropic = chaves.get("anthropic", "")
+    chave_google    = chaves.get("google", "")
+    if not chave_openai and not chave_anthropic:
+        return "⚠ Nenhuma chave de API encontrada. Configure ANTHROPIC_API_KEY e OPENAI_API_KEY no arquivo .env"
+
+    PROMPT_CONSULTOR = (
+        "Você é um consultor financeiro especializado no mercado brasileiro. "
+        "Analise os dados da carteira do usuário e responda de forma clara, "
+        "objetiva e personalizada em português. "
+        "Seja direto, use dados concretos da carteira e dê recomendações práticas. "
+        "Não invente dados — use apenas o que foi fornecido."
+    )
+
+    # ── Etapa 1: GPT-4o-mini processa os dados brutos ──
+    dados_processados = None
+    erro_gpt = None
+    if chave_openai:
+        try:
+            sys_gpt = (
+                "Você é um processador de dados financeiros. "
+                "Recebe dados de carteira em JSON e uma pergunta do usuário. "
+                "Retorne APENAS um JSON válido com os campos: "
+                "resumo_numerico (dict com métricas calculadas), "
+                "alertas (list de strings), "
+                "contexto_pergunta (string com dados relevantes para a pergunta)."
+            )
+            usr_gpt = (
+                f"Dados da carteira:\n{json.dumps(ctx, ensure_ascii=False, indent=2)}\n\n"
+                f"Pergunta do usuário: {pergunta_usuario}"
+            )
+            resposta_gpt = await _chamar_gpt(io, chave_openai, sys_gpt, usr_gpt)
+            resposta_gpt_clean = resposta_gpt.strip()
+            if resposta_gpt_clean.startswith("```"):
+                resposta_gpt_clean = resposta_gpt_clean.split("\n", 1)[1].rsplit("```", 1)[0]
+            dados_processados = json.loads(resposta_gpt_clean)
+        except Exception as e:
+            erro_gpt = str(e)
+            dados_processados = {"dados_brutos": ctx}
+    else:
+        dados_processados = {"dados_brutos": ctx}
+
+    # ── Etapa 2: tenta Claude Sonnet ──
+    if chave_anthropic:
+        sys_claude = PROMPT_CONSULTOR
+        usr_claude = (
+            f"Dados processados da carteira:\n{json.dumps(dados_processados, ensure_ascii=False, indent=2)}\n\n"
+            f"Pergunta do investidor: {pergunta_usuario}"
+        )
+        try:
+            resposta = await _chamar_claude(io, chave_anthropic, sys_claude, usr_claude)
+            return resposta  # pipeline completo funcionou
+        except Exception as e:
+            erro_str = str(e)
+            # Verifica se é erro de saldo — faz fallback silencioso para GPT
+            eh_saldo = any(k in erro_str for k in ["credit", "billing", "balance", "quota", "429", "low"])
+            if not eh_saldo:
+                return f"⚠ Erro ao chamar Claude: {erro_str}"
+            # Saldo insuficiente — continua para GPT
+
+    # ── Fallback 1: GPT-4o-mini sozinho ──
+    if chave_openai:
+        try:
+            usr_gpt_final = (
+                f"Dados da carteira:\n{json.dumps(ctx, ensure_ascii=False, indent=2)}\n\n"
+                f"Pergunta do investidor: {pergunta_usuario}"
+            )
+            resposta = await _chamar_gpt(io, chave_openai, PROMPT_CONSULTOR, usr_gpt_final)
+            return f"[GPT-4o-mini] {resposta}"
+        except Exception as e:
+            erro_gpt2 = str(e)
+            eh_saldo_gpt = any(k in erro_gpt2 for k in ["credit", "billing", "quota", "429", "insufficient"])
+            if not eh_saldo_gpt:
+                return f"⚠ Erro no GPT: {erro_gpt2}"
+            # Saldo insuficiente no GPT — tenta Gemini
+
+    # ── Fallback 2: Gemini 1.5 Flash (gratuito) ──
+    if chave_google:
+        # Garante que há dados válidos antes de enviar
+        ctx_limpo = {k: v for k, v in ctx.items() if v not in [None, [], {}]}
+        if not ctx_limpo:
+            ctx_limpo = {"aviso": "Carteira vazia — responda de forma genérica sobre investimentos."}
+        try:
+            usr_gemini = (
+                f"Dados da carteira:\n{json.dumps(ctx_limpo, ensure_ascii=False, indent=2)}\n\n"
+                f"Pergunta do investidor: {pergunta_usuario}"
+            )
+            resposta = await _chamar_gemini(io, chave_google, PROMPT_CONSULTOR, usr_gemini)
+            return f"[Gemini 1.5 Flash] {resposta}"
+        except Exception as e:
+            erro_str = str(e)
+            print(f"[Gemini] Erro detalhado: {erro_str}")
+            if "429" in erro_str or "quota" in erro_str.lower():
+                return "⏳ Limite do Gemini atingido (15 req/min gratuitas). Aguarde 1 minuto e tente novamente."
+            return f"⚠ Gemini indisponível: {erro_str[:150]}"
+
+    return "⚠ Nenhuma IA disponivel. Claude: console.anthropic.com | GPT: platform.openai.com | Gemini: verifique GOOGLE_API_KEY no .env"
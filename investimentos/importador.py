@@ -0,0 +1,308 @@
+# =============================================================================
+# investimentos.importador — importação de notas/extratos de corretora
+# Lê CSVs exportados pelas corretoras e a lista de negociações da B3/CEI
+# linha a linha (csv.reader sobre o arquivo, sem carregar tudo), agrega por
+# ativo e dia e só no fim reconstrói as posições em ordem cronológica — a
+# memória cresce com ativos × dias negociados, não com o número de linhas.
+# Colunas são reconhecidas pelo nome (com ou sem acento); separador e
+# encoding são detectados. O separador decimal é decidido uma vez por coluna
+# numérica, numa primeira passada pelo arquivo — "12.345" sozinho não diz se
+# é milhar ou decimal, mas o resto da coluna (ou do arquivo) diz.
+# =============================================================================
+
+import csv
+import re
+import unicodedata
+from datetime import datetime
+from functools import partial
+
+# nome normalizado da coluna -> campo
+ALIASES_COLUNAS = {
+    "data":     ["data", "data do negocio", "data negocio", "data da operacao", "data pregao",
+                 "data do pregao", "data de negociacao", "pregao"],
+    "tipo":     ["tipo de movimentacao", "c/v", "compra/venda", "operacao", "tipo",
+                 "natureza", "tipo de operacao", "movimentacao"],
+    "ticker":   ["codigo de negociacao", "codigo", "ticker", "ativo", "papel", "produto",
+                 "codigo do ativo", "especificacao do titulo"],
+    "qtd":      ["quantidade", "qtd", "qtde", "quantidade negociada"],
+    "preco":    ["preco", "preco unitario", "valor unitario", "preco (r$)", "preco medio",
+                 "preco do negocio"],
+    "valor":    ["valor", "valor total", "valor da operacao", "valor (r$)", "total"],
+    "sentido":  ["entrada/saida", "credito/debito", "sentido"],
+}
+RE_TICKER_B3 = re.compile(r"^[A-Z]{4}\d{1,2}[A-Z]?$")
+RE_AMBIGUO   = re.compile(r"^-?\d{1,3}\.\d{3}$")   # "1.000": mil ou um? depende do arquivo
+CAMPOS_NUMERICOS = ("qtd", "preco", "valor")
+
+# valores aceitos na coluna de tipo / na coluna Entrada/Saída — o resto é ignorado
+TIPOS_COMPRA  = {"c", "compra", "buy", "entrada"}
+TIPOS_VENDA   = {"v", "venda", "sell", "saida"}
+TIPOS_SENTIDO = {"transferencia - liquidacao", "liquidacao"}   # direção vem de Entrada/Saída
+SENTIDO       = {"credito": "C", "entrada": "C", "debito": "V", "saida": "V"}
+MAX_ERROS    = 20
+
+
+def _normalizar(txt):
+    txt = unicodedata.normalize("NFKD", txt.strip().lower())
+    return "".join(c for c in txt if not unicodedata.combining(c))
+
+def _limpar_numero(txt):
+    return txt.strip().replace("R$", "").replace(" ", "")
+
+def _numero(txt, decimal=","):
+    """'R$ 1.234,56' (decimal ',') / '1,234.56' (decimal '.') / '-10' -> float."""
+    milhar = "." if decimal == "," else ","
+    return float(_limpar_numero(txt).replace(milhar, "").replace(decimal, "."))
+
+def _voto_decimal(txt):
+    """Separador decimal que a célula revela sozinha — None se não revela ('10', '1.000')."""
+    txt = _limpar_numero(txt)
+    if "," in txt and "." in txt:
+        return "," if txt.rfind(",") > txt.rfind(".") else "."
+    if "," in txt or txt.count(".") > 1:   # "10,5" ou "1.234.567"
+        return ","
+    if "." in txt and not RE_AMBIGUO.match(txt):
+        return "."
+    return None
+
+def _decimais(linhas, mapa, sep):
+    """
+    {campo: ',' ou '.'} para as colunas numéricas, olhando o arquivo todo.
+    Coluna sem pista usa a das outras colunas (ou ',' em arquivo com ';');
+    ValueError se uma coluna mistura os dois ou tem "1.000" sem como decidir.
+    """
+    campos   = [c for c in CAMPOS_NUMERICOS if c in mapa]
+    votos    = {c: set() for c in campos}
+    ambiguos = set()
+    for linha in linhas:
+        for c in campos:
+            if mapa[c] >= len(linha):
+                continue
+            voto = _voto_decimal(linha[mapa[c]])
+            if voto:
+                votos[c].add(voto)
+            elif RE_AMBIGUO.match(_limpar_numero(linha[mapa[c]])):
+                ambiguos.add(c)
+    arquivo = set().union(*votos.values()) or ({","} if sep == ";" else set())
+    decimais = {}
+    for c in campos:
+        v = votos[c] or (arquivo if len(arquivo) == 1 else set())
+        if len(v) > 1:
+            raise ValueError(f"coluna {c}: mistura vírgula e ponto como decimal")
+        if not v and c in ambiguos:
+            raise ValueError(f"coluna {c}: não dá para saber se '1.234' é milhar ou decimal")
+        decimais[c] = v.pop() if v else "."   # só inteiros: tanto faz
+    return decimais
+
+def _data(txt):
+    txt = txt.strip()[:10]
+    for fmt in ("%d/%m/%Y", "%Y-%m-%d", "%d/%m/%y", "%d-%m-%Y"):
+        try:
+            return datetime.strptime(txt, fmt).date()
+        except ValueError:
+            pass
+    raise ValueError(f"data inválida {txt!r}")
+
+def _ticker(txt):
+    """'PETR4 - PETROLEO BRASILEIRO' / 'PETR4F' / 'petr4.sa' -> 'PETR4.SA' (None se não parecer B3)."""
+    raw = txt.strip().upper().split(" - ")[0].split()[0] if txt.strip() else ""
+    raw = raw.removesuffix(".SA")
+    if raw.endswith("F") and RE_TICKER_B3.match(raw[:-1]):   # mercado fracionário
+        raw = raw[:-1]
+    return raw + ".SA" if RE_TICKER_B3.match(raw) else None
+
+def _tipo(txt, sentido=None):
+    """
+    "C"/"V" pelo tipo da operação; com a coluna Entrada/Saída (Crédito/Débito)
+    a direção vem dela. None para o que não é compra/venda (cisão, crédito de
+    rendimento, tipo vazio...) — a linha é ignorada, nunca vira compra.
+    """
+    t = _normalizar(txt)
+    if sentido is not None and (t in TIPOS_SENTIDO or t in TIPOS_COMPRA or t in TIPOS_VENDA):
+        return SENTIDO.get(_normalizar(sentido))
+    if t in TIPOS_COMPRA:
+        return "C"
+    if t in TIPOS_VENDA:
+        return "V"
+    return None
+
+def _abrir(caminho):
+    """Abre com o encoding certo (utf-8 com/sem BOM ou latin-1, comum no CEI)."""
+    for enc in ("utf-8-sig", "latin-1"):
+        f = open(caminho, encoding=enc, newline="")
+        try:
+            f.read(64 * 1024)
+            f.seek(0)
+            return f
+        except UnicodeDecodeError:
+            f.close()
+    return open(caminho, encoding="latin-1", newline="")
+
+def _mapear_colunas(cabecalho):
+    norm  = [_normalizar(c) for c in cabecalho]
+    mapa  = {}
+    for campo, nomes in ALIASES_COLUNAS.items():
+        for nome in nomes:
+            if nome in norm:
+                mapa[campo] = norm.index(nome)
+                break
+    faltando = [c for c in ("data", "ticker", "qtd") if c not in mapa]
+    if faltando or ("preco" not in mapa and "valor" not in mapa):
+        raise ValueError(f"colunas não reconhecidas: {', '.join(faltando) or 'preço/valor'}")
+    return mapa
+
+
+def ler_operacoes(caminhos, relatorio):
+    """
+    Gera (ticker, data, tipo, qtd, preço) de cada linha válida dos arquivos,
+    em streaming. Linhas inválidas contam em relatorio["ignoradas"].
+    """
+    for caminho in caminhos:
+        with _abrir(caminho) as f:
+            amostra = f.read(8192)
+            f.seek(0)
+            try:
+                dialeto = csv.Sniffer().sniff(amostra, delimiters=";,\t")
+            except csv.Error:
+                dialeto = csv.excel
+            sep  = ";" if amostra.count(";") > amostra.count(",") else dialeto.delimiter
+
+            def _linhas():
+                """(n, linha) das linhas não vazias, do começo do arquivo."""
+                f.seek(0)
+                for n, linha in enumerate(csv.reader(f, dialeto, delimiter=sep), start=1):
+                    if any(c.strip() for c in linha):
+                        yield n, linha
+
+            # 1ª passada: cabeçalho e separador decimal de cada coluna numérica
+            linhas = _linhas()
+            cabecalho = next(linhas, None)
+            if cabecalho is None:
+                continue
+            mapa = _mapear_colunas(cabecalho[1])
+            try:
+                decimal = _decimais((linha for _, linha in linhas), mapa, sep)
+            except ValueError as e:
+                raise ValueError(f"{caminho}: {e}") from None
+
+            linhas = _linhas()
+            next(linhas)   # cabeçalho
+            for n, linha in linhas:
+                relatorio["linhas"] += 1
+                try:
+                    ticker = _ticker(linha[mapa["ticker"]])
+                    if ticker is None:
+                        raise ValueError(f"ativo {linha[mapa['ticker']]!r} fora do padrão B3")
+                    sentido = linha[mapa["sentido"]] if "sentido" in mapa else None
+                    if "tipo" in mapa:
+                        tipo = _tipo(linha[mapa["tipo"]], sentido)
+                    else:   # sem coluna de tipo: Entrada/Saída, ou extrato só de compras
+                        tipo = SENTIDO.get(_normalizar(sentido)) if sentido is not None else "C"
+                    if tipo is None:
+                        bruto = linha[mapa["tipo"]] if "tipo" in mapa else sentido
+                        raise ValueError(f"operação {bruto!r}")
+                    qtd = abs(_numero(linha[mapa["qtd"]], decimal["qtd"]))
+                    if "preco" in mapa and linha[mapa["preco"]].strip():
+                        preco = _numero(linha[mapa["preco"]], decimal["preco"])
+                    else:
+                        preco = abs(_numero(linha[mapa["valor"]], decimal["valor"])) / qtd
+                    if qtd <= 0 or preco <= 0:
+                        raise ValueError("quantidade/preço zerados")
+                    yield ticker, _data(linha[mapa["data"]]), tipo, qtd, preco
+                except (ValueError, IndexError, ZeroDivisionError) as e:
+                    relatorio["ignoradas"] += 1
+                    if len(relatorio["erros"]) < MAX_ERROS:
+                        relatorio["erros"].append(f"{caminho}:{n}: {e}")
+
+
+def importar_extratos(caminhos, validar=None):
+    """
+    Lê os arquivos e reconstrói as posições: preço médio ponderado nas
+    compras, vendas baixam a quantidade ao preço médio; posição zerada
+    recomeça a data de compra. Dentro do mesmo dia compras vêm antes.
+    validar(tickers) -> set dos válidos (ex.: checagem em lote no Yahoo).
+    Retorna o relatório com "posicoes" {ticker: {qtd, preco_medio, data_compra}}
+    e "zeradas" (tickers cujo saldo terminou em 0).
+    """
+    relatorio = {"linhas": 0, "ignoradas": 0, "erros": [], "operacoes": 0,
+                 "posicoes": {}, "zeradas": [], "invalidos": []}
+
+    # ticker -> data -> [qtd comprada, custo comprado, qtd vendida]
+    por_dia = {}
+    for ticker, data, tipo, qtd, preco in ler_operacoes(caminhos, relatorio):
+        dia = por_dia.setdefault(ticker, {}).setdefault(data, [0.0, 0.0, 0.0])
+        if tipo == "C":
+            dia[0] += qtd
+            dia[1] += qtd * preco
+        else:
+            dia[2] += qtd
+        relatorio["operacoes"] += 1
+
+    if validar and por_dia:
+        validos = validar(sorted(por_dia))
+        relatorio["invalidos"] = sorted(t for t in por_dia if t not in validos)
+        for t in relatorio["invalidos"]:
+            del por_dia[t]
+
+    for ticker, dias in por_dia.items():
+        qtd = custo = 0.0
+        inicio = None
+        for data in sorted(dias):
+            q_c, c_c, q_v = dias[data]
+            if q_c:
+                if qtd <= 1e-9:
+                    inicio = data
+                qtd   += q_c
+                custo += c_c
+            if q_v:
+                pm     = custo / qtd if qtd > 1e-9 else 0.0
+                qtd    = max(qtd - q_v, 0.0)
+                custo  = pm * qtd
+        if qtd > 1e-9:
+            relatorio["posicoes"][ticker] = {
+                "qtd":         round(qtd, 6),
+                "preco_medio": round(custo / qtd, 4),
+                "data_compra": inicio.strftime("%d/%m/%Y"),
+            }
+        else:
+            relatorio["zeradas"].append(ticker)
+    return relatorio
+
+
+def mesclar(carteira, relatorio):
+    """
+    Aplica o relatório sobre a carteira: tickers importados substituem a
+    posição atual (o extrato é a fonte da verdade), zerados saem, o resto
+    fica intacto. Retorna (upserts {ticker: pos}, remover [tickers]).
+    """
+    upserts = dict(relatorio["posicoes"])
+    remover = [t for t in relatorio["zeradas"] if t in carteira]
+    carteira.update(upserts)
+    for t in remover:
+        del carteira[t]
+    return upserts, remover
+
+
+def validar_no_yahoo(tickers, lote=200, baixar=None):
+    """
+    Tickers com cotação nos últimos pregões — um download por lote, não um
+    por ativo. baixar(tickers, period=...) substitui o yf.download (o app
+    passa ServicoInvestimentos.baixar_bruto, que serializa os downloads).
+    """
+    if baixar is None:
+        import yfinance as yf
+        baixar = partial(yf.download, auto_adjust=True, progress=False)
+    validos = set()
+    for i in range(0, len(tickers), lote):
+        parte = tickers[i:i + lote]
+        try:
+            dados = baixar(parte, period="5d")
+        except Exception:
+            continue
+        if dados is None or dados.empty:
+            continue
+        close = dados["Close"]
+        if hasattr(close, "to_frame"):
+            close = close.to_frame(name=parte[0])
+        validos.update(t for t in parte if t in close.columns and close[t].notna().any())
+    return validos
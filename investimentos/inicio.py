@@ -0,0 +1,40 @@
+# =============================================================================
+# investimentos.inicio — linha do tempo da inicialização
+# Marca o fim de cada fase (imports, serviço, janela, interface...) contando
+# de um instante zero tomado antes de qualquer import pesado, e compara o
+# tempo até a primeira janela com uma meta — uma regressão aparece no
+# console (ou no código de saída, com --medir-inicio) em vez de só ser
+# sentida pelo usuário.
+# =============================================================================
+
+import time
+
+META_INICIO_MS = 800   # tempo até a primeira janela (notebook do escritório, cache frio)
+
+
+class LinhaDoTempo:
+    """Fases nomeadas em ms desde t0 (time.perf_counter())."""
+
+    def __init__(self, t0=None, meta_ms=META_INICIO_MS):
+        self.t0      = time.perf_counter() if t0 is None else t0
+        self.meta_ms = meta_ms
+        self.fases   = []   # [(fase, ms desde t0)]
+
+    def marcar(self, fase):
+        self.fases.append((fase, (time.perf_counter() - self.t0) * 1000))
+
+    def total_ms(self):
+        return self.fases[-1][1] if self.fases else 0.0
+
+    def dentro_da_meta(self):
+        return self.meta_ms is None or self.total_ms() <= self.meta_ms
+
+    def relatorio(self):
+        linhas, anterior = [], 0.0
+        for fase, ms in self.fases:
+            linhas.append(f"  {fase:<18} +{ms - anterior:7.0f} ms  {ms:7.0f} ms")
+            anterior = ms
+        if self.meta_ms is not None:
+            situacao = "ok" if self.dentro_da_meta() else "ACIMA DA META"
+            linhas.append(f"  {'meta':<18} {self.meta_ms:8.0f} ms  {situacao}")
+        return "\n".join(linhas)
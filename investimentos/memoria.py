@@ -0,0 +1,117 @@
+# =============================================================================
+# investimentos.memoria — cache LRU em memória com orçamento em bytes
+# Um só lugar para guardar DataFrames/arrays já montados (downloads,
+# barras intradiárias, fatias do cache de preços). Cada entrada é medida
+# pelo tamanho real (memory_usage(deep=True) / nbytes) e, quando o total
+# passa do orçamento, as menos usadas recentemente saem primeiro — o
+# consumo fica previsível por mais períodos que o usuário explore.
+# =============================================================================
+
+import sys
+import threading
+from collections import OrderedDict
+
+
+def tamanho_bytes(obj):
+    """Memória ocupada por um DataFrame/Series/ndarray (ou contêiner deles)."""
+    if obj is None:
+        return 0
+    uso = getattr(obj, "memory_usage", None)
+    if callable(uso):   # pandas
+        try:
+            total = uso(deep=True, index=True)
+            return int(total.sum()) if hasattr(total, "sum") else int(total)
+        except TypeError:
+            pass
+    nbytes = getattr(obj, "nbytes", None)
+    if isinstance(nbytes, int):   # numpy
+        return nbytes
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(tamanho_bytes(k) + tamanho_bytes(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + sum(tamanho_bytes(v) for v in obj)
+    return sys.getsizeof(obj)
+
+
+class CacheLRU:
+    """
+    Mapa chave -> valor limitado por bytes. Thread-safe.
+    Valores maiores que o orçamento inteiro não são guardados.
+    """
+
+    def __init__(self, orcamento_bytes):
+        self.orcamento = int(orcamento_bytes)
+        self.bytes     = 0
+        self.acertos   = 0
+        self.faltas    = 0
+        self.despejos  = 0
+        self._itens    = OrderedDict()   # chave -> (valor, bytes), mais recente no fim
+        self._lock     = threading.Lock()
+
+    def obter(self, chave, padrao=None):
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                self.faltas += 1
+                return padrao
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return item[0]
+
+    def guardar(self, chave, valor):
+        """Guarda (ou substitui) e despeja as entradas mais antigas até caber."""
+        n = tamanho_bytes(valor)
+        with self._lock:
+            antigo = self._itens.pop(chave, None)
+            if antigo is not None:
+                self.bytes -= antigo[1]
+            if n > self.orcamento:
+                return valor
+            self._itens[chave] = (valor, n)
+            self.bytes += n
+            while self.bytes > self.orcamento:
+                _, (_, b) = self._itens.popitem(last=False)
+                self.bytes    -= b
+                self.despejos += 1
+        return valor
+
+    def obter_ou_calcular(self, chave, funcao):
+        """Valor em cache ou funcao() — calculado fora do lock, então dois
+        pedidos simultâneos da mesma chave podem calcular duas vezes."""
+        marcador = object()
+        valor = self.obter(chave, marcador)
+        if valor is marcador:
+            valor = self.guardar(chave, funcao())
+        return valor
+
+    def descartar(self, filtro=None):
+        """Remove as chaves em que filtro(chave) é verdadeiro (todas, sem filtro)."""
+        with self._lock:
+            for chave in [c for c in self._itens if filtro is None or filtro(c)]:
+                self.bytes -= self._itens.pop(chave)[1]
+
+    def __contains__(self, chave):
+        with self._lock:
+            return chave in self._itens
+
+    def __len__(self):
+        return len(self._itens)
+
+    def estatisticas(self):
+        with self._lock:
+            consultas = self.acertos + self.faltas
+            return {
+                "entradas":  len(self._itens),
+                "bytes":     self.bytes,
+                "orcamento": self.orcamento,
+                "acertos":   self.acertos,
+                "faltas":    self.faltas,
+                "despejos":  self.despejos,
+                "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+            }
+
+    def resumo(self):
+        e = self.estatisticas()
+        return (f"{e['entradas']} itens, {e['bytes'] / 2**20:.1f}/{e['orcamento'] / 2**20:.0f} MB, "
+                f"{e['acertos']} acertos, {e['faltas']} faltas ({e['taxa_acerto']:.0%}), "
+                f"{e['despejos']} despejos")
@@ -0,0 +1,246 @@
+# =============================================================================
+# investimentos.rede — núcleo de I/O assíncrono
+# Um event loop asyncio numa thread própria concentra o I/O de saída:
+#   - HTTP (APIs de IA, endpoint de gráfico do Yahoo) direto em sockets
+#     asyncio — dezenas de requisições simultâneas numa thread só;
+#   - chamadas bloqueantes de bibliotecas (yfinance) num pool pequeno,
+#     limitado por semáforo, sem travar o loop.
+# O cliente HTTP é mínimo de propósito: segue redirecionamentos, qualquer
+# resposta fora de 2xx vira ErroHTTP, corpo limitado a MAX_CORPO e resposta
+# malformada vira RespostaInvalida — nunca um IndexError solto no meio.
+# Timeouts são por requisição (asyncio.wait_for); cancelar o Future
+# devolvido por executar() cancela a corrotina no loop.
+# Da thread da UI: executar(coro) + add_done_callback → despacho.
+# De threads de trabalho: rodar(coro) bloqueia só quem chamou.
+# =============================================================================
+
+import asyncio
+import json
+import ssl
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import quote, urljoin, urlsplit
+
+AGENTE = "Mozilla/5.0 (dashboard-investimentos)"
+URL_GRAFICO_YAHOO = "https://query1.finance.yahoo.com/v8/finance/chart/{}?range=5d&interval=1d"
+MAX_CORPO          = 16 * 1024 * 1024   # bytes — respostas maiores são recusadas
+MAX_CABECALHOS     = 100
+MAX_REDIRECIONAMENTOS = 5
+REDIRECIONAMENTOS  = {301, 302, 303, 307, 308}
+
+
+class ErroHTTP(Exception):
+    """Resposta HTTP fora de 2xx (código e corpo, como o urllib.error.HTTPError)."""
+
+    def __init__(self, codigo, corpo):
+        super().__init__(f"HTTP {codigo}: {corpo}")
+        self.codigo = codigo
+        self.corpo  = corpo
+
+
+class RespostaInvalida(ValueError):
+    """Resposta que não é HTTP/1.x válido ou passa dos limites (MAX_CORPO etc.)."""
+
+
+def _status(linha):
+    """Código da linha de status "HTTP/1.x NNN motivo"."""
+    partes = linha.split(None, 2)
+    if len(partes) < 2 or not partes[0].startswith(b"HTTP/1.") \
+            or len(partes[1]) != 3 or not partes[1].isdigit():
+        raise RespostaInvalida(f"linha de status inválida: {linha[:80]!r}")
+    return int(partes[1])
+
+
+def _inteiro(txt, base=10):
+    try:
+        n = int(txt, base)
+    except ValueError:
+        n = -1
+    if n < 0:
+        raise RespostaInvalida(f"tamanho inválido: {txt!r}")
+    return n
+
+
+def _limitar(tamanho):
+    if tamanho > MAX_CORPO:
+        raise RespostaInvalida(f"corpo de {tamanho} bytes passa de MAX_CORPO ({MAX_CORPO})")
+    return tamanho
+
+
+class NucleoIO:
+    """Event loop em thread daemon + pool para chamadas bloqueantes."""
+
+    def __init__(self, max_conexoes=32, max_bloqueantes=8):
+        self.loop        = asyncio.new_event_loop()
+        self._pool       = ThreadPoolExecutor(max_bloqueantes, thread_name_prefix="io-bloqueante")
+        self._ssl        = None
+        self._conexoes   = asyncio.Semaphore(max_conexoes)
+        self._bloqueantes = asyncio.Semaphore(max_bloqueantes)
+        self._thread     = threading.Thread(target=self._rodar_loop, daemon=True, name="nucleo-io")
+        self._thread.start()
+
+    def _rodar_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.set_default_executor(self._pool)
+        self.loop.run_forever()
+
+    # ── Ponte com as outras threads ──
+    def executar(self, coro):
+        """Agenda a corrotina no loop; devolve concurrent.futures.Future (cancelável)."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def rodar(self, coro, timeout=None):
+        """Executa e espera o resultado — só fora da thread do loop."""
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("rodar() chamado de dentro do loop — use await")
+        return self.executar(coro).result(timeout)
+
+    def fechar(self):
+        """Cancela o que estiver pendente e para o loop."""
+        def _parar():
+            for tarefa in asyncio.all_tasks(self.loop):
+                tarefa.cancel()
+            self.loop.stop()
+        if self.loop.is_running():
+            self.loop.call_soon_threadsafe(_parar)
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    # ── Primitivas (corrotinas) ──
+    async def em_thread(self, funcao, *args, timeout=None):
+        """funcao(*args) bloqueante no pool, com limite de concorrência e timeout."""
+        async with self._bloqueantes:
+            return await asyncio.wait_for(
+                self.loop.run_in_executor(self._pool, partial(funcao, *args)), timeout)
+
+    async def http(self, url, corpo=None, cabecalhos=None, timeout=30):
+        """
+        GET (ou POST com corpo bytes) em HTTP/1.1; devolve o corpo da resposta.
+        Segue até MAX_REDIRECIONAMENTOS (303, e 301/302 após POST, viram GET);
+        o timeout vale para a cadeia toda.
+        """
+        async with self._conexoes:
+            return await asyncio.wait_for(self._seguir(url, corpo, cabecalhos), timeout)
+
+    async def _seguir(self, url, corpo, cabecalhos):
+        for _ in range(MAX_REDIRECIONAMENTOS + 1):
+            codigo, resp, dados = await self._http(url, corpo, cabecalhos)
+            if 200 <= codigo < 300:
+                return dados
+            if codigo not in REDIRECIONAMENTOS or "location" not in resp:
+                raise ErroHTTP(codigo, dados.decode("utf-8", errors="replace"))
+            destino = urljoin(url, resp["location"])
+            if urlsplit(destino).scheme not in ("http", "https"):
+                raise RespostaInvalida(f"redirecionamento para {destino!r}")
+            if urlsplit(destino).netloc != urlsplit(url).netloc:
+                cabecalhos = None   # chaves de API não vão para outro host
+            url = destino
+            if codigo == 303 or (codigo in (301, 302) and corpo is not None):
+                corpo = None
+                cabecalhos = {k: v for k, v in (cabecalhos or {}).items()
+                              if k.lower() != "content-type"}
+        raise ErroHTTP(codigo, f"mais de {MAX_REDIRECIONAMENTOS} redirecionamentos")
+
+    async def http_json(self, url, payload=None, cabecalhos=None, timeout=30):
+        corpo = None
+        cab   = dict(cabecalhos or {})
+        if payload is not None:
+            corpo = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            cab.setdefault("Content-Type", "application/json")
+        return json.loads((await self.http(url, corpo, cab, timeout)).decode("utf-8"))
+
+    async def _http(self, url, corpo, cabecalhos):
+        u      = urlsplit(url)
+        https  = u.scheme == "https"
+        if https and self._ssl is None:
+            self._ssl = ssl.create_default_context()
+        leitor, escritor = await asyncio.open_connection(
+            u.hostname, u.port or (443 if https else 80), ssl=self._ssl if https else None)
+        try:
+            cab = {"Host": u.netloc, "User-Agent": AGENTE, "Accept": "*/*",
+                   "Accept-Encoding": "identity", "Connection": "close", **(cabecalhos or {})}
+            if corpo is not None:
+                cab["Content-Length"] = str(len(corpo))
+            alvo   = (u.path or "/") + (f"?{u.query}" if u.query else "")
+            linhas = [f"{'POST' if corpo is not None else 'GET'} {alvo} HTTP/1.1"]
+            linhas += [f"{k}: {v}" for k, v in cab.items()]
+            escritor.write(("\r\n".join(linhas) + "\r\n\r\n").encode("latin-1") + (corpo or b""))
+            await escritor.drain()
+
+            codigo = _status(await leitor.readline())
+            resp   = {}
+            while True:
+                linha = await leitor.readline()
+                if linha in (b"\r\n", b"\n", b""):
+                    break
+                k, sep, v = linha.decode("latin-1").partition(":")
+                if not sep or not k.strip() or len(resp) >= MAX_CABECALHOS:
+                    raise RespostaInvalida(f"cabeçalho inválido: {linha[:80]!r}")
+                resp[k.strip().lower()] = v.strip()
+
+            if "chunked" in resp.get("transfer-encoding", "").lower():
+                partes, total = [], 0
+                while True:
+                    tam = _inteiro((await leitor.readline()).split(b";")[0].strip(), 16)
+                    if tam == 0:
+                        break
+                    total += tam
+                    _limitar(total)
+                    partes.append(await leitor.readexactly(tam))
+                    await leitor.readline()
+                dados = b"".join(partes)
+            elif "content-length" in resp:
+                dados = await leitor.readexactly(_limitar(_inteiro(resp["content-length"])))
+            else:
+                partes, total = [], 0
+                while total <= MAX_CORPO:
+                    parte = await leitor.read(MAX_CORPO + 1 - total)
+                    if not parte:
+                        break
+                    partes.append(parte)
+                    total += len(parte)
+                dados = b"".join(partes)
+                _limitar(len(dados))
+            return codigo, resp, dados
+        except RespostaInvalida:
+            raise
+        except (asyncio.IncompleteReadError, ValueError) as e:
+            # ValueError: readline() com linha além do limite do StreamReader
+            raise RespostaInvalida(f"resposta truncada ou linha longa demais: {e}") from e
+        finally:
+            escritor.close()
+
+    # ── Yahoo ──
+    async def ultimo_preco(self, ticker, timeout=10):
+        """(último fechamento, fechamento anterior) pelo endpoint de gráfico do Yahoo."""
+        dados  = await self.http_json(URL_GRAFICO_YAHOO.format(quote(ticker)), timeout=timeout)
+        res    = dados["chart"]["result"][0]
+        closes = [c for c in res["indicators"]["quote"][0]["close"] if c is not None]
+        if not closes:
+            raise ValueError(f"{ticker}: sem fechamentos")
+        return float(closes[-1]), float(closes[-2] if len(closes) > 1 else closes[-1])
+
+    async def precos_recentes(self, tickers, timeout=10, reserva=None):
+        """
+        {ticker: (preço, anterior)} de todos os tickers em paralelo. Se o
+        endpoint falhar para algum, reserva(ticker) (bloqueante, ex.: yfinance)
+        é tentada no pool. Tickers sem preço ficam de fora.
+        """
+        async def _um(t):
+            try:
+                return await self.ultimo_preco(t, timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                if reserva is None:
+                    return None
+                try:
+                    return await self.em_thread(reserva, t, timeout=timeout * 2)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    return None
+
+        resultados = await asyncio.gather(*(_um(t) for t in tickers))
+        return {t: r for t, r in zip(tickers, resultados) if r and r[0] > 0}
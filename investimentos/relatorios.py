@@ -0,0 +1,411 @@
+# =============================================================================
+# investimentos.relatorios — relatórios PNG/PDF em lote, sem Tk
+# Recebe uma lista de pedidos (carteiras ou watchlists + período), baixa os
+# fechamentos uma vez por período e gera gráfico, tabela de análise e
+# insights de cada pedido em processos separados. Os rasters dos gráficos
+# ficam em cache em disco: seções idênticas não são desenhadas de novo. O
+# cache é podado ao fim de cada lote (idade e tamanho máximos) — períodos
+# que terminam hoje mudam de chave todo dia.
+#
+# Uso:  python -m investimentos.relatorios pedidos.json --saida relatorios/
+#
+# pedidos.json:
+#   [{"nome": "cliente_a", "tickers": ["PETR4", "VALE3"],
+#     "start": "01/01/2025", "end": "30/06/2025", "formatos": ["pdf", "png"]},
+#    {"nome": "cliente_b", "carteira": {"ITUB4.SA": {...}}, "start": "2025-01-01"}]
+# Sem "end", vai até hoje; sem "start", PERIODO_PADRAO_DIAS antes do fim.
+# =============================================================================
+
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import textwrap
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+from investimentos.analise import (
+    nome_exibicao, _calcular_analise, _classificar_risco, _calcular_score,
+    _gerar_insights_completo,
+)
+from investimentos.graficos import BG, TXT, ACCENT, _montar_grafico
+
+CABECALHO_TABELA = ["Ativo", "Retorno %", "Volatil. %", "Risco", "Máximo", "Mínimo"]
+PERIODO_PADRAO_DIAS   = 365
+CACHE_GRAFICOS_MAX_MB = 200
+CACHE_GRAFICOS_DIAS   = 30    # gráfico sem uso há mais que isso sai do cache
+
+
+# ==============================
+# PEDIDOS
+# ==============================
+def _data_iso(texto, padrao=None):
+    """Aceita DD/MM/AAAA ou AAAA-MM-DD e devolve AAAA-MM-DD."""
+    if not texto:
+        return padrao
+    for fmt in ("%d/%m/%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(texto.strip(), fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            pass
+    raise ValueError(f"Data inválida: {texto!r}. Use DD/MM/AAAA.")
+
+def _normalizar_pedido(pedido, i):
+    """Completa um pedido com os padrões; aceita "tickers" (watchlist) ou "carteira"."""
+    brutos  = pedido.get("tickers") or list((pedido.get("carteira") or {}).keys())
+    tickers = []
+    for raw in brutos:
+        raw = raw.strip().upper()
+        t   = raw if raw.endswith(".SA") else raw + ".SA"
+        if raw and t not in tickers:
+            tickers.append(t)
+    if not tickers:
+        raise ValueError(f"Pedido {i} sem tickers nem carteira.")
+    nome  = pedido.get("nome") or f"relatorio_{i + 1}"
+    end   = _data_iso(pedido.get("end"), datetime.now().strftime("%Y-%m-%d"))
+    start = _data_iso(pedido.get("start"),
+                      (datetime.strptime(end, "%Y-%m-%d")
+                       - timedelta(days=PERIODO_PADRAO_DIAS)).strftime("%Y-%m-%d"))
+    if start >= end:
+        raise ValueError(f"Pedido {i}: início ({start}) deve ser antes do fim ({end}).")
+    return {
+        "nome":     nome,
+        "arquivo":  re.sub(r"[^\w\-]+", "_", nome).strip("_") or f"relatorio_{i + 1}",
+        "tickers":  tickers,
+        "start":    start,
+        "end":      end,
+        "modo":     pedido.get("modo", "preco"),
+        "mm":       int(pedido.get("mm", 0)),
+        "formatos": [f.lower() for f in pedido.get("formatos", ["pdf"])],
+    }
+
+
+# ==============================
+# DADOS
+# ==============================
+def _baixar_fechamentos(pedidos):
+    """Um yf.download por período com a união dos tickers. Retorna {(start, end): DataFrame}."""
+    import yfinance as yf
+
+    periodos = {}
+    for p in pedidos:
+        periodos.setdefault((p["start"], p["end"]), set()).update(p["tickers"])
+
+    fechamentos = {}
+    for (start, end), tickers in periodos.items():
+        tickers = sorted(tickers)
+        dados   = yf.download(tickers, start=start, end=end,
+                              auto_adjust=True, progress=False)
+        close   = dados["Close"] if not dados.empty else dados
+        if hasattr(close, "to_frame"):   # um ticker só → Series
+            close = close.to_frame(name=tickers[0])
+        fechamentos[(start, end)] = close
+    return fechamentos
+
+def _dados_do_pedido(fechamentos, tickers):
+    """Recorta os fechamentos no formato que as funções de análise esperam (o do yf.download)."""
+    import pandas as pd
+    tickers = [t for t in tickers
+               if t in fechamentos.columns and fechamentos[t].notna().any()]
+    if len(tickers) == 1:
+        return pd.DataFrame({"Close": fechamentos[tickers[0]]}), tickers
+    return pd.concat({"Close": fechamentos[tickers]}, axis=1), tickers
+
+def _chave_grafico(pedido, fechamentos):
+    """Hash do que define o raster: tickers, modo, MM e os próprios preços."""
+    h = hashlib.sha1()
+    h.update(json.dumps([pedido["tickers"], pedido["modo"], pedido["mm"]]).encode())
+    h.update(fechamentos.index.values.tobytes())
+    h.update(fechamentos.to_numpy(dtype="float64", na_value=float("nan")).tobytes())
+    return h.hexdigest()
+
+
+# ==============================
+# RENDERIZAÇÃO
+# ==============================
+def _podar_cache(pasta_cache, max_bytes=CACHE_GRAFICOS_MAX_MB * 2**20,
+                 idade_max_s=CACHE_GRAFICOS_DIAS * 86400, manter=()):
+    """
+    Apaga do cache de gráficos o que não é usado há `idade_max_s` e, se ainda
+    passar de `max_bytes`, os menos usados recentemente (mtime = último uso).
+    Os caminhos em `manter` (os do lote atual) ficam. Devolve quantos saíram.
+    """
+    manter  = {os.path.abspath(c) for c in manter}
+    agora   = time.time()
+    arquivos = []
+    for entrada in os.scandir(pasta_cache):
+        if entrada.is_file() and os.path.abspath(entrada.path) not in manter:
+            st = entrada.stat()
+            arquivos.append((st.st_mtime, st.st_size, entrada.path))
+    arquivos.sort()
+    total = sum(tam for _, tam, _ in arquivos)
+    removidos = 0
+    for mtime, tam, caminho in arquivos:   # mais antigo primeiro
+        if agora - mtime <= idade_max_s and total <= max_bytes:
+            break
+        try:
+            os.remove(caminho)
+        except OSError:
+            continue
+        total -= tam
+        removidos += 1
+    return removidos
+
+def _renderizar_grafico(pedido, fechamentos, caminho):
+    """Desenha o gráfico do pedido direto em PNG (escrita atômica — vários workers)."""
+    if os.path.exists(caminho):
+        return False
+    dados, tickers = _dados_do_pedido(fechamentos, pedido["tickers"])
+    fig, _, _ = _montar_grafico(dados, tickers, pedido["modo"], mm=pedido["mm"])
+    tmp = f"{caminho}.{os.getpid()}.tmp"
+    fig.savefig(tmp, format="png", dpi=120, bbox_inches="tight", facecolor=BG)
+    os.replace(tmp, caminho)
+    return True
+
+def _linhas_tabela(dados, selecionados, analises):
+    """Linhas da tabela de análise do relatório (mesmas colunas do PDF do dashboard)."""
+    rows = []
+    for a in analises:
+        try:
+            serie = (dados["Close"] if len(selecionados) == 1
+                     else dados["Close"][a["ticker"]]).dropna()
+            rows.append([
+                a["nome"],
+                f"{a['retorno']:+.2f}%",
+                f"{a['vol']:.2f}%",
+                _classificar_risco(a["vol"])[0],
+                f"R$ {float(serie.max()):.2f}",
+                f"R$ {float(serie.min()):.2f}",
+            ])
+        except Exception:
+            pass
+    return rows
+
+def _figura_pagina(grafico, linhas, score, frases, titulo):
+    """Página única (A4) com gráfico, tabela e insights — usada no PNG e no PDF sem reportlab."""
+    from matplotlib.figure import Figure
+    import matplotlib.image as mpimg
+
+    fig = Figure(figsize=(8.27, 11.69))
+    fig.patch.set_facecolor(BG)
+    fig.text(0.5, 0.975, titulo, color=ACCENT, fontsize=15,
+             fontweight="bold", ha="center", va="top")
+    fig.text(0.5, 0.950, f"Relatório gerado em {datetime.now().strftime('%d/%m/%Y %H:%M')}",
+             color="#888888", fontsize=8, ha="center", va="top")
+
+    ax_g = fig.add_axes([0.04, 0.63, 0.92, 0.30])
+    ax_g.imshow(mpimg.imread(grafico))
+    ax_g.axis("off")
+
+    ax_t = fig.add_axes([0.06, 0.36, 0.88, 0.24])
+    ax_t.axis("off")
+    if linhas:
+        tbl = ax_t.table(cellText=linhas, colLabels=CABECALHO_TABELA,
+                         loc="upper center", cellLoc="center")
+        tbl.auto_set_font_size(False)
+        tbl.set_fontsize(7)
+        for (r, _), cel in tbl.get_celld().items():
+            cel.set_edgecolor("#2e2e2e")
+            cel.set_facecolor("#1c1c1c" if r == 0 else ("#161616" if r % 2 else "#202020"))
+            cel.get_text().set_color(ACCENT if r == 0 else "#FFFFFF")
+
+    texto = [f"Score da carteira: {score}/10"]
+    for f in frases:
+        texto.extend(textwrap.wrap(f"• {f['titulo']}: {f['texto']}", 110))
+    fig.text(0.06, 0.33, "Inteligência do Período", color=ACCENT, fontsize=11,
+             fontweight="bold", va="top")
+    fig.text(0.06, 0.305, "\n".join(texto), color=TXT, fontsize=7,
+             va="top", linespacing=1.5)
+    return fig
+
+def _montar_pdf(caminho, grafico, linhas, score, frases, titulo="Dashboard de Investimentos"):
+    """
+    Gera o PDF (gráfico + tabela + insights). grafico é caminho ou buffer PNG.
+    Usa reportlab quando instalado; sem ele, cai para a página matplotlib.
+    """
+    try:
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib import colors
+        from reportlab.lib.units import cm
+        from reportlab.platypus import (SimpleDocTemplate, Paragraph, Spacer,
+                                         Image, Table, TableStyle)
+        from reportlab.lib.styles import ParagraphStyle
+        from reportlab.lib.enums import TA_CENTER
+    except ImportError:
+        if hasattr(grafico, "seek"):
+            grafico.seek(0)
+        _figura_pagina(grafico, linhas, score, frases, titulo).savefig(
+            caminho, format="pdf", facecolor=BG)
+        return
+
+    if hasattr(grafico, "seek"):
+        grafico.seek(0)
+    doc   = SimpleDocTemplate(caminho, pagesize=A4,
+                               leftMargin=1.5*cm, rightMargin=1.5*cm,
+                               topMargin=1.5*cm, bottomMargin=1.5*cm)
+    story = []
+
+    titulo_style = ParagraphStyle("titulo", fontSize=16, fontName="Helvetica-Bold",
+                                   alignment=TA_CENTER, spaceAfter=4)
+    sub_style    = ParagraphStyle("sub",    fontSize=9,  fontName="Helvetica",
+                                   alignment=TA_CENTER, textColor=colors.grey, spaceAfter=12)
+    sec_style    = ParagraphStyle("sec",    fontSize=11, fontName="Helvetica-Bold",
+                                   spaceBefore=12, spaceAfter=4)
+    body_style   = ParagraphStyle("body",   fontSize=8,  fontName="Helvetica",
+                                   spaceAfter=3, leading=12)
+
+    # Cabeçalho
+    story.append(Paragraph(titulo, titulo_style))
+    story.append(Paragraph(f"Relatório gerado em {datetime.now().strftime('%d/%m/%Y %H:%M')}", sub_style))
+
+    # Gráfico
+    story.append(Paragraph("Evolução dos Ativos", sec_style))
+    story.append(Image(grafico, width=16*cm, height=7*cm))
+    story.append(Spacer(1, 0.3*cm))
+
+    # Tabela de análise
+    story.append(Paragraph("Análise do Período", sec_style))
+    tbl = Table([CABECALHO_TABELA] + linhas, colWidths=[3*cm,2.5*cm,2.5*cm,2*cm,3*cm,3*cm])
+    tbl.setStyle(TableStyle([
+        ("BACKGROUND", (0,0), (-1,0), colors.HexColor("#1c1c1c")),
+        ("TEXTCOLOR",  (0,0), (-1,0), colors.HexColor("#cc0000")),
+        ("FONTNAME",   (0,0), (-1,0), "Helvetica-Bold"),
+        ("FONTSIZE",   (0,0), (-1,-1), 8),
+        ("ALIGN",      (0,0), (-1,-1), "CENTER"),
+        ("ROWBACKGROUNDS", (0,1), (-1,-1),
+         [colors.HexColor("#161616"), colors.HexColor("#202020")]),
+        ("TEXTCOLOR",  (0,1), (-1,-1), colors.white),
+        ("GRID",       (0,0), (-1,-1), 0.3, colors.HexColor("#2e2e2e")),
+        ("TOPPADDING", (0,0), (-1,-1), 4),
+        ("BOTTOMPADDING",(0,0),(-1,-1),4),
+    ]))
+    story.append(tbl)
+    story.append(Spacer(1, 0.4*cm))
+
+    # Score + insights
+    story.append(Paragraph("Inteligência do Período", sec_style))
+    story.append(Paragraph(f"Score da carteira: {score}/10", body_style))
+    for f in frases:
+        story.append(Paragraph(f"• {f['titulo']}: {f['texto']}", body_style))
+
+    doc.build(story)
+
+
+# ==============================
+# WORKERS
+# ==============================
+def _gerar_um(pedido, fechamentos, pasta_saida, pasta_cache, chave):
+    """Roda num processo do pool: monta tabela/insights e grava os arquivos do pedido."""
+    dados, tickers = _dados_do_pedido(fechamentos, pedido["tickers"])
+    if not tickers:
+        return {"nome": pedido["nome"], "arquivos": [], "erro": "Nenhum dado retornado."}
+
+    grafico  = os.path.join(pasta_cache, f"{chave}.png")
+    renderizou = _renderizar_grafico(pedido, fechamentos, grafico)
+
+    analises = _calcular_analise(dados, tickers)
+    linhas   = _linhas_tabela(dados, tickers, analises)
+    score    = _calcular_score(analises)
+    frases   = _gerar_insights_completo(analises, dados, tickers,
+                                         pedido["start"], pedido["end"])
+    titulo   = f"{pedido['nome']} — {', '.join(nome_exibicao(t) for t in tickers[:6])}" \
+               + ("..." if len(tickers) > 6 else "")
+
+    arquivos = []
+    for formato in pedido["formatos"]:
+        caminho = os.path.join(pasta_saida, f"{pedido['arquivo']}.{formato}")
+        if formato == "pdf":
+            _montar_pdf(caminho, grafico, linhas, score, frases, titulo)
+        elif formato == "png":
+            _figura_pagina(grafico, linhas, score, frases, titulo).savefig(
+                caminho, format="png", dpi=110, facecolor=BG)
+        else:
+            continue
+        arquivos.append(caminho)
+    return {"nome": pedido["nome"], "arquivos": arquivos, "cache_grafico": not renderizou}
+
+def gerar_relatorios(pedidos, pasta_saida="relatorios", processos=None, pasta_cache=None):
+    """
+    Gera os relatórios de todos os pedidos em paralelo.
+    1) baixa os fechamentos uma vez por período;
+    2) desenha cada gráfico distinto uma vez só (pula os que já estão no cache);
+    3) monta tabela + insights + arquivos de cada pedido no pool.
+    Retorna uma lista de dicts {"nome", "arquivos", "erro"?}.
+    """
+    pedidos     = [_normalizar_pedido(p, i) for i, p in enumerate(pedidos)]
+    pasta_cache = pasta_cache or os.path.join(pasta_saida, ".cache_graficos")
+    os.makedirs(pasta_saida, exist_ok=True)
+    os.makedirs(pasta_cache, exist_ok=True)
+
+    fechamentos = _baixar_fechamentos(pedidos)
+    recortes, chaves = [], []
+    for p in pedidos:
+        fech = fechamentos[(p["start"], p["end"])]
+        fech = fech[[t for t in p["tickers"] if t in fech.columns]]
+        recortes.append(fech)
+        chaves.append(_chave_grafico(p, fech))
+
+    resultados = []
+    # spawn: os workers não herdam o estado do processo pai (nem um Tk, se houver)
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=processos, mp_context=ctx) as pool:
+        # Fase 1 — um render por gráfico distinto ainda fora do cache
+        pendentes = {}
+        for p, fech, chave in zip(pedidos, recortes, chaves):
+            caminho = os.path.join(pasta_cache, f"{chave}.png")
+            if chave not in pendentes and not os.path.exists(caminho) and len(fech.columns):
+                pendentes[chave] = pool.submit(_renderizar_grafico, p, fech, caminho)
+        for futuro in pendentes.values():
+            try:
+                futuro.result()
+            except Exception:
+                pass   # a fase 2 tenta de novo e reporta o erro no pedido
+
+        # Fase 2 — tabela, insights e arquivos de cada pedido
+        futuros = {
+            pool.submit(_gerar_um, p, fech, pasta_saida, pasta_cache, chave): p
+            for p, fech, chave in zip(pedidos, recortes, chaves)
+        }
+        for futuro in as_completed(futuros):
+            try:
+                resultados.append(futuro.result())
+            except Exception as e:
+                resultados.append({"nome": futuros[futuro]["nome"], "arquivos": [], "erro": str(e)})
+
+    usados = [os.path.join(pasta_cache, f"{chave}.png") for chave in chaves]
+    for caminho in usados:   # reaproveitado conta como uso recente
+        try:
+            os.utime(caminho)
+        except OSError:
+            pass
+    _podar_cache(pasta_cache, manter=usados)
+    return resultados
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Gera relatórios PNG/PDF em lote, sem interface gráfica.")
+    parser.add_argument("pedidos", help="arquivo JSON com a lista de pedidos")
+    parser.add_argument("--saida", default="relatorios", help="pasta de saída")
+    parser.add_argument("--processos", type=int, default=None,
+                        help="workers do pool (padrão: nº de CPUs)")
+    args = parser.parse_args(argv)
+
+    with open(args.pedidos, encoding="utf-8") as f:
+        pedidos = json.load(f)
+
+    inicio = datetime.now()
+    for r in gerar_relatorios(pedidos, args.saida, args.processos):
+        if r.get("erro"):
+            print(f"⚠ {r['nome']}: {r['erro']}")
+        else:
+            cache = " (gráfico do cache)" if r.get("cache_grafico") else ""
+            print(f"✔ {r['nome']}: {', '.join(r['arquivos'])}{cache}")
+    print(f"Concluído em {(datetime.now() - inicio).total_seconds():.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,462 @@
+# =============================================================================
+# investimentos.servico — o dashboard sem a interface
+# ServicoInvestimentos reúne dados (Yahoo + cache de preços em disco e em
+# memória), persistência (SQLite + fila de gravação), a carteira/CDBs em
+# memória e as análises. Nada aqui importa Tk: o mesmo código roda no app,
+# em scripts, em servidores e em processos de lote.
+#
+#   from investimentos.servico import ServicoInvestimentos
+#   s = ServicoInvestimentos(".")
+#   r = s.atualizar_carteira()          # preços, histórico, indicadores
+#   _calcular_pl(s.carteira, r["precos"])
+#   s.fechar()
+#
+# Abrir o serviço só lê a carteira do banco: numpy/pandas (cache de preços),
+# asyncio/ssl (rede) e yfinance entram no primeiro uso de cada um.
+# =============================================================================
+
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+
+from investimentos.banco import Banco, FilaGravacao
+from investimentos.carteira import _indicadores_risco, _periodo_carteira, reconstruir_patrimonio
+from investimentos.importador import mesclar
+from investimentos.memoria import CacheLRU
+
+VALIDADE_PRECOS_S = 300   # preço atual reaproveitado por um refresh incremental da carteira
+VALIDADE_INTRADIARIO_S = 60   # barras de hoje ainda estão se formando
+
+# O yfinance guarda estado global durante um download (sessão, dicionários de
+# resultados) e não aguenta chamadas simultâneas — o app e a API chamam de
+# várias threads, então toda chamada a ele passa por aqui (baixar_bruto()
+# para quem está fora do serviço). Reentrante: baixar() segura o lock
+# enquanto confere o cache e chama baixar_bruto().
+_LOCK_YF = threading.RLock()
+
+
+def _preco_via_yfinance(ticker):
+    """(último fechamento, anterior) pelo yfinance — reserva quando o endpoint direto falha."""
+    import yfinance as yf
+    with _LOCK_YF:
+        hist = yf.Ticker(ticker).history(period="2d")
+    close = hist["Close"].dropna()
+    preco = float(close.iloc[-1])
+    return preco, float(close.iloc[-2]) if len(close) >= 2 else preco
+
+
+# ── JSONs das versões antigas (só lidos na migração) ──
+def _ler_carteira_json(caminho):
+    """Lê o carteira.json antigo com validação de campos."""
+    if os.path.exists(caminho):
+        try:
+            with open(caminho, encoding="utf-8") as f:
+                dados = json.load(f)
+            if not isinstance(dados, dict):
+                return {}
+            validos = {}
+            for ticker, pos in dados.items():
+                ticker = ticker.strip()
+                if not ticker:
+                    continue
+                if all(k in pos for k in ("qtd","preco_medio","data_compra")):
+                    pos["qtd"]         = float(pos["qtd"])
+                    pos["preco_medio"] = float(pos["preco_medio"])
+                    validos[ticker]    = pos
+            return validos
+        except Exception:
+            try:
+                shutil.copy(caminho, caminho + ".bak")
+            except Exception:
+                pass
+            return {}
+    return {}
+
+def _ler_cdbs_json(caminho):
+    """Lê o carteira_cdbs.json antigo com validação de campos."""
+    if os.path.exists(caminho):
+        try:
+            with open(caminho, encoding="utf-8") as f:
+                dados = json.load(f)
+            # Valida que é lista e cada item tem os campos necessários
+            if not isinstance(dados, list):
+                return []
+            validos = []
+            for item in dados:
+                if all(k in item for k in ("nome","valor","pct_cdi","data")):
+                    # Garante tipos corretos
+                    item["valor"]   = float(item["valor"])
+                    item["pct_cdi"] = float(item["pct_cdi"])
+                    validos.append(item)
+            return validos
+        except Exception:
+            # JSON corrompido — faz backup e começa do zero
+            try:
+                shutil.copy(caminho, caminho + ".bak")
+            except Exception:
+                pass
+            return []
+    return []   # lista de dicts: {nome, valor, pct_cdi, data}
+
+
+class ServicoInvestimentos:
+    """
+    Estado e operações do dashboard para uma pasta de dados (historico.db,
+    .cache_precos/). Escritas vão pela fila em segundo plano; fechar()
+    grava o que estiver pendente.
+    """
+
+    def __init__(self, pasta, duravel=True, cache_memoria_mb=256, io=None):
+        self.pasta         = pasta
+        self.banco         = Banco(os.path.join(pasta, "historico.db"), duravel=duravel)
+        self.fila          = FilaGravacao(self.banco)
+        self.cache_memoria = CacheLRU(cache_memoria_mb * 2**20)
+        self._cache_precos = None
+        self._io           = io
+        self._migrar_json()
+        self.carteira = self._carregar("carteira", self.banco.carregar_carteira, {})
+        self.cdbs     = self._carregar("CDBs", self.banco.carregar_cdbs, [])
+        # ids novos saem daqui (a gravação é assíncrona, então o id não vem do INSERT)
+        self._ultimo_cdb = max([self.banco.ultimo_id_cdb()] + [c["id"] for c in self.cdbs])
+        # muda a cada alteração de posições/CDBs — chave para caches de quem lê o serviço
+        self.versao        = 0
+        self._versao_banco = self.banco.versao_dados()
+        # último refresh da carteira: {ticker: (preço, instante)} e indicadores por período
+        self._precos_carteira      = {}
+        self._indicadores_carteira = (None, {})
+
+    @property
+    def io(self):
+        """NucleoIO (event loop de rede) — criado no primeiro uso."""
+        if self._io is None:
+            from investimentos.rede import NucleoIO
+            self._io = NucleoIO()
+        return self._io
+
+    @property
+    def cache_precos(self):
+        """CachePrecos de <pasta>/.cache_precos — carregado no primeiro download."""
+        if self._cache_precos is None:
+            from investimentos.cache_precos import CachePrecos
+            self._cache_precos = CachePrecos.carregar(os.path.join(self.pasta, ".cache_precos"))
+        return self._cache_precos
+
+    # ── Persistência ──
+    def _carregar(self, nome, funcao, padrao):
+        try:
+            return funcao()
+        except Exception as e:
+            print(f"[SQLite] Erro ao carregar {nome}: {e}")
+            return padrao
+
+    def _migrar_json(self):
+        """
+        Importa carteira.json / carteira_cdbs.json para o banco uma única vez
+        (marcada no próprio banco). Os arquivos não são tocados — no checkout
+        eles são versionados, e renomear sujaria a árvore do git.
+        """
+        carteira_json = os.path.join(self.pasta, "carteira.json")
+        cdb_json      = os.path.join(self.pasta, "carteira_cdbs.json")
+        pendentes = [p for p in (carteira_json, cdb_json) if os.path.exists(p)]
+        try:
+            if not pendentes or self.banco.legado_importado():
+                return
+            self.banco.importar_legado(_ler_carteira_json(carteira_json), _ler_cdbs_json(cdb_json))
+        except Exception as e:
+            print(f"[SQLite] Erro ao migrar JSON: {e}")
+
+    def recarregar_se_mudou(self):
+        """
+        Relê carteira e CDBs se outro processo gravou no banco desde a última
+        olhada. True se recarregou. Os objetos são trocados, não alterados no
+        lugar: uma thread que já pegou self.carteira continua vendo a versão
+        inteira anterior, nunca um dict esvaziado no meio da recarga. Quem
+        chama isto (a API) deve sempre ler via self.carteira, sem guardar alias.
+        """
+        versao = self.banco.versao_dados()
+        if versao == self._versao_banco:
+            return False
+        self._versao_banco = versao
+        self.fila.esvaziar(timeout=5)   # o que este processo ainda tem na fila vem antes
+        carteira = self._carregar("carteira", self.banco.carregar_carteira, None)
+        cdbs     = self._carregar("CDBs", self.banco.carregar_cdbs, None)
+        if carteira is not None:
+            self.carteira = carteira
+        if cdbs is not None:
+            self.cdbs = cdbs
+            self._ultimo_cdb = max([self._ultimo_cdb] + [c["id"] for c in cdbs])
+        self.versao += 1
+        return True
+
+    def registrar_patrimonio(self, custo_total, patrimonio, lucro_rs, lucro_pct, n_ativos,
+                             posicoes=None):
+        """
+        Agenda o snapshot de hoje (um por dia — o UPSERT substitui o anterior).
+        posicoes = [(ticker, qtd, preço, custo, valor)] grava também o detalhe por ativo.
+        """
+        hoje = datetime.now().strftime("%Y-%m-%d")
+        if posicoes is not None:
+            self.fila.enfileirar(("snapshot", hoje), self.banco.registrar_snapshot,
+                                 custo_total, patrimonio, lucro_rs, lucro_pct, posicoes, hoje)
+        else:
+            self.fila.enfileirar(("snapshot", hoje), self.banco.registrar_patrimonio,
+                                 custo_total, patrimonio, lucro_rs, lucro_pct, n_ativos, hoje)
+
+    def buscar_historico(self, dias=90):
+        try:
+            return self.banco.buscar_historico(dias)
+        except Exception as e:
+            print(f"[SQLite] Erro ao buscar histórico: {e}")
+            return []
+
+    def buscar_historico_periodo(self, inicio=None, fim=None, max_pontos=400):
+        """(resolução, linhas) entre duas datas AAAA-MM-DD — ver Banco.buscar_historico_periodo."""
+        try:
+            return self.banco.buscar_historico_periodo(inicio, fim, max_pontos)
+        except Exception as e:
+            print(f"[SQLite] Erro ao buscar histórico: {e}")
+            return "D", []
+
+    def serie_posicao(self, ticker, inicio=None, fim=None, campo="valor"):
+        """Série diária de um ativo no histórico local — ex.: serie_posicao("PETR4.SA", campo="peso")."""
+        import numpy as np
+        try:
+            return self.banco.serie_posicao(ticker, inicio, fim, campo)
+        except Exception as e:
+            print(f"[SQLite] Erro ao buscar série de {ticker}: {e}")
+            return np.array([], dtype="datetime64[D]"), np.array([], dtype="float64")
+
+    def backfill_historico(self, dados_hist, start, end):
+        """Grava no histórico os pregões entre start e ontem que ainda não têm snapshot."""
+        try:
+            ja_tem = self.banco.datas_registradas(start, end)
+            totais, posicoes = reconstruir_patrimonio(
+                dict(self.carteira), dados_hist, ate=end, pular=ja_tem)
+            if totais:
+                self.banco.preencher_historico(totais, posicoes)
+        except Exception as e:
+            print(f"[SQLite] Erro no backfill do histórico: {e}")
+
+    # ── Carteira e CDBs (memória + fila) ──
+    def adicionar_posicao(self, ticker, qtd, pm, data_compra):
+        """Nova posição ou soma à existente (preço médio ponderado). True se era nova."""
+        nova = ticker not in self.carteira
+        if nova:
+            self.carteira[ticker] = {"qtd": qtd, "preco_medio": pm, "data_compra": data_compra}
+        else:
+            old = self.carteira[ticker]
+            qtd_total = float(old["qtd"]) + qtd
+            pm_novo   = (float(old["qtd"])*float(old["preco_medio"]) + qtd*pm) / qtd_total
+            self.carteira[ticker] = {"qtd": qtd_total, "preco_medio": round(pm_novo,4),
+                                     "data_compra": old["data_compra"]}
+        self.fila.enfileirar(("posicao", ticker), self.banco.salvar_posicao,
+                             ticker, dict(self.carteira[ticker]))
+        self.versao += 1
+        return nova
+
+    def remover_posicao(self, ticker):
+        if self.carteira.pop(ticker, None) is not None:
+            self.fila.enfileirar(("posicao", ticker), self.banco.remover_posicao, ticker)
+            self.versao += 1
+
+    def aplicar_importacao(self, relatorio):
+        """Mescla o relatório de importar_extratos() e grava tudo numa transação."""
+        upserts, remover = mesclar(self.carteira, relatorio)
+        if upserts or remover:
+            self.fila.enfileirar(("importacao", id(relatorio)), self.banco.importar_posicoes,
+                                 upserts, remover)
+            self.versao += 1
+        return upserts, remover
+
+    def adicionar_cdb(self, nome, valor, pct_cdi, data, vencimento="—"):
+        self._ultimo_cdb += 1
+        cdb = {"id": self._ultimo_cdb, "nome": nome, "valor": valor, "pct_cdi": pct_cdi,
+               "data": data, "vencimento": vencimento}
+        self.fila.enfileirar(("cdb", cdb["id"]), self.banco.inserir_cdb, dict(cdb))
+        self.cdbs.append(cdb)
+        self.versao += 1
+        return cdb
+
+    def remover_cdb(self, idx):
+        if 0 <= idx < len(self.cdbs):
+            cdb_id = self.cdbs.pop(idx)["id"]
+            self.fila.enfileirar(("cdb", cdb_id), self.banco.remover_cdb, cdb_id)
+            self.versao += 1
+
+    # ── Preços ──
+    def baixar(self, tickers, start, end):
+        """
+        yf.download de fechamentos passando pelo cache: o que já foi baixado não
+        volta à rede — só a ponta que falta (ex.: os pregões desde a última execução).
+        Períodos já cobertos pelo disco saem prontos do cache em memória.
+        """
+        tickers = list(tickers)
+        chave   = ("diario", tuple(tickers), start, end)
+        if not any(self._faltando(tickers, start, end)):
+            return self.cache_memoria.obter_ou_calcular(
+                chave, lambda: self.cache_precos.dados(tickers, start, end))
+        novos = None
+        with _LOCK_YF:
+            # outra thread pode ter baixado o mesmo enquanto esta esperava
+            inteiros, ponta = self._faltando(tickers, start, end)
+            for parte, desde in ((inteiros, start), (list(ponta), min(ponta.values(), default=start))):
+                if not parte:
+                    continue
+                novos = self.baixar_bruto(parte, start=desde, end=end)
+                if novos is not None and not novos.empty:
+                    self.cache_precos.incorporar(novos, parte, desde, end)
+        if inteiros and len(inteiros) == len(tickers) and (novos is None or novos.empty):
+            return novos
+        return self.cache_memoria.guardar(chave, self.cache_precos.dados(tickers, start, end))
+
+    def _faltando(self, tickers, start, end):
+        """Por ticker: (sem o começo do período → vêm inteiros, {ticker: desde} → só a ponta)."""
+        inteiros, ponta = [], {}
+        for t in tickers:
+            desde = self.cache_precos.falta_desde([t], start, end)
+            if desde == start:
+                inteiros.append(t)
+            elif desde is not None:
+                ponta[t] = desde
+        return inteiros, ponta
+
+    def baixar_bruto(self, tickers, **opcoes):
+        """yf.download(tickers, **opcoes) sem cache, serializado com os outros downloads."""
+        import yfinance as yf
+        opcoes = {"auto_adjust": True, "progress": False, **opcoes}
+        with _LOCK_YF:
+            return yf.download(tickers, **opcoes)
+
+    def baixar_intradiario(self, tickers, intervalo, start, end):
+        """
+        Barras intradiárias da janela (reaproveitadas do cache em memória).
+        end é exclusivo; janelas que incluem hoje só valem VALIDADE_INTRADIARIO_S.
+        """
+        def _baixar():
+            return self.baixar_bruto(tickers, start=start, end=end, interval=intervalo)
+        hoje   = datetime.now().strftime("%Y-%m-%d")
+        janela = int(time.time() // VALIDADE_INTRADIARIO_S) if end > hoje else None
+        return self.cache_memoria.obter_ou_calcular(
+            (intervalo, tuple(tickers), start, end, janela), _baixar)
+
+    async def cotacoes_async(self, tickers):
+        """{ticker: (preço, anterior)} de todos em paralelo no NucleoIO."""
+        return await self.io.precos_recentes(list(tickers), reserva=_preco_via_yfinance)
+
+    async def precos_atuais_async(self, tickers):
+        """{ticker: preco_atual} — ignora inválidos/delistados."""
+        tickers = [t.strip() for t in tickers if t.strip()]   # espaços corrompem o yfinance
+        return {t: p for t, (p, _) in (await self.cotacoes_async(tickers)).items()}
+
+    def precos_atuais(self, tickers):
+        """Versão bloqueante (threads de trabalho, scripts)."""
+        return self.io.rodar(self.precos_atuais_async(tickers))
+
+    # ── Análises ──
+    def atualizar_carteira(self, incremental=False):
+        """
+        Tudo que o painel da carteira precisa, numa chamada: preços atuais,
+        fechamentos desde a compra mais antiga, Ibovespa e indicadores de
+        risco. Também preenche no histórico os dias em que o app não abriu.
+
+        incremental=True (depois de adicionar/remover posições): só vão à rede
+        os preços das posições novas (ou mais velhos que VALIDADE_PRECOS_S) e,
+        pelo cache, o histórico que falta; os indicadores só são calculados
+        para os tickers novos, se o período da carteira não mudou.
+        """
+        resultado = {"precos": {}, "ibov": None, "dados_hist": None,
+                     "indicadores": {}, "erro": None}
+        try:
+            tickers = list(self.carteira.keys())
+            if not tickers:
+                return resultado
+            resultado["precos"] = self._precos_da_carteira(tickers, incremental)
+            periodo = _periodo_carteira(self.carteira)
+            if periodo:
+                start, end = periodo
+                try:
+                    resultado["dados_hist"] = self.baixar(tickers, start, end)
+                except Exception: pass
+                self.backfill_historico(resultado["dados_hist"], start, end)
+                try:
+                    resultado["ibov"] = self.baixar(["^BVSP"], start, end)
+                except Exception: pass
+                try:
+                    resultado["indicadores"] = self._indicadores_da_carteira(
+                        resultado["dados_hist"], resultado["ibov"], tickers, periodo, incremental)
+                except Exception: pass
+        except Exception as e:
+            resultado["erro"] = str(e)
+        return resultado
+
+    def _precos_da_carteira(self, tickers, incremental):
+        """Preços atuais; no modo incremental, só busca os que faltam ou venceram."""
+        agora = time.monotonic()
+        cache = self._precos_carteira if incremental else {}
+        buscar = [t for t in tickers
+                  if t not in cache or agora - cache[t][1] > VALIDADE_PRECOS_S]
+        novos  = self.precos_atuais(buscar) if buscar else {}
+        self._precos_carteira = {**{t: cache[t] for t in tickers if t in cache and t not in buscar},
+                                 **{t: (p, agora) for t, p in novos.items()}}
+        return {t: p for t, (p, _) in self._precos_carteira.items()}
+
+    def _indicadores_da_carteira(self, dados, ibov, tickers, periodo, incremental):
+        """Beta/Sharpe/Drawdown; reaproveita os de tickers já calculados no mesmo período."""
+        periodo_ant, anteriores = self._indicadores_carteira
+        anteriores = anteriores if incremental and periodo_ant == periodo else {}
+        faltam = [t for t in tickers if t not in anteriores]
+        novos  = _indicadores_risco(dados, ibov, tickers, so=faltam) if faltam else {}
+        indicadores = {**{t: anteriores[t] for t in tickers if t in anteriores}, **novos}
+        self._indicadores_carteira = (periodo, indicadores)
+        return indicadores
+
+    def indicadores_risco(self, carteira=None):
+        """Beta, Sharpe e Drawdown de cada ativo (baixa o que faltar)."""
+        carteira = self.carteira if carteira is None else carteira
+        periodo  = _periodo_carteira(carteira) if carteira else None
+        if not periodo:
+            return {}
+        tickers = list(carteira.keys())
+        try:
+            dados = self.baixar(tickers, *periodo)
+        except Exception:
+            return {}
+        try:
+            ibov = self.baixar(["^BVSP"], *periodo)
+        except Exception:
+            ibov = None
+        return _indicadores_risco(dados, ibov, tickers)
+
+    def dados_benchmark(self, carteira=None):
+        """(dados, ibov, start, end) para o comparativo com benchmarks, ou None."""
+        carteira = self.carteira if carteira is None else carteira
+        periodo  = _periodo_carteira(carteira)
+        if not periodo:
+            return None
+        start, end = periodo
+        return self.baixar(list(carteira.keys()), start, end), self.baixar(["^BVSP"], start, end), start, end
+
+    async def consultar_ia(self, pergunta, chaves):
+        """Resposta da consultora multi-LLM para a carteira atual."""
+        from investimentos.ia import _montar_contexto_carteira, executar_tarefa_financeira
+        precos = await self.precos_atuais_async(list(self.carteira)) if self.carteira else {}
+        ctx    = _montar_contexto_carteira(self.carteira, self.cdbs, precos)
+        return await executar_tarefa_financeira(self.io, pergunta, ctx, chaves)
+
+    # ── Encerramento ──
+    def fechar(self, timeout=10):
+        """Grava pendências, o cache de preços, e fecha rede e banco."""
+        if not self.fila.fechar(timeout=timeout):
+            print("[SQLite] Aviso: gravações pendentes não concluídas ao sair.")
+        try:
+            if self._cache_precos is not None:
+                self._cache_precos.salvar()
+        except OSError as e:
+            print(f"[Cache] Não foi possível gravar o cache de preços: {e}")
+        if self._io is not None:
+            self._io.fechar()
+        self.banco.fechar()
+        print(f"[Cache] Memória: {self.cache_memoria.resumo()}")
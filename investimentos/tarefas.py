@@ -0,0 +1,211 @@
+# =============================================================================
+# investimentos.tarefas — executor de tarefas em segundo plano
+# Pool fixo de threads com fila de prioridade. Cada tarefa pertence a um
+# "painel" (gráfico, carteira, risco...). Um pedido novo no mesmo painel
+# incrementa a geração: as tarefas antigas ainda na fila nem rodam e as que
+# já estão rodando têm o resultado descartado — o painel nunca mostra dado
+# velho. Pedidos idênticos (mesma chave) a uma tarefa ativa reaproveitam a
+# tarefa em vez de baixar de novo.
+# O resultado volta por `agendar(funcao)`, que deve executar na thread da UI.
+# Funções `async def` não ocupam o pool: rodam no loop do NucleoIO
+# (investimentos.rede) e cancelar a tarefa cancela a corrotina de fato.
+# =============================================================================
+
+import inspect
+import itertools
+import queue
+import threading
+import time
+
+PRIORIDADE_ALTA   = 0   # ação direta do usuário (gerar gráfico, perguntar à IA)
+PRIORIDADE_NORMAL = 5
+PRIORIDADE_BAIXA  = 9   # refresh automático, pré-carregamento
+
+
+class Tarefa:
+    """Uma execução agendada. estado: fila → rodando → ok/erro/cancelada."""
+
+    def __init__(self, painel, geracao, nome, chave, funcao, args,
+                 ao_concluir, ao_erro, prioridade):
+        self.painel      = painel
+        self.geracao     = geracao
+        self.nome        = nome
+        self.chave       = chave
+        self.funcao      = funcao
+        self.args        = args
+        self.ao_concluir = ao_concluir
+        self.ao_erro     = ao_erro
+        self.prioridade  = prioridade
+        self.estado      = "fila"
+        self.criada      = time.monotonic()
+        self.inicio      = None
+        self.futuro      = None   # concurrent.futures.Future das tarefas async
+        self._cancelada  = threading.Event()
+
+    def cancelar(self):
+        self._cancelada.set()
+        if self.futuro is not None:
+            self.futuro.cancel()
+
+    def cancelada(self):
+        """Funções longas podem consultar isto entre etapas e parar cedo."""
+        return self._cancelada.is_set()
+
+    def ativa(self):
+        return self.estado in ("fila", "rodando") and not self.cancelada()
+
+
+class Executor:
+    """
+    Pool de `trabalhadores` threads daemon. `agendar(f)` leva f para a
+    thread da UI (ex.: lambda f: root.after(0, f)); `ao_mudar()` é chamado
+    lá sempre que a lista de tarefas em andamento muda. `nucleo` (NucleoIO,
+    ou função sem argumentos que o devolve — assim o loop só é criado na
+    primeira tarefa async) executa as tarefas cujas funções são corrotinas.
+    """
+
+    def __init__(self, trabalhadores=4, agendar=None, ao_mudar=None, nucleo=None):
+        self.agendar   = agendar or (lambda f: f())
+        self.ao_mudar  = ao_mudar
+        self.nucleo    = nucleo
+        self._fila     = queue.PriorityQueue()
+        self._seq      = itertools.count()
+        self._lock     = threading.Lock()
+        self._geracao  = {}     # painel -> geração atual
+        self._ativas   = []     # tarefas na fila ou rodando, em ordem de criação
+        self._threads  = [threading.Thread(target=self._loop, daemon=True,
+                                           name=f"tarefa-{i}") for i in range(trabalhadores)]
+        self._fechado  = False
+        for t in self._threads:
+            t.start()
+
+    # ── Submissão ──
+    def submeter(self, painel, funcao, *args, ao_concluir=None, ao_erro=None,
+                 prioridade=PRIORIDADE_NORMAL, nome=None, chave=None, substituir=True):
+        """
+        Agenda funcao(*args). Com substituir=True a tarefa substitui as
+        anteriores do painel; com False convive com elas (ex.: verificações
+        de tickers diferentes). Se já houver tarefa ativa com a mesma chave
+        no painel, devolve essa em vez de criar outra.
+        """
+        with self._lock:
+            if chave is not None:
+                for t in self._ativas:
+                    if t.painel == painel and t.chave == chave and t.ativa() \
+                            and t.geracao == self._geracao.get(painel):
+                        return t
+            if substituir or painel not in self._geracao:
+                self._geracao[painel] = self._geracao.get(painel, 0) + 1
+            geracao = self._geracao[painel]
+            antigas = [t for t in self._ativas if t.painel == painel] if substituir else []
+            tarefa = Tarefa(painel, geracao, nome or painel, chave, funcao, args,
+                            ao_concluir, ao_erro, prioridade)
+            self._ativas.append(tarefa)
+            assincrona = self.nucleo is not None and inspect.iscoroutinefunction(funcao)
+            if not assincrona:
+                self._fila.put((prioridade, next(self._seq), tarefa))
+        # fora do lock: cancelar um Future já pronto roda _pronto na hora e,
+        # com agendar síncrono, a entrega precisa pegar o lock de novo
+        for t in antigas:
+            t.cancelar()
+        if assincrona:
+            self._iniciar_async(tarefa)
+        self._notificar()
+        return tarefa
+
+    def cancelar(self, painel):
+        """Cancela tudo do painel (os resultados que chegarem são descartados)."""
+        with self._lock:
+            self._geracao[painel] = self._geracao.get(painel, 0) + 1
+            antigas = [t for t in self._ativas if t.painel == painel]
+        for t in antigas:
+            t.cancelar()
+        self._notificar()
+
+    def ocupado(self, painel):
+        with self._lock:
+            return any(t.painel == painel and t.ativa() for t in self._ativas)
+
+    def em_andamento(self):
+        """[(painel, nome, estado, segundos)] das tarefas ativas."""
+        agora = time.monotonic()
+        with self._lock:
+            return [(t.painel, t.nome, t.estado, agora - (t.inicio or t.criada))
+                    for t in self._ativas if t.ativa()]
+
+    # ── Execução ──
+    def _atual(self, tarefa):
+        return not tarefa.cancelada() and self._geracao.get(tarefa.painel) == tarefa.geracao
+
+    def _retirar(self, tarefa, estado):
+        with self._lock:
+            tarefa.estado = estado
+            if tarefa in self._ativas:
+                self._ativas.remove(tarefa)
+
+    def _loop(self):
+        while True:
+            _, _, tarefa = self._fila.get()
+            if tarefa is None:
+                return
+            if tarefa.cancelada():
+                self._retirar(tarefa, "cancelada")
+                self._notificar()
+                continue
+            tarefa.estado = "rodando"
+            tarefa.inicio = time.monotonic()
+            self._notificar()
+            try:
+                resultado, erro = tarefa.funcao(*tarefa.args), None
+            except Exception as e:
+                resultado, erro = None, e
+            self.agendar(lambda t=tarefa, r=resultado, e=erro: self._entregar(t, r, e))
+
+    def _iniciar_async(self, tarefa):
+        tarefa.estado = "rodando"
+        tarefa.inicio = time.monotonic()
+
+        def _pronto(futuro):
+            if futuro.cancelled():
+                resultado, erro = None, None
+            else:
+                erro      = futuro.exception()
+                resultado = None if erro else futuro.result()
+            self.agendar(lambda: self._entregar(tarefa, resultado, erro))
+
+        nucleo = self.nucleo() if callable(self.nucleo) else self.nucleo
+        tarefa.futuro = nucleo.executar(tarefa.funcao(*tarefa.args))
+        tarefa.futuro.add_done_callback(_pronto)
+
+    def _entregar(self, tarefa, resultado, erro):
+        """Na thread da UI: só entrega se a tarefa ainda é a geração atual do painel."""
+        if not self._atual(tarefa):
+            self._retirar(tarefa, "cancelada")
+        else:
+            self._retirar(tarefa, "erro" if erro else "ok")
+            try:
+                if erro is None:
+                    if tarefa.ao_concluir:
+                        tarefa.ao_concluir(resultado)
+                elif tarefa.ao_erro:
+                    tarefa.ao_erro(erro)
+                else:
+                    print(f"[Tarefas] {tarefa.nome}: {erro}")
+            except Exception as e:
+                print(f"[Tarefas] Erro ao aplicar {tarefa.nome}: {e}")
+        if self.ao_mudar:
+            self.ao_mudar()
+
+    def _notificar(self):
+        if self.ao_mudar and not self._fechado:
+            self.agendar(self.ao_mudar)
+
+    def fechar(self):
+        """Descarta a fila; tarefas em execução terminam sozinhas (threads daemon)."""
+        self._fechado = True
+        with self._lock:
+            ativas = list(self._ativas)
+        for t in ativas:
+            t.cancelar()
+        for _ in self._threads:
+            self._fila.put((-1, next(self._seq), None))
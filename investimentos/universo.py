@@ -0,0 +1,555 @@
+# =============================================================================
+# investimentos.universo — matriz de preços de todo o universo B3 em disco
+# Uma matriz datas × tickers append-only, mapeada em memória (np.memmap),
+# com um índice de símbolos. Cada ticker é uma coluna contígua de
+# `cap_datas` posições; ticker novo = arquivo cresce no fim, pregão novo =
+# linhas preenchidas dentro da capacidade. Nada é carregado inteiro: a
+# varredura lê só as linhas (datas) e as colunas de cada bloco que processa.
+#
+# Arquivos em <pasta>/:
+#   universo.json  formato, dtype, capacidade, nº de datas e os tickers
+#                  (gravado depois dos dados — o que passar dele é ignorado)
+#   datas.bin      int64, dias desde 1970-01-01, crescente
+#   precos.bin     float32/float64 (cap_datas, n_tickers), Fortran order
+#   varredura_<inicio>.npz  ponto de retomada da varredura (acumuladores por ticker)
+#
+# Uso:
+#   python -m investimentos.universo atualizar lista_b3.txt --desde 2005-01-01
+#   python -m investimentos.universo varrer --inicio 2024-01-01 --top 30
+#   python -m investimentos.universo varrer --inicio 2022-01-01 --risco Baixo Médio \
+#       --tendencia Alta --sharpe-min 0.5 --dd-max 30 --ordenar sharpe --a-cada 60
+# =============================================================================
+
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from investimentos.analise import CDI_ANUAL, _classificar_risco, _tendencia_por_diff
+
+FORMATO = 1
+MAX_REESCRITAS = 64   # regravações lembradas em universo.json (para validar pontos de retomada)
+
+
+class UniversoPrecos:
+    """Matriz datas × tickers append-only em memory-map."""
+
+    def __init__(self, pasta, dtype="float32", cap_datas=8192, somente_leitura=False):
+        self.pasta = pasta
+        self._modo = "r" if somente_leitura else "r+"
+        self._datas = self._precos = None
+        meta = self._ler_meta()
+        if meta is None:
+            if somente_leitura:
+                raise FileNotFoundError(f"Universo não encontrado em {pasta}")
+            os.makedirs(pasta, exist_ok=True)
+            meta = {"formato": FORMATO, "dtype": np.dtype(dtype).name,
+                    "cap_datas": cap_datas, "n_datas": 0, "tickers": []}
+            with open(self._caminho("datas.bin"), "wb") as f:
+                f.truncate(cap_datas * 8)
+            open(self._caminho("precos.bin"), "wb").close()
+            self._meta = meta
+            self._salvar_meta()
+        self._meta   = meta
+        self.dtype   = np.dtype(meta["dtype"])
+        self._coluna = {t: j for j, t in enumerate(meta["tickers"])}
+        self._mapear()
+
+    # ── Arquivos ──
+    def _caminho(self, nome):
+        return os.path.join(self.pasta, nome)
+
+    def _ler_meta(self):
+        try:
+            with open(self._caminho("universo.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get("formato") != FORMATO:
+            raise ValueError(f"Formato de universo desconhecido em {self.pasta}")
+        return meta
+
+    def _salvar_meta(self):
+        tmp = self._caminho("universo.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._meta, f)
+        os.replace(tmp, self._caminho("universo.json"))
+
+    def _mapear(self):
+        cap, n_t = self._meta["cap_datas"], len(self._meta["tickers"])
+        tam_datas  = os.path.getsize(self._caminho("datas.bin"))
+        tam_precos = os.path.getsize(self._caminho("precos.bin"))
+        if tam_datas < cap * 8 or tam_precos < cap * n_t * self.dtype.itemsize:
+            raise ValueError(f"Universo inconsistente em {self.pasta} (arquivos menores que o índice)")
+        self._datas  = np.memmap(self._caminho("datas.bin"), dtype="int64",
+                                 mode=self._modo, shape=(cap,))
+        self._precos = (np.memmap(self._caminho("precos.bin"), dtype=self.dtype,
+                                  mode=self._modo, shape=(cap, n_t), order="F")
+                        if n_t else np.empty((cap, 0), dtype=self.dtype))
+
+    def _soltar(self):
+        for arr in (self._datas, self._precos):
+            if isinstance(arr, np.memmap):
+                arr.flush()
+        self._datas = self._precos = None
+
+    def flush(self):
+        if self._modo == "r":
+            return
+        for arr in (self._datas, self._precos):
+            if isinstance(arr, np.memmap):
+                arr.flush()
+        self._salvar_meta()
+
+    # ── Índice de símbolos ──
+    @property
+    def tickers(self):
+        return self._meta["tickers"]
+
+    @property
+    def n_datas(self):
+        return self._meta["n_datas"]
+
+    @property
+    def seq(self):
+        """Nº de gravações — muda a cada `gravar`."""
+        return self._meta.get("seq", 0)
+
+    def menor_reescrita(self, desde_seq):
+        """Menor linha regravada depois da gravação `desde_seq` (None = nenhuma; 0 = log não alcança)."""
+        if desde_seq < self._meta.get("reescritas_perdidas", 0):
+            return 0
+        linhas = [l for q, l in self._meta.get("reescritas", []) if q > desde_seq]
+        return min(linhas) if linhas else None
+
+    def ultima_data(self):
+        n = self.n_datas
+        return self._datas[n - 1].astype("datetime64[D]") if n else None
+
+    # ── Crescimento ──
+    def _adicionar_colunas(self, novos):
+        """Ticker novo = coluna nova no fim do arquivo, preenchida com NaN."""
+        cap, n0 = self._meta["cap_datas"], len(self.tickers)
+        self._soltar()
+        with open(self._caminho("precos.bin"), "r+b") as f:
+            f.truncate(cap * (n0 + len(novos)) * self.dtype.itemsize)
+        self._meta["tickers"] = self.tickers + list(novos)
+        self._coluna.update({t: n0 + i for i, t in enumerate(novos)})
+        self._mapear()
+        self._precos[:, n0:] = np.nan
+
+    def _crescer(self, novo_cap):
+        """Mais datas que a capacidade: reescreve com capacidade maior (raro — 8192 ≈ 32 anos)."""
+        n, n_t = self.n_datas, len(self.tickers)
+        tmp_p, tmp_d = self._caminho("precos.bin.tmp"), self._caminho("datas.bin.tmp")
+        novo = np.memmap(tmp_p, dtype=self.dtype, mode="w+", shape=(novo_cap, max(n_t, 1)), order="F")
+        novo[:] = np.nan
+        for j in range(n_t):
+            novo[:n, j] = self._precos[:n, j]
+        novo.flush(); del novo
+        datas = np.memmap(tmp_d, dtype="int64", mode="w+", shape=(novo_cap,))
+        datas[:n] = self._datas[:n]
+        datas.flush(); del datas
+        self._soltar()
+        os.replace(tmp_p, self._caminho("precos.bin"))
+        os.replace(tmp_d, self._caminho("datas.bin"))
+        self._meta["cap_datas"] = novo_cap
+        self._salvar_meta()
+        self._mapear()
+
+    # ── Escrita ──
+    def gravar(self, fechamentos):
+        """
+        Grava um DataFrame de fechamentos (datas × tickers). Tickers novos viram
+        colunas; pregões depois do último viram linhas; pregões já existentes
+        são sobrescritos. Datas antigas que não estão no índice são descartadas
+        (append-only) — devolve quantas foram.
+        """
+        if fechamentos is None or fechamentos.empty:
+            return 0
+        fech = fechamentos.sort_index()
+        idx  = fech.index.tz_localize(None) if fech.index.tz is not None else fech.index
+        dias = idx.values.astype("datetime64[D]").astype("int64")
+
+        novos = [t for t in fech.columns if t not in self._coluna]
+        if novos:
+            self._adicionar_colunas(novos)
+
+        n      = self.n_datas
+        ultimo = self._datas[n - 1] if n else np.iinfo("int64").min
+        extras = np.unique(dias[dias > ultimo])
+        if n + len(extras) > self._meta["cap_datas"]:
+            self._crescer(max(self._meta["cap_datas"] * 2, n + len(extras)))
+        if len(extras):
+            self._datas[n:n + len(extras)] = extras
+            self._precos[n:n + len(extras), :] = np.nan   # descarta restos de um append interrompido
+            n += len(extras)
+
+        pos = np.searchsorted(self._datas[:n], dias)
+        ok  = pos < n
+        ok[ok] = self._datas[:n][pos[ok]] == dias[ok]
+        vals = fech.to_numpy(dtype=self.dtype)
+        for c, t in enumerate(fech.columns):
+            m = ok & ~np.isnan(vals[:, c])
+            self._precos[pos[m], self._coluna[t]] = vals[m, c]
+
+        # pregões que já existiam e foram regravados — invalidam pontos de retomada da varredura
+        self._meta["seq"] = self._meta.get("seq", 0) + 1
+        antigos = pos[ok & (pos < self._meta["n_datas"])]
+        if len(antigos):
+            log = self._meta.setdefault("reescritas", [])
+            log.append([self._meta["seq"], int(antigos.min())])
+            if len(log) > MAX_REESCRITAS:
+                self._meta["reescritas_perdidas"] = log.pop(0)[0]
+        self._meta["n_datas"] = n
+        self.flush()
+        return int((~ok).sum())
+
+    # ── Leitura (views, sem cópia) ──
+    def _linhas(self, inicio=None, fim=None):
+        d  = self._datas[:self.n_datas]
+        i0 = 0 if inicio is None else int(np.searchsorted(d, np.datetime64(inicio, "D").astype("int64")))
+        i1 = len(d) if fim is None else int(np.searchsorted(d, np.datetime64(fim, "D").astype("int64"), side="right"))
+        return i0, i1
+
+    def janela(self, inicio=None, fim=None):
+        """(datas datetime64[D], matriz datas × tickers) de [inicio, fim] — views do memmap."""
+        i0, i1 = self._linhas(inicio, fim)
+        return (self._datas[i0:i1].view("datetime64[D]"),
+                self._precos[i0:i1, :len(self.tickers)])
+
+    def coluna(self, ticker, inicio=None, fim=None):
+        """(datas, preços) de um ticker — a coluna é contígua no arquivo."""
+        i0, i1 = self._linhas(inicio, fim)
+        return self._datas[i0:i1].view("datetime64[D]"), self._precos[i0:i1, self._coluna[ticker]]
+
+
+# ==============================
+# VARREDURA DO UNIVERSO
+# ==============================
+# Cada coluna é resumida por acumuladores (contagem, 1º/último preço, soma e
+# soma dos quadrados das variações, pico e pior queda, 20 últimos preços).
+# Eles avançam linha a linha e podem ser retomados: a varredura grava o
+# estado num ponto um pouco atrás do último pregão (o `atualizar` regrava os
+# últimos dias) e, na próxima, só lê dali em diante — mais as colunas novas.
+MARGEM_PONTO = 10    # pregões refeitos a cada varredura
+DIAS_ANO     = 252
+
+def _estado_vazio(n_cols):
+    est = {k: np.zeros(n_cols) for k in ("n", "nr", "s1", "s2", "dd")}
+    est["primeiro"] = np.full(n_cols, np.nan)
+    est["ultimo"]   = np.full(n_cols, np.nan)
+    est["pico"]     = np.full(n_cols, -np.inf)
+    est["ult20"]    = np.full((20, n_cols), np.nan)   # alinhado ao fim, NaN no topo
+    return est
+
+def _fatia(est, j0, j1):
+    return {k: v[..., j0:j1] for k, v in est.items()}
+
+def _juntar(partes):
+    return {k: np.concatenate([p[k] for p in partes], axis=-1) for k in partes[0]}
+
+def _acumular(est, X):
+    """Novo estado depois das linhas de X (datas × colunas, float64). Não altera `est`."""
+    if not len(X):
+        return est
+    cols   = np.arange(X.shape[1])
+    linhas = np.arange(len(X))[:, None]
+    valid  = ~np.isnan(X)
+
+    # variação sobre o último preço válido anterior — a linha 0 de Y é o último do estado
+    Y   = np.vstack([est["ultimo"][None], X])
+    ant = np.where(~np.isnan(Y), np.arange(len(Y))[:, None], 0)
+    np.maximum.accumulate(ant, axis=0, out=ant)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = np.where(valid, X / Y[ant[:-1], cols] - 1, np.nan)
+    tem_r = ~np.isnan(r)
+    r     = np.where(tem_r, r, 0.0)
+
+    primeiro = X[np.where(valid, linhas, len(X) - 1).min(axis=0), cols]
+    ult_lin  = np.where(valid, linhas, -1).max(axis=0)
+
+    # pico corrente e pior queda relativa a ele
+    pico = np.maximum.accumulate(np.vstack([est["pico"][None], np.where(valid, X, -np.inf)]),
+                                 axis=0)[1:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        queda = np.where(valid, X / pico - 1, np.inf).min(axis=0)
+
+    # 20 últimos preços válidos (estado + X), alinhados ao fim
+    W      = np.vstack([est["ult20"], X])
+    vW     = ~np.isnan(W)
+    ordem  = np.cumsum(vW[::-1], axis=0)[::-1]       # 1 = último válido
+    li, co = np.nonzero(vW & (ordem <= 20))
+    ult20  = np.full((20, X.shape[1]), np.nan)
+    ult20[20 - ordem[li, co], co] = W[li, co]
+
+    return {
+        "n":        est["n"]  + valid.sum(axis=0),
+        "nr":       est["nr"] + tem_r.sum(axis=0),
+        "s1":       est["s1"] + r.sum(axis=0),
+        "s2":       est["s2"] + (r * r).sum(axis=0),
+        "dd":       np.minimum(est["dd"], queda),
+        "primeiro": np.where(np.isnan(est["primeiro"]), primeiro, est["primeiro"]),
+        "ultimo":   np.where(ult_lin >= 0, X[ult_lin, cols], est["ultimo"]),
+        "pico":     pico[-1],
+        "ult20":    ult20,
+    }
+
+def _finalizar(est, nomes):
+    """Acumuladores → linhas da tabela (mesmas regras da tabela de análise e dos indicadores de risco)."""
+    n, nr = est["n"], est["nr"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var     = np.maximum(est["s2"] - est["s1"] ** 2 / nr, 0) / (nr - 1)
+        vol     = np.where(nr >= 2, np.sqrt(var) * 100, np.nan)
+        media_a = est["s1"] / nr * DIAS_ANO
+        vol_a   = vol / 100 * DIAS_ANO ** 0.5
+        sharpe  = np.where(vol_a > 0, (media_a - CDI_ANUAL) / vol_a, np.nan)
+        retorno = (est["ultimo"] - est["primeiro"]) / est["primeiro"] * 100
+        mm20    = est["ult20"].sum(axis=0) / 20
+        diff    = (est["ultimo"] - mm20) / mm20 * 100
+
+    res = []
+    for c in np.flatnonzero(n >= 2):
+        v = float(vol[c])
+        res.append({
+            "ticker":    nomes[c],
+            "retorno":   float(retorno[c]),
+            "vol":       v,
+            "risco":     _classificar_risco(v)[0] if not np.isnan(v) else "N/D",
+            "tendencia": _tendencia_por_diff(float(diff[c]))[0] if n[c] >= 20 else "N/D",
+            "sharpe":    float(sharpe[c]),
+            "drawdown":  float(est["dd"][c]) * 100,
+            "pregoes":   int(n[c]),
+        })
+    return res
+
+def _varrer_fatia(universo, j0, j1, desde, ponto, fim, estado=None, bloco=512):
+    """
+    Colunas [j0, j1): avança o estado (vazio se None) das linhas [desde, ponto)
+    e dali até `fim`, em blocos de colunas. Devolve (estado no ponto, estado final).
+    """
+    estado = estado or _estado_vazio(j1 - j0)
+    pontos, finais = [], []
+    for b0 in range(0, j1 - j0, bloco):
+        b1 = min(b0 + bloco, j1 - j0)
+        X  = np.asarray(universo._precos[desde:fim, j0 + b0:j0 + b1], dtype="float64")
+        e  = _acumular(_fatia(estado, b0, b1), X[:ponto - desde])
+        pontos.append(e)
+        finais.append(_acumular(e, X[ponto - desde:]))
+    return _juntar(pontos), _juntar(finais)
+
+def _trabalho_fatia(pasta, j0, j1, desde, ponto, fim, estado, bloco):
+    """Roda num processo do pool: abre o universo (só leitura, memmap) e varre a fatia."""
+    universo = UniversoPrecos(pasta, somente_leitura=True)
+    return _varrer_fatia(universo, j0, j1, desde, ponto, fim, estado, bloco)
+
+# ── Ponto de retomada ──
+def _arquivo_ponto(universo, inicio):
+    rotulo = str(np.datetime64(inicio, "D")) if inicio else "tudo"
+    return universo._caminho(f"varredura_{rotulo}.npz")
+
+def _ler_ponto(universo, inicio, i0):
+    """Estado salvo da varredura de `inicio` — None se não existe ou não vale mais."""
+    try:
+        with np.load(_arquivo_ponto(universo, inicio)) as z:
+            salvo = {k: z[k] for k in z.files}
+    except (OSError, ValueError):
+        return None
+    linha, k = int(salvo.pop("linha")), int(salvo.pop("n_tickers"))
+    seq, i0_salvo = int(salvo.pop("seq")), int(salvo.pop("i0"))
+    reescrita = universo.menor_reescrita(seq)
+    if (i0_salvo != i0 or k > len(universo.tickers) or linha > universo.n_datas
+            or (reescrita is not None and reescrita < linha)):
+        return None
+    return {"linha": linha, "n_tickers": k, "estado": salvo}
+
+def _gravar_ponto(universo, inicio, i0, linha, estado):
+    caminho = _arquivo_ponto(universo, inicio)
+    try:
+        with open(caminho + ".tmp", "wb") as f:
+            np.savez(f, linha=linha, n_tickers=estado["n"].shape[0], seq=universo.seq,
+                     i0=i0, **estado)
+        os.replace(caminho + ".tmp", caminho)
+    except OSError:
+        pass   # pasta só leitura: a próxima varredura começa do zero
+
+def varrer(universo, inicio=None, fim=None, bloco=512, processos=None, retomar=True):
+    """
+    Retorno, volatilidade, risco, tendência (MM20), Sharpe e drawdown de todos
+    os tickers em [inicio, fim] — as mesmas regras da tabela de análise e dos
+    indicadores de risco, vetorizadas sobre blocos de colunas.
+
+    Sem `fim` (janela até o último pregão) e com `retomar`, parte do ponto
+    salvo na varredura anterior: só os pregões novos e as colunas novas são
+    lidos. As colunas são repartidas em fatias de pelo menos `bloco` entre
+    `processos` workers; uma fatia só roda no próprio processo.
+    """
+    i0, i1 = universo._linhas(inicio, fim)
+    nomes  = list(universo.tickers)
+    if i1 <= i0 or not nomes:
+        return []
+    aberta = fim is None or i1 == universo.n_datas
+    ponto  = max(i0, i1 - MARGEM_PONTO)
+
+    salvo = _ler_ponto(universo, inicio, i0) if retomar and aberta else None
+    if salvo and salvo["linha"] > ponto:
+        salvo = None
+    # (j0, j1, desde, estado) — colunas já no ponto salvo retomam dele, o resto vem do início
+    k      = salvo["n_tickers"] if salvo else 0
+    grupos = [(0, k, salvo["linha"], salvo["estado"])] if k else []
+    if k < len(nomes):
+        grupos.append((k, len(nomes), i0, None))
+
+    workers = processos or os.cpu_count() or 1
+    tam     = max(bloco, -(-len(nomes) // workers))
+    fatias  = [(j, min(j + tam, g1), desde, est and _fatia(est, j - g0, min(j + tam, g1) - g0))
+               for g0, g1, desde, est in grupos for j in range(g0, g1, tam)]
+
+    if len(fatias) == 1 or workers == 1:
+        partes = [_varrer_fatia(universo, j0, j1, desde, ponto, i1, est, bloco)
+                  for j0, j1, desde, est in fatias]
+    else:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        # spawn: cada worker abre o memmap por conta própria — nenhuma matriz trafega
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(workers, len(fatias)), mp_context=ctx) as pool:
+            partes = list(pool.map(_trabalho_fatia,
+                                   *zip(*[(universo.pasta, j0, j1, desde, ponto, i1, est, bloco)
+                                          for j0, j1, desde, est in fatias])))
+
+    if retomar and aberta:
+        _gravar_ponto(universo, inicio, i0, ponto, _juntar([p for p, _ in partes]))
+    return _finalizar(_juntar([f for _, f in partes]), nomes)
+
+# ── Triagem ──
+ORDENAVEIS = {"retorno": True, "vol": False, "sharpe": True, "drawdown": True}   # True = maior primeiro
+
+def filtrar(linhas, risco=None, tendencia=None, ret_min=None, vol_max=None,
+            sharpe_min=None, dd_max=None, pregoes_min=2):
+    """
+    Filtros da triagem. risco/tendencia são listas de rótulos ("Baixo", "Alta"...);
+    dd_max é a maior queda aceita em % (positiva: 30 = drawdown até -30%).
+    """
+    risco     = {r.lower() for r in risco} if risco else None
+    tendencia = {t.lower() for t in tendencia} if tendencia else None
+    saida = []
+    for a in linhas:
+        if a["pregoes"] < pregoes_min:
+            continue
+        if risco and a["risco"].lower() not in risco:
+            continue
+        if tendencia and a["tendencia"].split()[-1].lower() not in tendencia:
+            continue
+        if ret_min is not None and not a["retorno"] >= ret_min:
+            continue
+        if vol_max is not None and not a["vol"] <= vol_max:
+            continue
+        if sharpe_min is not None and not a["sharpe"] >= sharpe_min:
+            continue
+        if dd_max is not None and not a["drawdown"] >= -dd_max:
+            continue
+        saida.append(a)
+    return saida
+
+def ordenar(linhas, chave="retorno"):
+    """Ordena pela métrica (NaN no fim); retorno/Sharpe/drawdown do maior para o menor, vol do menor."""
+    desc = ORDENAVEIS[chave]
+    return sorted(linhas, key=lambda a: (np.isnan(a[chave]), -a[chave] if desc else a[chave]))
+
+
+# ==============================
+# CLI
+# ==============================
+def _atualizar(universo, tickers, desde, ate, lote):
+    """Baixa em lotes de `lote` tickers e grava na matriz."""
+    import yfinance as yf
+    for i in range(0, len(tickers), lote):
+        parte = tickers[i:i + lote]
+        dados = yf.download(parte, start=desde, end=ate, auto_adjust=True, progress=False)
+        if dados is None or dados.empty:
+            continue
+        close = dados["Close"]
+        if hasattr(close, "to_frame"):
+            close = close.to_frame(name=parte[0])
+        descartadas = universo.gravar(close.dropna(how="all", axis=1))
+        print(f"  {min(i + lote, len(tickers))}/{len(tickers)} tickers"
+              + (f" ({descartadas} datas fora do índice)" if descartadas else ""))
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Matriz de preços do universo B3 (memory-map).")
+    parser.add_argument("--pasta", default=".universo_b3")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_at = sub.add_parser("atualizar", help="baixa/anexa fechamentos")
+    p_at.add_argument("lista", help="arquivo com um ticker por linha")
+    p_at.add_argument("--desde", default=None, help="AAAA-MM-DD (padrão: último pregão gravado)")
+    p_at.add_argument("--lote", type=int, default=100)
+    p_at.add_argument("--float64", action="store_true", help="matriz em float64 (padrão float32)")
+
+    p_va = sub.add_parser("varrer", help="tabela de análise / triagem de todo o universo")
+    p_va.add_argument("--inicio", default=None)
+    p_va.add_argument("--fim", default=None)
+    p_va.add_argument("--ordenar", choices=list(ORDENAVEIS), default="retorno")
+    p_va.add_argument("--top", type=int, default=30)
+    p_va.add_argument("--risco", nargs="+", help="Baixo Médio Alto")
+    p_va.add_argument("--tendencia", nargs="+", help="Alta Queda Lateral")
+    p_va.add_argument("--ret-min", type=float, help="retorno mínimo no período (%%)")
+    p_va.add_argument("--vol-max", type=float, help="volatilidade diária máxima (%%)")
+    p_va.add_argument("--sharpe-min", type=float)
+    p_va.add_argument("--dd-max", type=float, help="maior queda aceita (%%, ex: 30)")
+    p_va.add_argument("--pregoes-min", type=int, default=2)
+    p_va.add_argument("--processos", type=int, default=None,
+                      help="workers do pool (padrão: nº de CPUs)")
+    p_va.add_argument("--sem-retomar", action="store_true",
+                      help="ignora o ponto salvo e varre a janela inteira")
+    p_va.add_argument("--a-cada", type=float, default=None, metavar="SEG",
+                      help="repete a varredura quando o universo receber pregões novos")
+    args = parser.parse_args(argv)
+
+    if args.cmd == "atualizar":
+        with open(args.lista, encoding="utf-8") as f:
+            tickers = []
+            for linha in f:
+                raw = linha.strip().upper()
+                if raw and not raw.startswith("#"):
+                    tickers.append(raw if raw.endswith(".SA") else raw + ".SA")
+        universo = UniversoPrecos(args.pasta, dtype="float64" if args.float64 else "float32")
+        ultima   = universo.ultima_data()
+        desde    = args.desde or (str(ultima - np.timedelta64(5, "D")) if ultima is not None
+                                  else "2005-01-01")
+        ate      = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+        inicio   = datetime.now()
+        _atualizar(universo, tickers, desde, ate, args.lote)
+        print(f"✔ {len(universo.tickers)} tickers × {universo.n_datas} pregões "
+              f"({(datetime.now() - inicio).total_seconds():.1f}s)")
+    else:
+        seq = None
+        while True:
+            universo = UniversoPrecos(args.pasta, somente_leitura=True)
+            if universo.seq != seq:
+                seq = universo.seq
+                _imprimir_triagem(universo, args)
+            if args.a_cada is None:
+                break
+            time.sleep(args.a_cada)
+
+def _imprimir_triagem(universo, args):
+    inicio = datetime.now()
+    linhas = varrer(universo, args.inicio, args.fim, processos=args.processos,
+                    retomar=not args.sem_retomar)
+    achados = ordenar(filtrar(linhas, args.risco, args.tendencia, args.ret_min, args.vol_max,
+                              args.sharpe_min, args.dd_max, args.pregoes_min), args.ordenar)
+    print(f"{'Ativo':<12}{'Retorno %':>11}{'Volatil. %':>12}{'Sharpe':>8}{'DD %':>9}"
+          f"  {'Risco':<7}{'Tendência':<12}")
+    for a in achados[:args.top]:
+        print(f"{a['ticker'].replace('.SA', ''):<12}{a['retorno']:>+11.2f}{a['vol']:>12.2f}"
+              f"{a['sharpe']:>8.2f}{a['drawdown']:>9.2f}  {a['risco']:<7}{a['tendencia']:<12}")
+    print(f"{len(achados)} de {len(linhas)} ativos ({universo.ultima_data()}) "
+          f"em {(datetime.now() - inicio).total_seconds():.2f}s")
+
+if __name__ == "__main__":
+    main()
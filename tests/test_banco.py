@@ -0,0 +1,129 @@
+# Testes do investimentos.banco (migração dos JSONs, fila de gravação, leitores).
+
+from investimentos.banco import Banco
+
+
+CDBS = [{"nome": "CDB X", "valor": 1000.0, "pct_cdi": 110.0, "data": "01/01/2024"}]
+
+
+def test_importar_legado_so_uma_vez(tmp_path):
+    banco = Banco(str(tmp_path / "historico.db"))
+    try:
+        assert banco.importar_legado({}, CDBS) is True
+        # ex.: os JSONs não puderam ser renomeados e o app abriu de novo
+        assert banco.importar_legado({}, CDBS) is False
+        assert len(banco.carregar_cdbs()) == 1
+    finally:
+        banco.fechar()
+
+
+def test_migracao_nao_mexe_nos_jsons(tmp_path):
+    import json
+    from investimentos.servico import ServicoInvestimentos
+
+    carteira = {"PETR4.SA": {"qtd": 100.0, "preco_medio": 30.0, "data_compra": "01/01/2025"}}
+    (tmp_path / "carteira.json").write_text(json.dumps(carteira), encoding="utf-8")
+    (tmp_path / "carteira_cdbs.json").write_text(json.dumps(CDBS), encoding="utf-8")
+    antes = sorted(p.name for p in tmp_path.iterdir())
+
+    for _ in range(2):   # segunda abertura não importa de novo
+        servico = ServicoInvestimentos(str(tmp_path))
+        try:
+            assert set(servico.carteira) == {"PETR4.SA"}
+            assert len(servico.cdbs) == 1
+        finally:
+            servico.fechar()
+    assert [p for p in sorted(p.name for p in tmp_path.iterdir())
+            if not p.startswith("historico.db")] == antes
+    assert json.loads((tmp_path / "carteira_cdbs.json").read_text(encoding="utf-8")) == CDBS
+
+
+def test_fila_isola_mudanca_que_sempre_falha(tmp_path):
+    from investimentos.banco import FilaGravacao
+
+    banco = Banco(str(tmp_path / "historico.db"))
+    avisos = []
+    fila  = FilaGravacao(banco, janela=0.05, pausa_erro=0.01,
+                         ao_descartar=lambda chave, erro: avisos.append(chave))
+    try:
+        pos = {"qtd": 10.0, "preco_medio": 20.0, "data_compra": "01/01/2025"}
+        fila.enfileirar(("posicao", "PETR4.SA"), banco.salvar_posicao, "PETR4.SA", pos)
+        # qtd NULL viola o NOT NULL — falha em toda tentativa
+        fila.enfileirar(("posicao", "RUIM3.SA"), banco.salvar_posicao, "RUIM3.SA",
+                        dict(pos, qtd=None))
+        fila.enfileirar(("posicao", "VALE3.SA"), banco.salvar_posicao, "VALE3.SA", pos)
+        assert fila.esvaziar(timeout=10)
+
+        assert set(banco.carregar_carteira()) == {"PETR4.SA", "VALE3.SA"}
+        assert fila.descartes == 1
+        assert avisos == [("posicao", "RUIM3.SA")]
+
+        # a fila continua gravando depois do descarte
+        fila.enfileirar(("posicao", "ITUB4.SA"), banco.salvar_posicao, "ITUB4.SA", pos)
+        assert fila.esvaziar(timeout=10)
+        assert "ITUB4.SA" in banco.carregar_carteira()
+    finally:
+        fila.fechar()
+        banco.fechar()
+
+
+def test_fila_regrava_na_ordem_apos_erro_transitorio(tmp_path):
+    import sqlite3
+    import threading
+    from investimentos.banco import FilaGravacao
+
+    banco = Banco(str(tmp_path / "historico.db"))
+    fila  = FilaGravacao(banco, janela=0.01, pausa_erro=0.01)
+    pos   = {"qtd": 1.0, "preco_medio": 20.0, "data_compra": "01/01/2025"}
+    ordem, travado, liberar = [], threading.Event(), threading.Event()
+
+    def salvar_a(p):
+        # as 4 primeiras tentativas encontram o banco travado por outro processo
+        if len(ordem) < 4:
+            ordem.append("travado")
+            travado.set()
+            liberar.wait(5)
+            raise sqlite3.OperationalError("database is locked")
+        banco.salvar_posicao("A", p)
+        ordem.append("A1")
+
+    def importar(p):
+        banco.salvar_posicao("A", p)
+        ordem.append("IMP-A")
+
+    try:
+        fila.enfileirar(("posicao", "A"), salvar_a, pos)
+        assert travado.wait(5)
+        # chega enquanto a primeira gravação está rodando (e vai falhar)
+        fila.enfileirar(("importacao", 1), importar, dict(pos, qtd=2.0))
+        liberar.set()
+        assert fila.esvaziar(timeout=10)
+
+        assert ordem == ["travado"] * 4 + ["A1", "IMP-A"]
+        assert banco.carregar_carteira()["A"]["qtd"] == 2.0
+        assert fila.descartes == 0
+    finally:
+        fila.fechar()
+        banco.fechar()
+
+
+def test_threads_de_vida_curta_nao_acumulam_conexoes(tmp_path):
+    import threading
+    from investimentos.banco import MAX_LEITORES
+
+    banco = Banco(str(tmp_path / "historico.db"))
+    try:
+        banco.registrar_patrimonio(100.0, 110.0, 10.0, 10.0, 1, data="2025-01-02")
+        resultados = []
+        threads = [threading.Thread(target=lambda: resultados.append(
+                       banco.buscar_historico_periodo("2025-01-01", "2025-01-31")))
+                   for _ in range(50)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(resultados) == 50
+        assert all(len(pontos) == 1 for _, pontos in resultados)
+        assert len(banco._leitores) <= MAX_LEITORES
+    finally:
+        banco.fechar()
@@ -0,0 +1,55 @@
+# Testes do investimentos.cache_precos (cobertura, merge parcial, snapshot).
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+from investimentos.cache_precos import CachePrecos
+
+
+def _download(datas, colunas):
+    """Retorno no formato do yf.download com vários tickers."""
+    fech = pd.DataFrame(colunas, index=pd.DatetimeIndex(datas))
+    return pd.concat({"Close": fech}, axis=1)
+
+
+DATAS = ["2024-01-02", "2024-01-03", "2024-01-04"]
+
+
+def test_ticker_que_falhou_no_lote_volta_a_ser_baixado(tmp_path):
+    cache = CachePrecos(str(tmp_path))
+    dados = _download(DATAS, {"PETR4.SA": [1.0, 2.0, 3.0], "RUIM3.SA": [np.nan] * 3})
+    cache.incorporar(dados, ["PETR4.SA", "RUIM3.SA"], "2024-01-02", "2024-01-05")
+    assert cache.falta_desde(["PETR4.SA"], "2024-01-02", "2024-01-05") is None
+    assert cache.falta_desde(["RUIM3.SA"], "2024-01-02", "2024-01-05") == "2024-01-02"
+
+    # e continua faltando depois de reabrir o snapshot
+    cache.salvar()
+    cache = CachePrecos.carregar(str(tmp_path))
+    assert cache.falta_desde(["RUIM3.SA"], "2024-01-02", "2024-01-05") == "2024-01-02"
+
+    cache.incorporar(_download(DATAS, {"RUIM3.SA": [5.0, 6.0, 7.0]}),
+                     ["RUIM3.SA"], "2024-01-02", "2024-01-05")
+    assert cache.falta_desde(["RUIM3.SA"], "2024-01-02", "2024-01-05") is None
+    assert list(cache.dados(["RUIM3.SA"], "2024-01-02", "2024-01-05")["Close"]) == [5.0, 6.0, 7.0]
+
+
+def test_merge_so_nas_linhas_e_colunas_novas(tmp_path):
+    cache = CachePrecos(str(tmp_path))
+    cache.incorporar(_download(DATAS, {"A": [1.0, 2.0, 3.0], "B": [10.0, 20.0, 30.0]}),
+                     ["A", "B"], "2024-01-02", "2024-01-05")
+    cache.salvar()
+    cache = CachePrecos.carregar(str(tmp_path))   # matriz volta como memmap só leitura
+
+    # ponta com data nova, NaN de A não apaga, B corrigido
+    cache.incorporar(_download(["2024-01-04", "2024-01-05"],
+                               {"A": [np.nan, 4.0], "B": [31.0, 40.0]}),
+                     ["A", "B"], "2024-01-04", "2024-01-06")
+    # mesmas datas: alterado no lugar
+    cache.incorporar(_download(["2024-01-02"], {"A": [1.5]}), ["A"], "2024-01-02", "2024-01-03")
+
+    fech = cache.dados(["A", "B"], "2024-01-02", "2024-01-06")["Close"]
+    assert list(fech["A"]) == [1.5, 2.0, 3.0, 4.0]
+    assert list(fech["B"]) == [10.0, 20.0, 31.0, 40.0]
+    assert cache.falta_desde(["A", "B"], "2024-01-02", "2024-01-06") is None
@@ -0,0 +1,114 @@
+# Testes do investimentos.importador (números pt-BR, tipos de operação, mesclagem).
+
+import pytest
+
+from investimentos.importador import _numero, _tipo, _voto_decimal, importar_extratos, mesclar
+
+
+def _csv(tmp_path, texto, nome="extrato.csv"):
+    caminho = tmp_path / nome
+    caminho.write_text(texto, encoding="utf-8")
+    return str(caminho)
+
+
+def test_numero_milhar_e_decimal():
+    assert _numero("1.000") == 1000.0
+    assert _numero("12.345.678") == 12345678.0
+    assert _numero("1.234,56") == 1234.56
+    assert _numero("R$ 1.234,56") == 1234.56
+    assert _numero("10,5") == 10.5
+    assert _numero("-10") == -10.0
+    assert _numero("1234.56", ".") == 1234.56
+    assert _numero("1,234.56", ".") == 1234.56
+    assert _numero("12.345", ".") == 12.345
+
+
+def test_voto_decimal():
+    assert _voto_decimal("1.234,56") == ","
+    assert _voto_decimal("12.345.678") == ","
+    assert _voto_decimal("1,234.56") == "."
+    assert _voto_decimal("0.5") == "."
+    assert _voto_decimal("0.1250") == "."
+    for indeciso in ("1.000", "12.345", "0.125", "10"):
+        assert _voto_decimal(indeciso) is None
+
+
+def test_tipo_so_aceita_compra_e_venda_explicitas():
+    assert _tipo("Compra") == "C"
+    assert _tipo("C") == "C"
+    assert _tipo("Venda") == "V"
+    for outro in ("Cisão", "Cessão de direitos", "Crédito", "Transferência - Liquidação", ""):
+        assert _tipo(outro) is None
+
+
+def test_tipo_direcao_pela_coluna_entrada_saida():
+    assert _tipo("Transferência - Liquidação", "Credito") == "C"
+    assert _tipo("Transferência - Liquidação", "Débito") == "V"
+    assert _tipo("Rendimento", "Credito") is None
+    assert _tipo("Transferência - Liquidação", "") is None
+
+
+def test_quantidade_com_milhar_nao_zera_posicao(tmp_path):
+    caminho = _csv(tmp_path,
+                   "Data do Negócio;Tipo de Movimentação;Código de Negociação;Quantidade;Preço\n"
+                   "02/01/2025;Compra;PETR4;1.000;38,50\n"
+                   "10/01/2025;Venda;PETR4;10;40,00\n")
+    rel = importar_extratos([caminho])
+    assert rel["zeradas"] == []
+    assert rel["posicoes"]["PETR4.SA"]["qtd"] == 990
+    assert rel["posicoes"]["PETR4.SA"]["preco_medio"] == 38.5
+
+    carteira = {"PETR4.SA": {"qtd": 5, "preco_medio": 30.0, "data_compra": "01/01/2024"}}
+    _, remover = mesclar(carteira, rel)
+    assert remover == [] and carteira["PETR4.SA"]["qtd"] == 990
+
+
+def test_movimentacao_b3_usa_entrada_saida_e_ignora_eventos(tmp_path):
+    caminho = _csv(tmp_path,
+                   "Entrada/Saída;Data;Movimentação;Produto;Quantidade;Preço unitário\n"
+                   "Credito;02/01/2025;Transferência - Liquidação;VALE3 - VALE S.A.;200;60,00\n"
+                   "Debito;05/01/2025;Transferência - Liquidação;VALE3 - VALE S.A.;50;62,00\n"
+                   "Credito;06/01/2025;Cisão;VALE3 - VALE S.A.;10;1,00\n"
+                   "Credito;07/01/2025;;VALE3 - VALE S.A.;10;1,00\n")
+    rel = importar_extratos([caminho])
+    assert rel["posicoes"]["VALE3.SA"]["qtd"] == 150
+    assert rel["posicoes"]["VALE3.SA"]["preco_medio"] == 60.0
+    assert rel["ignoradas"] == 2
+
+
+def test_precos_com_ponto_decimal(tmp_path):
+    caminho = _csv(tmp_path,
+                   "Data,Tipo,Ticker,Quantidade,Preço\n"
+                   "2025-01-02,buy,ITUB4,100,1234.56\n")
+    rel = importar_extratos([caminho])
+    assert rel["posicoes"]["ITUB4.SA"]["preco_medio"] == 1234.56
+
+
+def test_arquivo_com_ponto_decimal_nao_multiplica_por_mil(tmp_path):
+    # "0.125" e "12.345" têm três casas — o "38.5" da mesma coluna decide
+    caminho = _csv(tmp_path,
+                   "Data,Tipo,Ticker,Quantidade,Preço\n"
+                   "2025-01-02,buy,BBAS3,0.125,12.345\n"
+                   "2025-01-03,buy,PETR4,100,38.5\n"
+                   "2025-01-04,buy,VALE3,10.5,60.125\n")
+    rel = importar_extratos([caminho])
+    assert rel["posicoes"]["BBAS3.SA"] == {"qtd": 0.125, "preco_medio": 12.345,
+                                           "data_compra": "02/01/2025"}
+    assert rel["posicoes"]["VALE3.SA"]["qtd"] == 10.5
+
+
+def test_coluna_sem_pista_usa_a_convencao_do_arquivo(tmp_path):
+    # quantidade só tem "1.000"; o preço com ponto decimal resolve o arquivo
+    caminho = _csv(tmp_path,
+                   "Data,Tipo,Ticker,Quantidade,Preço\n"
+                   "2025-01-02,buy,ITUB4,1.000,30.25\n")
+    rel = importar_extratos([caminho])
+    assert rel["posicoes"]["ITUB4.SA"]["qtd"] == 1.0
+
+
+def test_coluna_ambigua_e_recusada(tmp_path):
+    caminho = _csv(tmp_path,
+                   "Data,Tipo,Ticker,Quantidade,Preço\n"
+                   "2025-01-02,buy,ITUB4,1.000,30\n")
+    with pytest.raises(ValueError, match="quantidade|qtd"):
+        importar_extratos([caminho])
@@ -0,0 +1,69 @@
+# Testes do investimentos.memoria (CacheLRU com orçamento em bytes).
+
+from investimentos.memoria import CacheLRU, tamanho_bytes
+
+
+class _Bloco:
+    """Valor de tamanho conhecido (como um ndarray: atributo nbytes)."""
+
+    def __init__(self, nbytes):
+        self.nbytes = nbytes
+
+
+def test_tamanho_bytes():
+    assert tamanho_bytes(None) == 0
+    assert tamanho_bytes(_Bloco(100)) == 100
+    assert tamanho_bytes({"a": _Bloco(100), "b": [_Bloco(50)]}) > 150
+
+
+def test_despeja_o_menos_usado_ate_caber():
+    cache = CacheLRU(300)
+    for chave in "abc":
+        cache.guardar(chave, _Bloco(100))
+    assert cache.obter("a") is not None   # "a" vira o mais recente
+    cache.guardar("d", _Bloco(150))       # saem "b" e "c", nessa ordem
+    assert "b" not in cache and "c" not in cache
+    assert "a" in cache and "d" in cache
+    assert cache.bytes == 250 and cache.despejos == 2
+
+    # substituir a mesma chave não conta duas vezes
+    cache.guardar("d", _Bloco(50))
+    assert cache.bytes == 150 and len(cache) == 2
+
+
+def test_valor_maior_que_o_orcamento_nao_e_guardado():
+    cache = CacheLRU(100)
+    cache.guardar("a", _Bloco(60))
+    grande = _Bloco(101)
+    assert cache.guardar("a", grande) is grande   # devolve o valor mesmo assim
+    assert "a" not in cache                        # e a versão antiga não fica
+    assert cache.bytes == 0 and cache.despejos == 0
+
+
+def test_descartar_com_filtro():
+    cache = CacheLRU(10_000)
+    for chave in [("diario", "PETR4"), ("diario", "VALE3"), ("1h", "PETR4")]:
+        cache.guardar(chave, _Bloco(10))
+    cache.descartar(lambda c: c[0] == "diario")
+    assert len(cache) == 1 and ("1h", "PETR4") in cache and cache.bytes == 10
+    cache.descartar()
+    assert len(cache) == 0 and cache.bytes == 0
+
+
+def test_contadores_e_obter_ou_calcular():
+    cache = CacheLRU(1000)
+    chamadas = []
+
+    def _calcular():
+        chamadas.append(1)
+        return _Bloco(10)
+
+    v1 = cache.obter_ou_calcular("k", _calcular)
+    v2 = cache.obter_ou_calcular("k", _calcular)
+    assert v1 is v2 and len(chamadas) == 1
+    assert cache.obter("outra", "padrao") == "padrao"
+
+    e = cache.estatisticas()
+    assert (e["acertos"], e["faltas"], e["entradas"], e["bytes"]) == (1, 2, 1, 10)
+    assert e["taxa_acerto"] == 1 / 3
+    assert "1 acertos, 2 faltas (33%)" in cache.resumo()
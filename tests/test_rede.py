@@ -0,0 +1,77 @@
+# Testes do cliente HTTP do investimentos.rede contra um servidor local que
+# devolve respostas prontas (redirecionamento, corpo grande, status malformado).
+
+import socketserver
+import threading
+
+import pytest
+
+from investimentos import rede
+from investimentos.rede import ErroHTTP, NucleoIO, RespostaInvalida
+
+
+RESPOSTAS = {
+    "/ok":        b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok",
+    "/chunked":   b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n2\r\nok\r\n1\r\n!\r\n0\r\n\r\n",
+    "/redir":     b"HTTP/1.1 302 Found\r\nLocation: /ok\r\nContent-Length: 0\r\n\r\n",
+    "/loop":      b"HTTP/1.1 301 Moved\r\nLocation: /loop\r\nContent-Length: 0\r\n\r\n",
+    "/sem-local": b"HTTP/1.1 302 Found\r\nContent-Length: 0\r\n\r\n",
+    "/304":       b"HTTP/1.1 304 Not Modified\r\n\r\n",
+    "/404":       b"HTTP/1.1 404 Not Found\r\nContent-Length: 4\r\n\r\nnada",
+    "/grande":    b"HTTP/1.1 200 OK\r\nContent-Length: 999999999\r\n\r\nx",
+    "/ate-fechar": b"HTTP/1.1 200 OK\r\n\r\n" + b"x" * 5000,
+    "/status":    b"lixo\r\n\r\n",
+    "/cabecalho": b"HTTP/1.1 200 OK\r\nsem dois pontos\r\n\r\n",
+    "/tamanho":   b"HTTP/1.1 200 OK\r\nContent-Length: abc\r\n\r\n",
+}
+
+
+class _Canned(socketserver.StreamRequestHandler):
+    def handle(self):
+        alvo = self.rfile.readline().split()[1].decode()
+        while self.rfile.readline() not in (b"\r\n", b""):
+            pass
+        self.wfile.write(RESPOSTAS[alvo])
+
+
+@pytest.fixture(scope="module")
+def base():
+    servidor = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _Canned)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{servidor.server_address[1]}"
+    servidor.shutdown()
+    servidor.server_close()
+
+
+@pytest.fixture
+def io():
+    nucleo = NucleoIO()
+    yield nucleo
+    nucleo.fechar()
+
+
+def test_corpo_e_redirecionamento(io, base):
+    assert io.rodar(io.http(base + "/ok")) == b"ok"
+    assert io.rodar(io.http(base + "/chunked")) == b"ok!"
+    assert io.rodar(io.http(base + "/redir")) == b"ok"
+
+
+@pytest.mark.parametrize("alvo, codigo", [("/404", 404), ("/304", 304),
+                                          ("/sem-local", 302), ("/loop", 301)])
+def test_fora_de_2xx_vira_erro(io, base, alvo, codigo):
+    with pytest.raises(ErroHTTP) as e:
+        io.rodar(io.http(base + alvo))
+    assert e.value.codigo == codigo
+
+
+@pytest.mark.parametrize("alvo", ["/grande", "/status", "/cabecalho", "/tamanho"])
+def test_resposta_invalida(io, base, alvo):
+    with pytest.raises(RespostaInvalida):
+        io.rodar(io.http(base + alvo))
+
+
+def test_corpo_sem_tamanho_limitado(io, base, monkeypatch):
+    monkeypatch.setattr(rede, "MAX_CORPO", 1000)
+    with pytest.raises(RespostaInvalida):
+        io.rodar(io.http(base + "/ate-fechar"))
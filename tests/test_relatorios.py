@@ -0,0 +1,60 @@
+# Testes do investimentos.relatorios (pedidos, chave e poda do cache de gráficos).
+
+import os
+import time
+
+import pytest
+
+from investimentos.relatorios import _chave_grafico, _normalizar_pedido, _podar_cache
+
+
+def test_normalizar_pedido():
+    p = _normalizar_pedido({"nome": "Cliente A/B", "tickers": [" petr4", "VALE3.SA", "PETR4"],
+                            "start": "01/01/2025", "end": "2025-06-30",
+                            "formatos": ["PDF", "png"]}, 0)
+    assert p["tickers"] == ["PETR4.SA", "VALE3.SA"]
+    assert (p["start"], p["end"]) == ("2025-01-01", "2025-06-30")
+    assert p["arquivo"] == "Cliente_A_B" and p["formatos"] == ["pdf", "png"]
+    assert (p["modo"], p["mm"]) == ("preco", 0)
+
+    p = _normalizar_pedido({"carteira": {"ITUB4.SA": {}}, "end": "30/06/2025"}, 1)
+    assert p["nome"] == "relatorio_2" and p["tickers"] == ["ITUB4.SA"]
+    assert p["start"] == "2024-06-30"   # sem início: PERIODO_PADRAO_DIAS antes do fim
+
+
+@pytest.mark.parametrize("pedido", [
+    {"tickers": []},
+    {"tickers": ["PETR4"], "start": "31/12/2025", "end": "01/01/2025"},
+    {"tickers": ["PETR4"], "start": "2025-13-01"},
+])
+def test_pedido_invalido(pedido):
+    with pytest.raises(ValueError):
+        _normalizar_pedido(pedido, 0)
+
+
+def test_chave_grafico_depende_do_pedido_e_dos_precos():
+    pd = pytest.importorskip("pandas")
+    fech = pd.DataFrame({"PETR4.SA": [10.0, 11.0, float("nan")]},
+                        index=pd.to_datetime(["2025-01-02", "2025-01-03", "2025-01-06"]))
+    p = _normalizar_pedido({"tickers": ["PETR4"], "start": "2025-01-01", "end": "2025-01-10"}, 0)
+    chave = _chave_grafico(p, fech)
+    assert chave == _chave_grafico(dict(p, nome="outro nome"), fech.copy())
+    assert chave != _chave_grafico(dict(p, mm=20), fech)
+    assert chave != _chave_grafico(dict(p, modo="retorno"), fech)
+    mudou = fech.copy()
+    mudou.iloc[-1, 0] = 12.0   # pregão de hoje fechou
+    assert chave != _chave_grafico(p, mudou)
+
+
+def test_podar_cache_por_idade_e_tamanho(tmp_path):
+    agora = time.time()
+    for nome, dias in (("velho", 40), ("a", 3), ("b", 2), ("c", 1), ("usado", 50)):
+        caminho = tmp_path / f"{nome}.png"
+        caminho.write_bytes(b"x" * 100)
+        os.utime(caminho, (agora - dias * 86400,) * 2)
+
+    removidos = _podar_cache(str(tmp_path), max_bytes=250, idade_max_s=30 * 86400,
+                             manter=[str(tmp_path / "usado.png")])
+    # "velho" sai pela idade, "a" pelo tamanho; o do lote atual fica mesmo antigo
+    assert removidos == 2
+    assert sorted(os.listdir(tmp_path)) == ["b.png", "c.png", "usado.png"]
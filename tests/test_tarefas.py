@@ -0,0 +1,141 @@
+# Testes do investimentos.tarefas (Executor com agendar síncrono).
+
+import asyncio
+import threading
+import time
+
+from investimentos.rede import NucleoIO
+from investimentos.tarefas import (
+    Executor, PRIORIDADE_ALTA, PRIORIDADE_BAIXA, PRIORIDADE_NORMAL)
+
+
+def _esperar(condicao, timeout=5):
+    limite = time.monotonic() + timeout
+    while not condicao():
+        assert time.monotonic() < limite, "tempo esgotado"
+        time.sleep(0.01)
+
+
+def _bloquear(executor, painel="ocupado"):
+    """Ocupa um trabalhador até o Event devolvido ser setado."""
+    rodando, liberar = threading.Event(), threading.Event()
+    executor.submeter(painel, lambda: (rodando.set(), liberar.wait(5)))
+    assert rodando.wait(5)
+    return liberar
+
+
+def test_resultado_de_geracao_antiga_e_descartado():
+    executor = Executor(trabalhadores=2)
+    entregues = []
+    try:
+        rodando, liberar = threading.Event(), threading.Event()
+        antiga = executor.submeter("grafico", lambda: (rodando.set(), liberar.wait(5), "velho")[-1],
+                                   ao_concluir=entregues.append)
+        assert rodando.wait(5)
+        nova = executor.submeter("grafico", lambda: "novo", ao_concluir=entregues.append)
+        _esperar(lambda: entregues)
+        liberar.set()   # a antiga termina depois — o painel não pode voltar para ela
+        _esperar(lambda: antiga.estado == "cancelada")
+        assert entregues == ["novo"] and nova.estado == "ok"
+    finally:
+        executor.fechar()
+
+
+def test_tarefa_substituida_na_fila_nem_roda():
+    executor = Executor(trabalhadores=1)
+    rodou, entregues = [], []
+    try:
+        liberar = _bloquear(executor)
+        antiga = executor.submeter("grafico", lambda: rodou.append("antiga"))
+        executor.submeter("grafico", lambda: rodou.append("nova") or "nova",
+                          ao_concluir=entregues.append)
+        liberar.set()
+        _esperar(lambda: entregues)
+        assert rodou == ["nova"] and antiga.estado == "cancelada"
+
+        executor.cancelar("grafico")
+        assert not executor.ocupado("grafico")
+    finally:
+        executor.fechar()
+
+
+def test_mesma_chave_reaproveita_a_tarefa_ativa():
+    executor = Executor(trabalhadores=1)
+    entregues = []
+    try:
+        liberar = _bloquear(executor)
+        t1 = executor.submeter("zoom", lambda: "barras", chave=("1h", "jan"),
+                               ao_concluir=entregues.append)
+        assert executor.submeter("zoom", lambda: "outra", chave=("1h", "jan")) is t1
+        t2 = executor.submeter("zoom", lambda: "fev", chave=("1h", "fev"),
+                               ao_concluir=entregues.append)
+        assert t2 is not t1 and not t1.ativa()   # chave diferente substitui
+        liberar.set()
+        _esperar(lambda: entregues)
+        assert entregues == ["fev"]
+        # terminada, a mesma chave cria outra tarefa
+        assert executor.submeter("zoom", lambda: None, chave=("1h", "fev")) is not t2
+    finally:
+        executor.fechar()
+
+
+def test_fila_respeita_prioridade_e_ordem_de_chegada():
+    executor = Executor(trabalhadores=1)
+    ordem = []
+    try:
+        liberar = _bloquear(executor)
+        for painel, prioridade in (("refresh", PRIORIDADE_BAIXA), ("tabela", PRIORIDADE_NORMAL),
+                                   ("risco", PRIORIDADE_NORMAL), ("grafico", PRIORIDADE_ALTA)):
+            executor.submeter(painel, ordem.append, painel, prioridade=prioridade)
+        liberar.set()
+        _esperar(lambda: len(ordem) == 4)
+        assert ordem == ["grafico", "tabela", "risco", "refresh"]
+    finally:
+        executor.fechar()
+
+
+def test_sem_substituir_convivem_e_erro_vai_para_ao_erro():
+    executor = Executor(trabalhadores=2)
+    ok, erros = [], []
+
+    def _falha():
+        raise ValueError("ticker inválido")
+
+    try:
+        executor.submeter("verificar", lambda: "PETR4", substituir=False, ao_concluir=ok.append)
+        executor.submeter("verificar", _falha, substituir=False, ao_erro=erros.append)
+        _esperar(lambda: ok and erros)
+        assert ok == ["PETR4"] and str(erros[0]) == "ticker inválido"
+        assert executor.em_andamento() == []
+    finally:
+        executor.fechar()
+
+
+def test_substituir_tarefa_async_nao_trava():
+    nucleo    = NucleoIO()
+    executor  = Executor(trabalhadores=1, nucleo=nucleo)
+    resultados = []
+
+    async def _lenta(n):
+        await asyncio.sleep(10)
+        return n
+
+    async def _rapida(n):
+        return n
+
+    try:
+        executor.submeter("painel", _lenta, 1, ao_concluir=resultados.append)
+        # cancelar a anterior roda o callback do Future na hora — antes travava no lock
+        feito = threading.Event()
+        threading.Thread(target=lambda: (executor.submeter("painel", _rapida, 2,
+                                                           ao_concluir=resultados.append),
+                                         feito.set()), daemon=True).start()
+        assert feito.wait(5)
+        for _ in range(100):
+            if resultados:
+                break
+            time.sleep(0.02)
+        assert resultados == [2]
+    finally:
+        executor.fechar()
+        nucleo.fechar()
@@ -0,0 +1,100 @@
+# Testes da varredura do investimentos.universo: acumuladores incrementais e
+# ponto de retomada têm de dar o mesmo que recalcular tudo do zero.
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+from investimentos.analise import CDI_ANUAL
+from investimentos.universo import (
+    DIAS_ANO, MARGEM_PONTO, UniversoPrecos, _acumular, _estado_vazio, _finalizar,
+    _ler_ponto, varrer)
+
+CAMPOS = ("retorno", "vol", "sharpe", "drawdown", "tendencia", "risco", "pregoes")
+
+
+def _precos(n_datas, n_tickers, semente=7):
+    """Passeios aleatórios com buracos (NaN) e um ticker que só começa no meio."""
+    rng = np.random.default_rng(semente)
+    X   = 20 * np.exp(np.cumsum(rng.normal(0, 0.02, (n_datas, n_tickers)), axis=0))
+    X[rng.random(X.shape) < 0.05] = np.nan
+    X[: n_datas // 2, 0] = np.nan
+    return X
+
+
+def _comparar(a, b):
+    assert [l["ticker"] for l in a] == [l["ticker"] for l in b]
+    for la, lb in zip(a, b):
+        for campo in CAMPOS:
+            if isinstance(la[campo], float):
+                assert la[campo] == pytest.approx(lb[campo], rel=1e-9, abs=1e-12), (la["ticker"], campo)
+            else:
+                assert la[campo] == lb[campo], (la["ticker"], campo)
+
+
+def test_acumular_em_partes_igual_ao_total():
+    X     = _precos(90, 6)
+    nomes = [f"T{j}" for j in range(6)]
+    total = _finalizar(_acumular(_estado_vazio(6), X), nomes)
+    for cortes in ([1], [30], [45, 46, 80], [5, 10, 15, 20, 25, 89]):
+        est = _estado_vazio(6)
+        for a, b in zip([0] + cortes, cortes + [len(X)]):
+            est = _acumular(est, X[a:b])
+        _comparar(_finalizar(est, nomes), total)
+
+
+def test_acumular_bate_com_o_calculo_direto():
+    X   = _precos(60, 3)
+    res = {l["ticker"]: l for l in _finalizar(_acumular(_estado_vazio(3), X), ["A", "B", "C"])}
+    for j, t in enumerate("ABC"):
+        p = X[~np.isnan(X[:, j]), j]
+        r = p[1:] / p[:-1] - 1
+        vol = r.std(ddof=1) * 100
+        assert res[t]["pregoes"] == len(p)
+        assert res[t]["retorno"] == pytest.approx((p[-1] - p[0]) / p[0] * 100)
+        assert res[t]["vol"] == pytest.approx(vol)
+        assert res[t]["drawdown"] == pytest.approx((p / np.maximum.accumulate(p) - 1).min() * 100)
+        sharpe = (r.mean() * DIAS_ANO - CDI_ANUAL) / (vol / 100 * DIAS_ANO ** 0.5)
+        assert res[t]["sharpe"] == pytest.approx(sharpe)
+        diff = (p[-1] - p[-20:].mean()) / p[-20:].mean() * 100
+        assert res[t]["tendencia"].split()[-1] == (
+            "Alta" if diff > 1.5 else "Queda" if diff < -1.5 else "Lateral")
+
+
+def _gravar(universo, X, datas, tickers):
+    universo.gravar(pd.DataFrame(X, index=datas, columns=tickers))
+
+
+def test_varredura_retomada_igual_a_recalculo(tmp_path):
+    X       = _precos(150, 5)
+    datas   = pd.bdate_range("2024-01-01", periods=len(X))
+    tickers = [f"T{j}" for j in range(5)]
+    universo = UniversoPrecos(str(tmp_path), dtype="float64", cap_datas=256)
+
+    # primeira carga: só 4 tickers e 100 pregões — grava o ponto de retomada
+    _gravar(universo, X[:100, :4], datas[:100], tickers[:4])
+    _comparar(varrer(universo, processos=1),
+              varrer(universo, processos=1, retomar=False))
+
+    # pregões novos, a ponta regravada (dentro da margem) e um ticker novo:
+    # o ponto salvo cobre só parte das colunas
+    _gravar(universo, X[95:130], datas[95:130], tickers)
+    salvo = _ler_ponto(universo, None, 0)
+    assert salvo["linha"] == 100 - MARGEM_PONTO and salvo["n_tickers"] == 4
+    _comparar(varrer(universo, processos=1),
+              varrer(universo, processos=1, retomar=False))
+
+    # regravação antes do ponto salvo invalida a retomada
+    X[20, :] *= 1.5
+    _gravar(universo, X[20:21], datas[20:21], tickers)
+    assert _ler_ponto(universo, None, 0) is None
+    _gravar(universo, X[130:], datas[130:], tickers)
+    _comparar(varrer(universo, processos=1),
+              varrer(universo, processos=1, retomar=False))
+
+    # a janela com início também retoma
+    _comparar(varrer(universo, inicio="2024-02-01", processos=1),
+              varrer(universo, inicio="2024-02-01", processos=1, retomar=False))
+    _comparar(varrer(universo, inicio="2024-02-01", processos=1),
+              varrer(universo, inicio="2024-02-01", processos=1, retomar=False))